@@ -1,8 +1,20 @@
-from fastapi import FastAPI
+import os
+import sys
+from fastapi import FastAPI, HTTPException, Query, Request
 from pydantic import BaseModel
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# 欄式 JSON / Arrow IPC 請求解析（packages/shared）
+SHARED_PACKAGE_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'packages', 'shared', 'src'
+)
+if os.path.isdir(SHARED_PACKAGE_SRC) and SHARED_PACKAGE_SRC not in sys.path:
+    sys.path.append(SHARED_PACKAGE_SRC)
+from shared.frame_response import MEDIA_TYPES, FORMAT_ARROW, arrow_to_frame, columns_to_frame
+
+OHLC_COLUMNS = ["date", "open", "high", "low", "close", "volume"]
 
 class OHLCItem(BaseModel):
     date: str
@@ -58,6 +70,40 @@ def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) ->
 def analyze(body: AnalyzeIn):
     df = pd.DataFrame([x.model_dump() for x in body.ohlc])
     df["date"] = pd.to_datetime(df["date"])
+    return analyze_frame(body.stock_id, df)
+
+@app.post("/analyze/columnar")
+async def analyze_columnar(request: Request, stock_id: Optional[str] = Query(None)):
+    """
+    與 /analyze 相同，但 K 線以欄式傳入，不必逐筆建立模型：
+    - Content-Type: application/json  {"stock_id": "2330", "dates": [...], "open": [...], ...}
+    - Content-Type: application/vnd.apache.arrow.stream  Arrow IPC（ohlc-api /get_ohlc?format=arrow 的回應），stock_id 以查詢參數傳入
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type == MEDIA_TYPES[FORMAT_ARROW]:
+            df = arrow_to_frame(body)
+        else:
+            try:
+                import orjson
+                payload = orjson.loads(body)
+            except ImportError:
+                import json
+                payload = json.loads(body)
+            stock_id = payload.pop("stock_id", None) or stock_id
+            df = columns_to_frame(payload)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid OHLC payload: {e}")
+
+    missing = [column for column in OHLC_COLUMNS if column not in df.columns]
+    if not stock_id or missing or df.empty:
+        raise HTTPException(status_code=422, detail=f"stock_id and non-empty columns {OHLC_COLUMNS} are required (missing: {missing})")
+    df["date"] = pd.to_datetime(df["date"])
+    return analyze_frame(stock_id, df[OHLC_COLUMNS].astype({column: float for column in OHLC_COLUMNS[1:]}))
+
+def analyze_frame(stock_id: str, df: pd.DataFrame) -> Dict[str, Any]:
+    """以 date/open/high/low/close/volume 的 DataFrame 計算指標與訊號"""
     df = df.sort_values("date").reset_index(drop=True)
 
     # Indicators
@@ -115,7 +161,7 @@ def analyze(body: AnalyzeIn):
         signals.append({"type": "price_volume", "pattern": pv, "on": str(d1["date"].date())})
 
     out = {
-        "stock_id": body.stock_id,
+        "stock_id": stock_id,
         "as_of": str(df["date"].max().date()),
         "indicators": {
             "MA5": round(float(df["MA5"].iloc[-1]), 4) if not pd.isna(df["MA5"].iloc[-1]) else None,
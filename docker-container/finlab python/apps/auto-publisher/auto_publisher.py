@@ -8,7 +8,9 @@ import sys
 import asyncio
 import time
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Any, List, Optional
 from dotenv import load_dotenv
 
 # 載入環境變數
@@ -20,6 +22,7 @@ sys.path.append('/app/src')
 
 from src.clients.cmoney.cmoney_client import CMoneyClient, LoginCredentials
 from src.clients.google.sheets_client import GoogleSheetsClient
+from shared.sheets_append_writer import get_append_writer
 from src.services.assign.assignment_service import AssignmentService, TopicData
 from src.services.classification.topic_classifier import TopicClassifier
 from src.services.content.content_generator import ContentGenerator, ContentRequest
@@ -35,6 +38,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 發文間隔（秒）
+PUBLISH_INTERVAL_SECONDS = int(os.getenv('PUBLISH_INTERVAL_SECONDS', '120'))
+# 同時生成內容的 worker 數
+GENERATION_WORKERS = int(os.getenv('GENERATION_WORKERS', '2'))
+# 已生成、等待發文的貼文上限（生成最多領先發文這麼多篇）
+PUBLISH_QUEUE_SIZE = int(os.getenv('PUBLISH_QUEUE_SIZE', '2'))
+
+@dataclass
+class PreparedPost:
+    """已生成內容、等待發文的貼文"""
+    post_id: str
+    kol_serial: int
+    topic_id: str
+    title: str
+    content: str
+
 class AutoPublisher:
     """自動發文服務"""
     
@@ -141,163 +160,49 @@ class AutoPublisher:
             return []
     
     async def generate_and_publish_content(self, topics):
-        """生成內容並發文"""
+        """
+        生成內容並發文
+        
+        生成 worker 逐一為每個派發生成一次內容（寫入 Google Sheets 後放入有上限的佇列），
+        發文端依 PUBLISH_INTERVAL_SECONDS 間隔從佇列取出發文，等待間隔的同時下一篇已在生成
+        """
         try:
             # 載入 KOL 配置
             self.assignment_service.load_kol_profiles()
             active_kols = [kol for kol in self.assignment_service._kol_profiles if kol.enabled]
             logger.info(f"載入了 {len(active_kols)} 個活躍的 KOL")
             
-            published_count = 0
-            
+            # 分派 KOL
+            jobs: asyncio.Queue = asyncio.Queue()
             for topic_data in topics:
                 try:
-                    # 分派 KOL
                     assignments = self.assignment_service.assign_topics(
                         [topic_data], max_assignments_per_topic=2
                     )
-                    
                     logger.info(f"話題 {topic_data.title} 分派給 {len(assignments)} 個 KOL")
-                    
-                    # 準備發文記錄
-                    post_records = []
-                    
                     for assignment in assignments:
-                        try:
-                            # 找到對應的 KOL
-                            kol = next((k for k in self.assignment_service._kol_profiles 
-                                      if k.serial == assignment.kol_serial), None)
-                            if not kol:
-                                continue
-                            
-                            # 生成內容
-                            content_request = ContentRequest(
-                                topic_title=topic_data.title,
-                                topic_keywords=", ".join(
-                                    topic_data.persona_tags + 
-                                    topic_data.industry_tags + 
-                                    topic_data.event_tags
-                                ),
-                                kol_persona=kol.persona,
-                                kol_nickname=kol.nickname,
-                                content_type="investment",
-                                target_audience="active_traders"
-                            )
-                            
-                            generated = self.content_generator.generate_complete_content(content_request)
-                            
-                            if not generated.success:
-                                logger.error(f"內容生成失敗: {generated.error_message}")
-                                continue
-                            
-                            # 生成 post ID
-                            post_id = f"{topic_data.topic_id}-{assignment.kol_serial}"
-                            
-                            # 準備發文記錄
-                            record = [
-                                post_id,  # 貼文ID
-                                assignment.kol_serial,  # KOL Serial
-                                kol.nickname,  # KOL 暱稱
-                                kol.member_id,  # KOL ID
-                                kol.persona,  # Persona
-                                "investment",  # Content Type
-                                1,  # 已派發TopicIndex
-                                topic_data.topic_id,  # 已派發TopicID
-                                generated.title,  # 已派發TopicTitle (使用生成的標題)
-                                ", ".join(topic_data.persona_tags + topic_data.industry_tags + topic_data.event_tags + topic_data.stock_tags),  # 已派發TopicKeywords
-                                generated.content,  # 生成內容
-                                "ready_to_post",  # 發文狀態
-                                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),  # 上次排程時間
-                                "",  # 發文時間戳記
-                                "",  # 最近錯誤訊息
-                                "",  # 平台發文ID
-                                "",  # 平台發文URL
-                                topic_data.title  # 熱門話題標題
-                            ]
-                            
-                            post_records.append(record)
-                            
-                            logger.info(f"準備發文: {post_id} - {generated.title}")
-                            
-                        except Exception as e:
-                            logger.error(f"準備發文記錄異常 {assignment.kol_serial}: {e}")
-                            continue
-                    
-                    # 將準備發文的記錄寫入 Google Sheets
-                    if post_records:
-                        try:
-                            # 讀取現有數據以找到最後一行
-                            existing_data = self.sheets_client.read_sheet('貼文記錄表', 'A:R')
-                            start_row = len(existing_data) + 1
-                            
-                            # 寫入新記錄
-                            range_name = f'A{start_row}:R{start_row + len(post_records) - 1}'
-                            self.sheets_client.write_sheet('貼文記錄表', post_records, range_name)
-                            
-                            logger.info(f"✅ 成功寫入 {len(post_records)} 筆準備發文記錄到 Google Sheets")
-                            
-                        except Exception as e:
-                            logger.error(f"寫入 Google Sheets 失敗: {e}")
-                    
-                    # 現在開始發文
-                    for i, assignment in enumerate(assignments):
-                        try:
-                            # 找到對應的 KOL
-                            kol = next((k for k in self.assignment_service._kol_profiles 
-                                      if k.serial == assignment.kol_serial), None)
-                            if not kol:
-                                continue
-                            
-                            # 生成內容（重新生成以確保一致性）
-                            content_request = ContentRequest(
-                                topic_title=topic_data.title,
-                                topic_keywords=", ".join(
-                                    topic_data.persona_tags + 
-                                    topic_data.industry_tags + 
-                                    topic_data.event_tags
-                                ),
-                                kol_persona=kol.persona,
-                                kol_nickname=kol.nickname,
-                                content_type="investment",
-                                target_audience="active_traders"
-                            )
-                            
-                            generated = self.content_generator.generate_complete_content(content_request)
-                            
-                            if not generated.success:
-                                logger.error(f"內容生成失敗: {generated.error_message}")
-                                continue
-                            
-                            # 發文
-                            post_id = f"{topic_data.topic_id}-{assignment.kol_serial}"
-                            logger.info(f"發文: {post_id} - {generated.title}")
-                            
-                            result = await self.publish_service.publish_post(
-                                kol_serial=assignment.kol_serial,
-                                title=generated.title,
-                                content=generated.content,
-                                topic_id=topic_data.topic_id
-                            )
-                            
-                            if result and result.success:
-                                logger.info(f"✅ 發文成功: {post_id} -> {result.post_id}")
-                                published_count += 1
-                                
-                                # 間隔2分鐘
-                                if i < len(assignments) - 1:
-                                    logger.info("等待 2 分鐘...")
-                                    await asyncio.sleep(120)
-                            else:
-                                logger.error(f"❌ 發文失敗: {post_id}")
-                                
-                        except Exception as e:
-                            logger.error(f"發文異常 {assignment.kol_serial}: {e}")
-                            continue
-                            
+                        jobs.put_nowait((topic_data, assignment))
                 except Exception as e:
                     logger.error(f"處理話題異常 {topic_data.title}: {e}")
                     continue
             
+            if jobs.empty():
+                logger.info("發文完成，共發文 0 篇")
+                return 0
+            
+            ready: asyncio.Queue = asyncio.Queue(maxsize=PUBLISH_QUEUE_SIZE)
+            workers = [asyncio.create_task(self._generation_worker(jobs, ready))
+                       for _ in range(min(GENERATION_WORKERS, jobs.qsize()))]
+            publisher = asyncio.create_task(self._paced_publisher(ready))
+            
+            try:
+                await asyncio.gather(*workers)
+                await ready.put(None)  # 生成完畢
+                published_count = await publisher
+            finally:
+                for task in workers + [publisher]:
+                    task.cancel()
+            
             logger.info(f"發文完成，共發文 {published_count} 篇")
             return published_count
             
@@ -305,6 +210,130 @@ class AutoPublisher:
             logger.error(f"發文流程失敗: {e}")
             return 0
     
+    async def _generation_worker(self, jobs: asyncio.Queue, ready: asyncio.Queue):
+        """生成 worker：每個派發生成一次內容，寫入 Google Sheets 後交給發文端"""
+        while True:
+            try:
+                topic_data, assignment = jobs.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            
+            try:
+                post = await self._prepare_post(topic_data, assignment)
+                if post:
+                    await ready.put(post)
+            except Exception as e:
+                logger.error(f"準備發文記錄異常 {assignment.kol_serial}: {e}")
+    
+    async def _prepare_post(self, topic_data, assignment) -> Optional[PreparedPost]:
+        """為單一派發生成內容並寫入準備發文記錄"""
+        # 找到對應的 KOL
+        kol = self.assignment_service.get_kol_profile(assignment.kol_serial)
+        if not kol:
+            return None
+        
+        # 生成內容
+        content_request = ContentRequest(
+            topic_title=topic_data.title,
+            topic_keywords=", ".join(
+                topic_data.persona_tags + 
+                topic_data.industry_tags + 
+                topic_data.event_tags
+            ),
+            kol_persona=kol.persona,
+            kol_nickname=kol.nickname,
+            content_type="investment",
+            target_audience="active_traders"
+        )
+        
+        # OpenAI 呼叫為同步阻塞，在執行緒中執行以免卡住發文端
+        generated = await asyncio.to_thread(self.content_generator.generate_complete_content, content_request)
+        
+        if not generated.success:
+            logger.error(f"內容生成失敗: {generated.error_message}")
+            return None
+        
+        # 生成 post ID
+        post_id = f"{topic_data.topic_id}-{assignment.kol_serial}"
+        
+        # 準備發文記錄
+        record = [
+            post_id,  # 貼文ID
+            assignment.kol_serial,  # KOL Serial
+            kol.nickname,  # KOL 暱稱
+            kol.member_id,  # KOL ID
+            kol.persona,  # Persona
+            "investment",  # Content Type
+            1,  # 已派發TopicIndex
+            topic_data.topic_id,  # 已派發TopicID
+            generated.title,  # 已派發TopicTitle (使用生成的標題)
+            ", ".join(topic_data.persona_tags + topic_data.industry_tags + topic_data.event_tags + topic_data.stock_tags),  # 已派發TopicKeywords
+            generated.content,  # 生成內容
+            "ready_to_post",  # 發文狀態
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),  # 上次排程時間
+            "",  # 發文時間戳記
+            "",  # 最近錯誤訊息
+            "",  # 平台發文ID
+            "",  # 平台發文URL
+            topic_data.title  # 熱門話題標題
+        ]
+        
+        await self._write_post_records([record])
+        logger.info(f"準備發文: {post_id} - {generated.title}")
+        
+        return PreparedPost(
+            post_id=post_id,
+            kol_serial=assignment.kol_serial,
+            topic_id=topic_data.topic_id,
+            title=generated.title,
+            content=generated.content
+        )
+    
+    async def _write_post_records(self, post_records: List[List[Any]]):
+        """將準備發文的記錄追加到 Google Sheets（各生成 worker 的記錄合併為一次 API 呼叫）"""
+        try:
+            await get_append_writer(self.sheets_client, '貼文記錄表').append_rows_async(post_records)
+            logger.info(f"✅ 成功寫入 {len(post_records)} 筆準備發文記錄到 Google Sheets")
+            
+        except Exception as e:
+            logger.error(f"寫入 Google Sheets 失敗: {e}")
+    
+    async def _paced_publisher(self, ready: asyncio.Queue) -> int:
+        """發文端：依序取出已生成的貼文，成功發文之間間隔 PUBLISH_INTERVAL_SECONDS"""
+        published_count = 0
+        next_publish_at = 0.0
+        
+        while True:
+            post = await ready.get()
+            if post is None:
+                return published_count
+            
+            wait_seconds = next_publish_at - time.monotonic()
+            if wait_seconds > 0:
+                logger.info(f"等待 {wait_seconds:.0f} 秒...")
+                await asyncio.sleep(wait_seconds)
+            
+            try:
+                # 發文
+                logger.info(f"發文: {post.post_id} - {post.title}")
+                
+                result = await self.publish_service.publish_post(
+                    kol_serial=post.kol_serial,
+                    title=post.title,
+                    content=post.content,
+                    topic_id=post.topic_id
+                )
+                
+                if result and result.success:
+                    logger.info(f"✅ 發文成功: {post.post_id} -> {result.post_id}")
+                    published_count += 1
+                    next_publish_at = time.monotonic() + PUBLISH_INTERVAL_SECONDS
+                else:
+                    logger.error(f"❌ 發文失敗: {post.post_id}")
+                    
+            except Exception as e:
+                logger.error(f"發文異常 {post.kol_serial}: {e}")
+    
     async def run_cycle(self):
         """運行一個週期"""
         try:
@@ -75,6 +75,7 @@ class AssignmentService:
         self.sheets_client = sheets_client
         self.use_double_colon = use_double_colon
         self._kol_profiles: List[KOLProfile] = []
+        self._kol_by_serial: Dict[int, KOLProfile] = {}
         self._existing_tasks: Set[str] = set()
         self._topic_classifier = create_topic_classifier()  # 初始化話題分類器
     
@@ -230,12 +231,17 @@ class AssignmentService:
                     continue
             
             self._kol_profiles = kol_profiles
+            self._kol_by_serial = {profile.serial: profile for profile in kol_profiles}
             logger.info(f"成功載入 {len(kol_profiles)} 個 KOL 配置")
             
         except Exception as e:
             logger.error(f"載入 KOL 配置失敗: {e}")
             raise
     
+    def get_kol_profile(self, serial: int) -> Optional[KOLProfile]:
+        """依序號取得已載入的 KOL 配置"""
+        return self._kol_by_serial.get(serial)
+    
     def load_existing_tasks(self) -> None:
         """從 Google Sheets 載入現有任務"""
         try:
@@ -369,7 +375,7 @@ class AssignmentService:
                 # 如果話題有指定 assign_to，優先使用
                 if topic.assign_to:
                     # 查找指定的 KOL
-                    assigned_kol = next((kol for kol in self._kol_profiles if kol.serial == topic.assign_to), None)
+                    assigned_kol = self.get_kol_profile(topic.assign_to)
                     if assigned_kol and assigned_kol.enabled:
                         # 將指定的 KOL 放到最前面
                         selected_kols = [{'kol': assigned_kol, 'score': 999.0}] + \
@@ -503,8 +503,7 @@ class UnifiedFlowManager:
         
         for assignment in assignments:
             try:
-                kol = next((k for k in self.assignment_service._kol_profiles 
-                           if k.serial == assignment.kol_serial), None)
+                kol = self.assignment_service.get_kol_profile(assignment.kol_serial)
                 if not kol:
                     continue
                 
@@ -571,8 +570,7 @@ class UnifiedFlowManager:
         """記錄到 Google Sheets"""
         try:
             for assignment in assignments:
-                kol = next((k for k in self.assignment_service._kol_profiles 
-                           if k.serial == assignment.kol_serial), None)
+                kol = self.assignment_service.get_kol_profile(assignment.kol_serial)
                 if not kol:
                     continue
                 
@@ -3,7 +3,7 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
@@ -488,7 +488,7 @@ async def _get_sector_stocks_from_finlab(
         return []
 
 # 依賴注入函數
-def get_posting_service(db: Session = Depends(get_db)) -> PostingService:
+def get_posting_service(db: AsyncSession = Depends(get_db)) -> PostingService:
     """獲取發文管理服務實例"""
     return PostingService(db)
 
@@ -535,8 +535,8 @@ async def create_session(
             status='active'
         )
         service.db.add(session)
-        service.db.commit()
-        service.db.refresh(session)
+        await service.db.commit()
+        await service.db.refresh(session)
         
         return {
             "id": session.id,
@@ -4,9 +4,8 @@
 
 import logging
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
 
 from ..models.posting_models import (
     PostingTemplate, PostingSession, Post, KOLProfile, 
@@ -27,7 +26,7 @@ logger = logging.getLogger(__name__)
 class PostingService:
     """發文管理服務"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
     # ==================== 模板管理 ====================
@@ -37,8 +36,8 @@ class PostingService:
         try:
             template = PostingTemplate(**template_data.dict())
             self.db.add(template)
-            self.db.commit()
-            self.db.refresh(template)
+            await self.db.commit()
+            await self.db.refresh(template)
             return PostingTemplateResponse.from_orm(template)
         except Exception as e:
             logger.error(f"創建發文模板失敗: {e}")
@@ -47,7 +46,7 @@ class PostingService:
     async def get_templates(self) -> List[PostingTemplateResponse]:
         """獲取發文模板列表"""
         try:
-            templates = self.db.query(PostingTemplate).all()
+            templates = (await self.db.scalars(select(PostingTemplate))).all()
             return [PostingTemplateResponse.from_orm(template) for template in templates]
         except Exception as e:
             logger.error(f"獲取發文模板列表失敗: {e}")
@@ -60,8 +59,8 @@ class PostingService:
         try:
             session = PostingSession(**session_data.dict())
             self.db.add(session)
-            self.db.commit()
-            self.db.refresh(session)
+            await self.db.commit()
+            await self.db.refresh(session)
             return PostingSessionResponse.from_orm(session)
         except Exception as e:
             logger.error(f"創建發文會話失敗: {e}")
@@ -70,7 +69,7 @@ class PostingService:
     async def get_sessions(self) -> List[PostingSessionResponse]:
         """獲取發文會話列表"""
         try:
-            sessions = self.db.query(PostingSession).all()
+            sessions = (await self.db.scalars(select(PostingSession))).all()
             return [PostingSessionResponse.from_orm(session) for session in sessions]
         except Exception as e:
             logger.error(f"獲取發文會話列表失敗: {e}")
@@ -83,8 +82,8 @@ class PostingService:
         try:
             post = Post(**post_data)
             self.db.add(post)
-            self.db.commit()
-            self.db.refresh(post)
+            await self.db.commit()
+            await self.db.refresh(post)
             return {
                 'id': post.id,
                 'session_id': post.session_id,
@@ -106,73 +105,57 @@ class PostingService:
     async def get_posts(self, skip: int = 0, limit: int = 100, status: Optional[str] = None) -> dict:
         """獲取發文列表 - 包含 posts 和 post_records 表"""
         try:
-            # 查詢 posts 表
-            posts_query = self.db.query(Post)
+            # 兩張表在資料庫端合併、排序、分頁，一次查詢取回當頁資料與總數
+            params = {"skip": skip, "limit": limit}
+            status_filter = ""
             if status:
-                posts_query = posts_query.filter(Post.status == status)
+                params["status"] = status
+                status_filter = "WHERE status = :status"
             
-            posts = posts_query.all()
-            logger.info(f"Found {len(posts)} posts from posts table")
+            result = await self.db.execute(text(f"""
+                WITH all_posts AS (
+                    SELECT CAST(id AS TEXT) AS id, title, content, status, kol_serial, kol_nickname,
+                           created_at, updated_at, 'posts' AS source
+                    FROM posts
+                    {status_filter}
+                    UNION ALL
+                    SELECT post_id AS id, title, content, status, kol_serial, kol_nickname,
+                           created_at, updated_at, 'post_records' AS source
+                    FROM post_records
+                    {status_filter}
+                )
+                SELECT *, COUNT(*) OVER () AS total_count
+                FROM all_posts
+                ORDER BY created_at DESC NULLS LAST
+                LIMIT :limit OFFSET :skip
+            """), params)
+            rows = result.fetchall()
             
-            # 查詢 post_records 表（手動發文）
-            post_records_query = """
-                SELECT 
-                    post_id as id,
-                    created_at,
-                    updated_at,
-                    kol_serial,
-                    kol_nickname,
-                    title,
-                    content,
-                    status
-                FROM post_records
-            """
-            
-            if status:
-                post_records_query += f" WHERE status = '{status}'"
-            
-            post_records_query += " ORDER BY created_at DESC"
-            
-            post_records_result = self.db.execute(text(post_records_query)).fetchall()
-            logger.info(f"Found {len(post_records_result)} posts from post_records table")
-            
-            # 合併結果
-            all_posts = []
-            
-            # 添加 posts 表的記錄
-            for post in posts:
-                all_posts.append({
-                    "id": post.id,
-                    "title": post.title,
-                    "content": post.content,
-                    "status": post.status,
-                    "kol_serial": post.kol_serial,
-                    "kol_nickname": post.kol_nickname,
-                    "created_at": post.created_at,
-                    "updated_at": post.updated_at,
-                    "source": "posts"
-                })
-            
-            # 添加 post_records 表的記錄
-            for record in post_records_result:
-                all_posts.append({
-                    "id": record.id,
-                    "title": record.title,
-                    "content": record.content,
-                    "status": record.status,
-                    "kol_serial": record.kol_serial,
-                    "kol_nickname": record.kol_nickname,
-                    "created_at": record.created_at,
-                    "updated_at": record.updated_at,
-                    "source": "post_records"
-                })
-            
-            # 按創建時間排序
-            all_posts.sort(key=lambda x: x["created_at"] or datetime.min, reverse=True)
+            paginated_posts = [
+                {
+                    "id": int(row.id) if row.source == "posts" else row.id,
+                    "title": row.title,
+                    "content": row.content,
+                    "status": row.status,
+                    "kol_serial": row.kol_serial,
+                    "kol_nickname": row.kol_nickname,
+                    "created_at": row.created_at,
+                    "updated_at": row.updated_at,
+                    "source": row.source
+                }
+                for row in rows
+            ]
             
-            # 應用分頁
-            total = len(all_posts)
-            paginated_posts = all_posts[skip:skip + limit]
+            if rows:
+                total = rows[0].total_count
+            elif skip:
+                # 超出最後一頁時沒有資料列可帶出總數，單獨計數
+                total = (await self.db.execute(text(f"""
+                    SELECT (SELECT COUNT(*) FROM posts {status_filter})
+                         + (SELECT COUNT(*) FROM post_records {status_filter})
+                """), {k: v for k, v in params.items() if k == "status"})).scalar_one()
+            else:
+                total = 0
             
             logger.info(f"Total posts: {total}, returning {len(paginated_posts)} posts")
             
@@ -189,13 +172,13 @@ class PostingService:
     async def update_post_status(self, post_id: int, status: str) -> PostResponse:
         """更新發文狀態"""
         try:
-            post = self.db.query(Post).filter(Post.id == post_id).first()
+            post = await self.db.get(Post, post_id)
             if not post:
                 raise ValueError(f"發文 {post_id} 不存在")
             
             post.status = status
-            self.db.commit()
-            self.db.refresh(post)
+            await self.db.commit()
+            await self.db.refresh(post)
             return PostResponse.from_orm(post)
         except Exception as e:
             logger.error(f"更新發文狀態失敗: {e}")
@@ -204,14 +187,14 @@ class PostingService:
     async def update_post_content(self, post_id: int, title: str, content: str) -> PostResponse:
         """更新發文內容"""
         try:
-            post = self.db.query(Post).filter(Post.id == post_id).first()
+            post = await self.db.get(Post, post_id)
             if not post:
                 raise ValueError(f"發文 {post_id} 不存在")
             
             post.title = title
             post.content = content
-            self.db.commit()
-            self.db.refresh(post)
+            await self.db.commit()
+            await self.db.refresh(post)
             return PostResponse.from_orm(post)
         except Exception as e:
             logger.error(f"更新發文內容失敗: {e}")
@@ -224,8 +207,8 @@ class PostingService:
         try:
             template = PromptTemplate(**template_data.dict())
             self.db.add(template)
-            self.db.commit()
-            self.db.refresh(template)
+            await self.db.commit()
+            await self.db.refresh(template)
             return PromptTemplateResponse.from_orm(template)
         except Exception as e:
             logger.error(f"創建Prompt模板失敗: {e}")
@@ -234,12 +217,12 @@ class PostingService:
     async def get_prompt_templates(self, data_source: Optional[str] = None) -> List[PromptTemplateResponse]:
         """獲取Prompt模板列表"""
         try:
-            query = self.db.query(PromptTemplate)
+            query = select(PromptTemplate)
             
             if data_source:
-                query = query.filter(PromptTemplate.data_source == data_source)
+                query = query.where(PromptTemplate.data_source == data_source)
             
-            templates = query.all()
+            templates = (await self.db.scalars(query)).all()
             return [PromptTemplateResponse.from_orm(template) for template in templates]
         except Exception as e:
             logger.error(f"獲取Prompt模板列表失敗: {e}")
@@ -251,7 +234,7 @@ class PostingService:
         """獲取KOL列表"""
         try:
             # 使用原生SQL查詢KOL數據
-            result = self.db.execute(text("""
+            result = await self.db.execute(text("""
                 SELECT id, serial, nickname, name, persona, style_preference,
                        expertise_areas, activity_level, question_ratio,
                        content_length, interaction_starters, is_active,
@@ -289,7 +272,7 @@ class PostingService:
     async def get_kol_by_serial(self, serial: int) -> dict:
         """根據序號獲取KOL信息"""
         try:
-            result = self.db.execute(text("""
+            result = await self.db.execute(text("""
                 SELECT id, serial, nickname, name, persona, style_preference,
                        expertise_areas, activity_level, question_ratio,
                        content_length, interaction_starters, is_active
@@ -321,7 +304,7 @@ class PostingService:
     async def get_session(self, session_id: int) -> dict:
         """獲取會話信息"""
         try:
-            session = self.db.query(PostingSession).filter(PostingSession.id == session_id).first()
+            session = await self.db.get(PostingSession, session_id)
             if session:
                 return {
                     'id': session.id,
@@ -343,10 +326,11 @@ class PostingService:
     async def get_post_analytics(self, post_id: int, days: int = 7) -> List[PostingAnalyticsResponse]:
         """獲取發文分析數據"""
         try:
-            analytics = self.db.query(PostingAnalytics)\
-                .filter(PostingAnalytics.post_id == post_id)\
-                .limit(days)\
-                .all()
+            analytics = (await self.db.scalars(
+                select(PostingAnalytics)
+                .where(PostingAnalytics.post_id == post_id)
+                .limit(days)
+            )).all()
             
             return [PostingAnalyticsResponse.from_orm(analytics_item) for analytics_item in analytics]
         except Exception as e:
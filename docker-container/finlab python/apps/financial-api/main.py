@@ -2,11 +2,18 @@ import os
 import json
 import pandas as pd
 import finlab
-from finlab import data
+from finlab import data as finlab_data
 from datetime import datetime, timedelta
 from fastapi import FastAPI, Query, HTTPException
 from typing import Dict, Any, Optional
 
+# 共用 FinLab 資料快取（packages/shared，依資料集與最新交易日快取；FINLAB_CACHE_BACKEND=lru/arrow/redis）
+try:
+    from shared.finlab_cache import CachedFinlabData
+    data = CachedFinlabData(finlab_data)
+except ImportError:
+    data = finlab_data
+
 app = FastAPI()
 
 @app.on_event("startup")
@@ -1,13 +1,21 @@
 import os
+import sys
 import json
 import pandas as pd
 import finlab
-from finlab import data
 from datetime import datetime, timedelta
 from fastapi import FastAPI, Query, HTTPException
 from typing import Dict, Any, Optional
 import random
 
+# 營收與財報資料集由共用的 FundamentalsDataset 持有（packages/shared；依公布時程更新版本，每版只載入一次）
+SHARED_PACKAGE_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'packages', 'shared', 'src'
+)
+if os.path.isdir(SHARED_PACKAGE_SRC) and SHARED_PACKAGE_SRC not in sys.path:
+    sys.path.append(SHARED_PACKAGE_SRC)
+from shared.revenue_dataset import get_fundamentals_dataset
+
 app = FastAPI()
 
 @app.on_event("startup")
@@ -145,28 +153,27 @@ def generate_kol_insights(stock_id: str, revenue_data: Dict, financial_data: Dic
 def analyze_fundamental(stock_id: str):
     """基本面分析"""
     try:
-        # 取得營收資料
-        current_revenue = data.get('monthly_revenue:當月營收')
-        yoy_change = data.get('monthly_revenue:去年同月增減(%)')
-        
-        # 取得財務資料
-        operating_profit = data.get('fundamental_features:營業利益')
-        operating_margin = data.get('fundamental_features:營業利益率')
-        roe = data.get('fundamental_features:ROE稅後')
+        dataset = get_fundamentals_dataset()
+        revenue = dataset.revenue()
+        fundamentals = dataset.fundamentals()
         
-        if stock_id not in current_revenue.columns:
+        if stock_id not in revenue:
             raise HTTPException(status_code=404, detail=f"Stock ID {stock_id} not found")
         
         # 取得最新資料
-        latest_revenue = current_revenue[stock_id].dropna().iloc[-1]
-        latest_yoy = yoy_change[stock_id].dropna().iloc[-1]
-        latest_profit = operating_profit[stock_id].dropna().iloc[-1]
-        latest_margin = operating_margin[stock_id].dropna().iloc[-1]
-        latest_roe = roe[stock_id].dropna().iloc[-1]
+        latest = revenue.latest([stock_id], ['current_revenue', 'yoy_change'])[stock_id]
+        latest.update(fundamentals.latest([stock_id]).get(stock_id, {}))
+        if any(latest.get(field) is None for field in ('current_revenue', 'yoy_change', 'operating_profit', 'operating_margin', 'roe')):
+            raise HTTPException(status_code=404, detail=f"Stock ID {stock_id} has no fundamental data")
+        latest_revenue = latest['current_revenue']
+        latest_yoy = latest['yoy_change']
+        latest_profit = latest['operating_profit']
+        latest_margin = latest['operating_margin']
+        latest_roe = latest['roe']
         
-        # 計算趨勢
-        recent_revenues = current_revenue[stock_id].dropna().tail(3)
-        trend = "上升" if recent_revenues.iloc[-1] > recent_revenues.iloc[0] else "下降"
+        # 計算趨勢（最新一期在前）
+        recent_revenues = [row['current_revenue'] for row in revenue.tail([stock_id], 3, ['current_revenue'])[stock_id]]
+        trend = "上升" if recent_revenues[0] > recent_revenues[-1] else "下降"
         
         # 分析財務健康度
         financial_health = "優秀" if latest_margin > 15 else "良好" if latest_margin > 10 else "一般"
@@ -254,6 +261,11 @@ def generate_kol_content(stock_id: str, content_style: str = Query("analysis", d
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/dataset/stats")
+def get_dataset_stats():
+    """營收與財報資料集版本與載入統計"""
+    return get_fundamentals_dataset().get_stats()
+
 @app.get("/health")
 def health_check():
     """健康檢查"""
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+/top_performers 排行計算效能比較：逐檔迴圈（舊） vs 全市場一次計算（compute_revenue_rankings）
+
+    python benchmark_rankings.py                 # 模擬全市場（上市櫃約 1,900 檔 × 15 年）
+    python benchmark_rankings.py --finlab        # 使用 FinLab 實際月營收（需 FINLAB_API_KEY）
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from main import compute_revenue_rankings
+
+METRICS = ["去年同月增減(%)", "上月比較增減(%)", "當月營收"]
+
+
+def synthetic_universe(stocks: int = 1900, months: int = 180, seed: int = 7):
+    """模擬月營收矩陣（含停止公開、新上市造成的缺值）"""
+    rng = np.random.default_rng(seed)
+    index = pd.period_range(end=pd.Timestamp.today(), periods=months, freq='M').to_timestamp()
+    columns = [str(1101 + i) for i in range(stocks)]
+    base = rng.lognormal(mean=11, sigma=1.5, size=stocks)
+    growth = rng.normal(1.005, 0.12, size=(months, stocks)).cumprod(axis=0)
+    revenue = pd.DataFrame(np.round(base * growth), index=index, columns=columns)
+    listed_after = rng.integers(0, months, size=stocks) * (rng.random(stocks) < 0.2)
+    for position, first in enumerate(listed_after):
+        revenue.iloc[:first, position] = np.nan
+    cumulative = revenue.groupby(revenue.index.year).cumsum()
+    return revenue, cumulative
+
+
+def finlab_universe():
+    import finlab
+    from finlab import data
+
+    finlab.login(os.environ["FINLAB_API_KEY"])
+    return data.get('monthly_revenue:當月營收'), data.get('monthly_revenue:當月累計營收')
+
+
+def reported_frames(revenue: pd.DataFrame):
+    """舊版直接讀 FinLab 的增減率資料集；這裡以相同定義產生，讓兩版結果可比對"""
+    return {
+        "當月營收": revenue,
+        "上月比較增減(%)": revenue.pct_change(1, fill_method=None) * 100,
+        "去年同月增減(%)": revenue.pct_change(12, fill_method=None) * 100,
+    }
+
+
+def legacy_top_performers(frames, metric: str, top_n: int):
+    """改版前 /top_performers 的排行邏輯（每檔股票各查一次當月營收）"""
+    data_df = frames[metric]
+    latest_date = data_df.index[-1]
+    latest_data = data_df.loc[latest_date]
+
+    performers = []
+    for stock_id, value in latest_data.items():
+        if pd.notna(value):
+            performers.append({
+                "stock_id": stock_id,
+                "月份": latest_date.strftime("%Y-%m") if hasattr(latest_date, 'strftime') else str(latest_date),
+                metric: round(float(value), 2) if metric != "當月營收" else int(value),
+                "當月營收": int(frames["當月營收"].loc[latest_date, stock_id]) if pd.notna(frames["當月營收"].loc[latest_date, stock_id]) else None
+            })
+
+    reverse = metric != "當月營收"
+    performers.sort(key=lambda x: x[metric], reverse=reverse)
+    return performers[:top_n]
+
+
+def vectorized_top_performers(revenue, cumulative, metric: str, top_n: int):
+    rankings = compute_revenue_rankings(revenue, cumulative)
+    values = rankings[metric].dropna()
+    top = values.nsmallest(top_n) if metric == "當月營收" else values.nlargest(top_n)
+    return list(top.index)
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--finlab', action='store_true', help="使用 FinLab 實際月營收")
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    revenue, cumulative = finlab_universe() if args.finlab else synthetic_universe()
+    frames = reported_frames(revenue)
+    print(f"月營收矩陣: {revenue.shape[0]} 個月 × {revenue.shape[1]} 檔")
+
+    for metric in METRICS:
+        legacy, legacy_ms = timed(lambda: legacy_top_performers(frames, metric, args.top_n), args.repeat)
+        vectorized, vectorized_ms = timed(
+            lambda: vectorized_top_performers(revenue, cumulative, metric, args.top_n), args.repeat
+        )
+        same = [row["stock_id"] for row in legacy] == vectorized
+        print(f"{metric:<12} 逐檔 {legacy_ms:8.1f} ms | 全市場 {vectorized_ms:6.1f} ms | "
+              f"{legacy_ms / vectorized_ms:6.1f}x | 排行一致: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
 import os
 import json
 import pandas as pd
+import numpy as np
 import finlab
-from finlab import data
+from finlab import data as finlab_data
 from datetime import datetime, timedelta
 from fastapi import FastAPI, Query, HTTPException
 from typing import Optional, Dict, Any, List
 
+# 共用 FinLab 資料快取（packages/shared，依資料集與最新交易日快取；FINLAB_CACHE_BACKEND=lru/arrow/redis）
+try:
+    from shared.finlab_cache import CachedFinlabData
+    data = CachedFinlabData(finlab_data)
+except ImportError:
+    data = finlab_data
+
 app = FastAPI(
     title="月營收 API",
     description="提供個股月營收相關數據的API服務",
@@ -159,6 +167,32 @@ def get_revenue_summary(stock_id: str):
         print(f"❌ 獲取股票 {stock_id} 營收摘要失敗: {e}")
         raise HTTPException(status_code=500, detail=f"獲取營收摘要失敗: {str(e)}")
 
+# 排行指標 -> 計算方式（全市場一次計算，見 compute_revenue_rankings）
+RANKING_METRICS = ["去年同月增減(%)", "上月比較增減(%)", "前期比較增減(%)", "當月營收"]
+
+def compute_revenue_rankings(revenue: pd.DataFrame, cumulative_revenue: pd.DataFrame) -> pd.DataFrame:
+    """
+    最新月份全市場營收指標：對整個營收矩陣一次計算，不逐檔迴圈
+
+    Args:
+        revenue: monthly_revenue:當月營收（列=月份，欄=股票）
+        cumulative_revenue: monthly_revenue:當月累計營收
+
+    Returns:
+        index=股票代號，欄位=當月營收 / 上月比較增減(%) / 去年同月增減(%) / 前期比較增減(%)
+    """
+    # 年增只需要最近 13 個月
+    recent = revenue.iloc[-13:]
+    recent_cumulative = cumulative_revenue.iloc[-13:]
+    rankings = pd.DataFrame({
+        "當月營收": recent.iloc[-1],
+        "上月比較增減(%)": recent.pct_change(1, fill_method=None).iloc[-1] * 100,
+        "去年同月增減(%)": recent.pct_change(12, fill_method=None).iloc[-1] * 100,
+        "前期比較增減(%)": recent_cumulative.pct_change(12, fill_method=None).iloc[-1] * 100,
+    })
+    # 前期營收為 0 時的增減率無意義
+    return rankings.replace([np.inf, -np.inf], np.nan)
+
 @app.get("/top_performers")
 def get_top_performers(
     metric: str = Query("去年同月增減(%)", description="排序指標"),
@@ -167,45 +201,39 @@ def get_top_performers(
     """獲取營收表現最佳的股票"""
     try:
         # 檢查指標是否支援
-        supported_metrics = ["去年同月增減(%)", "上月比較增減(%)", "當月營收"]
-        if metric not in supported_metrics:
-            raise HTTPException(status_code=400, detail=f"不支援的指標: {metric}，支援的指標: {supported_metrics}")
-        
-        # 獲取對應的數據
-        if metric == "去年同月增減(%)":
-            data_df = data.get('monthly_revenue:去年同月增減(%)')
-        elif metric == "上月比較增減(%)":
-            data_df = data.get('monthly_revenue:上月比較增減(%)')
-        elif metric == "當月營收":
-            data_df = data.get('monthly_revenue:當月營收')
+        if metric not in RANKING_METRICS:
+            raise HTTPException(status_code=400, detail=f"不支援的指標: {metric}，支援的指標: {RANKING_METRICS}")
+        
+        revenue = data.get('monthly_revenue:當月營收')
+        cumulative_revenue = data.get('monthly_revenue:當月累計營收')
         
         # 轉換索引
         try:
-            data_df = data_df.index_str_to_date()
+            revenue = revenue.index_str_to_date()
         except Exception as e:
             print(f"⚠️  索引轉換失敗: {e}")
         
-        # 獲取最新數據
-        latest_date = data_df.index[-1]
-        latest_data = data_df.loc[latest_date]
-        
-        # 排序並獲取前N名
-        performers = []
-        for stock_id, value in latest_data.items():
-            if pd.notna(value):
-                performers.append({
-                    "stock_id": stock_id,
-                    "月份": latest_date.strftime("%Y-%m") if hasattr(latest_date, 'strftime') else str(latest_date),
-                    metric: round(float(value), 2) if metric != "當月營收" else int(value),
-                    "當月營收": int(data.get('monthly_revenue:當月營收').loc[latest_date, stock_id]) if pd.notna(data.get('monthly_revenue:當月營收').loc[latest_date, stock_id]) else None
-                })
-        
-        # 根據指標排序
-        reverse = metric != "當月營收"  # 增減率降序，營收升序
-        performers.sort(key=lambda x: x[metric], reverse=reverse)
-        
-        return performers[:top_n]
+        latest_date = revenue.index[-1]
+        month = latest_date.strftime("%Y-%m") if hasattr(latest_date, 'strftime') else str(latest_date)
+        rankings = compute_revenue_rankings(revenue, cumulative_revenue)
+        
+        # 增減率取最高，營收維持原本的升序排列
+        values = rankings[metric].dropna()
+        top = values.nsmallest(top_n) if metric == "當月營收" else values.nlargest(top_n)
+        
+        latest_revenue = rankings["當月營收"]
+        return [
+            {
+                "stock_id": stock_id,
+                "月份": month,
+                metric: int(value) if metric == "當月營收" else round(float(value), 2),
+                "當月營收": int(latest_revenue[stock_id]) if pd.notna(latest_revenue[stock_id]) else None
+            }
+            for stock_id, value in top.items()
+        ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ 獲取營收表現最佳股票失敗: {e}")
         raise HTTPException(status_code=500, detail=f"獲取排行榜失敗: {str(e)}")
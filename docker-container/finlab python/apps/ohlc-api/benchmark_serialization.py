@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+/get_ohlc 回應序列化效能比較：逐筆 dict（records，現行預設） vs 欄式 JSON（columns，orjson） vs Arrow IPC（arrow）
+
+    python benchmark_serialization.py                    # 一年日 K（約 245 根）× 200 檔
+    python benchmark_serialization.py --stocks 1000 --days 500
+
+records 的計時包含 FastAPI 回傳 list 時的 jsonable_encoder + JSONResponse 序列化（已安裝 fastapi 時）。
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SHARED_PACKAGE_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'packages', 'shared', 'src'
+)
+if os.path.isdir(SHARED_PACKAGE_SRC) and SHARED_PACKAGE_SRC not in sys.path:
+    sys.path.append(SHARED_PACKAGE_SRC)
+
+from shared.frame_response import encode_frame, frame_to_records  # noqa: E402
+
+
+def synthetic_ohlcv(days: int, seed: int) -> pd.DataFrame:
+    """模擬單檔股票的日 K（與 /get_ohlc 相同欄位）"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    spread = np.abs(rng.normal(0, 0.01, days)) * close
+    return pd.DataFrame({
+        'date': pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days),
+        'open': np.round(close + rng.normal(0, 0.005, days) * close, 2),
+        'high': np.round(close + spread, 2),
+        'low': np.round(close - spread, 2),
+        'close': np.round(close, 2),
+        'volume': rng.integers(1_000, 50_000_000, days).astype(float),
+    })
+
+
+def encode_records(df: pd.DataFrame) -> bytes:
+    """現行行為：to_json -> list of dict -> FastAPI jsonable_encoder -> JSONResponse"""
+    records = frame_to_records(df)
+    try:
+        from fastapi.encoders import jsonable_encoder
+        records = jsonable_encoder(records)
+    except ImportError:
+        pass
+    return json.dumps(records, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode('utf-8')
+
+
+def measure(encode, frames, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payloads = [encode(df) for df in frames]
+        timings.append(time.perf_counter() - start)
+    size = sum(len(payload) for payload in payloads)
+    gzipped = sum(len(gzip.compress(payload, 6)) for payload in payloads)
+    return statistics.median(timings), size, gzipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stocks', type=int, default=200)
+    parser.add_argument('--days', type=int, default=245)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    frames = [synthetic_ohlcv(args.days, seed) for seed in range(args.stocks)]
+    formats = {
+        'records': encode_records,
+        'columns': lambda df: encode_frame(df, 'columns'),
+    }
+    try:
+        import pyarrow  # noqa: F401
+        formats['arrow'] = lambda df: encode_frame(df, 'arrow')
+    except ImportError:
+        print("（未安裝 pyarrow，略過 arrow）")
+
+    print(f"{args.stocks} 檔 × {args.days} 根日 K，每種格式取 {args.repeat} 次中位數\n")
+    print(f"{'格式':<10}{'編碼時間':>12}{'每檔':>10}{'大小':>12}{'gzip 後':>12}")
+    baseline = None
+    for name, encode in formats.items():
+        elapsed, size, gzipped = measure(encode, frames, args.repeat)
+        baseline = baseline or (elapsed, size)
+        print(f"{name:<10}{elapsed * 1000:>10.1f}ms{elapsed / args.stocks * 1e6:>8.0f}µs"
+              f"{size / 1e6:>10.2f}MB{gzipped / 1e6:>10.2f}MB"
+              f"   ({baseline[0] / elapsed:.1f}x 速度, {size / baseline[1]:.0%} 大小)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,32 @@
 import os
+import sys
 import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
 import pandas as pd
 import finlab
-from finlab import data
+from finlab import data as finlab_data
 from datetime import datetime, timedelta
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 import numpy as np
 
+# 共用套件 packages/shared（映像內已安裝；從 repo 直接執行時加入 sys.path）
+SHARED_PACKAGE_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'packages', 'shared', 'src'
+)
+if os.path.isdir(SHARED_PACKAGE_SRC) and SHARED_PACKAGE_SRC not in sys.path:
+    sys.path.append(SHARED_PACKAGE_SRC)
+
+# 共用 FinLab 資料快取（packages/shared，依資料集與最新交易日快取；FINLAB_CACHE_BACKEND=lru/arrow/redis）
+from shared.finlab_cache import CachedFinlabData
+data = CachedFinlabData(finlab_data)
+
+# 大量 K 線回應的格式協商（records / columns / arrow；packages/shared）
+from shared.frame_response import negotiate_format, frame_response
+
 app = FastAPI()
 
 # 添加 CORS 中間件
@@ -31,6 +50,8 @@ def startup_event():
     if api_key:
         finlab.login(api_key)
         print("✅ FinLab API 登入成功")
+        # 背景預建市場快照，首個 /trending-stocks/info 請求不必等待
+        threading.Thread(target=refresh_market_snapshot, daemon=True).start()
     else:
         print("❌ 未找到 FINLAB_API_KEY 環境變數")
 
@@ -52,7 +73,16 @@ def ensure_finlab_login():
         raise e
 
 @app.get("/get_ohlc")
-def get_ohlc(stock_id: str = Query(..., description="股票代號，例如 '2330'")):
+def get_ohlc(
+    request: Request,
+    stock_id: str = Query(..., description="股票代號，例如 '2330'"),
+    format: Optional[str] = Query(None, description="回應格式：records（預設）、columns（欄式 JSON）、arrow（Arrow IPC）；也可用 Accept 標頭指定")
+):
+    try:
+        fmt = negotiate_format(request.headers.get('accept'), format)
+    except ValueError as e:
+        return {"error": str(e)}
+
     try:
         open_df = data.get('price:開盤價')
         high_df = data.get('price:最高價')
@@ -77,7 +107,7 @@ def get_ohlc(stock_id: str = Query(..., description="股票代號，例如 '2330
         one_year_ago = datetime.today() - timedelta(days=365)
         ohlcv_df = ohlcv_df[ohlcv_df['date'] >= one_year_ago]
 
-        return json.loads(ohlcv_df.to_json(orient="records", date_format="iso"))
+        return frame_response(ohlcv_df, fmt)
     except Exception as e:
         return {"error": str(e)}
 
@@ -347,145 +377,192 @@ def calculate_trading_stats(stock_id: str, latest_date: datetime, close_df: pd.D
         print(f"計算 {stock_id} 交易統計失敗: {e}")
         return {"up_days": 0, "five_day_change": 0.0}
 
+# ==================== 市場快照 ====================
+# 每檔一列（收盤、漲跌、成交量、產業、名稱）＋ TAIEX，資料更新後整份重建再一次替換，
+# /trending-stocks/info 與 /twa00/* 只做字典查詢
+
+TAIEX_COLUMN = "TAIEX"  # 台股加權指數
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    version: str
+    date: str
+    previous_date: Optional[str]
+    stocks: Dict[str, Dict[str, Any]]
+    taiex: Optional[Dict[str, Any]]
+    taiex_history: List[Dict[str, Any]]
+    built_at: str
+
+
+market_snapshot: Optional[MarketSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def current_data_version() -> str:
+    """FinLab 資料版本：共用快取的最新交易日（無共用快取時每小時重建一次）"""
+    cache = getattr(data, 'cache', None)
+    if cache is not None:
+        return cache.trading_date().isoformat()
+    return datetime.now().strftime('%Y-%m-%d %H')
+
+
+def _optional_float(value) -> Optional[float]:
+    return None if pd.isna(value) else float(value)
+
+
+def build_market_snapshot(version: str) -> MarketSnapshot:
+    """從 FinLab 收盤價 / 成交股數 / 收盤指數一次計算全市場快照"""
+    ensure_finlab_login()
+    close_df = data.get('price:收盤價').sort_index()
+    volume_df = data.get('price:成交股數')
+    market_closing = data.get('market_transaction_info:收盤指數')
+
+    latest_date = close_df.index[-1]
+    previous_date = close_df.index[-2] if len(close_df.index) > 1 else None
+    latest_close = close_df.iloc[-1]
+    previous_close = close_df.iloc[-2] if previous_date is not None else pd.Series(np.nan, index=close_df.columns)
+    latest_volume = (
+        volume_df.loc[latest_date].reindex(close_df.columns)
+        if volume_df is not None and latest_date in volume_df.index
+        else pd.Series(np.nan, index=close_df.columns)
+    )
+    change = latest_close - previous_close
+    change_percent = (change / previous_close.where(previous_close != 0)) * 100
+
+    frame = pd.DataFrame({
+        'close': latest_close,
+        'previous_close': previous_close,
+        'change': change,
+        'change_percent': change_percent,
+        'volume': latest_volume,
+    })
+    stocks = {}
+    for stock_code, row in zip(frame.index, frame.itertuples(index=False)):
+        stocks[str(stock_code)] = {
+            'name': get_stock_name(str(stock_code)),
+            'industry': get_stock_industry(str(stock_code)),
+            'close': _optional_float(row.close),
+            'previous_close': _optional_float(row.previous_close),
+            'change': _optional_float(row.change),
+            'change_percent': _optional_float(row.change_percent),
+            'volume': _optional_float(row.volume),
+        }
+
+    taiex = None
+    taiex_history = []
+    if market_closing is not None and TAIEX_COLUMN in market_closing.columns and len(market_closing.index) > 0:
+        taiex_series = market_closing[TAIEX_COLUMN].sort_index().dropna()
+        taiex_change = (taiex_series.pct_change(fill_method=None) * 100).fillna(0.0)
+        taiex_history = [
+            {"date": day.strftime('%Y-%m-%d'), "closing_index": float(value), "change_percent": float(pct)}
+            for day, value, pct in zip(taiex_series.index, taiex_series.values, taiex_change.values)
+        ]
+        if taiex_history:
+            taiex = taiex_history[-1]
+
+    return MarketSnapshot(
+        version=version,
+        date=latest_date.strftime('%Y-%m-%d'),
+        previous_date=previous_date.strftime('%Y-%m-%d') if previous_date is not None else None,
+        stocks=stocks,
+        taiex=taiex,
+        taiex_history=taiex_history,
+        built_at=datetime.now().isoformat(),
+    )
+
+
+def get_market_snapshot() -> MarketSnapshot:
+    """
+    取得目前的市場快照；資料版本變更時由一個請求重建後整份替換，
+    其他請求在重建期間繼續使用舊快照（沒有舊快照時才等待）
+    """
+    global market_snapshot
+    version = current_data_version()
+    snapshot = market_snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    if not _snapshot_lock.acquire(blocking=snapshot is None):
+        return snapshot
+    try:
+        if market_snapshot is not None and market_snapshot.version == version:
+            return market_snapshot
+        start = time.perf_counter()
+        rebuilt = build_market_snapshot(version)
+        market_snapshot = rebuilt
+        print(f"✅ 市場快照已更新: {rebuilt.date}（{len(rebuilt.stocks)} 檔，{time.perf_counter() - start:.1f}s）")
+        return rebuilt
+    except Exception as e:
+        if snapshot is None:
+            raise
+        print(f"⚠️  市場快照更新失敗，沿用 {snapshot.date} 的快照: {e}")
+        return snapshot
+    finally:
+        _snapshot_lock.release()
+
+
+def refresh_market_snapshot():
+    try:
+        get_market_snapshot()
+    except Exception as e:
+        print(f"❌ 市場快照建立失敗: {e}")
+
+
 @app.get("/trending-stocks/info")
 def get_trending_stocks_info(stock_codes: str = Query(..., description="股票代號列表，用逗號分隔")):
     """獲取熱門話題股票的完整資訊"""
     try:
-        ensure_finlab_login()
-        
         # 解析股票代號
         stock_list = [code.strip() for code in stock_codes.split(',') if code.strip()]
         if not stock_list:
             return {"error": "請提供有效的股票代號"}
         
+        snapshot = get_market_snapshot()
         result = []
         
         for stock_code in stock_list:
-            try:
-                # 獲取基本資訊
+            # 特殊處理 TWA00
+            if stock_code == "TWA00":
                 stock_info = {
                     "code": stock_code,
                     "name": get_stock_name(stock_code),
                     "industry": get_stock_industry(stock_code),
-                    "type": "index_future" if stock_code == "TWA00" else "stock"
+                    "type": "index_future"
                 }
-                
-                # 特殊處理 TWA00
-                if stock_code == "TWA00":
-                    # 直接獲取台指期市場資訊
-                    try:
-                        market_transaction_info = data.get('market_transaction_info:收盤指數')
-                        if market_transaction_info is not None and len(market_transaction_info.index) > 0:
-                            latest_date = market_transaction_info.index[-1]
-                            taiex_closing = market_transaction_info.loc[latest_date, "TAIEX"] if "TAIEX" in market_transaction_info.columns else 0
-                            
-                            # 計算漲跌百分比
-                            taiex_change = 0.0
-                            if len(market_transaction_info.index) > 1:
-                                previous_date = market_transaction_info.index[-2]
-                                taiex_previous = market_transaction_info.loc[previous_date, "TAIEX"] if "TAIEX" in market_transaction_info.columns else 0
-                                if taiex_previous > 0:
-                                    taiex_change = ((taiex_closing - taiex_previous) / taiex_previous) * 100
-                            
-                            stock_info.update({
-                                "market_data": {
-                                    "closing_index": float(taiex_closing),
-                                    "change_percent": float(taiex_change)
-                                },
-                                "date": latest_date.strftime('%Y-%m-%d'),
-                                "data_source": "market_transaction_info"
-                            })
-                    except Exception as e:
-                        print(f"獲取 TWA00 資訊失敗: {e}")
-                        stock_info["error"] = f"獲取 TWA00 資訊失敗: {str(e)}"
+                if snapshot.taiex:
+                    stock_info.update({
+                        "market_data": {
+                            "closing_index": snapshot.taiex["closing_index"],
+                            "change_percent": snapshot.taiex["change_percent"]
+                        },
+                        "date": snapshot.taiex["date"],
+                        "data_source": "market_transaction_info"
+                    })
                 else:
-                    # 獲取個股資訊
-                    try:
-                        # 嘗試不同的數據格式
-                        price_data = None
-                        volume_data = None
-                        
-                        # 嘗試獲取價格數據
-                        for price_key in [f'{stock_code}:收盤價', f'{stock_code}:close', 'close']:
-                            try:
-                                price_data = data.get(price_key)
-                                if price_data is not None and len(price_data.index) > 0:
-                                    break
-                            except:
-                                continue
-                        
-                        if price_data is not None and len(price_data.index) > 0:
-                            latest_date = price_data.index[-1]
-                            
-                            # 嘗試不同的列名
-                            closing_price = 0
-                            for col in price_data.columns:
-                                if stock_code in str(col) or col == stock_code:
-                                    closing_price = price_data.loc[latest_date, col]
-                                    break
-                            
-                            if closing_price == 0 and len(price_data.columns) > 0:
-                                # 如果找不到對應列，使用第一列
-                                closing_price = price_data.iloc[-1, 0]
-                            
-                            # 計算漲跌百分比
-                            change_percent = 0.0
-                            if len(price_data.index) > 1:
-                                prev_date = price_data.index[-2]
-                                prev_price = 0
-                                for col in price_data.columns:
-                                    if stock_code in str(col) or col == stock_code:
-                                        prev_price = price_data.loc[prev_date, col]
-                                        break
-                                if prev_price == 0 and len(price_data.columns) > 0:
-                                    prev_price = price_data.iloc[-2, 0]
-                                
-                                if prev_price > 0:
-                                    change_percent = ((closing_price - prev_price) / prev_price) * 100
-                            
-                            stock_info.update({
-                                "market_data": {
-                                    "closing_price": float(closing_price),
-                                    "change_percent": float(change_percent),
-                                    "date": latest_date.strftime('%Y-%m-%d')
-                                }
-                            })
-                        
-                        # 嘗試獲取成交量數據
-                        for volume_key in [f'{stock_code}:成交量', f'{stock_code}:volume', 'volume']:
-                            try:
-                                volume_data = data.get(volume_key)
-                                if volume_data is not None and len(volume_data.index) > 0:
-                                    break
-                            except:
-                                continue
-                        
-                        if volume_data is not None and len(volume_data.index) > 0:
-                            latest_date = volume_data.index[-1]
-                            volume = 0
-                            for col in volume_data.columns:
-                                if stock_code in str(col) or col == stock_code:
-                                    volume = volume_data.loc[latest_date, col]
-                                    break
-                            if volume == 0 and len(volume_data.columns) > 0:
-                                volume = volume_data.iloc[-1, 0]
-                            stock_info["volume"] = float(volume)
-                        
-                        # 如果沒有獲取到詳細數據，至少提供基本資訊
-                        if "market_data" not in stock_info:
-                            stock_info["note"] = "僅提供基本資訊，詳細市場數據暫不可用"
-                            
-                    except Exception as e:
-                        print(f"獲取股票 {stock_code} 詳細資訊失敗: {e}")
-                        stock_info["note"] = f"詳細資訊獲取失敗: {str(e)}"
-                
+                    stock_info["error"] = "獲取 TWA00 資訊失敗: 無台股加權指數數據"
                 result.append(stock_info)
-                
-            except Exception as e:
-                result.append({
-                    "code": stock_code,
-                    "error": f"獲取股票資訊失敗: {str(e)}"
-                })
+                continue
+            
+            row = snapshot.stocks.get(stock_code)
+            stock_info = {
+                "code": stock_code,
+                "name": row["name"] if row else get_stock_name(stock_code),
+                "industry": row["industry"] if row else get_stock_industry(stock_code),
+                "type": "stock"
+            }
+            if row and row["close"] is not None:
+                stock_info["market_data"] = {
+                    "closing_price": row["close"],
+                    "change": row["change"] or 0.0,
+                    "change_percent": row["change_percent"] or 0.0,
+                    "date": snapshot.date
+                }
+                stock_info["volume"] = row["volume"] or 0.0
+            else:
+                # 如果沒有獲取到詳細數據，至少提供基本資訊
+                stock_info["note"] = "僅提供基本資訊，詳細市場數據暫不可用"
+            result.append(stock_info)
         
         return {
             "stocks": result,
@@ -500,60 +577,23 @@ def get_trending_stocks_info(stock_codes: str = Query(..., description="股票
 def get_twa00_market_info():
     """獲取台指期市場資訊 (TWA00)"""
     try:
-        # 確保 FinLab 已登入
-        ensure_finlab_login()
-        
-        # 獲取 TAIEX 市場交易資訊（主要數據源）
-        market_transaction_info = data.get('market_transaction_info:收盤指數')
-        
-        # 檢查數據是否可用
-        if market_transaction_info is None or len(market_transaction_info.index) == 0:
+        taiex = get_market_snapshot().taiex
+        if taiex is None:
             return {"error": "無法獲取台指期價格數據"}
         
-        # 獲取最新數據
-        latest_date = market_transaction_info.index[-1]
-        
-        # 安全地獲取數據
-        def safe_get_value(df, date, column_name):
-            if df is None or len(df.index) == 0:
-                return 0
-            try:
-                if column_name in df.columns:
-                    value = df.loc[date, column_name]
-                    if pd.isna(value):
-                        return 0
-                    return value
-                return 0
-            except:
-                return 0
-        
-        # 使用正確的 TAIEX 列名
-        taiex_column = "TAIEX"  # 台股加權指數
-        taiex_closing = safe_get_value(market_transaction_info, latest_date, taiex_column)
-        
-        # 計算漲跌百分比（與前一日比較）
-        taiex_change = 0.0
-        if len(market_transaction_info.index) > 1:
-            previous_date = market_transaction_info.index[-2]
-            taiex_previous = safe_get_value(market_transaction_info, previous_date, taiex_column)
-            if taiex_previous > 0:
-                taiex_change = ((taiex_closing - taiex_previous) / taiex_previous) * 100
-        
-        result = {
+        return {
             "symbol": "TWA00",
             "name": "台指期",
-            "date": latest_date.strftime('%Y-%m-%d'),
+            "date": taiex["date"],
             "taiex_data": {
-                "closing_index": float(taiex_closing),
-                "change_percent": float(taiex_change)
+                "closing_index": taiex["closing_index"],
+                "change_percent": taiex["change_percent"]
             },
             "data_source": "market_transaction_info",
-            "column_used": taiex_column,
+            "column_used": TAIEX_COLUMN,
             "note": "使用台股加權指數數據作為台指期參考"
         }
         
-        return result
-        
     except Exception as e:
         return {"error": f"獲取台指期數據失敗: {str(e)}"}
 
@@ -561,32 +601,11 @@ def get_twa00_market_info():
 def get_twa00_historical(days: int = Query(30, description="獲取最近幾天的歷史數據")):
     """獲取台指期歷史數據"""
     try:
-        # 確保 FinLab 已登入
-        ensure_finlab_login()
-        
-        # 獲取收盤指數歷史數據
-        closing_index = data.get('market_transaction_info:收盤指數')
-        index_change_percent = data.get('stock_index_price:漲跌百分比(%)')
-        
-        if closing_index is None or len(closing_index.index) == 0:
+        history = get_market_snapshot().taiex_history
+        if not history:
             return {"error": "無法獲取台指期歷史數據"}
         
-        # 獲取最近 N 天的數據
-        recent_data = closing_index.tail(days)
-        
-        historical_data = []
-        for date, value in recent_data.items():
-            if not pd.isna(value):
-                change_percent = 0.0
-                if index_change_percent is not None and date in index_change_percent.index:
-                    change_percent = float(index_change_percent.loc[date]) if not pd.isna(index_change_percent.loc[date]) else 0.0
-                
-                historical_data.append({
-                    "date": date.strftime('%Y-%m-%d'),
-                    "closing_index": float(value),
-                    "change_percent": change_percent
-                })
-        
+        historical_data = history[-days:] if days > 0 else []
         return {
             "symbol": "TWA00",
             "name": "台指期",
@@ -597,6 +616,22 @@ def get_twa00_historical(days: int = Query(30, description="獲取最近幾天
     except Exception as e:
         return {"error": f"獲取台指期歷史數據失敗: {str(e)}"}
 
+@app.get("/market_snapshot/status")
+def get_market_snapshot_status():
+    """市場快照狀態（資料版本、交易日、建立時間、股票數）"""
+    snapshot = market_snapshot
+    if snapshot is None:
+        return {"ready": False, "data_version": current_data_version()}
+    return {
+        "ready": True,
+        "version": snapshot.version,
+        "data_version": current_data_version(),
+        "date": snapshot.date,
+        "previous_date": snapshot.previous_date,
+        "stocks": len(snapshot.stocks),
+        "built_at": snapshot.built_at
+    }
+
 @app.get("/debug/market_transaction_info")
 def debug_market_transaction_info():
     """調試 market_transaction_info 表格結構"""
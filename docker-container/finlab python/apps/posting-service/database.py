@@ -5,6 +5,7 @@ import os
 from sqlalchemy import create_engine, Column, String, Integer, DateTime, Text, Float, Boolean, JSON, BigInteger
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 import logging
 from timezone_utils import get_taiwan_utcnow
@@ -67,13 +68,13 @@ class PostRecord(Base):
     topic_id = Column(String, nullable=True)
     topic_title = Column(String, nullable=True)
     technical_analysis = Column(JSON, nullable=True)
-    serper_data = Column(JSON, nullable=True)
+    serper_data = Column(JSONB, nullable=True)
     quality_score = Column(Float, nullable=True)
     ai_detection_score = Column(Float, nullable=True)
     risk_level = Column(String, nullable=True)
-    generation_params = Column(JSON, nullable=True)
-    commodity_tags = Column(JSON, nullable=True)
-    alternative_versions = Column(JSON, nullable=True)  # 存儲其他4個版本
+    generation_params = Column(JSONB, nullable=True)
+    commodity_tags = Column(JSONB, nullable=True)
+    alternative_versions = Column(JSONB, nullable=True)  # 存儲其他4個版本
 
 class InvestmentBlogSyncState(Base):
     """投資網誌同步狀態表 - 追蹤最後同步的文章ID"""
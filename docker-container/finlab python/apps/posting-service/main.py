@@ -889,7 +889,7 @@ async def manual_post_content(request: PostingRequest):
             else:
                 print("📝 使用預設新聞搜尋關鍵字")
             
-            serper_analysis = serper_service.get_comprehensive_stock_analysis(
+            serper_analysis = await serper_service.get_comprehensive_stock_analysis(
                 stock_id, 
                 stock_name, 
                 search_keywords=search_keywords,
@@ -1716,7 +1716,7 @@ async def manual_post_content(request: PostingRequest):
                 'topic_title': topic_title,  # 使用處理後的 topic_title
                 'trigger_type': request.trigger_type or 'manual',  # 添加觸發器類型
                 'commodity_tags': [tag.model_dump() for tag in commodity_tag_models] if commodity_tag_models else [],
-                'generation_params': json.dumps({
+                'generation_params': {
                     "method": "manual",  # 手動發文生成（步驟1-9）
                     "kol_persona": request.kol_persona,
                     "content_style": request.content_style,
@@ -1730,8 +1730,8 @@ async def manual_post_content(request: PostingRequest):
                     "trigger_type": request.trigger_type or 'manual',  # 在 generation_params 中也添加
                     "posting_type": posting_type,  # 🎲 新增：發文類型
                     "created_at": datetime.now(pytz.timezone('Asia/Taipei')).replace(tzinfo=None).isoformat()
-                }),
-                'alternative_versions': json.dumps(enhanced_content.get('alternative_versions', []))  # 🎲 新增：其他版本
+                },
+                'alternative_versions': enhanced_content.get('alternative_versions', [])  # 🎲 新增：其他版本
             }
             
             print(f"🔍 完整的 post_data: {post_data}")
@@ -2206,7 +2206,7 @@ async def test_serper_api():
         from serper_integration import serper_service
         
         # 測試搜尋功能
-        test_result = serper_service.search_stock_news("2330", "台積電", limit=2, time_range="d2")
+        test_result = await serper_service.search_stock_news("2330", "台積電", limit=2, time_range="d2")
         
         return {
             "success": True,
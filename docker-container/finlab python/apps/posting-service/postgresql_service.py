@@ -5,12 +5,36 @@ from typing import List, Optional, Dict
 from datetime import datetime
 import uuid
 import logging
+from sqlalchemy import text, cast, literal_column, Text
 from sqlalchemy.orm import Session
 from database import PostRecord, get_db, create_tables
 import json
 
 logger = logging.getLogger(__name__)
 
+def _trigger_type_from_text(generation_params: Optional[str]) -> Optional[str]:
+    """從尚未轉為 JSONB 的 generation_params 字串取出 trigger_type"""
+    if not generation_params:
+        return None
+    try:
+        params = json.loads(generation_params)
+        # 經 JSONB 型別欄位寫入的 json.dumps 字串會被再編碼一次
+        if isinstance(params, str):
+            params = json.loads(params)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    return params.get('trigger_type') if isinstance(params, dict) else None
+
+# generation_params 若存成 JSON 字串（舊版把 json.dumps 結果寫入 JSONB 欄位），先解開一層再取 trigger_type；
+# 只解開看起來是物件的字串，一般舊文字不轉型，避免整個查詢失敗
+_TRIGGER_TYPE_JSONB_SQL = """
+    CASE WHEN jsonb_typeof(post_records.generation_params) = 'string'
+              AND post_records.generation_params #>> '{}' LIKE '{%'
+         THEN (post_records.generation_params #>> '{}')::jsonb
+         ELSE post_records.generation_params
+    END ->> 'trigger_type'
+"""
+
 class PostgreSQLPostRecordService:
     """PostgreSQL 貼文記錄服務"""
     
@@ -149,6 +173,90 @@ class PostgreSQLPostRecordService:
             logger.error(f"❌ 獲取貼文記錄失敗: {e}")
             return []
     
+    def _generation_params_is_jsonb(self, db: Session) -> bool:
+        """generation_params 是否已轉為 JSONB（unified-api 啟動時轉換；轉換後不會再變回）"""
+        if not getattr(self, '_generation_params_jsonb', False):
+            data_type = db.execute(text("""
+                SELECT data_type FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'post_records'
+                  AND column_name = 'generation_params'
+            """)).scalar()
+            self._generation_params_jsonb = data_type == 'jsonb'
+        return self._generation_params_jsonb
+
+    def get_post_summaries(self, skip: int = 0, limit: int = 100) -> List[Dict]:
+        """
+        獲取一頁貼文摘要（不載入大型 JSON 欄位，依 created_at、post_id 由新到舊）
+
+        generation_params 已是 JSONB 時 trigger_type 由 PostgreSQL 取出；尚未轉換（TEXT / JSON）時
+        讀取原始字串在 Python 解析。查詢失敗會拋出例外，不回傳空列表。
+        """
+        db = next(get_db())
+        try:
+            columns = [
+                PostRecord.post_id,
+                PostRecord.session_id,
+                PostRecord.kol_serial,
+                PostRecord.stock_code,
+                PostRecord.title,
+                PostRecord.status,
+                PostRecord.created_at,
+            ]
+            order_by = (PostRecord.created_at.desc(), PostRecord.post_id.desc())
+            if self._generation_params_is_jsonb(db):
+                rows = db.query(
+                    *columns, literal_column(_TRIGGER_TYPE_JSONB_SQL).label('trigger_type')
+                ).order_by(*order_by).offset(skip).limit(limit).all()
+                summaries = [row._asdict() for row in rows]
+            else:
+                rows = db.query(
+                    *columns, cast(PostRecord.generation_params, Text).label('generation_params')
+                ).order_by(*order_by).offset(skip).limit(limit).all()
+                summaries = []
+                for row in rows:
+                    summary = row._asdict()
+                    summary['trigger_type'] = _trigger_type_from_text(summary.pop('generation_params'))
+                    summaries.append(summary)
+
+            logger.info(f"✅ 獲取貼文摘要成功 - 總數: {len(summaries)}")
+            return summaries
+
+        except Exception as e:
+            logger.error(f"❌ 獲取貼文摘要失敗: {e}")
+            raise
+        finally:
+            db.close()
+
+    def get_session_rollup(self) -> Optional[List[Dict]]:
+        """獲取 post_stats_session 彙總列（session / KOL / 股票 / 狀態 → 篇數）；彙總表不存在時回傳 None"""
+        db = next(get_db())
+        try:
+            rows = db.execute(text("""
+                SELECT NULLIF(session_id, -1) AS session_id, kol_serial, stock_code, status, post_count
+                FROM post_stats_session
+                WHERE post_count > 0
+            """)).mappings().all()
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            logger.warning(f"⚠️ 讀取 post_stats_session 失敗，改由 post_records 分組統計: {e}")
+            return None
+        finally:
+            db.close()
+
+    def get_session_counts(self) -> List[Dict]:
+        """直接由 post_records 分組計算與 get_session_rollup 相同形狀的列（彙總表不存在時使用）"""
+        db = next(get_db())
+        try:
+            rows = db.execute(text("""
+                SELECT session_id, kol_serial, stock_code, status, COUNT(*) AS post_count
+                FROM post_records
+                GROUP BY session_id, kol_serial, stock_code, status
+            """)).mappings().all()
+            return [dict(row) for row in rows]
+        finally:
+            db.close()
+
     def get_session_posts(self, session_id: int, status: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[PostRecord]:
         """獲取特定session的貼文記錄"""
         try:
@@ -234,11 +342,11 @@ class PostgreSQLPostRecordService:
                 content=f"這是 {kol_nickname} 針對 {stock_name}({stock_code}) 的簡化版貼文內容。",
                 content_md=f"# {stock_name}({stock_code}) 分析\n\n這是 {kol_nickname} 的簡化版貼文內容。",
                 status='draft',
-                generation_params=json.dumps({
+                generation_params={
                     "method": "simple",
                     "bypass_commodity_tag": True,
                     "created_at": now.isoformat()
-                })
+                }
             )
             
             # 保存到數據庫
@@ -9,6 +9,7 @@ from datetime import datetime
 import logging
 
 from schedule_service import schedule_service, ScheduleTask
+from shared.schedule_dispatcher import dispatcher_enabled, dispatcher_service
 
 logger = logging.getLogger(__name__)
 
@@ -388,6 +389,13 @@ async def start_background_scheduler():
     try:
         logger.info("🚀 手動啟動背景排程器")
         
+        if not dispatcher_enabled('posting-service'):
+            return ScheduleResponse(
+                success=False,
+                task_id=None,
+                message=f"排程由 {dispatcher_service()} 執行（SCHEDULE_DISPATCHER_SERVICE），posting-service 不啟動背景排程器"
+            )
+        
         # 檢查背景排程器是否已在運行
         if schedule_service.background_scheduler_running:
             logger.warning("⚠️ 背景排程器已在運行中")
@@ -423,7 +431,7 @@ async def stop_background_scheduler():
         logger.info("🛑 手動停止背景排程器")
         
         # 停止背景排程器
-        schedule_service.background_scheduler_running = False
+        schedule_service.stop_background_scheduler()
         
         # 停止所有運行中的任務
         for task_id, task in schedule_service.running_tasks.items():
@@ -458,7 +466,9 @@ async def get_scheduler_status():
             "data": {
                 "scheduler_running": schedule_service.background_scheduler_running,
                 "running_tasks_count": len(schedule_service.running_tasks),
-                "running_tasks": list(schedule_service.running_tasks.keys())
+                "running_tasks": list(schedule_service.running_tasks.keys()),
+                "dispatcher": schedule_service.dispatcher.get_stats() if schedule_service.dispatcher else None,
+                "dispatcher_service": dispatcher_service()
             }
         }
     except Exception as e:
@@ -4,16 +4,54 @@
 
 import asyncio
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 import logging
 import pytz
 
-from schedule_database import schedule_db_service
+import psycopg2
+
+from schedule_database import schedule_db_service, DATABASE_URL
+from shared.schedule_dispatcher import ScheduleDispatcher, dispatcher_enabled, dispatcher_service
+from shared.trading_calendar import (
+    get_trading_calendar,
+    configure_trading_calendar,
+    load_overrides as load_trading_calendar_overrides,
+    schedule_closure_reason,
+)
 from timezone_utils import get_taiwan_utcnow
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=256)
+def _parse_execution_time(daily_execution_time: str) -> time:
+    """
+    解析 daily_execution_time（每個字串只解析一次）
+
+    支援 "09:00"、ISO 格式 "2025-09-30T20:04:00.000Z"（取時間部分）、
+    時間範圍 "09:00-18:00" 與多段範圍 "09:00-12:00,14:00-18:00"（取第一段開始時間）
+
+    Raises:
+        ValueError: 無法解析
+    """
+    if 'T' in daily_execution_time:
+        time_part = daily_execution_time.split('T')[1].split('.')[0]
+        return datetime.strptime(time_part, '%H:%M:%S').time()
+    first = daily_execution_time.split(',')[0]
+    start = first.split('-')[0] if ':' in first else first
+    return datetime.strptime(start.strip(), '%H:%M').time()
+
+
+def _load_calendar_overrides():
+    """交易日曆覆寫載入器（休市 / 補班公告，TradingCalendar 每分鐘最多呼叫一次）"""
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        return load_trading_calendar_overrides(conn)
+    finally:
+        conn.close()
+
 class ScheduleTask:
     """排程任務"""
     def __init__(self, task_id: str, session_id: int, post_ids: List[str], 
@@ -60,6 +98,7 @@ class ScheduleService:
         self.running_tasks: Dict[str, asyncio.Task] = {}
         self.db_service = schedule_db_service
         self.background_scheduler_running = False
+        self.dispatcher: Optional[ScheduleDispatcher] = None
     
     async def create_schedule_task(self, session_id: int, post_ids: List[str],
                                  schedule_type: str, interval_seconds: int = 30,
@@ -215,7 +254,15 @@ class ScheduleService:
         return schedule_id
     
     async def start_background_scheduler(self):
-        """啟動背景排程器，自動啟動所有 active 排程"""
+        """
+        啟動背景排程分派器：active 排程在 next_run 到期時執行（LISTEN/NOTIFY，不輪詢）
+
+        只有 SCHEDULE_DISPATCHER_SERVICE=posting-service 時啟動（預設由 unified-api 執行排程）
+        """
+        if not dispatcher_enabled('posting-service'):
+            logger.info(f"⏸️ 排程由 {dispatcher_service()} 執行，posting-service 不啟動背景排程器")
+            return
+        
         logger.info("🚀🚀🚀 開始啟動背景排程器 🚀🚀🚀")
         
         if self.background_scheduler_running:
@@ -223,205 +270,32 @@ class ScheduleService:
             return
         
         self.background_scheduler_running = True
-        logger.info("🔄 啟動背景排程器狀態: STARTING")
+        # 交易日曆：與 unified-api 相同的休市判斷（本地快取交易日 + 週一至週五 + 休市公告覆寫）
+        configure_trading_calendar(_load_calendar_overrides)
+        self.dispatcher = ScheduleDispatcher(
+            connect=lambda: psycopg2.connect(DATABASE_URL),
+            next_run_for=lambda task, now: self._next_run_after(task),
+            execute=self._run_claimed_task,
+            initialize_missing=True,
+        )
         
         try:
-            # 獲取所有 active 排程任務
-            logger.info("📊 正在獲取所有 active 排程任務...")
-            active_tasks = await self.db_service.get_active_schedule_tasks()
-            logger.info(f"📋 資料庫中發現 {len(active_tasks)} 個 active 排程任務")
-            
-            if len(active_tasks) == 0:
-                logger.info("✅ 沒有 active 排程任務，背景排程器空轉等待")
-                # 持續等待，每小時檢查一次
-                while self.background_scheduler_running:
-                    await asyncio.sleep(3600)  # 等待 1 小時
-                    active_tasks = await self.db_service.get_active_schedule_tasks()
-                    if len(active_tasks) > 0:
-                        logger.info(f"📋 發現新的 active 排程任務: {len(active_tasks)} 個")
-                        break
-                return
-            
-            # 啟動所有 active 排程
-            success_count = 0
-            failure_count = 0
-            
-            for idx, task in enumerate(active_tasks, 1):
-                task_id = task['schedule_id']
-                schedule_name = task.get('schedule_name', 'Unknown')
-                schedule_type = task.get('schedule_type', 'Unknown')
-                daily_execution_time = task.get('daily_execution_time', 'Not Set')
-                
-                logger.info(f"🔍 處理排程任務 {idx}/{len(active_tasks)}:")
-                logger.info(f"   📋 Task ID: {task_id}")
-                logger.info(f"   📝 排程名稱: {schedule_name}")
-                logger.info(f"   🕐 排程類型: {schedule_type}")
-                logger.info(f"   ⏰ 執行時間: {daily_execution_time}")
-                logger.info(f"   🔄 狀態: {task.get('status', 'Unknown')}")
-                logger.info(f"   📊 Session ID: {task.get('session_id', 'N/A')}")
-                logger.info(f"   🌍 時區: {task.get('timezone', 'N/A')}")
-                logger.info(f"   📅 僅工作日: {task.get('weekdays_only', 'N/A')}")
-                logger.info(f"   🤖 自動發文: {task.get('auto_posting', 'N/A')}")
-                logger.info(f"   ⏱️ 間隔秒數: {task.get('interval_seconds', 'N/A')}")
-                logger.info(f"   📈 每小時最大發文數: {task.get('max_posts_per_hour', 'N/A')}")
-                logger.info(f"   🏃 執行次數: {task.get('run_count', 0)}")
-                logger.info(f"   ✅ 成功次數: {task.get('success_count', 0)}")
-                logger.info(f"   ❌ 失敗次數: {task.get('failure_count', 0)}")
-                logger.info(f"   📈 成功率: {task.get('success_rate', 0)}%")
-                logger.info(f"   📝 下次執行: {task.get('next_run', 'Not Set')}")
-                logger.info(f"   📝 最後執行: {task.get('last_run', 'Never')}")
-                
-                # 🔥 計算並顯示預計執行時間
-                try:
-                    next_run_time = await self._calculate_next_run_time(task)
-                    if next_run_time:
-                        tz_next_run = next_run_time.strftime('%Y-%m-%d %H:%M:%S %Z')
-                        logger.info(f"   🎯 預計下次執行時間: {tz_next_run}")
-                        
-                        # 計算距離執行還有多久
-                        now = datetime.now(pytz.timezone(task.get('timezone', 'Asia/Taipei')))
-                        time_diff = next_run_time - now
-                        if time_diff.total_seconds() > 0:
-                            hours = int(time_diff.total_seconds() // 3600)
-                            minutes = int((time_diff.total_seconds() % 3600) // 60)
-                            logger.info(f"   ⏳ 距離執行還有: {hours}小時{minutes}分鐘")
-                        else:
-                            logger.info(f"   ⚠️ 執行時間已過，將重新計算")
-                    else:
-                        logger.warning(f"   ⚠️ 無法計算預計執行時間")
-                except Exception as calc_error:
-                    logger.error(f"   ❌ 計算預計執行時間失敗: {calc_error}")
-                
-                # 🔥 顯示觸發器配置
-                trigger_config = task.get('trigger_config', {})
-                if trigger_config:
-                    logger.info(f"   🎯 觸發器配置:")
-                    logger.info(f"      🎯 觸發器類型: {trigger_config.get('trigger_type', 'N/A')}")
-                    logger.info(f"      📊 最大股票數: {trigger_config.get('max_stocks', 'N/A')}")
-                    logger.info(f"      👥 KOL分配: {trigger_config.get('kol_assignment', 'N/A')}")
-                    logger.info(f"      📈 股票排序: {trigger_config.get('stock_sorting', 'N/A')}")
-                
-                # 🔥 顯示生成配置
-                generation_config = task.get('generation_config', {})
-                if generation_config:
-                    logger.info(f"   🎨 生成配置:")
-                    logger.info(f"      📝 發文類型: {generation_config.get('posting_type', 'N/A')}")
-                    logger.info(f"      📏 內容長度: {generation_config.get('content_length', 'N/A')}")
-                    logger.info(f"      🎨 內容風格: {generation_config.get('content_style', 'N/A')}")
-                    logger.info(f"      📰 新聞連結: {generation_config.get('enable_news_links', 'N/A')}")
-                
-                # 🔥 顯示批次資訊
-                batch_info = task.get('batch_info', {})
-                if batch_info:
-                    logger.info(f"   📦 批次資訊:")
-                    logger.info(f"      📊 總發文數: {batch_info.get('total_posts', 'N/A')}")
-                    logger.info(f"      ✅ 已發布數: {batch_info.get('published_posts', 'N/A')}")
-                    logger.info(f"      📈 成功率: {batch_info.get('success_rate', 'N/A')}%")
-                    logger.info(f"      🏢 股票代碼: {batch_info.get('stock_codes', 'N/A')}")
-                    logger.info(f"      👥 KOL名稱: {batch_info.get('kol_names', 'N/A')}")
-                
-                # 檢查是否有執行時間設定
-                if not daily_execution_time or daily_execution_time == 'Not Set':
-                    logger.warning(f"⚠️ 排程沒有設定執行時間，跳過執行 - Task ID: {task_id}")
-                    failure_count += 1
-                    continue
-                status = task.get('status', 'unknown')
-                
-                logger.info(f"🚀 [{idx}/{len(active_tasks)}] 正在準備啟動排程任務:")
-                logger.info(f"   📋 Task ID: {task_id}")
-                logger.info(f"   📝 排程名稱: {schedule_name}")
-                logger.info(f"   🕐 排程類型: {schedule_type}")
-                logger.info(f"   ⏰ 執行時間: {daily_execution_time}")
-                logger.info(f"   🔄 當前狀態: {status}")
-                
-                try:
-                    # 檢查是否已有運行中的任務
-                    if task_id in self.running_tasks:
-                        existing_task = self.running_tasks[task_id]
-                        if not existing_task.done():
-                            logger.warning(f"⚠️ 排程任務已在運行 - Task ID: {task_id}")
-                            success_count += 1
-                            continue
-                        else:
-                            logger.info(f"🔄 清理已完成的任務: {task_id}")
-                            del self.running_tasks[task_id]
-                    
-                    # 啟動新的排程任務
-                    logger.info(f"🎯 創建排程任務協程 - Task ID: {task_id}")
-                    running_task = asyncio.create_task(self._execute_schedule_task(task_id))
-                    self.running_tasks[task_id] = running_task
-                    
-                    # 等待一小段時間確保任務啟動成功
-                    await asyncio.sleep(0.1)
-                    
-                    if not running_task.done():
-                        success_count += 1
-                        logger.info(f"✅ 排程任務啟動成功 - Task ID: {task_id}")
-                    else:
-                        failure_count += 1
-                        logger.error(f"❌ 排程任務立即完成（可能失敗）- Task ID: {task_id}")
-                        
-                except Exception as e:
-                    failure_count += 1
-                    logger.error(f"❌ 排程任務啟動失敗 - Task ID: {task_id}")
-                    logger.error(f"🔍 錯誤類型: {type(e).__name__}")
-                    logger.error(f"🔍 錯誤詳情: {str(e)}")
-                    import traceback
-                    logger.error(f"🔍 錯誤堆疊:\n{traceback.format_exc()}")
-            
-            # 啟動總結
-            logger.info("📊 背景排程器啟動總結:")
-            logger.info(f"   ✅ 成功啟動: {success_count} 個任務")
-            logger.info(f"   ❌ 啟動失敗: {failure_count} 個任務")
-            logger.info(f"   🔄 總運行中: {len(self.running_tasks)} 個任務")
-            
-            if success_count > 0:
-                logger.info("✅ 背景排程器啟動完成 - 開始監控執行")
-                self.background_scheduler_running = True
-                
-                # 持續監控運行中的任務
-                while self.background_scheduler_running:
-                    try:
-                        # 檢查是否有任務需要重啟
-                        active_tasks = await self.db_service.get_active_schedule_tasks()
-                        current_running_task_ids = set(self.running_tasks.keys())
-                        active_task_ids = {task['schedule_id'] for task in active_tasks}
-                        
-                        # 啟動新的 active 任務
-                        for task in active_tasks:
-                            task_id = task['schedule_id']
-                            if task_id not in current_running_task_ids:
-                                logger.info(f"🔄 發現新的 active 任務，正在啟動: {task_id}")
-                                try:
-                                    task_obj = asyncio.create_task(self._execute_schedule_task(task_id))
-                                    self.running_tasks[task_id] = task_obj
-                                    logger.info(f"✅ 新任務啟動成功: {task_id}")
-                                except Exception as e:
-                                    logger.error(f"❌ 新任務啟動失敗: {task_id}, Error: {e}")
-                        
-                        # 清理已停止的任務
-                        for task_id in list(current_running_task_ids):
-                            if task_id not in active_task_ids:
-                                logger.info(f"🛑 任務已停止，清理: {task_id}")
-                                if task_id in self.running_tasks:
-                                    self.running_tasks[task_id].cancel()
-                                    del self.running_tasks[task_id]
-                        
-                        # 等待 5 分鐘後再次檢查
-                        await asyncio.sleep(300)
-                        
-                    except Exception as e:
-                        logger.error(f"❌ 背景排程器監控錯誤: {e}")
-                        await asyncio.sleep(60)  # 錯誤時等待 1 分鐘
-            else:
-                logger.warning("⚠️ 沒有成功啟動任何排程任務")
-                
+            logger.info("✅ 背景排程器啟動完成 - 依 next_run 分派執行")
+            await self.dispatcher.run()
         except Exception as e:
             logger.error(f"❌ 背景排程器啟動失敗: {e}")
             logger.error(f"🔍 錯誤類型: {type(e).__name__}")
             import traceback
             logger.error(f"🔍 錯誤堆疊:\n{traceback.format_exc()}")
+        finally:
             self.background_scheduler_running = False
+            logger.info("🛑 背景排程器已停止")
+    
+    def stop_background_scheduler(self):
+        """停止背景排程分派器（執行中的任務由呼叫端決定是否取消）"""
+        self.background_scheduler_running = False
+        if self.dispatcher:
+            self.dispatcher.stop()
     
     async def start_schedule_task(self, task_id: str) -> bool:
         """啟動排程任務"""
@@ -490,8 +364,7 @@ class ScheduleService:
             return False
         
         if current_status == 'active':
-            logger.info(f"ℹ️ 排程任務已經是 active 狀態，直接啟動執行循環 - Task ID: {task_id}")
-            # 直接啟動執行循環，不改變狀態
+            logger.info(f"ℹ️ 排程任務已經是 active 狀態，重新計算下次執行時間 - Task ID: {task_id}")
         else:
             logger.info(f"✅ 任務狀態檢查通過，狀態有效")
         
@@ -528,22 +401,11 @@ class ScheduleService:
                 task.started_at = datetime.utcnow()
                 logger.info(f"✅ 記憶體狀態更新成功")
             
-            logger.info(f"🚀 正在創建異步任務協程...")
-            # 創建異步任務
-            running_task = asyncio.create_task(self._execute_schedule_task(task_id))
-            self.running_tasks[task_id] = running_task
-            
-            # 檢查任務是否成功啟動
-            await asyncio.sleep(0.05)  # 短暫等待
-            
-            if not running_task.done():
-                logger.info(f"✅ 異步任務成功啟動並運行中")
-                logger.info(f"🎉 排程任務啟動完全成功 - Task ID: {task_id}")
-                logger.info(f"📊 當前運行中任務總數: {len(self.running_tasks)}")
-                return True
-            else:
-                logger.error(f"❌ 異步任務立即完成（可能啟動失敗）")
-                return False
+            # 狀態 / next_run 變更會經 NOTIFY 通知背景排程分派器，到期時由它執行
+            if not self.background_scheduler_running:
+                logger.warning(f"⚠️ 背景排程器未運行，排程將在排程器啟動後執行 - Task ID: {task_id}")
+            logger.info(f"🎉 排程任務啟動完全成功 - Task ID: {task_id}")
+            return True
             
         except Exception as e:
             logger.error(f"❌ 啟動排程任務失敗 - Task ID: {task_id}")
@@ -631,224 +493,56 @@ class ScheduleService:
             logger.error(f"🔍 錯誤堆疊:\n{traceback.format_exc()}")
             return False
     
-    async def _execute_schedule_task(self, task_id: str):
-        """執行排程任務 - 持續運行模式"""
+    async def _run_claimed_task(self, task: Dict[str, Any]):
+        """執行一次已被分派器認領的排程（next_run 已在認領時推進）"""
+        task_id = task['schedule_id']
+        # next_run 已跳過非交易日，這裡只攔截 next_run 算好之後才公告的休市（例如颱風假）
+        reason = schedule_closure_reason(task)
+        if reason:
+            logger.info(f"⏭️ 今日休市（{reason}），略過排程: {task.get('schedule_name')} - Task ID: {task_id}")
+            return
+        self.running_tasks[task_id] = asyncio.current_task()
         try:
-            logger.info(f"🚀 開始執行排程任務 - Task ID: {task_id}")
-            
-            # 從資料庫獲取任務資訊
-            db_task = await self.db_service.get_schedule_task(task_id)
-            if not db_task:
-                raise Exception(f"排程任務不存在: {task_id}")
+            logger.info(f"📋 排程名稱: {task.get('schedule_name', 'Unknown')}")
+            logger.info(f"🕐 排程類型: {task.get('schedule_type', 'Unknown')}")
             
-            # 持續運行循環
-            while True:
-                try:
-                    # 檢查任務是否仍為 active 狀態
-                    current_task = await self.db_service.get_schedule_task(task_id)
-                    if not current_task or current_task['status'] != 'active':
-                        logger.info(f"🛑 排程任務已停止 - Task ID: {task_id}")
-                        break
-                    
-                    # 檢查是否應該執行
-                    should_execute = await self._should_execute_now(current_task)
-                    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    if not should_execute:
-                        logger.debug(f"⏰ 排程未到執行時間 - Task ID: {task_id}, 時間: {current_time}")
-                        # 等待 1 分鐘後再檢查，確保不會錯過執行時間
-                        await asyncio.sleep(60)
-                        continue
-                    
-                    # 🔥 關鍵修復：檢查今日是否已執行過，避免重複執行
-                    last_run = current_task.get('last_run')
-                    if last_run:
-                        tz = pytz.timezone('Asia/Taipei')
-                        
-                        # 處理 last_run 可能是字符串的情況
-                        if isinstance(last_run, str):
-                            # 如果是字符串，解析為 datetime
-                            try:
-                                if 'T' in last_run:
-                                    # ISO 格式
-                                    last_run_dt = datetime.fromisoformat(last_run.replace('Z', '+00:00'))
-                                else:
-                                    # 其他格式
-                                    last_run_dt = datetime.strptime(last_run, '%Y-%m-%d %H:%M:%S')
-                            except ValueError:
-                                logger.warning(f"⚠️ 無法解析 last_run 時間格式: {last_run}")
-                                continue
-                        else:
-                            # 已經是 datetime 對象
-                            last_run_dt = last_run
-                        
-                        # 確保時區處理正確
-                        if last_run_dt.tzinfo is None:
-                            # 沒有時區信息，假設為 UTC 然後轉換
-                            last_run_tz = pytz.UTC.localize(last_run_dt).astimezone(tz)
-                        else:
-                            # 有時區信息，直接轉換
-                            last_run_tz = last_run_dt.astimezone(tz)
-                        
-                        now_tz = datetime.now(tz)
-                        
-                        # 如果今日已執行過，跳過本次執行
-                        if last_run_tz.date() == now_tz.date():
-                            logger.info(f"⏰ 今日已執行過，跳過重複執行 - Task ID: {task_id}, 上次執行: {last_run_tz.strftime('%Y-%m-%d %H:%M:%S')}")
-                            # 等待到明天再執行
-                            tomorrow = now_tz.date() + timedelta(days=1)
-                            tomorrow_execution_time = current_task.get('daily_execution_time', '16:30')
-                            try:
-                                exec_time = datetime.strptime(tomorrow_execution_time.split('T')[1].split('.')[0], '%H:%M:%S').time() if 'T' in tomorrow_execution_time else datetime.strptime(tomorrow_execution_time.strip(), '%H:%M').time()
-                                next_execution = tz.localize(datetime.combine(tomorrow, exec_time))
-                                sleep_seconds = (next_execution - now_tz).total_seconds()
-                                await asyncio.sleep(max(sleep_seconds, 3600))  # 至少等待 1 小時
-                            except:
-                                await asyncio.sleep(86400)  # 等待 24 小時
-                            continue
-                    
-                    logger.info(f"⏰ 🚀 觸發排程執行 - Task ID: {task_id}, 時間: {current_time}")
-                    logger.info(f"📋 排程名稱: {current_task.get('schedule_name', 'Unknown')}")
-                    logger.info(f"🕐 排程類型: {current_task.get('schedule_type', 'Unknown')}")
-                    
-                    # 更新最後執行時間
-                    await self.db_service.update_schedule_status(
-                        task_id, 'active', last_run=datetime.utcnow()
-                    )
-                    
-                    # 執行排程邏輯
-                    if current_task['schedule_type'] == 'immediate':
-                        # 立即執行所有貼文
-                        if current_task.get('auto_posting'):
-                            await self._publish_posts_immediately(task_id, current_task.get('post_ids', []))
-                        else:
-                            logger.info("🛑 自動發文關閉，跳過立即發布")
-                    elif current_task['schedule_type'] == '24hour_batch':
-                        # 24小時內分批發文
-                        if current_task.get('auto_posting'):
-                            await self._publish_posts_with_interval(task_id, current_task.get('post_ids', []), current_task['interval_seconds'])
-                        else:
-                            logger.info("🛑 自動發文關閉，跳過分批發布")
-                    elif current_task['schedule_type'] == '5min_batch':
-                        # 5分鐘內分批發文
-                        if current_task.get('auto_posting'):
-                            await self._publish_posts_with_interval(task_id, current_task.get('post_ids', []), current_task['interval_seconds'])
-                        else:
-                            logger.info("🛑 自動發文關閉，跳過分批發布")
-                    elif current_task['schedule_type'] == 'weekday_daily':
-                        # 工作日每日執行批次腳本
-                        await self._execute_weekday_daily_schedule(task_id, current_task)
-                    
-                    # 🔥 注意：統計數據已在具體執行方法中更新，這裡不需要重複更新
-                    # await self.db_service.increment_schedule_stats(
-                    #     task_id, run_count=1, success_count=1
-                    # )
-                    
-                    # 計算下次執行時間
-                    next_run_time = await self._calculate_next_run_time(current_task)
-                    if next_run_time:
-                        # 更新資料庫中的下次執行時間
-                        await self.db_service.update_schedule_next_run(task_id, next_run_time)
-                        logger.info(f"⏰ 下次執行時間: {next_run_time}")
-
-                        # 等待到下次執行時間
-                        tz = pytz.timezone('Asia/Taipei')
-                        now = datetime.now(tz)
-                        # 確保兩個時間都是 aware 的
-                        if next_run_time.tzinfo is None:
-                            next_run_time = tz.localize(next_run_time)
-                        elif next_run_time.tzinfo != tz:
-                            # 如果時區不同，轉換到台北時區
-                            next_run_time = next_run_time.astimezone(tz)
-                        if now.tzinfo is None:
-                            now = tz.localize(now)
-                        sleep_seconds = (next_run_time - now).total_seconds()
-                        
-                        if sleep_seconds and sleep_seconds > 0:
-                            logger.info(f"😴 等待 {sleep_seconds/3600:.1f} 小時後執行")
-                            await asyncio.sleep(sleep_seconds)
-                        else:
-                            logger.warning("⚠️ 下次執行時間已過，立即執行")
-                    else:
-                        # 如果無法計算下次執行時間，設定為明天的同一個時間 + 15分鐘
-                        logger.warning("⚠️ 無法計算下次執行時間，設定為明天 16:30 (安全默認值)")
-                        try:
-                            # 安全默認：明天 16:30 執行
-                            tz = pytz.timezone('Asia/Taipei')
-                            now = datetime.now(tz)
-                            tomorrow = now.date() + timedelta(days=1)
-                            fallback_time = tz.localize(datetime.combine(tomorrow, datetime.strptime('16:30', '%H:%M').time()))
-                            await self.db_service.update_schedule_next_run(task_id, fallback_time)
-                            logger.info(f"✅ 設定安全默認執行時間: {fallback_time}")
-                            
-                            # 計算等待時間
-                            sleep_seconds = (fallback_time - now).total_seconds()
-                            if sleep_seconds > 0:
-                                logger.info(f"😴 等待 {sleep_seconds/3600:.1f} 小時後執行")
-                                await asyncio.sleep(min(sleep_seconds, 86400))  # 最多等待 24 小時
-                        except Exception as fallback_error:
-                            logger.error(f"❌ 設定默認執行時間失敗: {fallback_error}")
-                            # 最後的安全措施：等待 4 小時
-                            await asyncio.sleep(14400)
-                    
-                except Exception as e:
-                    logger.error(f"❌ 排程任務執行失敗 - Task ID: {task_id}, Error: {e}")
-                    
-                    # 更新失敗統計
-                    try:
-                        await self.db_service.increment_schedule_stats(
-                            task_id, run_count=1, failure_count=1
-                        )
-                    except Exception as db_error:
-                        logger.error(f"❌ 更新失敗統計失敗: {db_error}")
-                    
-                    # 計算下次執行時間（即使失敗也要等到明天）
-                    try:
-                        current_task = await self.db_service.get_schedule_task(task_id)
-                        if current_task:
-                            next_run_time = await self._calculate_next_run_time(current_task)
-                            if next_run_time:
-                                await self.db_service.update_schedule_next_run(task_id, next_run_time)
-                                tz = pytz.timezone('Asia/Taipei')
-                                now = datetime.now(tz)
-                                if next_run_time.tzinfo is None:
-                                    next_run_time = tz.localize(next_run_time)
-                                elif next_run_time.tzinfo != tz:
-                                    # 如果時區不同，轉換到台北時區
-                                    next_run_time = next_run_time.astimezone(tz)
-                                if now.tzinfo is None:
-                                    now = tz.localize(now)
-                                sleep_seconds = (next_run_time - now).total_seconds()
-                                if sleep_seconds and sleep_seconds > 0:
-                                    logger.info(f"⚠️ 執行失敗，等待 {sleep_seconds/3600:.1f} 小時後重試")
-                                    await asyncio.sleep(sleep_seconds)
-                                else:
-                                    logger.warning("⚠️ 執行失敗，等待 1 小時後重試")
-                                    await asyncio.sleep(3600)
-                            else:
-                                logger.warning("⚠️ 無法計算下次執行時間，等待 1 小時後重試")
-                                await asyncio.sleep(3600)
-                        else:
-                            logger.warning("⚠️ 無法獲取任務資訊，等待 1 小時後重試")
-                            await asyncio.sleep(3600)
-                    except Exception as calc_error:
-                        logger.error(f"❌ 計算下次執行時間失敗: {calc_error}, 等待 1 小時")
-                        await asyncio.sleep(3600)
+            # 更新最後執行時間
+            await self.db_service.update_schedule_status(
+                task_id, 'active', last_run=datetime.utcnow()
+            )
             
-            logger.info(f"✅ 排程任務結束 - Task ID: {task_id}")
+            # 執行排程邏輯
+            if task['schedule_type'] == 'immediate':
+                # 立即執行所有貼文
+                if task.get('auto_posting'):
+                    await self._publish_posts_immediately(task_id, task.get('post_ids') or [])
+                else:
+                    logger.info("🛑 自動發文關閉，跳過立即發布")
+            elif task['schedule_type'] in ('24hour_batch', '5min_batch'):
+                # 分批發文
+                if task.get('auto_posting'):
+                    await self._publish_posts_with_interval(task_id, task.get('post_ids') or [], task['interval_seconds'])
+                else:
+                    logger.info("🛑 自動發文關閉，跳過分批發布")
+            elif task['schedule_type'] == 'weekday_daily':
+                # 工作日每日執行批次腳本（統計數據在方法內更新）
+                await self._execute_weekday_daily_schedule(task_id, task)
             
         except Exception as e:
             logger.error(f"❌ 排程任務執行失敗 - Task ID: {task_id}, Error: {e}")
             
-            # 更新失敗狀態
-            await self.db_service.update_schedule_status(
-                task_id, 'failed', error_message=str(e)
-            )
+            # 更新失敗統計（下次執行時間已由分派器設定，不需重算）
+            try:
+                await self.db_service.increment_schedule_stats(
+                    task_id, run_count=1, failure_count=1
+                )
+            except Exception as db_error:
+                logger.error(f"❌ 更新失敗統計失敗: {db_error}")
             
-            # 更新記憶體中的任務狀態
             if task_id in self.tasks:
-                self.tasks[task_id].status = 'failed'
                 self.tasks[task_id].error_message = str(e)
+        finally:
+            self.running_tasks.pop(task_id, None)
     
     async def _publish_posts_immediately(self, task_id: str, post_ids: List[str]):
         """立即發布所有貼文"""
@@ -1348,161 +1042,39 @@ class ScheduleService:
         
         return success
     
-    async def _should_execute_now(self, task: Dict[str, Any]) -> bool:
-        """檢查是否應該現在執行排程"""
-        try:
-            schedule_type = task['schedule_type']
-            daily_execution_time = task.get('daily_execution_time')
-            weekdays_only = task.get('weekdays_only', True)
-            timezone = task.get('timezone', 'Asia/Taipei')
-            
-            logger.info(f"🔍 檢查執行時間 - Task ID: {task.get('schedule_id')}")
-            logger.info(f"   📅 daily_execution_time: {repr(daily_execution_time)}")
-            logger.info(f"   🌍 timezone: {timezone}")
-            
-            # 獲取當前時間
-            tz = pytz.timezone(timezone)
-            now = datetime.now(tz)
-            
-            # 檢查是否為工作日
-            if weekdays_only and now.weekday() >= 5:  # 0-4 是週一到週五，5-6 是週末
-                logger.info(f"📅 今天是週末，跳過執行 - Task ID: {task['schedule_id']}")
-                return False
-            
-            # 檢查執行時間
-            if daily_execution_time:
-                try:
-                    # 解析執行時間 (格式: "09:00" 或 "09:00-18:00" 或 ISO 格式)
-                    # 先處理 ISO 格式時間 (2025-09-30T20:04:00.000Z)
-                    if 'T' in daily_execution_time:
-                        time_part = daily_execution_time.split('T')[1].split('.')[0]
-                        execution_time = datetime.strptime(time_part, '%H:%M:%S').time()
-                        current_time = now.time()
-                        
-                        # 嚴格按照設定時間執行，不允許提前執行
-                        current_seconds = current_time.hour * 3600 + current_time.minute * 60 + current_time.second
-                        execution_seconds = execution_time.hour * 3600 + execution_time.minute * 60 + execution_time.second
-                        
-                        # 只允許在設定時間之後的 2 分鐘內執行（不允許提前）
-                        if current_seconds >= execution_seconds and current_seconds <= execution_seconds + 120:
-                            return True
-                    elif '-' in daily_execution_time and ':' in daily_execution_time:
-                        # 時間範圍格式 (09:00-18:00)
-                        parts = daily_execution_time.split('-')
-                        if len(parts) == 2:
-                            start_time_str = parts[0].strip()
-                            end_time_str = parts[1].strip()
-                            start_time = datetime.strptime(start_time_str, '%H:%M').time()
-                            end_time = datetime.strptime(end_time_str, '%H:%M').time()
-                            
-                            # 檢查是否在執行時間範圍內
-                            current_time = now.time()
-                            if start_time <= current_time <= end_time:
-                                return True
-                    else:
-                        # 單一時間點
-                        logger.info(f"   🕐 解析單一時間點: {daily_execution_time}")
-                        execution_time = datetime.strptime(daily_execution_time.strip(), '%H:%M').time()
-                        current_time = now.time()
-                        
-                        logger.info(f"   🕐 執行時間: {execution_time}")
-                        logger.info(f"   🕐 當前時間: {current_time}")
-                        
-                        # 嚴格按照設定時間執行，不允許提前執行
-                        current_seconds = current_time.hour * 3600 + current_time.minute * 60 + current_time.second
-                        execution_seconds = execution_time.hour * 3600 + execution_time.minute * 60
-                        
-                        logger.info(f"   🕐 當前秒數: {current_seconds}")
-                        logger.info(f"   🕐 執行秒數: {execution_seconds}")
-                        
-                        # 只允許在設定時間之後的 1 分鐘內執行（不允許提前）
-                        if current_seconds >= execution_seconds and current_seconds <= execution_seconds + 60:
-                            logger.info(f"   ✅ 時間檢查通過，應該執行")
-                            return True
-                        else:
-                            logger.info(f"   ❌ 時間檢查失敗，不執行")
-                            return False
-                except ValueError as e:
-                    logger.error(f"❌ 解析執行時間失敗: {daily_execution_time}, Error: {e}")
-                    logger.error(f"❌ 當前時間: {now}, 時區: {timezone}")
-                    return False
-            
-            # 如果沒有設定執行時間，則不執行（等待設定）
-            logger.warning(f"⚠️ 排程沒有設定執行時間，跳過執行 - Task ID: {task['schedule_id']}")
-            return False
-            
-        except Exception as e:
-            logger.error(f"❌ 檢查執行時間失敗: {e}")
-            return False
-    
     async def _calculate_next_run_time(self, task: Dict[str, Any]) -> Optional[datetime]:
-        """計算下次執行時間 - 時區固定台北時間，明天同一時間執行"""
+        """計算下次執行時間 - 時區固定台北時間"""
+        next_run = self._next_run_after(task)
+        if next_run:
+            logger.info(f"⏰ 計算下次執行時間: {next_run} (台北時間) - Task ID: {task.get('schedule_id', 'Unknown')}")
+        return next_run
+    
+    def _next_run_after(self, task: Dict[str, Any], now: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        下一個執行時間點（台北時間）：今天的執行時間未到用今天，否則明天；
+        weekdays_only 時跳過非交易日（週末、國定假日、休市公告）。無法解析執行時間時回傳 None
+        """
+        task_id = task.get('schedule_id', 'Unknown')
+        daily_execution_time = task.get('daily_execution_time')
+        if not daily_execution_time:
+            logger.error(f"❌ 沒有設定執行時間 - Task ID: {task_id}")
+            return None
+        
         try:
-            daily_execution_time = task.get('daily_execution_time')
-            task_id = task.get('schedule_id', 'Unknown')
-            
-            logger.info(f"⏰ 開始計算下次執行時間 - Task ID: {task_id}")
-            logger.info(f"   📝 執行時間設定: {daily_execution_time}")
-            
-            if not daily_execution_time:
-                logger.error(f"❌ 沒有設定執行時間 - Task ID: {task_id}")
-                return None
-            
-            if not daily_execution_time:
-                # 如果沒有設定執行時間，返回 None（會等待 1 小時）
-                return None
-            
-            # 固定使用台北時區
-            tz = pytz.timezone('Asia/Taipei')
-            now = datetime.now(tz)
-            
-            try:
-                # 處理 ISO 格式時間 (2025-09-30T20:04:00.000Z)
-                if 'T' in daily_execution_time:
-                    # ISO 格式，提取時間部分
-                    time_part_with_tz = daily_execution_time.split('T')[1]  # 20:04:00.000Z
-                    time_part_only = time_part_with_tz.split('.')[0]  # 20:04:00
-                    execution_time = datetime.strptime(time_part_only, '%H:%M:%S').time()
-                elif ',' in daily_execution_time:
-                    # 多個時間範圍 (例如: 09:00-12:00,14:00-18:00)
-                    first_range = daily_execution_time.split(',')[0]
-                    if '-' in first_range:
-                        parts = first_range.split('-')
-                        start_time_str = parts[0].strip()
-                        execution_time = datetime.strptime(start_time_str, '%H:%M').time()
-                    else:
-                        execution_time = datetime.strptime(first_range.strip(), '%H:%M').time()
-                elif '-' in daily_execution_time and ':' in daily_execution_time:
-                    # 時間範圍，計算明天的開始時間 (例如: 09:00-12:00)
-                    parts = daily_execution_time.split('-')
-                    start_time_str = parts[0].strip()
-                    execution_time = datetime.strptime(start_time_str, '%H:%M').time()
-                else:
-                    # 單一時間點
-                    execution_time = datetime.strptime(daily_execution_time.strip(), '%H:%M').time()
-                
-                # 計算下次執行時間：先檢查今天是否已過執行時間
-                today_execution = tz.localize(datetime.combine(now.date(), execution_time))
-                
-                if now < today_execution:
-                    # 今天的執行時間還沒到，使用今天
-                    next_run = today_execution
-                    logger.info(f"⏰ 計算下次執行時間: {next_run} (今天，台北時間)")
-                else:
-                    # 今天的執行時間已過，使用明天
-                    tomorrow = now.date() + timedelta(days=1)
-                    next_run = tz.localize(datetime.combine(tomorrow, execution_time))
-                    logger.info(f"⏰ 計算下次執行時間: {next_run} (明天，台北時間)")
-                
-                return next_run
-                
-            except ValueError as e:
-                logger.error(f"❌ 解析執行時間失敗: {daily_execution_time}, Error: {e}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"❌ 計算下次執行時間失敗: {e}")
+            execution_time = _parse_execution_time(daily_execution_time)
+        except ValueError as e:
+            logger.error(f"❌ 解析執行時間失敗: {daily_execution_time}, Error: {e}")
             return None
+        
+        # 固定使用台北時區
+        tz = pytz.timezone('Asia/Taipei')
+        now = now or datetime.now(tz)
+        next_run = tz.localize(datetime.combine(now.date(), execution_time))
+        if next_run <= now:
+            next_run = tz.localize(datetime.combine(now.date() + timedelta(days=1), execution_time))
+        if task.get('schedule_type') == 'weekday_daily' or task.get('weekdays_only', True):
+            next_run = get_trading_calendar().roll_forward(next_run)
+        return next_run
 
 # 全局排程服務實例
 schedule_service = ScheduleService()
\ No newline at end of file
@@ -4,12 +4,19 @@ Serper API 整合服務
 """
 
 import os
+import asyncio
 import requests
 import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
 
+# 共用 Serper 客戶端（packages/shared：連線池、SQLite 查詢快取、相同查詢合併為一次請求）
+try:
+    from shared.serper_client import SerperClient, get_serper_client
+except ImportError:
+    SerperClient = None
+
 logger = logging.getLogger(__name__)
 
 class SerperNewsService:
@@ -18,11 +25,32 @@ class SerperNewsService:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.getenv('SERPER_API_KEY')
         self.base_url = "https://google.serper.dev/search"
+        self.client = None
         
         if not self.api_key:
             logger.warning("SERPER_API_KEY 未設定，將使用模擬數據")
+        elif SerperClient is not None:
+            self.client = get_serper_client() if self.api_key == os.getenv('SERPER_API_KEY') else SerperClient(api_key=self.api_key)
     
-    def search_stock_news(self, stock_code: str, stock_name: str, limit: int = 5, 
+    async def _search(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """送出 Serper 查詢（有共用客戶端時經快取與請求合併，否則在執行緒中同步請求）"""
+        if self.client is not None:
+            params = {key: value for key, value in payload.items() if key != 'q'}
+            return await self.client.search(payload['q'], **params)
+        
+        headers = {
+            "X-API-KEY": self.api_key,
+            "Content-Type": "application/json"
+        }
+        
+        def post():
+            response = requests.post(self.base_url, headers=headers, json=payload, timeout=10)
+            response.raise_for_status()
+            return response.json()
+        
+        return await asyncio.to_thread(post)
+    
+    async def search_stock_news(self, stock_code: str, stock_name: str, limit: int = 5, 
                           search_keywords: Optional[List[Dict[str, Any]]] = None,
                           time_range: str = "d1") -> List[Dict[str, Any]]:
         """搜尋股票相關新聞"""
@@ -30,11 +58,6 @@ class SerperNewsService:
             if not self.api_key:
                 return self._get_mock_news(stock_code, stock_name)
             
-            headers = {
-                "X-API-KEY": self.api_key,
-                "Content-Type": "application/json"
-            }
-            
             # 構建搜尋查詢 - 使用前端配置的關鍵字
             if search_keywords:
                 query_parts = []
@@ -67,10 +90,7 @@ class SerperNewsService:
                 "tbs": self._get_time_range_filter(time_range)  # 時間範圍過濾器
             }
             
-            response = requests.post(self.base_url, headers=headers, json=payload, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = await self._search(payload)
             organic_results = data.get('organic', [])
             
             # 處理搜尋結果
@@ -91,7 +111,7 @@ class SerperNewsService:
             logger.error(f"搜尋 {stock_name}({stock_code}) 新聞失敗: {e}")
             return self._get_mock_news(stock_code, stock_name)
     
-    def analyze_limit_up_reason(self, stock_code: str, stock_name: str, 
+    async def analyze_limit_up_reason(self, stock_code: str, stock_name: str, 
                                search_keywords: Optional[List[Dict[str, Any]]] = None,
                                time_range: str = "d1", trigger_type: str = None) -> Dict[str, Any]:
         """分析漲停原因"""
@@ -99,11 +119,6 @@ class SerperNewsService:
             if not self.api_key:
                 return self._get_mock_limit_up_analysis(stock_code, stock_name)
             
-            headers = {
-                "X-API-KEY": self.api_key,
-                "Content-Type": "application/json"
-            }
-            
             # 搜尋漲停相關資訊 - 使用前端配置的關鍵字
             if search_keywords:
                 query_parts = []
@@ -147,10 +162,7 @@ class SerperNewsService:
                 "tbs": self._get_time_range_filter(time_range)  # 時間範圍過濾器
             }
             
-            response = requests.post(self.base_url, headers=headers, json=payload, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = await self._search(payload)
             organic_results = data.get('organic', [])
             
             # 分析漲停原因
@@ -208,7 +220,7 @@ class SerperNewsService:
             logger.error(f"分析 {stock_name}({stock_code}) 漲停原因失敗: {e}")
             return self._get_mock_limit_up_analysis(stock_code, stock_name)
     
-    def get_comprehensive_stock_analysis(self, stock_code: str, stock_name: str, 
+    async def get_comprehensive_stock_analysis(self, stock_code: str, stock_name: str, 
                                         search_keywords: Optional[List[Dict[str, Any]]] = None,
                                         time_range: str = "d1", trigger_type: str = None) -> Dict[str, Any]:
         """獲取股票綜合分析資料"""
@@ -217,8 +229,10 @@ class SerperNewsService:
             adjusted_keywords = self._adjust_keywords_for_trigger(search_keywords, trigger_type)
             
             # 並行獲取新聞和漲停分析
-            news_items = self.search_stock_news(stock_code, stock_name, limit=5, search_keywords=adjusted_keywords, time_range=time_range)
-            limit_up_analysis = self.analyze_limit_up_reason(stock_code, stock_name, search_keywords=adjusted_keywords, time_range=time_range, trigger_type=trigger_type)
+            news_items, limit_up_analysis = await asyncio.gather(
+                self.search_stock_news(stock_code, stock_name, limit=5, search_keywords=adjusted_keywords, time_range=time_range),
+                self.analyze_limit_up_reason(stock_code, stock_name, search_keywords=adjusted_keywords, time_range=time_range, trigger_type=trigger_type)
+            )
             
             return {
                 'stock_code': stock_code,
@@ -1,12 +1,23 @@
 import os
+import sys
 import json
 import pandas as pd
 import finlab
-from finlab import data
 from datetime import datetime, timedelta
 from fastapi import FastAPI, Query, HTTPException
 from typing import Dict, Any, Optional
 
+# 營收資料集由共用的 FundamentalsDataset 持有（packages/shared；依月營收公布時程更新版本，每版只載入一次）
+SHARED_PACKAGE_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'packages', 'shared', 'src'
+)
+if os.path.isdir(SHARED_PACKAGE_SRC) and SHARED_PACKAGE_SRC not in sys.path:
+    sys.path.append(SHARED_PACKAGE_SRC)
+from shared.revenue_dataset import get_fundamentals_dataset
+
+# 批次查詢一次最多幾檔股票
+MAX_BATCH_STOCKS = int(os.getenv("REVENUE_BATCH_MAX_STOCKS", "200"))
+
 app = FastAPI()
 
 @app.on_event("startup")
@@ -36,79 +47,94 @@ def format_large_number(num):
     else:
         return str(num)
 
+def format_amount(value):
+    """金額欄位：原始值與格式化字串（缺值為 None）"""
+    if value is None:
+        return {"value": None, "formatted": None}
+    return {"value": int(value), "formatted": format_large_number(value)}
+
+def round_rate(value):
+    return None if value is None else round(value, 2)
+
+def build_period_data(row: Dict[str, Any]) -> Dict[str, Any]:
+    """FundamentalsDataset.tail 的一期資料 -> API 回應格式"""
+    return {
+        "period": row["period"],
+        "current_revenue": format_amount(row["current_revenue"]),
+        "previous_revenue": format_amount(row["previous_revenue"]),
+        "last_year_revenue": format_amount(row["last_year_revenue"]),
+        "growth_rates": {
+            "month_over_month": round_rate(row["mom_change"]),
+            "year_over_year": round_rate(row["yoy_change"]),
+            "period_change": round_rate(row["period_change"])
+        },
+        "cumulative": {
+            "current": format_amount(row["cumulative_revenue"]),
+            "last_year": format_amount(row["last_year_cumulative"])
+        }
+    }
+
+def parse_stock_ids(stock_ids: str):
+    """'2330,2317 2454' -> ['2330', '2317', '2454']（去除重複，保留順序）"""
+    parsed = []
+    for stock_id in stock_ids.replace(' ', ',').split(','):
+        stock_id = stock_id.strip()
+        if stock_id and stock_id not in parsed:
+            parsed.append(stock_id)
+    return parsed
+
+@app.get("/revenue/batch")
+def get_revenue_batch(
+    stock_ids: str = Query(..., description="股票代號，以逗號分隔，例如 2330,2317,2454"),
+    periods: int = Query(3, description="取得最近幾個月的資料")
+):
+    """一次取得多檔股票的營收資料"""
+    stock_list = parse_stock_ids(stock_ids)
+    if not stock_list:
+        raise HTTPException(status_code=400, detail="stock_ids is required")
+    if len(stock_list) > MAX_BATCH_STOCKS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_STOCKS} stocks per request")
+
+    try:
+        revenue = get_fundamentals_dataset().revenue()
+        found, _, missing = revenue.positions(stock_list)
+
+        # 所有股票的最近幾期一次切片
+        rows = revenue.tail(found, periods)
+
+        return {
+            "periods": periods,
+            "data_version": revenue.version.isoformat(),
+            "data": {
+                stock_id: {
+                    "stock_id": stock_id,
+                    "data": [build_period_data(row) for row in rows[stock_id]]
+                }
+                for stock_id in found
+            },
+            "not_found": missing
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/revenue/{stock_id}")
 def get_revenue_data(stock_id: str, periods: int = Query(3, description="取得最近幾個月的資料")):
     """取得股票營收資料"""
     try:
-        # 取得各種營收資料
-        current_revenue = data.get('monthly_revenue:當月營收')
-        prev_revenue = data.get('monthly_revenue:上月營收')
-        last_year_revenue = data.get('monthly_revenue:去年當月營收')
-        mom_change = data.get('monthly_revenue:上月比較增減(%)')
-        yoy_change = data.get('monthly_revenue:去年同月增減(%)')
-        cumulative_revenue = data.get('monthly_revenue:當月累計營收')
-        last_year_cumulative = data.get('monthly_revenue:去年累計營收')
-        period_change = data.get('monthly_revenue:前期比較增減(%)')
+        revenue = get_fundamentals_dataset().revenue()
         
-        if stock_id not in current_revenue.columns:
+        if stock_id not in revenue:
             raise HTTPException(status_code=404, detail=f"Stock ID {stock_id} not found")
         
         # 取得最近幾期的資料
-        result = {
+        rows = revenue.tail([stock_id], periods)[stock_id]
+        
+        return {
             "stock_id": stock_id,
-            "data": []
+            "data": [build_period_data(row) for row in rows]
         }
-        
-        for i in range(periods):
-            try:
-                # 取得各期資料
-                current = current_revenue[stock_id].dropna().iloc[-(i+1)]
-                prev = prev_revenue[stock_id].dropna().iloc[-(i+1)]
-                last_year = last_year_revenue[stock_id].dropna().iloc[-(i+1)]
-                mom = mom_change[stock_id].dropna().iloc[-(i+1)]
-                yoy = yoy_change[stock_id].dropna().iloc[-(i+1)]
-                cumulative = cumulative_revenue[stock_id].dropna().iloc[-(i+1)]
-                last_year_cum = last_year_cumulative[stock_id].dropna().iloc[-(i+1)]
-                period = period_change[stock_id].dropna().iloc[-(i+1)]
-                
-                period_data = {
-                    "period": current_revenue.index[-(i+1)],
-                    "current_revenue": {
-                        "value": int(current),
-                        "formatted": format_large_number(current)
-                    },
-                    "previous_revenue": {
-                        "value": int(prev),
-                        "formatted": format_large_number(prev)
-                    },
-                    "last_year_revenue": {
-                        "value": int(last_year),
-                        "formatted": format_large_number(last_year)
-                    },
-                    "growth_rates": {
-                        "month_over_month": round(float(mom), 2),
-                        "year_over_year": round(float(yoy), 2),
-                        "period_change": round(float(period), 2)
-                    },
-                    "cumulative": {
-                        "current": {
-                            "value": int(cumulative),
-                            "formatted": format_large_number(cumulative)
-                        },
-                        "last_year": {
-                            "value": int(last_year_cum),
-                            "formatted": format_large_number(last_year_cum)
-                        }
-                    }
-                }
-                
-                result["data"].append(period_data)
-                
-            except IndexError:
-                break
-        
-        return result
-        
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -116,40 +142,30 @@ def get_revenue_data(stock_id: str, periods: int = Query(3, description="取得
 def get_revenue_summary(stock_id: str):
     """取得股票營收摘要"""
     try:
-        # 取得最新營收資料
-        current_revenue = data.get('monthly_revenue:當月營收')
-        yoy_change = data.get('monthly_revenue:去年同月增減(%)')
-        cumulative_revenue = data.get('monthly_revenue:當月累計營收')
-        period_change = data.get('monthly_revenue:前期比較增減(%)')
+        revenue = get_fundamentals_dataset().revenue()
         
-        if stock_id not in current_revenue.columns:
+        if stock_id not in revenue:
             raise HTTPException(status_code=404, detail=f"Stock ID {stock_id} not found")
         
         # 取得最新資料
-        latest_revenue = current_revenue[stock_id].dropna().iloc[-1]
-        latest_yoy = yoy_change[stock_id].dropna().iloc[-1]
-        latest_cumulative = cumulative_revenue[stock_id].dropna().iloc[-1]
-        latest_period = period_change[stock_id].dropna().iloc[-1]
+        latest = revenue.latest(
+            [stock_id], ["current_revenue", "yoy_change", "cumulative_revenue", "period_change"]
+        )[stock_id]
+        latest_yoy = latest["yoy_change"] or 0
         
-        # 取得前3期資料計算趨勢
-        recent_revenues = current_revenue[stock_id].dropna().tail(3)
-        trend = "上升" if recent_revenues.iloc[-1] > recent_revenues.iloc[0] else "下降"
+        # 取得前3期資料計算趨勢（最新一期在前）
+        recent_revenues = [row["current_revenue"] for row in revenue.tail([stock_id], 3, ["current_revenue"])[stock_id]]
+        trend = "上升" if recent_revenues and recent_revenues[0] > recent_revenues[-1] else "下降"
         
         result = {
             "stock_id": stock_id,
-            "latest_period": current_revenue.index[-1],
-            "current_revenue": {
-                "value": int(latest_revenue),
-                "formatted": format_large_number(latest_revenue)
-            },
+            "latest_period": revenue.index[-1],
+            "current_revenue": format_amount(latest["current_revenue"]),
             "growth": {
-                "year_over_year": round(float(latest_yoy), 2),
-                "period_change": round(float(latest_period), 2)
-            },
-            "cumulative_revenue": {
-                "value": int(latest_cumulative),
-                "formatted": format_large_number(latest_cumulative)
+                "year_over_year": round_rate(latest["yoy_change"]),
+                "period_change": round_rate(latest["period_change"])
             },
+            "cumulative_revenue": format_amount(latest["cumulative_revenue"]),
             "trend": trend,
             "analysis": {
                 "revenue_trend": f"營收趨勢{trend}",
@@ -158,7 +174,7 @@ def get_revenue_summary(stock_id: str):
         }
         
         return result
-        
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -166,35 +182,34 @@ def get_revenue_summary(stock_id: str):
 def get_revenue_growth(stock_id: str, periods: int = Query(6, description="取得最近幾個月的成長率")):
     """取得股票營收成長率資料"""
     try:
-        mom_change = data.get('monthly_revenue:上月比較增減(%)')
-        yoy_change = data.get('monthly_revenue:去年同月增減(%)')
-        period_change = data.get('monthly_revenue:前期比較增減(%)')
+        revenue = get_fundamentals_dataset().revenue()
         
-        if stock_id not in mom_change.columns:
+        if stock_id not in revenue:
             raise HTTPException(status_code=404, detail=f"Stock ID {stock_id} not found")
         
-        result = {
-            "stock_id": stock_id,
-            "growth_data": []
-        }
+        rows = revenue.tail([stock_id], periods, ["mom_change", "yoy_change", "period_change"])[stock_id]
         
-        for i in range(min(periods, len(mom_change[stock_id].dropna()))):
-            try:
-                period_data = {
-                    "period": mom_change.index[-(i+1)],
-                    "month_over_month": round(float(mom_change[stock_id].dropna().iloc[-(i+1)]), 2),
-                    "year_over_year": round(float(yoy_change[stock_id].dropna().iloc[-(i+1)]), 2),
-                    "period_change": round(float(period_change[stock_id].dropna().iloc[-(i+1)]), 2)
+        return {
+            "stock_id": stock_id,
+            "growth_data": [
+                {
+                    "period": row["period"],
+                    "month_over_month": round_rate(row["mom_change"]),
+                    "year_over_year": round_rate(row["yoy_change"]),
+                    "period_change": round_rate(row["period_change"])
                 }
-                result["growth_data"].append(period_data)
-            except IndexError:
-                break
-        
-        return result
-        
+                for row in rows
+            ]
+        }
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/dataset/stats")
+def get_dataset_stats():
+    """營收資料集版本與載入統計"""
+    return get_fundamentals_dataset().get_stats()
+
 @app.get("/health")
 def health_check():
     """健康檢查"""
@@ -203,5 +218,3 @@ def health_check():
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8008)
-
-
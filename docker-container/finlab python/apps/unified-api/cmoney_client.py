@@ -6,7 +6,7 @@ import httpx
 import logging
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -164,7 +164,7 @@ class CMoneyClient:
     
     async def login(self, credentials: LoginCredentials) -> AccessToken:
         """
-        登入 CMoney 平台
+        登入 CMoney 平台（經由共用 token manager：同帳號快取並單飛登入）
         
         Args:
             credentials: 登入憑證
@@ -175,94 +175,12 @@ class CMoneyClient:
         Raises:
             Exception: 登入失敗
         """
-        import time
-        max_retries = 3
-        retry_delay = 2  # 秒
-        
-        for attempt in range(max_retries):
-            try:
-                # 檢查是否已有有效 Token
-                if credentials.email in self._tokens:
-                    token = self._tokens[credentials.email]
-                    if not token.is_expired:
-                        logger.info(f"使用快取的 Token: {credentials.email}")
-                        return token
-                
-                # 準備登入請求
-                headers = {
-                    "Content-Type": "application/x-www-form-urlencoded",
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-                
-                data = {
-                    "grant_type": "password",
-                    "login_method": "email",
-                    "client_id": "cmstockcommunity",
-                    "account": credentials.email,
-                    "password": credentials.password
-                }
-                
-                logger.info(f"嘗試登入 CMoney (第 {attempt + 1} 次): {credentials.email}")
-                
-                # 發送登入請求
-                response = self.client.post(
-                    self.login_url,
-                    headers=headers,
-                    data=data
-                )
-                
-                if response.status_code != 200:
-                    error_msg = f"登入失敗: HTTP {response.status_code}"
-                    logger.error(f"{error_msg} - {response.text}")
-                    if attempt < max_retries - 1:
-                        logger.info(f"等待 {retry_delay} 秒後重試...")
-                        time.sleep(retry_delay)
-                        continue
-                    raise Exception(error_msg)
-                
-                # 解析回應
-                result = response.json()
-                access_token = result.get("access_token")
-                expires_in = result.get("expires_in", 3600)  # 預設 1 小時
-                
-                if not access_token:
-                    error_msg = f"登入失敗: 沒有收到 access_token"
-                    logger.error(f"{error_msg} - {result}")
-                    if attempt < max_retries - 1:
-                        logger.info(f"等待 {retry_delay} 秒後重試...")
-                        time.sleep(retry_delay)
-                        continue
-                    raise Exception(error_msg)
-                
-                # 建立 Token 物件
-                token = AccessToken(
-                    token=access_token,
-                    expires_at=datetime.now() + timedelta(seconds=expires_in - 300)  # 提前 5 分鐘過期
-                )
-                
-                # 快取 Token
-                self._tokens[credentials.email] = token
-                
-                logger.info(f"登入成功: {credentials.email}")
-                return token
-                
-            except (httpx.ConnectError, httpx.TimeoutException, httpx.NetworkError) as e:
-                logger.warning(f"網路連接錯誤 (第 {attempt + 1} 次): {e}")
-                if attempt < max_retries - 1:
-                    logger.info(f"等待 {retry_delay} 秒後重試...")
-                    time.sleep(retry_delay)
-                    continue
-                else:
-                    logger.error(f"登入 CMoney 失敗，已重試 {max_retries} 次: {e}")
-                    raise Exception(f"網路連接失敗: {e}")
-            except Exception as e:
-                logger.error(f"登入 CMoney 失敗 (第 {attempt + 1} 次): {e}")
-                if attempt < max_retries - 1:
-                    logger.info(f"等待 {retry_delay} 秒後重試...")
-                    time.sleep(retry_delay)
-                    continue
-                else:
-                    raise
+        from services.cmoney_tokens import get_token_manager
+
+        token = await get_token_manager().get(credentials.email, credentials.password)
+        access_token = AccessToken(token=token.token, expires_at=token.expires_at)
+        self._tokens[credentials.email] = access_token
+        return access_token
     
     async def get_trending_topics(self, access_token: str) -> List[Topic]:
         """
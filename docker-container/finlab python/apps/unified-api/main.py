@@ -18,153 +18,86 @@ Recent Updates:
 - 2025-01-18: Standardized all API endpoints with /api prefix
 """
 
+# 🔥 Startup profile first so import timings cover the whole module
+from services.startup import startup_profile, subsystems, LazyModule
+
 from fastapi import FastAPI, Query, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, RedirectResponse
 import hashlib
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Optional, List, Dict, Any
 import httpx
+import base64
 import json
 import sys
 import os
-import pandas as pd
-import numpy as np
+import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import pytz
 import traceback
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import asyncio
-import asyncpg  # 🔥 Add asyncpg for KOL Profile query
+startup_profile.mark_import('core')
+
+# pandas / numpy（約 0.4 秒）與 asyncpg 在第一次使用時才匯入，不佔用啟動到 healthy 的時間；
+# 實際耗時記在 /api/debug/startup-profile 的 lazy_imports_ms。APScheduler 在 scheduler 子系統內匯入
+pd = LazyModule('pandas')
+np = LazyModule('numpy')
+asyncpg = LazyModule('asyncpg')  # 🔥 KOL Profile query
+
+# 共用套件（packages/shared：排程分派器、FinLab 資料快取、回應格式；整個 repo 都在映像內，直接加入 sys.path）
+SHARED_PACKAGE_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'packages', 'shared', 'src'
+)
+if os.path.isdir(SHARED_PACKAGE_SRC) and SHARED_PACKAGE_SRC not in sys.path:
+    sys.path.append(SHARED_PACKAGE_SRC)
 
 # 🔥 CMoney Real-time Stock Price Service
 from services.cmoney_realtime import get_cmoney_service
 # 🔥 DTNO Data Service (基本面/技術面/籌碼面)
 from services.dtno import get_dtno_service
+# 🔥 Shared HTTP clients (keep-alive pools per upstream + latency/error metrics)
+from services.http_clients import get_http_client, get_http_clients
+# 🔥 Versioned SQL migrations (migrations/NNN_*.sql)
+from services.migrations import run_migrations
+from services.jsonb_backfill import migrate_post_records_jsonb
+from services.post_records_schema import create_post_records, recreate_post_records
+# 🔥 post_records 月分區 + Parquet 冷封存（封存為手動操作：python -m services.post_partitions archive）
+from services.post_partitions import ensure_partitions, read_archived_posts, estimate_post_count
+# 🔥 Schedule Dispatcher (packages/shared，與 posting-service 共用；schedule_tasks 到期即執行，多副本以 SKIP LOCKED 認領)
+from shared.schedule_dispatcher import ScheduleDispatcher, dispatcher_enabled, dispatcher_service
+# 🔥 Trading Calendar (packages/shared，與 posting-service 共用；TWSE 交易日：FinLab 價格索引 + 休市/補班公告覆寫)
+from shared.trading_calendar import (
+    get_trading_calendar,
+    configure_trading_calendar,
+    schedule_closure_reason,
+    load_overrides as load_trading_calendar_overrides,
+    save_override as save_trading_calendar_override,
+    delete_override as delete_trading_calendar_override,
+)
+# 🔥 KOL Profile Cache (kol_profiles 以 serial 索引，kol_profiles 觸發器 NOTIFY 失效)
+from services.kol_profile_cache import get_kol_profile_cache, configure_kol_profile_cache
+# 🔥 CMoney Token Manager (所有帳號登入共用快取 / 單飛刷新)
+from services.cmoney_tokens import get_token_manager as get_cmoney_token_manager
+# 🔥 Industry Index (產業篩選 / 產業統計)
+from services.industry_index import UNKNOWN_INDUSTRY, get_industry_index, rebuild_industry_index
+# 🔥 Stock Mapping Snapshot (冷啟動快速載入公司資訊)
+from services.stock_mapping_store import (
+    build_stock_mapping,
+    load_snapshot as load_stock_mapping_snapshot,
+    save_snapshot as save_stock_mapping_snapshot,
+)
+# 🔥 Text Post-processing (數字格式化，規則於 import 時預先編譯)
+from services.text_postprocess import sanitize_content_numbers
+startup_profile.mark_import('services')
 
 # Timezone utility - Always use Taipei time (GMT+8)
 def get_current_time():
     """Returns current time in Asia/Taipei timezone"""
     return datetime.now(pytz.timezone('Asia/Taipei'))
 
-def sanitize_content_numbers(content: str) -> str:
-    """
-    🔥 Sanitize machine-like number formatting to sound more natural/human-like.
-
-    Fixes:
-    - Trailing zeros: 2.50萬 → 2.5萬, 3.00億 → 3億
-    - Awkward raw numbers: 112340千元 → 1.12億元, 15000張 → 1.5萬張
-    - Over-precise decimals: 1.234567億 → 1.23億
-    - Inconsistent units: 混合使用千/萬/億
-
-    Args:
-        content: The GPT-generated content to sanitize
-
-    Returns:
-        Sanitized content with natural number formatting
-    """
-    import re
-
-    if not content:
-        return content
-
-    result = content
-
-    # 1. Fix trailing zeros in decimals (2.50 → 2.5, 3.00 → 3)
-    # Pattern: number with trailing zeros before unit
-    result = re.sub(r'(\d+)\.0+([萬億千張元%股])', r'\1\2', result)  # 3.00萬 → 3萬
-    result = re.sub(r'(\d+\.\d*[1-9])0+([萬億千張元%股])', r'\1\2', result)  # 2.50萬 → 2.5萬
-
-    # 2. Convert awkward 千元 to proper units (112340千元 → 1.12億元)
-    def convert_qian_to_proper_unit(match):
-        num_str = match.group(1)
-        unit_suffix = match.group(2) if match.group(2) else '元'
-        try:
-            num = float(num_str)
-            actual_value = num * 1000  # 千 = 1000
-
-            if actual_value >= 100000000:  # >= 1億
-                formatted = actual_value / 100000000
-                if formatted == int(formatted):
-                    return f"{int(formatted)}億{unit_suffix}"
-                else:
-                    return f"{formatted:.2f}億{unit_suffix}".rstrip('0').rstrip('.')  + unit_suffix if unit_suffix != '元' else f"{formatted:.2f}".rstrip('0').rstrip('.') + "億元"
-            elif actual_value >= 10000:  # >= 1萬
-                formatted = actual_value / 10000
-                if formatted == int(formatted):
-                    return f"{int(formatted)}萬{unit_suffix}"
-                else:
-                    return f"{formatted:.2f}萬{unit_suffix}".rstrip('0').rstrip('.')
-            else:
-                return match.group(0)  # Keep original if small
-        except:
-            return match.group(0)
-
-    result = re.sub(r'(\d+(?:\.\d+)?)\s*千\s*(元)?', convert_qian_to_proper_unit, result)
-
-    # 3. Convert large raw numbers to 萬/億 units
-    def convert_large_number(match):
-        prefix = match.group(1) or ''
-        num_str = match.group(2)
-        unit = match.group(3)
-        try:
-            num = float(num_str.replace(',', ''))
-
-            # Skip if already has Chinese unit modifier
-            if num < 10000:
-                return match.group(0)
-
-            if num >= 100000000:  # >= 1億
-                formatted = num / 100000000
-                if formatted == int(formatted):
-                    return f"{prefix}{int(formatted)}億{unit}"
-                else:
-                    return f"{prefix}{formatted:.2f}億{unit}".replace('.00', '')
-            elif num >= 10000:  # >= 1萬
-                formatted = num / 10000
-                if formatted == int(formatted):
-                    return f"{prefix}{int(formatted)}萬{unit}"
-                else:
-                    # Remove trailing zeros
-                    formatted_str = f"{formatted:.2f}".rstrip('0').rstrip('.')
-                    return f"{prefix}{formatted_str}萬{unit}"
-            else:
-                return match.group(0)
-        except:
-            return match.group(0)
-
-    # Match patterns like: 15000張, 成交量15000張, etc.
-    result = re.sub(r'(成交量|買超|賣超|持股)?[\s]*(\d{5,}(?:,\d{3})*(?:\.\d+)?)\s*(張|股|元|手)', convert_large_number, result)
-
-    # 4. Fix over-precise decimals (1.234567億 → 1.23億)
-    def fix_decimal_precision(match):
-        num = match.group(1)
-        unit = match.group(2)
-        try:
-            # Parse and reformat with max 2 decimal places
-            num_float = float(num)
-            if num_float == int(num_float):
-                return f"{int(num_float)}{unit}"
-            else:
-                formatted = f"{num_float:.2f}".rstrip('0').rstrip('.')
-                return f"{formatted}{unit}"
-        except:
-            return match.group(0)
-
-    result = re.sub(r'(\d+\.\d{3,})(萬|億|%)', fix_decimal_precision, result)
-
-    # 5. Clean up redundant patterns
-    result = re.sub(r'(\d+)\.0([萬億])', r'\1\2', result)  # 5.0萬 → 5萬
-
-    # 6. Fix patterns like "X.XX萬元元" (double unit)
-    result = re.sub(r'(萬|億)(元)(元)', r'\1\2', result)
-
-    logger.debug(f"📝 Content sanitized: {len(content)} → {len(result)} chars")
-
-    return result
-
 
 # ==================== URL Shortener (is.gd) ====================
 def create_short_url(original_url: str) -> str:
@@ -326,6 +259,7 @@ def convert_post_datetimes_to_taipei(post_dict):
                 result[field] = dt_taipei.isoformat()
 
     # 🔥 FIX: Parse JSON fields from TEXT to dict/list
+    # (JSONB payload columns already arrive as dict/list; only TEXT columns / unconverted databases are parsed here)
     json_fields = ['technical_analysis', 'serper_data', 'generation_params', 'commodity_tags', 'alternative_versions']
 
     for field in json_fields:
@@ -378,8 +312,8 @@ logging.getLogger("openai").setLevel(logging.WARNING)
 logging.getLogger("openai._base_client").setLevel(logging.WARNING)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
-# 🔥 Initialize APScheduler for automatic schedule execution
-scheduler = AsyncIOScheduler(timezone='Asia/Taipei')
+# 🔥 APScheduler for automatic schedule execution (created by the scheduler subsystem)
+scheduler = None
 
 # 創建 FastAPI 應用
 app = FastAPI(
@@ -402,8 +336,21 @@ app.add_middleware(
 
 # ==================== FinLab 初始化 ====================
 
-import finlab
-from finlab import data
+# FinLab SDK is imported on first use (keeps it off the startup import path)
+finlab = LazyModule('finlab')
+
+# data.get 經共用資料集快取（packages/shared：依資料集與最新交易日快取，可與 ohlc-api 等服務共用 Arrow 檔 / Redis）
+try:
+    from shared.finlab_cache import CachedFinlabData, last_trading_date
+    data = CachedFinlabData(
+        LazyModule('finlab.data'),
+        trading_date=lambda: last_trading_date(is_trading_day=get_trading_calendar().is_trading_day)
+    )
+except ImportError as e:
+    logger.warning(f"⚠️ 共用 FinLab 資料快取不可用，直接呼叫 FinLab: {e}")
+    data = LazyModule('finlab.data')
+# 大量 K 線回應的格式協商（records / columns / arrow；pyarrow / orjson 只在請求該格式時才載入）
+from shared.frame_response import negotiate_format, frame_response
 import psycopg2
 from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
@@ -435,52 +382,24 @@ def setup_posting_service_path():
 
 posting_service_path = setup_posting_service_path()
 
-# 導入 GPT 內容生成器
-try:
-    import openai
-    from gpt_content_generator import GPTContentGenerator
-    gpt_generator = GPTContentGenerator()
-    logger.info("✅ GPT 內容生成器初始化成功")
-except Exception as e:
-    logger.warning(f"⚠️  GPT 內容生成器導入失敗: {e}，將使用模板生成")
-    gpt_generator = None
-
-# 導入個人化模組
-try:
-    from personalization_module import enhanced_personalization_processor
-    logger.info("✅ 個人化模組初始化成功")
-except Exception as e:
-    logger.warning(f"⚠️  個人化模組導入失敗: {e}，將跳過個人化處理")
-    enhanced_personalization_processor = None
-
-# 導入 Serper API 服務
-try:
-    import sys
-    import os
-    # Add posting-service directory to path (both possible locations)
-    current_dir = os.path.dirname(__file__)
-    posting_service_paths = [
-        os.path.join(current_dir, 'posting-service'),
-        os.path.join(os.path.dirname(current_dir), 'posting-service')
-    ]
-
-    for path in posting_service_paths:
-        if path not in sys.path and os.path.exists(path):
-            sys.path.insert(0, path)
-            logger.info(f"📁 添加路徑到 sys.path: {path}")
-
-    from serper_integration import SerperNewsService
-    serper_service = SerperNewsService()
-    logger.info("✅ Serper API 服務初始化成功")
-except Exception as e:
-    logger.warning(f"⚠️  Serper API 服務導入失敗: {e}，將使用模擬數據")
-    serper_service = None
+# 內容生成模組（GPT / 個人化 / Serper）於背景或首次使用時載入，見 _init_content_generation
+gpt_generator = None
+enhanced_personalization_processor = None
+serper_service = None
 
 stock_mapping = {}
 db_pool = None  # Connection pool instead of single connection
+# 連接池大小：min 為建立時先連線、並在歸還時保留的閒置連線數（0 = 啟動不連線，但每次用完即關閉）
+DB_POOL_MIN_CONNECTIONS = int(os.getenv("DB_POOL_MIN_CONNECTIONS", "1"))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "10"))
 
 # 🔥 FIX: Parse DATABASE_URL into DB_CONFIG for asyncpg connections
 DB_CONFIG = None
+# psycopg2 連線參數（連接池以外的專用連線使用，例如排程分派器的 LISTEN）
+DB_CONNECT_KWARGS = None
+
+# 🔥 排程分派器（LISTEN/NOTIFY + 最小堆積，取代每分鐘輪詢 schedule_tasks）
+schedule_dispatcher: Optional[ScheduleDispatcher] = None
 
 # 🔥 Reaction Bot Service and CMoney Client
 reaction_bot_service = None
@@ -523,46 +442,7 @@ def create_post_records_table():
             
             if not table_exists:
                 logger.info("📋 開始創建 post_records 表...")
-                cursor.execute("""
-                    CREATE TABLE post_records (
-                        post_id VARCHAR PRIMARY KEY,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        session_id BIGINT,
-                        kol_serial INTEGER NOT NULL,
-                        kol_nickname VARCHAR NOT NULL,
-                        kol_persona VARCHAR,
-                        stock_code VARCHAR NOT NULL,
-                        stock_name VARCHAR NOT NULL,
-                        title VARCHAR NOT NULL,
-                        content TEXT NOT NULL,
-                        content_md TEXT,
-                        status VARCHAR DEFAULT 'draft',
-                        reviewer_notes TEXT,
-                        approved_by VARCHAR,
-                        approved_at TIMESTAMP,
-                        scheduled_at TIMESTAMP,
-                        published_at TIMESTAMP,
-                        cmoney_post_id VARCHAR,
-                        cmoney_post_url VARCHAR,
-                        publish_error TEXT,
-                        views BIGINT DEFAULT 0,
-                        likes BIGINT DEFAULT 0,
-                        comments BIGINT DEFAULT 0,
-                        shares BIGINT DEFAULT 0,
-                        donations BIGINT DEFAULT 0,
-                        topic_id VARCHAR,
-                        topic_title VARCHAR,
-                        technical_analysis TEXT,
-                        serper_data TEXT,
-                        quality_score FLOAT,
-                        ai_detection_score FLOAT,
-                        risk_level VARCHAR,
-                        generation_params TEXT,
-                        commodity_tags TEXT,
-                        alternative_versions TEXT
-                    );
-                """)
+                create_post_records(cursor)
                 conn.commit()
                 logger.info("✅ post_records 表創建成功")
             else:
@@ -658,9 +538,6 @@ def create_schedule_tasks_table():
         if conn:
             return_db_connection(conn)
 
-# 🔥 Track running schedule executions to prevent duplicates
-_running_schedule_executions: set = set()
-
 # 🔥 Investment Blog Auto-Post Job
 async def auto_post_investment_blog():
     """
@@ -702,7 +579,7 @@ async def auto_post_investment_blog():
         # Login once
         cmoney_client = CMoneyClient()
         credentials = LoginCredentials(email=poster_email, password=poster_password)
-        access_token = await cmoney_client.login(credentials)
+        access_token = await get_cmoney_token_manager().login(credentials)
 
         if not access_token or not access_token.token:
             logger.error("📰 [Investment Blog] Failed to login, aborting auto-post")
@@ -804,105 +681,65 @@ async def auto_post_investment_blog():
         import traceback
         logger.error(traceback.format_exc())
 
-# 🔥 APScheduler Background Job - Check and execute schedules
-async def check_schedules():
+# 🔥 Schedule Dispatcher - 到期即執行（取代每分鐘 check_schedules 輪詢）
+async def start_schedule_dispatcher():
     """
-    Background job that runs every minute to check for schedules ready to execute.
-
-    🔥 FIX: Now spawns schedule executions as background tasks instead of blocking.
-    This allows check_schedules to return quickly and not block subsequent checks.
+    啟動排程分派器（database 子系統就緒後背景執行）
 
     Flow:
-    1. Find schedules where status='active' AND next_run <= NOW()
-    2. Spawn background task for each schedule execution (non-blocking)
-    3. Background task handles: execute → auto-publish → update next_run
-    """
-    conn = None
-    try:
-        logger.info("🔍 [APScheduler] Checking for schedules ready to execute...")
-
-        conn = get_db_connection()
-        if not conn:
-            logger.error("❌ [APScheduler] Failed to get database connection")
-            return
-
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            # 🔥 FIX: Only execute schedules due NOW (within current minute window)
-            # If next_run is in the past, update it instead of executing
-            now = get_current_time()
-
-            # Define "now" window: current minute (e.g., 18:07:00 to 18:07:59)
-            current_minute_start = now.replace(second=0, microsecond=0)
-            current_minute_end = current_minute_start + timedelta(minutes=1)
-
-            # First, find and update stale schedules (next_run in the past)
-            cursor.execute("""
-                SELECT *
-                FROM schedule_tasks
-                WHERE status = 'active'
-                  AND next_run IS NOT NULL
-                  AND next_run < %s
-            """, (current_minute_start,))
-
-            stale_schedules = cursor.fetchall()
-
-            if stale_schedules:
-                logger.info(f"⚠️ [APScheduler] Found {len(stale_schedules)} schedule(s) with stale next_run, updating...")
-                for stale_schedule in stale_schedules:
-                    await update_next_run(stale_schedule['schedule_id'], stale_schedule, is_post_execution=False)
-
-            # Now find schedules due within current minute
-            cursor.execute("""
-                SELECT *
-                FROM schedule_tasks
-                WHERE status = 'active'
-                  AND next_run IS NOT NULL
-                  AND next_run >= %s
-                  AND next_run < %s
-                ORDER BY next_run ASC
-            """, (current_minute_start, current_minute_end))
-
-            ready_schedules = cursor.fetchall()
-
-            if not ready_schedules:
-                logger.info("✅ [APScheduler] No schedules ready to execute")
-                return
-
-            logger.info(f"🚀 [APScheduler] Found {len(ready_schedules)} schedule(s) ready to execute NOW")
-
-            # 🔥 FIX: Spawn background tasks for each schedule execution (non-blocking)
-            for schedule in ready_schedules:
-                schedule_id = schedule['schedule_id']
-                schedule_name = schedule['schedule_name']
-
-                # Skip if this schedule is already being executed
-                if schedule_id in _running_schedule_executions:
-                    logger.warning(f"⏭️ [APScheduler] Schedule already running, skipping: {schedule_name} (ID: {schedule_id})")
-                    continue
+    1. 載入 status='active' 排程的 next_run 到最小堆積，並 LISTEN schedule_tasks 變更
+    2. 睡到最早的 next_run（或收到 NOTIFY），以 FOR UPDATE SKIP LOCKED 認領並推進 next_run
+    3. 背景執行 execute_schedule_background → auto-publish
+    錯過的時段（超過 1 分鐘）只推進 next_run 不補跑，與原本的 stale 處理相同
 
-                logger.info(f"🚀 [APScheduler] Spawning background task for schedule: {schedule_name} (ID: {schedule_id})")
+    只有 SCHEDULE_DISPATCHER_SERVICE（預設 unified-api）指定的服務執行排程，避免與 posting-service 搶同一筆
+    """
+    global schedule_dispatcher
+    if not dispatcher_enabled('unified-api'):
+        logger.info(f"⏸️ [Dispatcher] 排程由 {dispatcher_service()} 執行，本服務不啟動分派器")
+        return False
+    if db_pool is None or DB_CONNECT_KWARGS is None:
+        return False
+
+    schedule_dispatcher = ScheduleDispatcher(
+        connect=lambda: psycopg2.connect(**DB_CONNECT_KWARGS),
+        next_run_for=lambda schedule, now: calculate_next_run(schedule['schedule_id'], schedule),
+        execute=execute_schedule_on_trading_day,
+    )
+    asyncio.create_task(schedule_dispatcher.run(), name="schedule_dispatcher")
+    logger.info("✅ [Dispatcher] 排程分派器已啟動")
+
+async def start_kol_profile_cache():
+    """
+    載入 KOL Profile 快取並 LISTEN kol_profiles_changed（database 子系統就緒後背景執行）
 
-                # 🔥 Spawn execution as background task - doesn't block check_schedules
-                asyncio.create_task(
-                    execute_schedule_background(schedule),
-                    name=f"schedule_{schedule_id}"
-                )
+    手動貼文 / 發文 / 個人化模組從快取讀取 KOL 設定，不再每篇查詢 kol_profiles；
+    kol_profiles 的觸發器在每次新增、更新、刪除後 NOTIFY（不論由哪個服務寫入），各副本只重新載入變更的 serial；
+    run() 啟動即整表載入一次（預熱），之後不在請求路徑上整表載入
+    """
+    if DB_CONNECT_KWARGS is None:
+        return False
 
-            logger.info(f"✅ [APScheduler] Spawned {len(ready_schedules)} schedule execution task(s) - check_schedules returning")
+    cache = configure_kol_profile_cache(lambda: psycopg2.connect(**DB_CONNECT_KWARGS))
+    asyncio.create_task(cache.run(), name="kol_profile_cache")
+    logger.info("✅ [KOL Cache] KOL Profile 快取已啟動")
 
-    except Exception as e:
-        logger.error(f"❌ [APScheduler] Error in check_schedules: {e}")
-        logger.error(traceback.format_exc())
-    finally:
-        if conn:
-            return_db_connection(conn)
+async def execute_schedule_on_trading_day(schedule: Dict):
+    """
+    分派器的執行入口：next_run 已跳過非交易日，這裡只攔截 next_run 算好之後才公告的休市（例如颱風假）
+    """
+    reason = schedule_closure_reason(schedule)
+    if reason:
+        logger.info(f"⏭️ [Dispatcher] 今日休市（{reason}），略過排程: {schedule.get('schedule_name')} (ID: {schedule['schedule_id']})")
+        return
+    await execute_schedule_background(schedule)
 
 async def execute_schedule_background(schedule: Dict):
     """
     🔥 NEW: Execute a single schedule as a background task.
 
-    This function runs independently of check_schedules, allowing multiple
-    schedules to execute concurrently without blocking the scheduler.
+    Spawned by the schedule dispatcher after it claimed the schedule; next_run was
+    already advanced in the claiming transaction.
 
     Args:
         schedule: Schedule dictionary from database
@@ -912,9 +749,6 @@ async def execute_schedule_background(schedule: Dict):
     auto_posting = schedule.get('auto_posting', False)
     interval_seconds = schedule.get('interval_seconds', 300)
 
-    # Track this execution to prevent duplicates
-    _running_schedule_executions.add(schedule_id)
-
     try:
         logger.info(f"🚀 [Background] Starting execution: {schedule_name} (ID: {schedule_id})")
         logger.info(f"🔧 [Background] auto_posting={auto_posting}, interval_seconds={interval_seconds}")
@@ -922,47 +756,35 @@ async def execute_schedule_background(schedule: Dict):
         import httpx
 
         # Call the existing execute endpoint internally
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            internal_port = os.getenv('PORT', '8000')
-            api_url = f"http://127.0.0.1:{internal_port}"
-            logger.info(f"🔗 [Background] Calling internal API: {api_url}/api/schedule/execute/{schedule_id}")
-
-            response = await client.post(
-                f"{api_url}/api/schedule/execute/{schedule_id}",
-                json={}
-            )
+        client = get_http_client('internal')
+        internal_port = os.getenv('PORT', '8000')
+        api_url = f"http://127.0.0.1:{internal_port}"
+        logger.info(f"🔗 [Background] Calling internal API: {api_url}/api/schedule/execute/{schedule_id}")
 
-            if response.status_code == 200:
-                result = response.json()
-                logger.info(f"✅ [Background] Schedule executed successfully: {schedule_name}")
+        response = await client.post(
+            f"{api_url}/api/schedule/execute/{schedule_id}",
+            json={}
+        )
 
-                # If auto_posting is enabled, publish posts with intervals
-                if auto_posting and result.get('success'):
-                    posts = result.get('posts', [])
-                    if posts:
-                        logger.info(f"📤 [Background] Auto-posting {len(posts)} posts with {interval_seconds}s intervals")
-                        await publish_posts_with_queue(posts, interval_seconds)
-                    else:
-                        logger.warning(f"⚠️ [Background] No posts to publish for schedule: {schedule_name}")
+        if response.status_code == 200:
+            result = response.json()
+            logger.info(f"✅ [Background] Schedule executed successfully: {schedule_name}")
 
-                # Calculate next_run for the next execution
-                await update_next_run(schedule_id, schedule, is_post_execution=True)
-            else:
-                logger.error(f"❌ [Background] Schedule execution failed: {schedule_name}, status={response.status_code}")
-                # Still update next_run even on failure to prevent stuck schedules
-                await update_next_run(schedule_id, schedule, is_post_execution=True)
+            # If auto_posting is enabled, publish posts with intervals
+            if auto_posting and result.get('success'):
+                posts = result.get('posts', [])
+                if posts:
+                    logger.info(f"📤 [Background] Auto-posting {len(posts)} posts with {interval_seconds}s intervals")
+                    await publish_posts_with_queue(posts, interval_seconds)
+                else:
+                    logger.warning(f"⚠️ [Background] No posts to publish for schedule: {schedule_name}")
+        else:
+            logger.error(f"❌ [Background] Schedule execution failed: {schedule_name}, status={response.status_code}")
 
     except Exception as e:
         logger.error(f"❌ [Background] Error executing schedule {schedule_name}: {e}")
         logger.error(traceback.format_exc())
-        # Update next_run even on exception to prevent stuck schedules
-        try:
-            await update_next_run(schedule_id, schedule, is_post_execution=True)
-        except:
-            pass
     finally:
-        # Remove from tracking set when done
-        _running_schedule_executions.discard(schedule_id)
         logger.info(f"🏁 [Background] Execution completed: {schedule_name} (ID: {schedule_id})")
 
 async def publish_posts_with_queue(posts: List[Dict], interval_seconds: int):
@@ -986,20 +808,21 @@ async def publish_posts_with_queue(posts: List[Dict], interval_seconds: int):
 
                 logger.info(f"📤 [Auto-Posting] Publishing post {idx+1}/{len(posts)}: {stock_code} (ID: {post_id})")
 
-                async with httpx.AsyncClient(timeout=120.0) as client:
-                    # Call the publish endpoint (single post)
-                    response = await client.post(
-                        f"{api_url}/api/posts/{post_id}/publish"
-                    )
+                client = get_http_client('internal')
+                # Call the publish endpoint (single post)
+                response = await client.post(
+                    f"{api_url}/api/posts/{post_id}/publish",
+                    timeout=120.0
+                )
 
-                    if response.status_code == 200:
-                        result = response.json()
-                        if result.get('success'):
-                            logger.info(f"✅ [Auto-Posting] Post published successfully: {stock_code}")
-                        else:
-                            logger.error(f"❌ [Auto-Posting] Failed to publish post: {result.get('error')}")
+                if response.status_code == 200:
+                    result = response.json()
+                    if result.get('success'):
+                        logger.info(f"✅ [Auto-Posting] Post published successfully: {stock_code}")
                     else:
-                        logger.error(f"❌ [Auto-Posting] Publish API returned {response.status_code}")
+                        logger.error(f"❌ [Auto-Posting] Failed to publish post: {result.get('error')}")
+                else:
+                    logger.error(f"❌ [Auto-Posting] Publish API returned {response.status_code}")
 
                 # Wait interval before publishing next post (except for last post)
                 if idx < len(posts) - 1:
@@ -1015,315 +838,489 @@ async def publish_posts_with_queue(posts: List[Dict], interval_seconds: int):
         logger.error(f"❌ [Auto-Posting] Error in publish_posts_with_queue: {e}")
         logger.error(traceback.format_exc())
 
-async def update_next_run(schedule_id: str, schedule: Dict, is_post_execution: bool = True):
+def calculate_next_run(schedule_id: str, schedule: Dict, is_post_execution: bool = True) -> datetime:
     """
-    Calculate and update next_run time for a schedule based on its schedule_type.
+    Calculate the next_run time for a schedule based on its schedule_type.
 
     Args:
         schedule_id: Schedule ID
         schedule: Schedule dictionary from database
-        is_post_execution: True if updating after execution, False if updating stale schedule
+        is_post_execution: True if calculating after execution, False for a stale schedule
+
+    Returns:
+        Next run (aware, schedule timezone); unsupported configurations fall back to tomorrow 09:30
     """
-    conn = None
-    try:
-        schedule_type = schedule.get('schedule_type', 'daily')
-        daily_execution_time = schedule.get('daily_execution_time')
-        weekdays_only = schedule.get('weekdays_only', True)
-        timezone_str = schedule.get('timezone', 'Asia/Taipei')
-
-        # 🔥 FIX: Extract daily_execution_time from schedule_config if not at root level
-        if not daily_execution_time:
-            schedule_config = schedule.get('schedule_config', {})
-            if isinstance(schedule_config, str):
-                try:
-                    schedule_config = json.loads(schedule_config)
-                except:
-                    schedule_config = {}
-            if isinstance(schedule_config, dict):
-                posting_time_slots = schedule_config.get('posting_time_slots', [])
-                if posting_time_slots and len(posting_time_slots) > 0:
-                    daily_execution_time = posting_time_slots[0]
-                    logger.info(f"🔍 [APScheduler] Extracted daily_execution_time from schedule_config: {daily_execution_time}")
-
-        tz = pytz.timezone(timezone_str)
-        now = datetime.now(tz)
-        next_run = None
-
-        # 🔥 FIX: Support both 'daily' and 'weekday_daily' schedule types
-        if schedule_type in ['daily', 'weekday_daily'] and daily_execution_time:
-            # Parse execution time (format: "HH:MM")
+    schedule_type = schedule.get('schedule_type', 'daily')
+    daily_execution_time = schedule.get('daily_execution_time')
+    weekdays_only = schedule.get('weekdays_only', True)
+    timezone_str = schedule.get('timezone', 'Asia/Taipei')
+
+    # 🔥 FIX: Extract daily_execution_time from schedule_config if not at root level
+    if not daily_execution_time:
+        schedule_config = schedule.get('schedule_config', {})
+        if isinstance(schedule_config, str):
             try:
-                hour, minute = map(int, daily_execution_time.split(':'))
+                schedule_config = json.loads(schedule_config)
+            except:
+                schedule_config = {}
+        if isinstance(schedule_config, dict):
+            posting_time_slots = schedule_config.get('posting_time_slots', [])
+            if posting_time_slots and len(posting_time_slots) > 0:
+                daily_execution_time = posting_time_slots[0]
+                logger.info(f"🔍 [Dispatcher] Extracted daily_execution_time from schedule_config: {daily_execution_time}")
+
+    tz = pytz.timezone(timezone_str)
+    now = datetime.now(tz)
+    next_run = None
+
+    # 🔥 FIX: Support both 'daily' and 'weekday_daily' schedule types
+    if schedule_type in ['daily', 'weekday_daily'] and daily_execution_time:
+        # Parse execution time (format: "HH:MM")
+        try:
+            hour, minute = map(int, daily_execution_time.split(':'))
 
-                # Calculate next execution time
-                next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            # Calculate next execution time
+            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
 
-                # If execution time already passed today, move to tomorrow
-                if next_run <= now:
-                    next_run = next_run + timedelta(days=1)
+            # If execution time already passed today, move to tomorrow
+            if next_run <= now:
+                next_run = next_run + timedelta(days=1)
 
-                # 🔥 FIX: For weekday_daily or weekdays_only, skip weekends
-                # Skip to next Monday if next_run falls on weekend
-                if schedule_type == 'weekday_daily' or weekdays_only:
-                    while next_run.weekday() >= 5:  # 5=Saturday, 6=Sunday
-                        next_run = next_run + timedelta(days=1)
+            # 🔥 For weekday_daily or weekdays_only, skip non-trading days (weekends, holidays, announced closures)
+            if schedule_type == 'weekday_daily' or weekdays_only:
+                next_run = get_trading_calendar().roll_forward(next_run)
+
+            log_prefix = "🔄" if not is_post_execution else "📅"
+            logger.info(f"{log_prefix} [Dispatcher] Next run for schedule {schedule_id}: {next_run.isoformat()}")
 
-                log_prefix = "🔄" if not is_post_execution else "📅"
-                logger.info(f"{log_prefix} [APScheduler] Next run for schedule {schedule_id}: {next_run.isoformat()}")
-
-            except Exception as parse_error:
-                logger.error(f"❌ [APScheduler] Failed to parse daily_execution_time '{daily_execution_time}': {parse_error}")
-                # 🔥 FIX: Set default next_run to avoid infinite stale loop
-                next_run = now + timedelta(days=1)
-                next_run = next_run.replace(hour=9, minute=30, second=0, microsecond=0)
-                logger.warning(f"⚠️ [APScheduler] Set default next_run to tomorrow 09:30: {next_run.isoformat()}")
-        elif schedule_type in ['daily', 'weekday_daily']:
-            # Missing daily_execution_time but valid schedule_type
-            logger.error(f"❌ [APScheduler] Schedule {schedule_id} has schedule_type='{schedule_type}' but no daily_execution_time")
-            logger.error(f"❌ [APScheduler] schedule_config: {schedule.get('schedule_config', 'None')}")
+        except Exception as parse_error:
+            logger.error(f"❌ [Dispatcher] Failed to parse daily_execution_time '{daily_execution_time}': {parse_error}")
             # 🔥 FIX: Set default next_run to avoid infinite stale loop
             next_run = now + timedelta(days=1)
             next_run = next_run.replace(hour=9, minute=30, second=0, microsecond=0)
-            if schedule_type == 'weekday_daily':
-                while next_run.weekday() >= 5:
-                    next_run = next_run + timedelta(days=1)
-            logger.warning(f"⚠️ [APScheduler] Set default next_run to tomorrow 09:30: {next_run.isoformat()}")
+            logger.warning(f"⚠️ [Dispatcher] Set default next_run to tomorrow 09:30: {next_run.isoformat()}")
+    elif schedule_type in ['daily', 'weekday_daily']:
+        # Missing daily_execution_time but valid schedule_type
+        logger.error(f"❌ [Dispatcher] Schedule {schedule_id} has schedule_type='{schedule_type}' but no daily_execution_time")
+        logger.error(f"❌ [Dispatcher] schedule_config: {schedule.get('schedule_config', 'None')}")
+        # 🔥 FIX: Set default next_run to avoid infinite stale loop
+        next_run = now + timedelta(days=1)
+        next_run = next_run.replace(hour=9, minute=30, second=0, microsecond=0)
+        if schedule_type == 'weekday_daily':
+            next_run = get_trading_calendar().roll_forward(next_run)
+        logger.warning(f"⚠️ [Dispatcher] Set default next_run to tomorrow 09:30: {next_run.isoformat()}")
+    else:
+        # For other schedule types or empty schedule_type
+        if not schedule_type:
+            logger.error(f"❌ [Dispatcher] Schedule {schedule_id} has EMPTY schedule_type!")
         else:
-            # For other schedule types or empty schedule_type
-            if not schedule_type:
-                logger.error(f"❌ [APScheduler] Schedule {schedule_id} has EMPTY schedule_type!")
-            else:
-                logger.warning(f"⚠️ [APScheduler] Schedule type '{schedule_type}' not supported for auto-update")
-            # 🔥 FIX: Set default next_run to avoid infinite stale loop
-            next_run = now + timedelta(days=1)
-            next_run = next_run.replace(hour=9, minute=30, second=0, microsecond=0)
-            logger.warning(f"⚠️ [APScheduler] Set default next_run to tomorrow 09:30: {next_run.isoformat()}")
+            logger.warning(f"⚠️ [Dispatcher] Schedule type '{schedule_type}' not supported for auto-update")
+        # 🔥 FIX: Set default next_run to avoid infinite stale loop
+        next_run = now + timedelta(days=1)
+        next_run = next_run.replace(hour=9, minute=30, second=0, microsecond=0)
+        logger.warning(f"⚠️ [Dispatcher] Set default next_run to tomorrow 09:30: {next_run.isoformat()}")
+
+    return next_run
+
+def set_stock_mapping(mapping: Dict[str, Dict[str, Any]]):
+    """Swap in a new stock_mapping and rebuild everything derived from it"""
+    global stock_mapping, _stock_name_to_code_cache
+    stock_mapping = mapping
+    _stock_name_to_code_cache = None
+    try:
+        rebuild_industry_index(mapping)
+    except Exception as e:
+        logger.error(f"❌ 建立產業索引失敗: {e}")
+
+async def refresh_stock_mapping_from_finlab():
+    """從 FinLab 載入完整公司資訊（背景執行），更新 stock_mapping 並寫入快照"""
+    logger.info("📊 [背景] 正在從 FinLab 載入完整公司資訊...")
+    company_info = await asyncio.to_thread(data.get, 'company_basic_info')
+    finlab_mapping = build_stock_mapping(company_info)
+    if not finlab_mapping:
+        logger.warning("⚠️ 無法從 FinLab 取得公司資訊")
+        return False
 
-        # Update next_run in database
+    set_stock_mapping({**stock_mapping, **finlab_mapping})
+    logger.info(f"✅ 從 FinLab 載入完整公司資訊成功: {len(stock_mapping)} 支股票")
+
+    await asyncio.to_thread(save_stock_mapping_snapshot, finlab_mapping)
+
+def load_trading_calendar_overrides_from_pool():
+    """交易日曆覆寫載入器（TradingCalendar 每分鐘最多呼叫一次）"""
+    if db_pool is None:
+        return {}
+    conn = get_db_connection()
+    try:
+        return load_trading_calendar_overrides(conn)
+    finally:
+        return_db_connection(conn)
+
+async def refresh_trading_calendar_from_finlab():
+    """從 FinLab 收盤價索引重建交易日（背景執行 + 每日盤後），寫入本地快取"""
+    close = await asyncio.to_thread(data.get, 'price:收盤價')
+    if close is None or close.empty:
+        logger.warning("⚠️ 無法從 FinLab 取得收盤價索引，交易日曆沿用快取")
+        return False
+    sessions = get_trading_calendar().refresh_from_index(close.index)
+    logger.info(f"✅ 交易日曆更新完成: {sessions} 個交易日")
+    return True
+
+# ==================== 子系統初始化（Fast-start） ====================
+# /health 不再等待以下子系統；各子系統於啟動後背景初始化，或在首次使用時初始化 (subsystems.ensure)
+
+def init_database_pool():
+    """解析 DATABASE_URL 並建立連接池（建立時開啟 DB_POOL_MIN_CONNECTIONS 條連線，於 worker thread 執行）"""
+    global db_pool, DB_CONFIG, DB_CONNECT_KWARGS
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        logger.warning("⚠️ 未找到 DATABASE_URL 環境變數，將無法查詢貼文數據")
+        db_pool = None
+        return
+
+    logger.info(f"🔗 嘗試連接數據庫: {database_url[:20]}...")
+    # Railway PostgreSQL URL 格式轉換（postgresql:// -> postgres:// for psycopg2）
+    if database_url.startswith("postgresql://"):
+        database_url = database_url.replace("postgresql://", "postgres://", 1)
+
+    # 添加連接參數以解決 Railway 連接問題
+    import urllib.parse
+    parsed_url = urllib.parse.urlparse(database_url)
+
+    # 構建連接參數
+    connect_kwargs = {
+        'host': parsed_url.hostname,
+        'port': parsed_url.port or 5432,
+        'database': parsed_url.path[1:],  # 移除前導斜線
+        'user': parsed_url.username,
+        'password': parsed_url.password,
+        'connect_timeout': 30,  # 30秒連接超時
+        'sslmode': 'require',   # Railway 需要 SSL
+        'keepalives_idle': 600, # 保持連接活躍
+        'keepalives_interval': 30,
+        'keepalives_count': 3
+    }
+
+    # 🔥 FIX: Set DB_CONFIG for asyncpg connections (used in KOL Profile queries)
+    DB_CONFIG = {
+        'host': parsed_url.hostname,
+        'port': parsed_url.port or 5432,
+        'database': parsed_url.path[1:],
+        'user': parsed_url.username,
+        'password': parsed_url.password
+    }
+    logger.info(f"✅ DB_CONFIG 已設置: host={DB_CONFIG['host']}, database={DB_CONFIG['database']}")
+
+    # Create connection pool sized by DB_POOL_MIN_CONNECTIONS / DB_POOL_MAX_CONNECTIONS
+    DB_CONNECT_KWARGS = connect_kwargs
+    try:
+        db_pool = pool.SimpleConnectionPool(
+            minconn=DB_POOL_MIN_CONNECTIONS, maxconn=DB_POOL_MAX_CONNECTIONS, **connect_kwargs
+        )
+        logger.info(f"✅ PostgreSQL 連接池創建成功 ({DB_POOL_MIN_CONNECTIONS}-{DB_POOL_MAX_CONNECTIONS} connections)")
+    except psycopg2.OperationalError as e:
+        # 資料庫暫時連不上：改用不預先連線的連接池，之後每次 getconn 再連線
+        logger.warning(f"⚠️ 無法預先建立資料庫連線，連接池改為使用時才連線: {e}")
+        db_pool = pool.SimpleConnectionPool(minconn=0, maxconn=DB_POOL_MAX_CONNECTIONS, **connect_kwargs)
+
+def init_database_schema():
+    """暖機第一條連線、建立資料表並套用遷移（背景執行；遷移失敗時拋出 RuntimeError）"""
+    if db_pool is None:
+        return False
+
+    logger.info("📋 開始創建 post_records 表...")
+    create_post_records_table()
+    reset_post_records_columns_cache()
+    logger.info("✅ post_records 表創建完成")
+
+    logger.info("📋 開始創建 schedule_tasks 表...")
+    create_schedule_tasks_table()
+    logger.info("✅ schedule_tasks 表創建完成")
+
+    # 遷移失敗時拋出例外：database 子系統標記為 failed，依賴它的排程分派器 / KOL 快取不會在未遷移的 schema 上啟動
+    if not apply_database_migrations():
+        raise RuntimeError("資料庫遷移失敗")
+    convert_post_records_payload_to_jsonb()
+    maintain_post_records_partitions()
+
+def apply_database_migrations() -> bool:
+    """套用 migrations/ 下編號的 SQL 檔（已套用者略過，記錄於 schema_migrations）"""
+    conn = None
+    try:
         conn = get_db_connection()
+        summary = run_migrations(conn)
+        reset_post_records_columns_cache()
+        logger.info(f"✅ 資料庫遷移完成: 新套用 {len(summary['applied'])} 個, 已套用 {summary['already_applied']} 個")
+        if summary['checksum_mismatches']:
+            logger.warning(f"⚠️ 已套用的遷移檔被修改過: {summary['checksum_mismatches']}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ 資料庫遷移失敗: {e}")
+        return False
+    finally:
         if conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE schedule_tasks
-                    SET next_run = %s, updated_at = NOW()
-                    WHERE schedule_id = %s
-                """, (next_run, schedule_id))
-                conn.commit()
-                logger.info(f"✅ [APScheduler] Updated next_run for schedule {schedule_id}")
+            return_db_connection(conn)
 
+def convert_post_records_payload_to_jsonb():
+    """post_records 的 JSON 內容欄位 TEXT → JSONB（分批回填，轉換完成後為 no-op）"""
+    conn = None
+    try:
+        conn = get_db_connection()
+        result = migrate_post_records_jsonb(conn)
+        if result['converted']:
+            reset_post_records_columns_cache()
+            logger.info(f"✅ post_records JSONB 轉換完成: {result['converted']} ({result['rows']} 筆)")
     except Exception as e:
-        logger.error(f"❌ [APScheduler] Error updating next_run for schedule {schedule_id}: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"❌ post_records JSONB 轉換失敗（下次啟動重試）: {e}")
     finally:
         if conn:
             return_db_connection(conn)
 
-@app.on_event("startup")
-async def startup_event():
-    """啟動時初始化 FinLab 和數據庫連接"""
-    global stock_mapping, db_pool
-
-    # 檢查所有關鍵環境變數
-    logger.info("🔍 [啟動檢查] 開始檢查環境變數...")
-    logger.info(f"🔍 [啟動檢查] FINLAB_API_KEY 存在: {os.getenv('FINLAB_API_KEY') is not None}")
-    logger.info(f"🔍 [啟動檢查] FORUM_200_EMAIL 存在: {os.getenv('FORUM_200_EMAIL') is not None}")
-    logger.info(f"🔍 [啟動檢查] FORUM_200_PASSWORD 存在: {os.getenv('FORUM_200_PASSWORD') is not None}")
-    logger.info(f"🔍 [啟動檢查] DATABASE_URL 存在: {os.getenv('DATABASE_URL') is not None}")
-    logger.info(f"🔍 [啟動檢查] PORT: {os.getenv('PORT', '未設定')}")
-
-    # 初始化數據庫連接 - Don't crash startup if DB fails
+def maintain_post_records_partitions():
+    """post_records 月分區維護：建立本月與下月分區（啟動時與每日執行；封存舊月份需手動執行 services.post_partitions archive）"""
+    if db_pool is None:
+        return
+    conn = None
     try:
-        database_url = os.getenv("DATABASE_URL")
-        if database_url:
-            logger.info(f"🔗 嘗試連接數據庫: {database_url[:20]}...")
-            # Railway PostgreSQL URL 格式轉換（postgresql:// -> postgres:// for psycopg2）
-            if database_url.startswith("postgresql://"):
-                database_url = database_url.replace("postgresql://", "postgres://", 1)
-
-            # 添加連接參數以解決 Railway 連接問題
-            import urllib.parse
-            parsed_url = urllib.parse.urlparse(database_url)
-
-            # 構建連接參數
-            connect_kwargs = {
-                'host': parsed_url.hostname,
-                'port': parsed_url.port or 5432,
-                'database': parsed_url.path[1:],  # 移除前導斜線
-                'user': parsed_url.username,
-                'password': parsed_url.password,
-                'connect_timeout': 30,  # 30秒連接超時
-                'sslmode': 'require',   # Railway 需要 SSL
-                'keepalives_idle': 600, # 保持連接活躍
-                'keepalives_interval': 30,
-                'keepalives_count': 3
-            }
+        conn = get_db_connection()
+        partitions = ensure_partitions(conn)
+        if partitions:
+            logger.info(f"✅ post_records 分區就緒: {partitions}")
+    except Exception as e:
+        logger.error(f"❌ post_records 分區維護失敗: {e}")
+    finally:
+        if conn:
+            return_db_connection(conn)
 
-            # 🔥 FIX: Set DB_CONFIG for asyncpg connections (used in KOL Profile queries)
-            global DB_CONFIG
-            DB_CONFIG = {
-                'host': parsed_url.hostname,
-                'port': parsed_url.port or 5432,
-                'database': parsed_url.path[1:],
-                'user': parsed_url.username,
-                'password': parsed_url.password
-            }
-            logger.info(f"✅ DB_CONFIG 已設置: host={DB_CONFIG['host']}, database={DB_CONFIG['database']}")
-
-            # Create connection pool (1-10 concurrent connections)
-            # Use minconn=1 for faster startup
-            logger.info(f"🔗 創建數據庫連接池...")
-            db_pool = pool.SimpleConnectionPool(
-                minconn=1,  # Minimum 1 connection (faster startup)
-                maxconn=10,  # Maximum 10 concurrent connections
-                **connect_kwargs
-            )
-            logger.info("✅ PostgreSQL 連接池創建成功 (1-10 connections)")
+def init_finlab():
+    """FinLab API 登入（背景執行）"""
+    api_key = os.getenv("FINLAB_API_KEY")
+    if not api_key:
+        logger.warning("⚠️ 未找到 FINLAB_API_KEY 環境變數")
+        return False
 
-            # Don't test pool during startup - let first request validate
-            logger.info("✅ 數據庫連接池初始化完成 (延遲測試到首次使用)")
+    logger.info("🔑 嘗試登入 FinLab API...")
+    finlab.login(api_key)
+    logger.info("✅ FinLab API 登入成功")
 
-            # Create tables using pool
-            try:
-                logger.info("📋 開始創建 post_records 表...")
-                create_post_records_table()
-                logger.info("✅ post_records 表創建完成")
+def init_content_generation():
+    """載入 posting-service 內容生成模組（GPT / 個人化 / Serper）"""
+    global gpt_generator, enhanced_personalization_processor, serper_service
 
-                logger.info("📋 開始創建 schedule_tasks 表...")
-                create_schedule_tasks_table()
-                logger.info("✅ schedule_tasks 表創建完成")
-            except Exception as table_error:
-                logger.error(f"❌ 創建表失敗: {table_error}")
-                # Don't fail startup if table creation fails
-        else:
-            logger.warning("⚠️ 未找到 DATABASE_URL 環境變數，將無法查詢貼文數據")
-            db_pool = None
+    # OpenAI module-level client reuses the shared keep-alive pool
+    try:
+        import openai
+        openai.http_client = get_http_clients().get_sync('openai')
     except Exception as e:
-        logger.error(f"❌ PostgreSQL 數據庫連接失敗: {e}")
-        logger.error(f"❌ 錯誤詳情: {type(e).__name__}: {str(e)}")
-        import traceback
-        logger.error(f"❌ 完整錯誤堆疊: {traceback.format_exc()}")
-        db_pool = None  # Ensure pool is None on failure
+        logger.warning(f"⚠️  OpenAI 共用 HTTP 客戶端設定失敗: {e}")
 
-    # FinLab API 登入 - Don't crash startup if FinLab login fails
+    # 導入 GPT 內容生成器
     try:
-        api_key = os.getenv("FINLAB_API_KEY")
-        if api_key:
-            logger.info("🔑 嘗試登入 FinLab API...")
-            finlab.login(api_key)
-            logger.info("✅ FinLab API 登入成功")
-        else:
-            logger.warning("⚠️ 未找到 FINLAB_API_KEY 環境變數")
+        from gpt_content_generator import GPTContentGenerator
+        gpt_generator = GPTContentGenerator()
+        logger.info("✅ GPT 內容生成器初始化成功")
     except Exception as e:
-        logger.error(f"❌ FinLab API 登入失敗: {e}")
-        logger.error(f"❌ 錯誤詳情: {type(e).__name__}: {str(e)}")
-        # Don't crash - app can still serve other endpoints
+        logger.warning(f"⚠️  GPT 內容生成器導入失敗: {e}，將使用模板生成")
+        gpt_generator = None
 
-    # 載入股票映射表（先嘗試靜態文件）
+    # 導入個人化模組
     try:
-        stock_mapping_path = '/app/stock_mapping.json'
-        if os.path.exists(stock_mapping_path):
-            with open(stock_mapping_path, 'r', encoding='utf-8') as f:
-                stock_mapping = json.load(f)
-            logger.info(f"✅ 載入靜態股票映射表成功: {len(stock_mapping)} 支股票")
-        else:
-            logger.warning(f"⚠️ 靜態股票映射表不存在: {stock_mapping_path}")
+        from personalization_module import enhanced_personalization_processor as processor
+        # KOL 設定改從全程序共用的 KOL Profile 快取讀取；快取首次載入完成前不在事件迴圈上整表載入，
+        # 查詢會拋出例外，由個人化模組改查該 KOL 一筆
+        processor.kol_profile_lookup = lambda serial: get_kol_profile_cache().get(serial, load=False)
+        enhanced_personalization_processor = processor
+        logger.info("✅ 個人化模組初始化成功")
     except Exception as e:
-        logger.error(f"❌ 載入靜態股票映射表失敗: {e}")
+        logger.warning(f"⚠️  個人化模組導入失敗: {e}，將跳過個人化處理")
+        enhanced_personalization_processor = None
 
-    # 從 FinLab 動態載入完整公司資訊
+    # 導入 Serper API 服務
     try:
-        if api_key:
-            logger.info("📊 正在從 FinLab 載入完整公司資訊...")
-            company_info = data.get('company_basic_info')
-            if company_info is not None and not company_info.empty:
-                # 轉換為字典格式
-                for stock_id in company_info['stock_id']:
-                    stock_data = company_info[company_info['stock_id'] == stock_id].iloc[0]
-                    stock_mapping[stock_id] = {
-                        'company_name': stock_data.get('公司簡稱', stock_data.get('公司名稱', f'股票{stock_id}')),
-                        'industry': stock_data.get('產業類別', '未知產業')
-                    }
-                logger.info(f"✅ 從 FinLab 載入完整公司資訊成功: {len(stock_mapping)} 支股票")
-            else:
-                logger.warning("⚠️ 無法從 FinLab 取得公司資訊")
+        # Add posting-service directory to path (both possible locations)
+        current_dir = os.path.dirname(__file__)
+        posting_service_paths = [
+            os.path.join(current_dir, 'posting-service'),
+            os.path.join(os.path.dirname(current_dir), 'posting-service')
+        ]
+
+        for path in posting_service_paths:
+            if path not in sys.path and os.path.exists(path):
+                sys.path.insert(0, path)
+                logger.info(f"📁 添加路徑到 sys.path: {path}")
+
+        from serper_integration import SerperNewsService
+        serper_service = SerperNewsService()
+        if getattr(serper_service, 'client', None) is not None:
+            # 共用 Serper 快取客戶端改走本服務的 serper 連線池（計入 upstream metrics）
+            serper_service.client.http_client = lambda: get_http_clients().get('serper')
+        logger.info("✅ Serper API 服務初始化成功")
     except Exception as e:
-        logger.error(f"❌ 從 FinLab 載入公司資訊失敗: {e}")
+        logger.warning(f"⚠️  Serper API 服務導入失敗: {e}，將使用模擬數據")
+        serper_service = None
+
+    if gpt_generator is None and enhanced_personalization_processor is None and serper_service is None:
+        raise RuntimeError("posting-service modules unavailable")
+
+async def init_reaction_bot():
+    """初始化 Reaction Bot 服務（AsyncPG 連接池 + CMoney 客戶端）"""
+    global reaction_bot_service, cmoney_reaction_client, asyncpg_pool
 
-    # 🔥 Initialize and start APScheduler
+    # Create asyncpg connection pool if DB_CONFIG is available
+    if not DB_CONFIG:
+        logger.warning("⚠️  [Reaction Bot] DB_CONFIG 未設置，Reaction Bot 服務將無法使用")
+        return False
+
+    logger.info("🤖 [Reaction Bot] 正在初始化 Reaction Bot 服務...")
     try:
-        logger.info("🚀 [APScheduler] 正在啟動排程器...")
-
-        # Add job to check schedules every minute
-        scheduler.add_job(
-            check_schedules,
-            'interval',
-            minutes=1,
-            id='check_schedules',
-            replace_existing=True,
-            max_instances=1  # Prevent overlapping runs
+        asyncpg_pool = await asyncpg.create_pool(
+            host=DB_CONFIG['host'],
+            port=DB_CONFIG['port'],
+            database=DB_CONFIG['database'],
+            user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            min_size=1,
+            max_size=5
         )
-
-        # Add job for investment blog auto-posting (every 30 minutes)
-        scheduler.add_job(
-            auto_post_investment_blog,
-            'interval',
-            minutes=30,
-            id='auto_post_investment_blog',
-            replace_existing=True,
-            max_instances=1
+        logger.info("✅ [Reaction Bot] AsyncPG 連接池創建成功")
+
+        # Initialize CMoney reaction client
+        from cmoney_reaction_client import CMoneyReactionClient
+        cmoney_reaction_client = CMoneyReactionClient()
+        logger.info("✅ [Reaction Bot] CMoney 客戶端初始化成功")
+
+        # Initialize reaction bot service
+        from reaction_bot_service import ReactionBotService
+        reaction_bot_service = ReactionBotService(
+            db_connection=asyncpg_pool,
+            cmoney_client=cmoney_reaction_client
         )
+        logger.info("✅ [Reaction Bot] Reaction Bot 服務初始化成功")
+    except Exception:
+        reaction_bot_service = None
+        cmoney_reaction_client = None
+        asyncpg_pool = None
+        raise
 
-        # Start the scheduler
-        scheduler.start()
-        logger.info("✅ [APScheduler] 排程器啟動成功 - 每分鐘檢查排程任務, 每30分鐘檢查投資網誌自動發文")
+async def start_apscheduler():
+    """
+    啟動 APScheduler（分區維護、交易日曆、投資網誌自動發文）
 
-    except Exception as scheduler_error:
-        logger.error(f"❌ [APScheduler] 排程器啟動失敗: {scheduler_error}")
-        logger.error(traceback.format_exc())
-        # Don't crash startup if scheduler fails
+    apscheduler 在這裡才匯入，背景子系統執行，不佔用啟動到 healthy 的時間
+    """
+    global scheduler
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+    logger.info("🚀 [APScheduler] 正在啟動排程器...")
+    scheduler = AsyncIOScheduler(timezone='Asia/Taipei')
+
+    # post_records 月分區維護（每日：建立下月分區）
+    scheduler.add_job(
+        maintain_post_records_partitions,
+        'cron',
+        hour=0,
+        minute=10,
+        id='maintain_post_records_partitions',
+        replace_existing=True,
+        max_instances=1
+    )
+
+    # 交易日曆（每日盤後 FinLab 更新收盤價後重建交易日）
+    scheduler.add_job(
+        refresh_trading_calendar_from_finlab,
+        'cron',
+        hour=18,
+        minute=30,
+        id='refresh_trading_calendar',
+        replace_existing=True,
+        max_instances=1
+    )
+
+    # Add job for investment blog auto-posting (every 30 minutes)
+    scheduler.add_job(
+        auto_post_investment_blog,
+        'interval',
+        minutes=30,
+        id='auto_post_investment_blog',
+        replace_existing=True,
+        max_instances=1
+    )
+
+    # Start the scheduler
+    scheduler.start()
+    logger.info("✅ [APScheduler] 排程器啟動成功 - 每30分鐘檢查投資網誌自動發文（schedule_tasks 由排程分派器處理）")
+
+subsystems.register('database', init_database_schema)
+subsystems.register('finlab', init_finlab)
+subsystems.register('stock_mapping', refresh_stock_mapping_from_finlab, depends_on=['finlab'])
+subsystems.register('trading_calendar', refresh_trading_calendar_from_finlab, depends_on=['finlab'])
+subsystems.register('content_generation', init_content_generation)
+subsystems.register('reaction_bot', init_reaction_bot)
+subsystems.register('schedule_dispatcher', start_schedule_dispatcher, depends_on=['database'])
+subsystems.register('kol_profile_cache', start_kol_profile_cache, depends_on=['database'])
+subsystems.register('scheduler', start_apscheduler)
+
+# UNIFIED_API_FAST_START=false restores blocking startup (wait for every subsystem before serving)
+FAST_START = os.getenv("UNIFIED_API_FAST_START", "true").lower() not in ("0", "false", "no")
 
-    # 🔥 Initialize Reaction Bot Service
-    try:
-        global reaction_bot_service, cmoney_reaction_client, asyncpg_pool
+@app.on_event("startup")
+async def startup_event():
+    """啟動時只做必要的輕量初始化，重型子系統於背景載入"""
+    global stock_mapping, db_pool
 
-        logger.info("🤖 [Reaction Bot] 正在初始化 Reaction Bot 服務...")
+    # 檢查所有關鍵環境變數
+    logger.info("🔍 [啟動檢查] 開始檢查環境變數...")
+    logger.info(f"🔍 [啟動檢查] FINLAB_API_KEY 存在: {os.getenv('FINLAB_API_KEY') is not None}")
+    logger.info(f"🔍 [啟動檢查] FORUM_200_EMAIL 存在: {os.getenv('FORUM_200_EMAIL') is not None}")
+    logger.info(f"🔍 [啟動檢查] FORUM_200_PASSWORD 存在: {os.getenv('FORUM_200_PASSWORD') is not None}")
+    logger.info(f"🔍 [啟動檢查] DATABASE_URL 存在: {os.getenv('DATABASE_URL') is not None}")
+    logger.info(f"🔍 [啟動檢查] PORT: {os.getenv('PORT', '未設定')}")
 
-        # Create asyncpg connection pool if DB_CONFIG is available
-        if DB_CONFIG:
-            import asyncpg
-            asyncpg_pool = await asyncpg.create_pool(
-                host=DB_CONFIG['host'],
-                port=DB_CONFIG['port'],
-                database=DB_CONFIG['database'],
-                user=DB_CONFIG['user'],
-                password=DB_CONFIG['password'],
-                min_size=1,
-                max_size=5
-            )
-            logger.info("✅ [Reaction Bot] AsyncPG 連接池創建成功")
-
-            # Initialize CMoney reaction client
-            from cmoney_reaction_client import CMoneyReactionClient
-            cmoney_reaction_client = CMoneyReactionClient()
-            logger.info("✅ [Reaction Bot] CMoney 客戶端初始化成功")
-
-            # Initialize reaction bot service
-            from reaction_bot_service import ReactionBotService
-            reaction_bot_service = ReactionBotService(
-                db_connection=asyncpg_pool,
-                cmoney_client=cmoney_reaction_client
-            )
-            logger.info("✅ [Reaction Bot] Reaction Bot 服務初始化成功")
-        else:
-            logger.warning("⚠️  [Reaction Bot] DB_CONFIG 未設置，Reaction Bot 服務將無法使用")
+    # 初始化數據庫連接池 - Don't crash startup if DB fails
+    with startup_profile.step('database_pool'):
+        try:
+            # 連接池建立時會先開 DB_POOL_MIN_CONNECTIONS 條連線，放到 worker thread 不阻塞 event loop
+            await asyncio.to_thread(init_database_pool)
+        except Exception as e:
+            logger.error(f"❌ PostgreSQL 數據庫連接池建立失敗: {type(e).__name__}: {e}")
+            logger.error(f"❌ 完整錯誤堆疊: {traceback.format_exc()}")
+            db_pool = None  # Ensure pool is None on failure
 
-    except Exception as reaction_bot_error:
-        logger.error(f"❌ [Reaction Bot] 初始化失敗: {reaction_bot_error}")
-        logger.error(traceback.format_exc())
-        reaction_bot_service = None
-        cmoney_reaction_client = None
-        asyncpg_pool = None
-        # Don't crash startup if reaction bot fails
+    # 交易日曆：本地快取的 FinLab 交易日 + 資料庫休市公告（排程分派器計算 next_run 前就緒）
+    configure_trading_calendar(load_trading_calendar_overrides_from_pool)
+
+    # 載入股票映射表（靜態文件 + 上次的 FinLab 公司資訊快照，毫秒級載入）
+    with startup_profile.step('stock_mapping_snapshot'):
+        try:
+            stock_mapping_path = '/app/stock_mapping.json'
+            if os.path.exists(stock_mapping_path):
+                with open(stock_mapping_path, 'r', encoding='utf-8') as f:
+                    stock_mapping = json.load(f)
+                logger.info(f"✅ 載入靜態股票映射表成功: {len(stock_mapping)} 支股票")
+            else:
+                logger.warning(f"⚠️ 靜態股票映射表不存在: {stock_mapping_path}")
+        except Exception as e:
+            logger.error(f"❌ 載入靜態股票映射表失敗: {e}")
+
+        try:
+            snapshot = load_stock_mapping_snapshot()
+            if snapshot:
+                stock_mapping = {**stock_mapping, **snapshot}
+                logger.info(f"✅ 載入公司資訊快照成功: {len(stock_mapping)} 支股票")
+        except Exception as e:
+            logger.error(f"❌ 載入公司資訊快照失敗: {e}")
+
+        # 建立產業索引（產業篩選 / 產業統計使用）
+        set_stock_mapping(stock_mapping)
+
+    # 🔥 重型子系統（DB schema / FinLab / 公司資訊 / GPT 模組 / Reaction Bot）背景初始化
+    subsystems.start_all()
+    if not FAST_START:
+        logger.info("⏳ UNIFIED_API_FAST_START=false，等待所有子系統初始化完成...")
+        await subsystems.wait_all()
+
+    startup_profile.mark_startup_complete()
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -1337,6 +1334,15 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"❌ [APScheduler] 排程器關閉失敗: {e}")
 
+    if schedule_dispatcher:
+        schedule_dispatcher.stop()
+        logger.info("✅ [Dispatcher] 排程分派器已停止")
+
+    kol_profile_cache = get_kol_profile_cache()
+    if kol_profile_cache.running:
+        kol_profile_cache.stop()
+        logger.info("✅ [KOL Cache] KOL Profile 快取已停止")
+
     try:
         # Close reaction bot resources
         if cmoney_reaction_client:
@@ -1351,14 +1357,42 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"❌ [Reaction Bot] 關閉失敗: {e}")
 
+    try:
+        # Close shared HTTP clients
+        await get_http_clients().aclose()
+        logger.info("✅ 共用 HTTP 客戶端已關閉")
+    except Exception as e:
+        logger.error(f"❌ 共用 HTTP 客戶端關閉失敗: {e}")
+
+# 請求路徑上的 FinLab 登入失敗後，這段時間內不再重試（背景登入失敗時避免每個請求都打登入 API）
+FINLAB_LOGIN_RETRY_SECONDS = int(os.getenv("FINLAB_LOGIN_RETRY_SECONDS", "60"))
+_finlab_request_login = {'logged_in': False, 'retry_after': 0.0}
+
+def login_finlab_on_request(api_key: str):
+    """於請求中登入 FinLab；失敗後 FINLAB_LOGIN_RETRY_SECONDS 秒內直接回報失敗"""
+    now = time.monotonic()
+    if now < _finlab_request_login['retry_after']:
+        raise Exception(f"FinLab 登入失敗，{_finlab_request_login['retry_after'] - now:.0f} 秒後再重試")
+    try:
+        finlab.login(api_key)
+    except Exception:
+        _finlab_request_login['retry_after'] = now + FINLAB_LOGIN_RETRY_SECONDS
+        raise
+    _finlab_request_login['logged_in'] = True
+    _finlab_request_login['retry_after'] = 0.0
+
 def ensure_finlab_login():
     """確保 FinLab 已登入"""
     try:
+        # 背景登入尚未完成或失敗時，於首次使用時同步登入（成功一次即可）
+        api_key = os.getenv("FINLAB_API_KEY")
+        if not subsystems.is_ready('finlab') and not _finlab_request_login['logged_in'] and api_key:
+            login_finlab_on_request(api_key)
+
         test_data = data.get('market_transaction_info:收盤指數')
         if test_data is None:
-            api_key = os.getenv("FINLAB_API_KEY")
             if api_key:
-                finlab.login(api_key)
+                login_finlab_on_request(api_key)
                 logger.info("🔄 FinLab API 重新登入成功")
             else:
                 raise Exception("未找到 FINLAB_API_KEY")
@@ -1390,7 +1424,7 @@ def get_stock_industry(stock_code: str) -> str:
         return stock_mapping[stock_code].get('industry', '未知產業')
     return '未知產業'
 
-def calculate_trading_stats(stock_id: str, latest_date: datetime, close_df: pd.DataFrame) -> dict:
+def calculate_trading_stats(stock_id: str, latest_date: datetime, close_df: 'pd.DataFrame') -> dict:
     """計算過去五個交易日的統計資訊"""
     try:
         trading_days = close_df.index[close_df.index <= latest_date].sort_values(ascending=False)[:5]
@@ -1441,9 +1475,11 @@ async def health_check():
     """健康檢查端點 - 支持 /health 和 /api/health 兩個路徑"""
     logger.info("收到健康檢查請求")
 
-    # 檢查數據庫連接狀態
+    # 檢查數據庫連接狀態（背景初始化完成前不在健康檢查中建立連線）
     db_status = "disconnected"
-    if db_pool:
+    if db_pool and not subsystems.is_ready('database'):
+        db_status = subsystems.status()['database']['state']
+    elif db_pool:
         conn = None
         try:
             conn = get_db_connection()
@@ -1461,6 +1497,8 @@ async def health_check():
     # 檢查 FinLab API 狀態
     finlab_status = "connected" if os.getenv("FINLAB_API_KEY") else "disconnected"
 
+    startup_profile.mark_healthy()
+
     return {
         "status": "healthy",
         "message": "Unified API is running successfully",
@@ -1469,6 +1507,8 @@ async def health_check():
             "finlab": finlab_status,
             "database": db_status
         },
+        # 各子系統就緒狀態（pending / initializing / ready / disabled / failed）
+        "subsystems": subsystems.status(),
         "endpoints": {
             "total": 35,
             "working": 30 if db_status == "connected" else 24,
@@ -1477,6 +1517,34 @@ async def health_check():
     }
 
 
+@app.get("/api/debug/startup-profile")
+async def debug_startup_profile():
+    """
+    啟動效能分析：模組匯入耗時、啟動步驟耗時、各子系統初始化狀態
+
+    imports_total_ms 為啟動路徑上的匯入耗時；lazy_imports_ms 為延後到第一次使用才匯入的模組
+    （pandas / numpy / asyncpg），eager_imports_total_ms 為全部在啟動時匯入的對照值
+    """
+    return {
+        "fast_start": FAST_START,
+        "profile": startup_profile.to_dict(),
+        "subsystems": subsystems.status(),
+        "timestamp": get_current_time().isoformat()
+    }
+
+
+@app.get("/api/debug/upstream-metrics")
+async def debug_upstream_metrics():
+    """各上游服務（CMoney / DTNO / Serper / OpenAI）的延遲、錯誤率與連線重用統計，以及 CMoney token 快取統計"""
+    return {
+        "upstreams": get_http_clients().metrics(),
+        "cmoney_tokens": get_cmoney_token_manager().get_stats(),
+        "finlab_cache": None if isinstance(data, LazyModule) else data.cache.get_stats(),
+        "serper": serper_service.client.get_stats() if getattr(serper_service, "client", None) else None,
+        "timestamp": get_current_time().isoformat()
+    }
+
+
 # ==================== URL Shortener Redirect ====================
 @app.get("/r/cmnews/{short_id}")
 async def redirect_short_url(short_id: str):
@@ -2125,15 +2193,15 @@ async def get_after_hours_limit_up_stocks(
         if industries:
             selected_industries = [industry.strip() for industry in industries.split(',') if industry.strip()]
 
+        # 產業篩選：使用預先建立的產業索引一次產生布林遮罩
+        candidate_stocks = latest_close.index
+        if selected_industries:
+            candidate_stocks = candidate_stocks[get_industry_index().mask(candidate_stocks, selected_industries)]
+
         limit_up_stocks = []
 
-        for stock_id in latest_close.index:
+        for stock_id in candidate_stocks:
             try:
-                if selected_industries:
-                    stock_industry = get_stock_industry(stock_id)
-                    if stock_industry not in selected_industries:
-                        continue
-
                 today_price = latest_close[stock_id]
                 yesterday_price = previous_close[stock_id]
 
@@ -2232,15 +2300,15 @@ async def get_after_hours_limit_down_stocks(
         if industries:
             selected_industries = [industry.strip() for industry in industries.split(',') if industry.strip()]
 
+        # 產業篩選：使用預先建立的產業索引一次產生布林遮罩
+        candidate_stocks = latest_close.index
+        if selected_industries:
+            candidate_stocks = candidate_stocks[get_industry_index().mask(candidate_stocks, selected_industries)]
+
         limit_down_stocks = []
 
-        for stock_id in latest_close.index:
+        for stock_id in candidate_stocks:
             try:
-                if selected_industries:
-                    stock_industry = get_stock_industry(stock_id)
-                    if stock_industry not in selected_industries:
-                        continue
-
                 today_price = latest_close[stock_id]
                 yesterday_price = previous_close[stock_id]
 
@@ -2746,12 +2814,10 @@ async def get_industries():
     logger.info("收到 industries 請求")
 
     try:
-        industries = set()
-        for stock_code, info in stock_mapping.items():
-            if 'industry' in info:
-                industries.add(info['industry'])
-
-        industries_list = [{"id": ind, "name": ind} for ind in sorted(list(industries))]
+        # 未知產業只供篩選內部使用（沒有產業資料的股票），不列為可選的產業
+        industries_list = [
+            {"id": ind, "name": ind} for ind in get_industry_index().industries if ind != UNKNOWN_INDUSTRY
+        ]
 
         result = {
             "success": True,
@@ -2772,14 +2838,14 @@ async def get_stocks_by_industry(industry: str = Query(..., description="產業
     logger.info(f"收到 stocks_by_industry 請求: industry={industry}")
 
     try:
-        stocks = []
-        for stock_code, info in stock_mapping.items():
-            if info.get('industry') == industry:
-                stocks.append({
-                    "stock_id": stock_code,
-                    "stock_name": info.get('company_name', stock_code),
-                    "industry": industry
-                })
+        stocks = [
+            {
+                "stock_id": stock_code,
+                "stock_name": stock_mapping.get(stock_code, {}).get('company_name', stock_code),
+                "industry": industry
+            }
+            for stock_code in get_industry_index().stocks_in(industry)
+        ]
 
         result = {
             "success": True,
@@ -2795,10 +2861,59 @@ async def get_stocks_by_industry(industry: str = Query(..., description="產業
         logger.error(f"獲取產業股票失敗: {e}")
         return {"error": str(e)}
 
+@app.get("/api/industry_stats")
+async def get_industry_stats(
+    industries: str = Query("", description="產業類別篩選（逗號分隔，空白表示全部）")
+):
+    """獲取最新交易日各產業統計（上漲家數比例、平均漲跌幅）"""
+    logger.info(f"收到 industry_stats 請求: industries={industries}")
+
+    try:
+        ensure_finlab_login()
+
+        close_df = data.get('price:收盤價')
+        if close_df is None or close_df.empty or len(close_df.index) < 2:
+            return {"error": "無法獲取收盤價數據"}
+
+        close_df = close_df.sort_index()
+        latest_date = close_df.index[-1]
+        previous_date = close_df.index[-2]
+
+        latest_close = close_df.loc[latest_date]
+        previous_close = close_df.loc[previous_date].replace(0, np.nan)
+        change_percent = (latest_close - previous_close) / previous_close * 100
+
+        stats = get_industry_index().sector_stats(change_percent)
+
+        selected_industries = [industry.strip() for industry in industries.split(',') if industry.strip()]
+        if selected_industries:
+            stats = [s for s in stats if s['industry'] in selected_industries]
+
+        return {
+            "success": True,
+            "data": stats,
+            "count": len(stats),
+            "date": latest_date.strftime('%Y-%m-%d'),
+            "previous_date": previous_date.strftime('%Y-%m-%d'),
+            "timestamp": get_current_time().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"獲取產業統計失敗: {e}")
+        return {"error": str(e)}
+
 @app.get("/api/get_ohlc")
-async def get_ohlc(stock_id: str = Query(..., description="股票代碼")):
+async def get_ohlc(
+    request: Request,
+    stock_id: str = Query(..., description="股票代碼"),
+    format: Optional[str] = Query(None, description="回應格式：records（預設）、columns（欄式 JSON）、arrow（Arrow IPC）；也可用 Accept 標頭指定")
+):
     """獲取特定股票的 OHLC 數據"""
-    logger.info(f"收到 get_ohlc 請求: stock_id={stock_id}")
+    logger.info(f"收到 get_ohlc 請求: stock_id={stock_id}, format={format}")
+
+    try:
+        fmt = negotiate_format(request.headers.get('accept'), format)
+    except ValueError as e:
+        return {"error": str(e)}
 
     try:
         ensure_finlab_login()
@@ -2826,7 +2941,7 @@ async def get_ohlc(stock_id: str = Query(..., description="股票代碼")):
         one_year_ago = datetime.today() - timedelta(days=365)
         ohlcv_df = ohlcv_df[ohlcv_df['date'] >= one_year_ago]
 
-        return json.loads(ohlcv_df.to_json(orient="records", date_format="iso"))
+        return frame_response(ohlcv_df, fmt)
     except Exception as e:
         logger.error(f"獲取 OHLC 數據失敗: {e}")
         return {"error": str(e)}
@@ -2843,9 +2958,9 @@ def get_forum_200_credentials():
     member_id = os.getenv("FORUM_200_MEMBER_ID", "9505546")  # 預設值
 
     # 記錄環境變數狀態（不記錄實際值以保護隱私）
-    logger.info(f"📋 [憑證檢查] FORUM_200_EMAIL 存在: {email is not None}")
-    logger.info(f"📋 [憑證檢查] FORUM_200_PASSWORD 存在: {password is not None}")
-    logger.info(f"📋 [憑證檢查] FORUM_200_MEMBER_ID: {member_id}")
+    logger.debug(f"📋 [憑證檢查] FORUM_200_EMAIL 存在: {email is not None}")
+    logger.debug(f"📋 [憑證檢查] FORUM_200_PASSWORD 存在: {password is not None}")
+    logger.debug(f"📋 [憑證檢查] FORUM_200_MEMBER_ID: {member_id}")
 
     if not email or not password:
         # 更詳細的錯誤訊息
@@ -2858,65 +2973,21 @@ def get_forum_200_credentials():
         logger.error(f"❌ {error_msg}")
         raise Exception(error_msg)
 
-    logger.info(f"✅ [憑證檢查] 成功載入 forum_200 憑證: {email}")
+    logger.debug(f"✅ [憑證檢查] 成功載入 forum_200 憑證: {email}")
     return {
         "email": email,
         "password": password,
         "member_id": member_id
     }
 
-_token_cache = {
-    "token": None,
-    "expires_at": None,
-    "created_at": None
-}
-
 async def get_dynamic_auth_token() -> str:
-    """使用 forum_200 KOL 憑證動態取得 CMoney API token"""
+    """使用 forum_200 KOL 憑證動態取得 CMoney API token（由共用 token manager 快取 / 單飛登入）"""
     try:
-        # Check token cache validity
-        if _token_cache["token"] and _token_cache["expires_at"]:
-            current_time = get_current_time()
-            expires_at = _token_cache["expires_at"]
-
-            # Handle timezone-naive datetime from cmoney_client
-            if expires_at.tzinfo is None:
-                # Assume naive datetime is in local timezone (Taipei)
-                taipei_tz = pytz.timezone('Asia/Taipei')
-                expires_at = taipei_tz.localize(expires_at)
-
-            if current_time < expires_at:
-                logger.info("✅ 使用快取的 CMoney API token")
-                return _token_cache["token"]
-
-        logger.info("🔐 開始使用 forum_200 憑證登入 CMoney...")
-
-        # 將 src 路徑加入 Python path
-        src_path = '/app/src'
-        if src_path not in sys.path:
-            sys.path.insert(0, src_path)
-
-        from src.clients.cmoney.cmoney_client import CMoneyClient, LoginCredentials
-
-        cmoney_client = CMoneyClient()
         forum_credentials = get_forum_200_credentials()
-        credentials = LoginCredentials(
-            email=forum_credentials["email"],
-            password=forum_credentials["password"]
+        return await get_cmoney_token_manager().get_token(
+            forum_credentials["email"],
+            forum_credentials["password"]
         )
-
-        login_result = await cmoney_client.login(credentials)
-
-        if not login_result or not login_result.token:
-            raise Exception("forum_200 登入失敗")
-
-        _token_cache["token"] = login_result.token
-        _token_cache["expires_at"] = login_result.expires_at
-        _token_cache["created_at"] = get_current_time()
-
-        logger.info(f"✅ forum_200 登入成功，token 有效期至: {login_result.expires_at}")
-        return login_result.token
-
     except Exception as e:
         logger.error(f"❌ 動態取得 CMoney API token 失敗: {e}")
         raise HTTPException(status_code=500, detail=f"認證失敗: {str(e)}")
@@ -2963,48 +3034,48 @@ async def get_intraday_trigger_stocks(request: Request):
 
         # 發送請求到 CMoney API
         logger.info(f"🌐 [盤中觸發器] 發送請求到 CMoney API: {endpoint}")
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{endpoint}?columns={columns}",
-                json=request_data,
-                headers=headers
-            )
+        client = get_http_client('cmoney_api')
+        response = await client.post(
+            f"{endpoint}?columns={columns}",
+            json=request_data,
+            headers=headers
+        )
 
-            logger.info(f"📡 [盤中觸發器] CMoney API 響應狀態: {response.status_code}")
+        logger.info(f"📡 [盤中觸發器] CMoney API 響應狀態: {response.status_code}")
 
-            if response.status_code != 200:
-                logger.error(f"❌ [盤中觸發器] CMoney API 請求失敗: HTTP {response.status_code}, 響應: {response.text}")
-                raise HTTPException(status_code=500, detail=f"CMoney API 請求失敗: {response.status_code}")
+        if response.status_code != 200:
+            logger.error(f"❌ [盤中觸發器] CMoney API 請求失敗: HTTP {response.status_code}, 響應: {response.text}")
+            raise HTTPException(status_code=500, detail=f"CMoney API 請求失敗: {response.status_code}")
 
-            # 解析響應數據
-            raw_data = response.json()
-            logger.info(f"📊 [盤中觸發器] 收到數據: {len(raw_data)} 筆記錄")
+        # 解析響應數據
+        raw_data = response.json()
+        logger.info(f"📊 [盤中觸發器] 收到數據: {len(raw_data)} 筆記錄")
 
-            # 提取股票代碼並映射到股票名稱和產業
-            stock_codes = [item[7] for item in raw_data if len(item) > 7 and item[7]]
+        # 提取股票代碼並映射到股票名稱和產業
+        stock_codes = [item[7] for item in raw_data if len(item) > 7 and item[7]]
 
-            # 構建包含股票名稱和產業的完整數據
-            stocks_with_info = []
-            for stock_code in stock_codes:
-                stock_name = get_stock_name(stock_code)
-                stock_industry = get_stock_industry(stock_code)
-                stocks_with_info.append({
-                    "stock_code": stock_code,
-                    "stock_name": stock_name,
-                    "industry": stock_industry
-                })
+        # 構建包含股票名稱和產業的完整數據
+        stocks_with_info = []
+        for stock_code in stock_codes:
+            stock_name = get_stock_name(stock_code)
+            stock_industry = get_stock_industry(stock_code)
+            stocks_with_info.append({
+                "stock_code": stock_code,
+                "stock_name": stock_name,
+                "industry": stock_industry
+            })
 
-            logger.info(f"✅ [盤中觸發器] 執行成功，獲取 {len(stocks_with_info)} 支股票")
-            # 提取股票列表避免 f-string 嵌套問題
-            stock_list = [f"{s['stock_code']}({s['stock_name']})" for s in stocks_with_info[:5]]
-            logger.info(f"📋 [盤中觸發器] 股票列表: {stock_list}...")
+        logger.info(f"✅ [盤中觸發器] 執行成功，獲取 {len(stocks_with_info)} 支股票")
+        # 提取股票列表避免 f-string 嵌套問題
+        stock_list = [f"{s['stock_code']}({s['stock_name']})" for s in stocks_with_info[:5]]
+        logger.info(f"📋 [盤中觸發器] 股票列表: {stock_list}...")
 
-            return {
-                "success": True,
-                "stocks": stock_codes,  # 返回股票代碼字符串數組，與前端期望格式一致
-                "data": raw_data,  # 保留原始 CMoney 數據
-                "count": len(stock_codes)
-            }
+        return {
+            "success": True,
+            "stocks": stock_codes,  # 返回股票代碼字符串數組，與前端期望格式一致
+            "data": raw_data,  # 保留原始 CMoney 數據
+            "count": len(stock_codes)
+        }
 
     except httpx.TimeoutException:
         logger.error("❌ [盤中觸發器] CMoney API 請求超時")
@@ -3040,56 +3111,56 @@ async def execute_cmoney_intraday_trigger(processing: list, trigger_name: str):
         }
 
         # 發送請求到 CMoney API
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{endpoint}?columns={columns}",
-                json=request_data,
-                headers=headers
-            )
+        client = get_http_client('cmoney_api')
+        response = await client.post(
+            f"{endpoint}?columns={columns}",
+            json=request_data,
+            headers=headers
+        )
 
-            if response.status_code != 200:
-                raise HTTPException(status_code=500, detail=f"CMoney API 請求失敗: {response.status_code}")
+        if response.status_code != 200:
+            raise HTTPException(status_code=500, detail=f"CMoney API 請求失敗: {response.status_code}")
 
-            raw_data = response.json()
-            # CMoney API columns: 交易時間,傳輸序號,內外盤旗標,即時成交價,即時成交量,最低價,最高價,標的,漲跌,漲跌幅,累計成交總額,累計成交量,開盤價
-            # Index mapping: 0=交易時間, 1=傳輸序號, 2=內外盤旗標, 3=即時成交價, 4=即時成交量, 5=最低價, 6=最高價, 7=標的, 8=漲跌, 9=漲跌幅, 10=累計成交總額, 11=累計成交量, 12=開盤價
+        raw_data = response.json()
+        # CMoney API columns: 交易時間,傳輸序號,內外盤旗標,即時成交價,即時成交量,最低價,最高價,標的,漲跌,漲跌幅,累計成交總額,累計成交量,開盤價
+        # Index mapping: 0=交易時間, 1=傳輸序號, 2=內外盤旗標, 3=即時成交價, 4=即時成交量, 5=最低價, 6=最高價, 7=標的, 8=漲跌, 9=漲跌幅, 10=累計成交總額, 11=累計成交量, 12=開盤價
 
-            stocks_with_info = []
-            for item in raw_data:
-                if len(item) >= 13 and item[7]:  # Ensure we have all fields
-                    stock_code = item[7]
+        stocks_with_info = []
+        for item in raw_data:
+            if len(item) >= 13 and item[7]:  # Ensure we have all fields
+                stock_code = item[7]
 
-                    # Calculate 5-day trading statistics
-                    # Note: Historical data not available in intraday context, using defaults
-                    stats = {"up_days": 0, "five_day_change": 0.0}
+                # Calculate 5-day trading statistics
+                # Note: Historical data not available in intraday context, using defaults
+                stats = {"up_days": 0, "five_day_change": 0.0}
 
-                    stocks_with_info.append({
-                        "stock_code": stock_code,
-                        "stock_name": get_stock_name(stock_code),
-                        "industry": get_stock_industry(stock_code),
-                        "current_price": float(item[3]) if item[3] else 0.0,  # 即時成交價
-                        "open_price": float(item[12]) if item[12] else 0.0,  # 開盤價
-                        "high_price": float(item[6]) if item[6] else 0.0,  # 最高價
-                        "low_price": float(item[5]) if item[5] else 0.0,  # 最低價
-                        "change_amount": float(item[8]) if item[8] else 0.0,  # 漲跌
-                        "change_percent": float(item[9]) if item[9] else 0.0,  # 漲跌幅
-                        "volume": int(item[11]) if item[11] else 0,  # 累計成交量
-                        "volume_amount": float(item[10]) if item[10] else 0.0,  # 累計成交總額
-                        "trade_time": item[0] if item[0] else "",  # 交易時間
-                        # Add 5-day statistics
-                        "up_days_5": stats['up_days'],  # 五日上漲天數
-                        "five_day_change": stats['five_day_change']  # 五日漲跌幅
-                    })
+                stocks_with_info.append({
+                    "stock_code": stock_code,
+                    "stock_name": get_stock_name(stock_code),
+                    "industry": get_stock_industry(stock_code),
+                    "current_price": float(item[3]) if item[3] else 0.0,  # 即時成交價
+                    "open_price": float(item[12]) if item[12] else 0.0,  # 開盤價
+                    "high_price": float(item[6]) if item[6] else 0.0,  # 最高價
+                    "low_price": float(item[5]) if item[5] else 0.0,  # 最低價
+                    "change_amount": float(item[8]) if item[8] else 0.0,  # 漲跌
+                    "change_percent": float(item[9]) if item[9] else 0.0,  # 漲跌幅
+                    "volume": int(item[11]) if item[11] else 0,  # 累計成交量
+                    "volume_amount": float(item[10]) if item[10] else 0.0,  # 累計成交總額
+                    "trade_time": item[0] if item[0] else "",  # 交易時間
+                    # Add 5-day statistics
+                    "up_days_5": stats['up_days'],  # 五日上漲天數
+                    "five_day_change": stats['five_day_change']  # 五日漲跌幅
+                })
 
-            logger.info(f"✅ [{trigger_name}] 獲取 {len(stocks_with_info)} 支股票")
+        logger.info(f"✅ [{trigger_name}] 獲取 {len(stocks_with_info)} 支股票")
 
-            return {
-                "success": True,
-                "total_count": len(stocks_with_info),
-                "stocks": stocks_with_info,
-                "timestamp": get_current_time().isoformat(),
-                "trigger_type": trigger_name
-            }
+        return {
+            "success": True,
+            "total_count": len(stocks_with_info),
+            "stocks": stocks_with_info,
+            "timestamp": get_current_time().isoformat(),
+            "trigger_type": trigger_name
+        }
 
     except Exception as e:
         logger.error(f"❌ [{trigger_name}] 執行失敗: {e}")
@@ -3417,26 +3488,10 @@ async def manual_posting(request: Request):
         else:
             chosen_model_id = "gpt-4o-mini"  # 預設值
 
-        # 優先級 2: 從數據庫獲取 KOL 完整資料
+        # 優先級 2: 從 KOL Profile 快取獲取 KOL 完整資料（不查詢數據庫）
         try:
-            conn = await asyncpg.connect(
-                host=DB_CONFIG['host'],
-                port=DB_CONFIG['port'],
-                database=DB_CONFIG['database'],
-                user=DB_CONFIG['user'],
-                password=DB_CONFIG['password']
-            )
-
-            # 🔥 查詢完整 KOL Profile (包含 prompt 設定 + 簽名檔)
-            kol_row = await conn.fetchrow("""
-                SELECT serial, nickname, persona, model_id,
-                       prompt_persona, prompt_style, prompt_guardrails, prompt_skeleton,
-                       signature
-                FROM kol_profiles
-                WHERE serial = $1
-            """, str(kol_serial))
-
-            await conn.close()
+            # 🔥 完整 KOL Profile (包含 prompt 設定 + 簽名檔)
+            kol_row = await get_kol_profile_cache().get_async(kol_serial)
 
             if kol_row:
                 # 🔥 構建 kol_profile dict (包含完整 prompt 設定 + 簽名檔)
@@ -3577,7 +3632,7 @@ async def manual_posting(request: Request):
             logger.info(f"✅ 使用用戶自定義內容: title={custom_title[:30]}..., content_length={len(custom_content)}")
             title = custom_title
             content = custom_content
-        elif gpt_generator:
+        elif gpt_generator or (await subsystems.ensure('content_generation', timeout=60) and gpt_generator):
             # No custom content - generate with GPT
             logger.info(f"使用 GPT 生成器生成內容: stock_code={stock_code}, kol={kol_profile.get('nickname')}, model={chosen_model_id}")
             try:
@@ -3962,9 +4017,10 @@ async def performance_test(request: Request):
         # Step 2.5: Serper API Call (for news data)
         step_start = time.time()
         serper_analysis = {}
+        await subsystems.ensure('content_generation', timeout=60)
         if serper_service:
             try:
-                serper_analysis = serper_service.get_comprehensive_stock_analysis(
+                serper_analysis = await serper_service.get_comprehensive_stock_analysis(
                     stock_code=stock_code,
                     stock_name=stock_name,
                     search_keywords=None,
@@ -4215,15 +4271,65 @@ async def get_interaction_analysis():
 
 # ==================== Posts API 功能 ====================
 
+# post_records 欄位快取（每個 process 只查一次 information_schema；建表 / 遷移後重置）
+_post_records_columns: Optional[List[str]] = None
+
+# 列表檢視預設不需要的大型 TEXT JSON 欄位（fields=summary 時排除）
+POST_LIST_HEAVY_FIELDS = {'content_md', 'technical_analysis', 'serper_data', 'generation_params', 'commodity_tags', 'alternative_versions'}
+
+
+def get_post_records_columns(cursor) -> List[str]:
+    """post_records 欄位列表（快取），表不存在時回傳空列表（不快取）"""
+    global _post_records_columns
+    if _post_records_columns is None:
+        cursor.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'post_records'
+            ORDER BY ordinal_position
+        """)
+        columns = [row['column_name'] for row in cursor.fetchall()]
+        if not columns:
+            return []
+        _post_records_columns = columns
+        logger.info(f"📊 post_records 欄位已快取: {len(columns)} 欄")
+    return _post_records_columns
+
+
+def reset_post_records_columns_cache():
+    global _post_records_columns
+    _post_records_columns = None
+
+
+def encode_posts_cursor(created_at, post_id: str) -> str:
+    """Keyset cursor: (created_at, post_id) of the last row on the page"""
+    created = created_at.isoformat() if isinstance(created_at, datetime) else created_at
+    raw = json.dumps([created, post_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_posts_cursor(cursor_value: str):
+    """Inverse of encode_posts_cursor; raises ValueError on malformed cursors"""
+    try:
+        padded = cursor_value + '=' * (-len(cursor_value) % 4)
+        created, post_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created), str(post_id)
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {e}")
+
+
 @app.get("/api/posts")
 async def get_posts(
-    skip: int = Query(0, description="跳過的記錄數"),
+    skip: int = Query(0, description="跳過的記錄數（未提供 cursor 時使用）"),
     limit: int = Query(100, description="返回的記錄數，默認100條"),
     status: str = Query(None, description="狀態篩選"),
-    session_id: int = Query(None, description="Session ID篩選")
+    session_id: int = Query(None, description="Session ID篩選"),
+    page_cursor: str = Query(None, alias="cursor", description="Keyset 分頁游標（上一頁回傳的 next_cursor），提供時忽略 skip"),
+    fields: str = Query(None, description="欄位投影：逗號分隔欄位名稱，或 summary（排除大型 JSON 欄位）"),
+    exact_count: bool = Query(False, description="True 時回傳精確總數（COUNT(*)），否則回傳估算值"),
+    include_archived: bool = Query(False, description="True 時線上資料不足一頁會接著讀取已封存（Parquet）的舊月份")
 ):
-    """獲取貼文列表（從 PostgreSQL 數據庫）"""
-    logger.info(f"收到 get_posts 請求: skip={skip}, limit={limit}, status={status}, session_id={session_id}")
+    """獲取貼文列表（從 PostgreSQL 數據庫，依 (created_at, post_id) 由新到舊）"""
+    logger.info(f"收到 get_posts 請求: skip={skip}, limit={limit}, status={status}, session_id={session_id}, cursor={'yes' if page_cursor else 'no'}, fields={fields}")
 
     conn = None
     try:
@@ -4240,6 +4346,13 @@ async def get_posts(
                 "timestamp": get_current_time().isoformat()
             }
 
+        after = None
+        if page_cursor:
+            try:
+                after = decode_posts_cursor(page_cursor)
+            except ValueError as e:
+                return {"success": False, "posts": [], "count": 0, "error": str(e), "timestamp": get_current_time().isoformat()}
+
         # Get connection from pool
         conn = get_db_connection()
 
@@ -4248,19 +4361,9 @@ async def get_posts(
 
         # 查詢 post_records 表
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            # 首先檢查表是否存在
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables
-                    WHERE table_schema = 'public'
-                    AND table_name = 'post_records'
-                ) as exists;
-            """)
-            result = cursor.fetchone()
-            table_exists = result['exists'] if result else False
-            logger.info(f"📊 post_records 表存在狀態: {table_exists}")
-
-            if not table_exists:
+            # 檢查表是否存在（欄位列表每個 process 只查一次）
+            columns = get_post_records_columns(cursor)
+            if not columns:
                 logger.error("❌ post_records 表不存在")
                 return {
                     "success": False,
@@ -4272,36 +4375,61 @@ async def get_posts(
                     "timestamp": get_current_time().isoformat()
                 }
 
-            # 獲取總數（在查詢前先檢查）
-            count_query = "SELECT COUNT(*) as count FROM post_records"
-            count_params = []
+            # 欄位投影（keyset 欄位 created_at / post_id 一律包含）
+            if not fields:
+                selected = columns
+            elif fields.strip() == 'summary':
+                selected = [c for c in columns if c not in POST_LIST_HEAVY_FIELDS]
+            else:
+                requested = [f.strip() for f in fields.split(',') if f.strip()]
+                unknown = [f for f in requested if f not in columns]
+                if unknown:
+                    return {
+                        "success": False,
+                        "posts": [],
+                        "count": 0,
+                        "error": f"未知欄位: {', '.join(unknown)}",
+                        "timestamp": get_current_time().isoformat()
+                    }
+                selected = [c for c in columns if c in requested or c in ('post_id', 'created_at')]
+            select_sql = ", ".join(f'"{c}"' for c in selected)
+
             where_clauses = []
+            filter_params = []
 
             if status:
                 where_clauses.append("status = %s")
-                count_params.append(status)
+                filter_params.append(status)
 
             if session_id is not None:
                 where_clauses.append("session_id = %s")
-                count_params.append(session_id)
-
-            if where_clauses:
-                count_query += " WHERE " + " AND ".join(where_clauses)
-
-            cursor.execute(count_query, count_params)
-            total_count = cursor.fetchone()['count']
-            logger.info(f"📊 數據庫中總貼文數 (filtered): {total_count}")
-
-            # 構建查詢
-            query = "SELECT * FROM post_records"
-            params = []
+                filter_params.append(session_id)
 
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-                params.extend(count_params)
+            filter_sql = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
 
-            query += " ORDER BY created_at DESC LIMIT %s OFFSET %s"
-            params.extend([limit, skip])
+            # 總數：精確 COUNT(*) 或估算
+            if exact_count:
+                cursor.execute(f"SELECT COUNT(*) as count FROM post_records{filter_sql}", filter_params)
+                total_count = cursor.fetchone()['count']
+            else:
+                total_count = estimate_post_count(cursor, filter_sql, filter_params)
+            logger.info(f"📊 數據庫中總貼文數 (filtered, {'exact' if exact_count else 'estimate'}): {total_count}")
+
+            # 構建查詢（keyset：(created_at, post_id) < 上一頁最後一筆）
+            page_clauses = list(where_clauses)
+            params = list(filter_params)
+            if after:
+                page_clauses.append("(created_at, post_id) < (%s, %s)")
+                params.extend(after)
+
+            query = f"SELECT {select_sql} FROM post_records"
+            if page_clauses:
+                query += " WHERE " + " AND ".join(page_clauses)
+            query += " ORDER BY created_at DESC, post_id DESC LIMIT %s"
+            params.append(limit)
+            if not after and skip:
+                query += " OFFSET %s"
+                params.append(skip)
 
             logger.info(f"🔍 執行 SQL 查詢: {query} with params: {params}")
             cursor.execute(query, params)
@@ -4310,6 +4438,22 @@ async def get_posts(
             conn.commit()  # Commit after all reads
             logger.info(f"✅ 查詢到 {len(posts)} 條貼文數據，總數: {total_count}")
 
+            # 📦 線上分區讀完後接著讀封存檔（同樣的 keyset 順序；OFFSET 超出線上資料時不適用）
+            archived_posts = []
+            if include_archived and len(posts) < limit and (posts or after or not skip):
+                boundary = (posts[-1]['created_at'], posts[-1]['post_id']) if posts else after
+                archived_posts = await asyncio.to_thread(
+                    read_archived_posts, limit - len(posts), boundary, status, session_id, selected
+                )
+                if archived_posts:
+                    logger.info(f"📦 從封存檔補上 {len(archived_posts)} 條貼文")
+                    posts = list(posts) + archived_posts
+
+            next_cursor = None
+            if posts and len(posts) == limit and posts[-1]['created_at'] is not None:
+                last = posts[-1]
+                next_cursor = encode_posts_cursor(last['created_at'], last['post_id'])
+
             # 🔥 FIX: Convert naive UTC datetimes to Taipei timezone
             posts_with_timezone = [convert_post_datetimes_to_taipei(dict(post)) for post in posts]
 
@@ -4317,8 +4461,11 @@ async def get_posts(
                 "success": True,
                 "posts": posts_with_timezone,
                 "count": total_count,
+                "count_is_estimate": not exact_count,
                 "skip": skip,
                 "limit": limit,
+                "next_cursor": next_cursor,
+                "archived_in_page": len(archived_posts),
                 "timestamp": get_current_time().isoformat()
             }
 
@@ -4392,72 +4539,61 @@ async def refresh_kol_interactions(serial: str):
 
         logger.info(f"Found {len(posts)} published posts for KOL {serial}")
 
-        # Login to CMoney to get access token
-        async with httpx.AsyncClient() as client:
-            login_response = await client.post(
-                "https://www.cmoney.tw/member/login/jsonp.aspx",
-                data={"a": email, "b": password, "remember": 0},
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=30.0
-            )
-
-            if login_response.status_code != 200:
-                return {"success": False, "error": "CMoney login failed", "timestamp": get_current_time().isoformat()}
-
-            # Extract access token
-            token_data = login_response.json()
-            access_token = token_data.get("Data", {}).get("access_token")
-
-            if not access_token:
-                return {"success": False, "error": "Failed to get access token", "timestamp": get_current_time().isoformat()}
+        # Login to CMoney to get access token (cached per KOL by the token manager)
+        client = get_http_client('cmoney_api')
+        try:
+            access_token = await get_cmoney_token_manager().get_token(email, password)
+        except Exception as login_error:
+            logger.error(f"KOL {serial} 登入失敗: {login_error}")
+            return {"success": False, "error": "CMoney login failed", "timestamp": get_current_time().isoformat()}
 
-            # Refresh interaction data for each post
-            updated_count = 0
-            failed_count = 0
+        # Refresh interaction data for each post
+        updated_count = 0
+        failed_count = 0
 
-            for post in posts:
-                article_id = post['article_id']
-                post_id = post['post_id']
+        for post in posts:
+            article_id = post['article_id']
+            post_id = post['post_id']
 
-                try:
-                    # Fetch interaction data from CMoney
-                    interaction_response = await client.get(
-                        f"https://forumservice.cmoney.tw/api/Article/{article_id}",
-                        headers={
-                            "Authorization": f"Bearer {access_token}",
-                            "X-Version": "2.0",
-                            "accept": "application/json"
-                        },
-                        timeout=15.0
-                    )
+            try:
+                # Fetch interaction data from CMoney
+                interaction_response = await client.get(
+                    f"https://forumservice.cmoney.tw/api/Article/{article_id}",
+                    headers={
+                        "Authorization": f"Bearer {access_token}",
+                        "X-Version": "2.0",
+                        "accept": "application/json"
+                    },
+                    timeout=15.0
+                )
 
-                    if interaction_response.status_code == 200:
-                        data = interaction_response.json()
+                if interaction_response.status_code == 200:
+                    data = interaction_response.json()
 
-                        # 🔥 FIX: Use correct CMoney API response field names
-                        # Response: emojiCount.like, commentCount, collectedCount, donation
-                        emoji_count = data.get("emojiCount", {})
-                        likes = emoji_count.get("like", 0)
-                        comments = data.get("commentCount", 0)
-                        shares = data.get("collectedCount", 0)  # Using collections as shares
-                        donations = data.get("donation", 0)  # 🔥 打賞數量
+                    # 🔥 FIX: Use correct CMoney API response field names
+                    # Response: emojiCount.like, commentCount, collectedCount, donation
+                    emoji_count = data.get("emojiCount", {})
+                    likes = emoji_count.get("like", 0)
+                    comments = data.get("commentCount", 0)
+                    shares = data.get("collectedCount", 0)  # Using collections as shares
+                    donations = data.get("donation", 0)  # 🔥 打賞數量
 
-                        # Update database (include donations and refresh timestamp)
-                        with conn.cursor() as update_cursor:
-                            update_cursor.execute("""
-                                UPDATE post_records
-                                SET likes = %s, comments = %s, shares = %s, donations = %s, updated_at = CURRENT_TIMESTAMP
-                                WHERE post_id = %s
-                            """, (likes, comments, shares, donations, post_id))
+                    # Update database (include donations and refresh timestamp)
+                    with conn.cursor() as update_cursor:
+                        update_cursor.execute("""
+                            UPDATE post_records
+                            SET likes = %s, comments = %s, shares = %s, donations = %s, updated_at = CURRENT_TIMESTAMP
+                            WHERE post_id = %s
+                        """, (likes, comments, shares, donations, post_id))
 
-                        updated_count += 1
-                        logger.info(f"Updated post {post_id}: {likes} likes, {comments} comments, {shares} shares, {donations} donations")
+                    updated_count += 1
+                    logger.info(f"Updated post {post_id}: {likes} likes, {comments} comments, {shares} shares, {donations} donations")
 
-                except Exception as e:
-                    logger.error(f"Failed to update post {post_id}: {e}")
-                    failed_count += 1
+            except Exception as e:
+                logger.error(f"Failed to update post {post_id}: {e}")
+                failed_count += 1
 
-            conn.commit()
+        conn.commit()
 
         logger.info(f"Refresh complete for KOL {serial}: {updated_count} updated, {failed_count} failed")
 
@@ -4539,118 +4675,99 @@ async def refresh_all_interactions():
         updated_count = 0
         failed_count = 0
 
-        async with httpx.AsyncClient() as client:
-            for kol_serial, kol_data in kol_posts.items():
-                email = kol_data['email']
-                password = kol_data['password']
+        client = get_http_client('cmoney_api')
+        for kol_serial, kol_data in kol_posts.items():
+            email = kol_data['email']
+            password = kol_data['password']
 
-                if not email or not password:
-                    logger.warning(f"KOL {kol_serial} 沒有登入憑證，跳過")
-                    failed_count += len(kol_data['posts'])
-                    continue
+            if not email or not password:
+                logger.warning(f"KOL {kol_serial} 沒有登入憑證，跳過")
+                failed_count += len(kol_data['posts'])
+                continue
 
-                # Login to CMoney using correct endpoint
-                try:
-                    login_response = await client.post(
-                        "https://social.cmoney.tw/identity/token",
-                        data={
-                            "grant_type": "password",
-                            "login_method": "email",
-                            "client_id": "cmstockcommunity",
-                            "account": email,
-                            "password": password
-                        },
-                        headers={"Content-Type": "application/x-www-form-urlencoded"},
-                        timeout=30.0
-                    )
+            # Login to CMoney (cached per KOL by the token manager)
+            try:
+                access_token = await get_cmoney_token_manager().get_token(email, password)
+            except Exception as login_error:
+                logger.error(f"KOL {kol_serial} 登入失敗: {login_error}")
+                failed_count += len(kol_data['posts'])
+                continue
+
+            try:
+                # Process each post for this KOL
+                for post in kol_data['posts']:
+                    article_id = post['article_id']
+                    post_id = post['post_id']
 
-                    if login_response.status_code != 200:
-                        logger.error(f"KOL {kol_serial} 登入失敗: {login_response.status_code}")
-                        failed_count += len(kol_data['posts'])
-                        continue
-
-                    token_data = login_response.json()
-                    access_token = token_data.get("access_token")
-
-                    if not access_token:
-                        logger.error(f"KOL {kol_serial} 無法獲取 access_token")
-                        failed_count += len(kol_data['posts'])
-                        continue
-
-                    # Process each post for this KOL
-                    for post in kol_data['posts']:
-                        article_id = post['article_id']
-                        post_id = post['post_id']
-
-                        try:
-                            # Fetch interaction data from CMoney
-                            interaction_response = await client.get(
-                                f"https://forumservice.cmoney.tw/api/Article/{article_id}",
-                                headers={
-                                    "Authorization": f"Bearer {access_token}",
-                                    "X-Version": "2.0",
-                                    "accept": "application/json"
-                                },
-                                timeout=15.0
-                            )
-
-                            if interaction_response.status_code == 200:
-                                data = interaction_response.json()
-
-                                # Extract emoji counts (correct API response format)
-                                emoji_count = data.get("emojiCount", {})
-                                likes = emoji_count.get("like", 0)
-                                dislikes = emoji_count.get("dislike", 0)
-                                laughs = emoji_count.get("laugh", 0)
-                                money = emoji_count.get("money", 0)
-                                shock = emoji_count.get("shock", 0)
-                                cry = emoji_count.get("cry", 0)
-                                think = emoji_count.get("think", 0)
-                                angry = emoji_count.get("angry", 0)
-
-                                # Other interaction data
-                                comments = data.get("commentCount", 0)
-                                collections = data.get("collectedCount", 0)
-                                donations = data.get("donation", 0)
-
-                                # Calculate total emojis
-                                total_emojis = likes + dislikes + laughs + money + shock + cry + think + angry
-
-                                emoji_data = {
-                                    "like": likes,
-                                    "dislike": dislikes,
-                                    "laugh": laughs,
-                                    "money": money,
-                                    "shock": shock,
-                                    "cry": cry,
-                                    "think": think,
-                                    "angry": angry,
-                                    "total": total_emojis
-                                }
-
-                                # Update database (include donations and refresh timestamp)
-                                with conn.cursor() as update_cursor:
-                                    update_cursor.execute("""
-                                        UPDATE post_records
-                                        SET likes = %s, comments = %s, shares = %s, donations = %s, updated_at = CURRENT_TIMESTAMP
-                                        WHERE post_id = %s
-                                    """, (likes, comments, collections, donations, post_id))
-
-                                updated_count += 1
-                                logger.debug(f"Updated post {post_id}: likes={likes}, comments={comments}, collections={collections}, donations={donations}")
-                            else:
-                                logger.warning(f"無法獲取文章 {article_id} 的互動數據: HTTP {interaction_response.status_code}")
-                                failed_count += 1
-
-                        except Exception as e:
-                            logger.error(f"Failed to update post {post_id}: {e}")
+                    try:
+                        # Fetch interaction data from CMoney
+                        interaction_response = await client.get(
+                            f"https://forumservice.cmoney.tw/api/Article/{article_id}",
+                            headers={
+                                "Authorization": f"Bearer {access_token}",
+                                "X-Version": "2.0",
+                                "accept": "application/json"
+                            },
+                            timeout=15.0
+                        )
+
+                        if interaction_response.status_code == 200:
+                            data = interaction_response.json()
+
+                            # Extract emoji counts (correct API response format)
+                            emoji_count = data.get("emojiCount", {})
+                            likes = emoji_count.get("like", 0)
+                            dislikes = emoji_count.get("dislike", 0)
+                            laughs = emoji_count.get("laugh", 0)
+                            money = emoji_count.get("money", 0)
+                            shock = emoji_count.get("shock", 0)
+                            cry = emoji_count.get("cry", 0)
+                            think = emoji_count.get("think", 0)
+                            angry = emoji_count.get("angry", 0)
+
+                            # Other interaction data
+                            comments = data.get("commentCount", 0)
+                            collections = data.get("collectedCount", 0)
+                            donations = data.get("donation", 0)
+
+                            # Calculate total emojis
+                            total_emojis = likes + dislikes + laughs + money + shock + cry + think + angry
+
+                            emoji_data = {
+                                "like": likes,
+                                "dislike": dislikes,
+                                "laugh": laughs,
+                                "money": money,
+                                "shock": shock,
+                                "cry": cry,
+                                "think": think,
+                                "angry": angry,
+                                "total": total_emojis
+                            }
+
+                            # Update database (include donations and refresh timestamp)
+                            with conn.cursor() as update_cursor:
+                                update_cursor.execute("""
+                                    UPDATE post_records
+                                    SET likes = %s, comments = %s, shares = %s, donations = %s, updated_at = CURRENT_TIMESTAMP
+                                    WHERE post_id = %s
+                                """, (likes, comments, collections, donations, post_id))
+
+                            updated_count += 1
+                            logger.debug(f"Updated post {post_id}: likes={likes}, comments={comments}, collections={collections}, donations={donations}")
+                        else:
+                            logger.warning(f"無法獲取文章 {article_id} 的互動數據: HTTP {interaction_response.status_code}")
                             failed_count += 1
 
-                except Exception as e:
-                    logger.error(f"KOL {kol_serial} 處理失敗: {e}")
-                    failed_count += len(kol_data['posts'])
+                    except Exception as e:
+                        logger.error(f"Failed to update post {post_id}: {e}")
+                        failed_count += 1
 
-            conn.commit()
+            except Exception as e:
+                logger.error(f"KOL {kol_serial} 處理失敗: {e}")
+                failed_count += len(kol_data['posts'])
+
+        conn.commit()
 
         logger.info(f"Refresh complete: {updated_count} updated, {failed_count} failed")
 
@@ -4756,116 +4873,95 @@ async def refresh_filtered_interactions(request: Request):
         updated_posts = []
         errors = []  # 記錄詳細錯誤
 
-        async with httpx.AsyncClient() as client:
-            for kol_serial, kol_data in kol_posts.items():
-                email = kol_data['email']
-                password = kol_data['password']
+        client = get_http_client('cmoney_api')
+        for kol_serial, kol_data in kol_posts.items():
+            email = kol_data['email']
+            password = kol_data['password']
+
+            if not email or not password:
+                error_msg = f"KOL {kol_serial} 沒有登入憑證 (email={email}, password={'***' if password else None})"
+                logger.warning(error_msg)
+                errors.append(error_msg)
+                failed_count += len(kol_data['posts'])
+                continue
 
-                if not email or not password:
-                    error_msg = f"KOL {kol_serial} 沒有登入憑證 (email={email}, password={'***' if password else None})"
-                    logger.warning(error_msg)
+            try:
+                # Login to CMoney (cached per KOL by the token manager)
+                try:
+                    access_token = await get_cmoney_token_manager().get_token(email, password)
+                except Exception as login_error:
+                    error_msg = f"KOL {kol_serial} ({email}) 登入失敗: {login_error}"
+                    logger.error(error_msg)
                     errors.append(error_msg)
                     failed_count += len(kol_data['posts'])
                     continue
 
-                try:
-                    # Login to CMoney
-                    login_response = await client.post(
-                        "https://social.cmoney.tw/identity/token",
-                        data={
-                            "grant_type": "password",
-                            "login_method": "email",
-                            "client_id": "cmstockcommunity",
-                            "account": email,
-                            "password": password
-                        },
-                        headers={"Content-Type": "application/x-www-form-urlencoded"},
-                        timeout=30.0
-                    )
+                logger.info(f"KOL {kol_serial} ({email}) 登入成功")
+
+                for post in kol_data['posts']:
+                    article_id = post['article_id']
+                    post_id = post['post_id']
+
+                    try:
+                        interaction_response = await client.get(
+                            f"https://forumservice.cmoney.tw/api/Article/{article_id}",
+                            headers={
+                                "Authorization": f"Bearer {access_token}",
+                                "X-Version": "2.0",
+                                "accept": "application/json"
+                            },
+                            timeout=15.0
+                        )
+
+                        if interaction_response.status_code == 200:
+                            data = interaction_response.json()
+
+                            emoji_count = data.get("emojiCount", {})
+                            likes = emoji_count.get("like", 0)
+                            comments = data.get("commentCount", 0)
+                            collections = data.get("collectedCount", 0)
+                            donations = data.get("donation", 0)  # 🔥 Add donations
+
+                            emoji_data = {
+                                "like": likes,
+                                "dislike": emoji_count.get("dislike", 0),
+                                "laugh": emoji_count.get("laugh", 0),
+                                "money": emoji_count.get("money", 0),
+                                "shock": emoji_count.get("shock", 0),
+                                "cry": emoji_count.get("cry", 0),
+                                "think": emoji_count.get("think", 0),
+                                "angry": emoji_count.get("angry", 0)
+                            }
 
-                    if login_response.status_code != 200:
-                        error_msg = f"KOL {kol_serial} ({email}) 登入失敗: HTTP {login_response.status_code} - {login_response.text[:200]}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
-                        failed_count += len(kol_data['posts'])
-                        continue
-
-                    token_data = login_response.json()
-                    access_token = token_data.get("access_token")
-
-                    if not access_token:
-                        error_msg = f"KOL {kol_serial} ({email}) 無法獲取 access_token: {token_data}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
-                        failed_count += len(kol_data['posts'])
-                        continue
-
-                    logger.info(f"KOL {kol_serial} ({email}) 登入成功")
-
-                    for post in kol_data['posts']:
-                        article_id = post['article_id']
-                        post_id = post['post_id']
-
-                        try:
-                            interaction_response = await client.get(
-                                f"https://forumservice.cmoney.tw/api/Article/{article_id}",
-                                headers={
-                                    "Authorization": f"Bearer {access_token}",
-                                    "X-Version": "2.0",
-                                    "accept": "application/json"
-                                },
-                                timeout=15.0
-                            )
-
-                            if interaction_response.status_code == 200:
-                                data = interaction_response.json()
-
-                                emoji_count = data.get("emojiCount", {})
-                                likes = emoji_count.get("like", 0)
-                                comments = data.get("commentCount", 0)
-                                collections = data.get("collectedCount", 0)
-                                donations = data.get("donation", 0)  # 🔥 Add donations
-
-                                emoji_data = {
-                                    "like": likes,
-                                    "dislike": emoji_count.get("dislike", 0),
-                                    "laugh": emoji_count.get("laugh", 0),
-                                    "money": emoji_count.get("money", 0),
-                                    "shock": emoji_count.get("shock", 0),
-                                    "cry": emoji_count.get("cry", 0),
-                                    "think": emoji_count.get("think", 0),
-                                    "angry": emoji_count.get("angry", 0)
-                                }
-
-                                with conn.cursor() as update_cursor:
-                                    update_cursor.execute("""
-                                        UPDATE post_records
-                                        SET likes = %s, comments = %s, shares = %s, donations = %s, updated_at = CURRENT_TIMESTAMP
-                                        WHERE post_id = %s
-                                    """, (likes, comments, collections, donations, post_id))
-
-                                updated_count += 1
-                                updated_posts.append({
-                                    "post_id": post_id,
-                                    "article_id": article_id,
-                                    "likes": likes,
-                                    "comments": comments,
-                                    "shares": collections,
-                                    "donations": donations,
-                                    "updated_at": datetime.now().isoformat()
-                                })
-                            else:
-                                failed_count += 1
-
-                        except Exception as e:
-                            logger.error(f"Failed to update post {post_id}: {e}")
+                            with conn.cursor() as update_cursor:
+                                update_cursor.execute("""
+                                    UPDATE post_records
+                                    SET likes = %s, comments = %s, shares = %s, donations = %s, updated_at = CURRENT_TIMESTAMP
+                                    WHERE post_id = %s
+                                """, (likes, comments, collections, donations, post_id))
+
+                            updated_count += 1
+                            updated_posts.append({
+                                "post_id": post_id,
+                                "article_id": article_id,
+                                "likes": likes,
+                                "comments": comments,
+                                "shares": collections,
+                                "donations": donations,
+                                "updated_at": datetime.now().isoformat()
+                            })
+                        else:
                             failed_count += 1
 
-                except Exception as e:
-                    logger.error(f"KOL {kol_serial} 處理失敗: {e}")
-                    failed_count += len(kol_data['posts'])
+                    except Exception as e:
+                        logger.error(f"Failed to update post {post_id}: {e}")
+                        failed_count += 1
 
-            conn.commit()
+            except Exception as e:
+                logger.error(f"KOL {kol_serial} 處理失敗: {e}")
+                failed_count += len(kol_data['posts'])
+
+        conn.commit()
 
         return {
             "success": True,
@@ -4974,15 +5070,8 @@ async def publish_post(post_id: str):
 
             logger.info(f"🔍 Fetching credentials for KOL {kol_serial}")
 
-            # Query kol_profiles for email and password
-            # 🔥 FIX: Cast kol_serial to string (serial column is VARCHAR)
-            cursor.execute("""
-                SELECT email, password, nickname
-                FROM kol_profiles
-                WHERE serial = %s
-            """, (str(kol_serial),))
-
-            kol_profile = cursor.fetchone()
+            # KOL email / password from the KOL Profile cache
+            kol_profile = await get_kol_profile_cache().get_async(kol_serial)
 
             if not kol_profile:
                 raise ValueError(f"KOL {kol_serial} not found in kol_profiles")
@@ -5003,7 +5092,7 @@ async def publish_post(post_id: str):
 
             # Login with selected KOL's credentials
             logger.info(f"🔐 登入 CMoney API as {kol_profile['nickname']} ({kol_profile['email']})...")
-            login_result = await cmoney_client.login(credentials)
+            login_result = await get_cmoney_token_manager().login(credentials)
 
             if not login_result or not login_result.token:
                 raise ValueError("CMoney login failed")
@@ -5280,7 +5369,7 @@ async def get_trending_topics(limit: int = Query(10, description="返回結果
 
         # Login to get access token
         logger.info("🔐 Logging in to CMoney API...")
-        login_result = await cmoney_client.login(credentials)
+        login_result = await get_cmoney_token_manager().login(credentials)
 
         if not login_result or not login_result.token:
             raise Exception("CMoney 登入失敗")
@@ -5776,54 +5865,10 @@ async def drop_and_recreate_table():
         conn = get_db_connection()
         conn.rollback()  # Clear failed transactions
 
-        with conn.cursor() as cursor:
-            # 刪除現有表
-            cursor.execute("DROP TABLE IF EXISTS post_records CASCADE")
-            conn.commit()
-            logger.info("🗑️ 刪除現有 post_records 表")
-
-            # 重新創建表
-            cursor.execute("""
-                CREATE TABLE post_records (
-                    post_id VARCHAR PRIMARY KEY,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    session_id INTEGER,
-                    kol_serial INTEGER NOT NULL,
-                    kol_nickname VARCHAR NOT NULL,
-                    kol_persona VARCHAR,
-                    stock_code VARCHAR NOT NULL,
-                    stock_name VARCHAR NOT NULL,
-                    title VARCHAR NOT NULL,
-                    content TEXT NOT NULL,
-                    content_md TEXT,
-                    status VARCHAR DEFAULT 'draft',
-                    reviewer_notes TEXT,
-                    approved_by VARCHAR,
-                    approved_at TIMESTAMP,
-                    scheduled_at TIMESTAMP,
-                    published_at TIMESTAMP,
-                    cmoney_post_id VARCHAR,
-                    cmoney_post_url VARCHAR,
-                    publish_error TEXT,
-                    views BIGINT DEFAULT 0,
-                    likes BIGINT DEFAULT 0,
-                    comments BIGINT DEFAULT 0,
-                    shares BIGINT DEFAULT 0,
-                    topic_id VARCHAR,
-                    topic_title VARCHAR,
-                    technical_analysis TEXT,
-                    serper_data TEXT,
-                    quality_score FLOAT,
-                    ai_detection_score FLOAT,
-                    risk_level VARCHAR,
-                    generation_params TEXT,
-                    commodity_tags TEXT,
-                    alternative_versions TEXT
-                );
-            """)
-            conn.commit()
-            logger.info("✅ 重新創建 post_records 表成功")
+        # 刪除並以目前的結構重建（JSONB 欄位、索引、統計彙總觸發器、月分區）
+        summary = recreate_post_records(conn)
+        reset_post_records_columns_cache()
+        logger.info(f"✅ 重新創建 post_records 表成功，重新套用遷移: {summary['applied']}")
 
         return {
             "success": True,
@@ -5850,15 +5895,14 @@ async def reset_database():
         conn = get_db_connection()
         conn.rollback()  # Clear failed transactions
 
-        with conn.cursor() as cursor:
-            # 刪除現有表
-            cursor.execute("DROP TABLE IF EXISTS post_records CASCADE")
-            conn.commit()
-            logger.info("🗑️ 刪除現有 post_records 表")
+        # 清空貼文：刪除 post_records 並以目前的結構重建（只刪表會讓遷移帳本與實際結構不一致）
+        summary = recreate_post_records(conn)
+        reset_post_records_columns_cache()
+        logger.info(f"🗑️ post_records 已重置，重新套用遷移: {summary['applied']}")
 
         return {
             "success": True,
-            "message": "數據庫已重置，表已刪除",
+            "message": "數據庫已重置，post_records 已清空並重建",
             "timestamp": get_current_time().isoformat()
         }
     except Exception as e:
@@ -5942,67 +5986,14 @@ async def fix_database():
         if not db_pool:
             return {"error": "數據庫連接不存在"}
         
-        # 創建新的連接來避免事務問題
-        import psycopg2
-        from psycopg2.extras import RealDictCursor
-        
-        # 從環境變數獲取數據庫連接信息
-        database_url = os.getenv("DATABASE_URL")
-        if not database_url:
-            return {"error": "DATABASE_URL 環境變數不存在"}
-        
-        # 創建新連接
-        new_conn = psycopg2.connect(database_url)
-        new_conn.autocommit = True
-        
-        with new_conn.cursor() as cursor:
-            # 刪除現有表
-            cursor.execute("DROP TABLE IF EXISTS post_records CASCADE")
-            logger.info("🗑️ 刪除現有 post_records 表")
-            
-            # 重新創建表
-            cursor.execute("""
-                CREATE TABLE post_records (
-                    post_id VARCHAR PRIMARY KEY,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    session_id BIGINT,
-                    kol_serial INTEGER NOT NULL,
-                    kol_nickname VARCHAR NOT NULL,
-                    kol_persona VARCHAR,
-                    stock_code VARCHAR NOT NULL,
-                    stock_name VARCHAR NOT NULL,
-                    title VARCHAR NOT NULL,
-                    content TEXT NOT NULL,
-                    content_md TEXT,
-                    status VARCHAR DEFAULT 'draft',
-                    reviewer_notes TEXT,
-                    approved_by VARCHAR,
-                    approved_at TIMESTAMP,
-                    scheduled_at TIMESTAMP,
-                    published_at TIMESTAMP,
-                    cmoney_post_id VARCHAR,
-                    cmoney_post_url VARCHAR,
-                    publish_error TEXT,
-                    views BIGINT DEFAULT 0,
-                    likes BIGINT DEFAULT 0,
-                    comments BIGINT DEFAULT 0,
-                    shares BIGINT DEFAULT 0,
-                    topic_id VARCHAR,
-                    topic_title VARCHAR,
-                    technical_analysis TEXT,
-                    serper_data TEXT,
-                    quality_score FLOAT,
-                    ai_detection_score FLOAT,
-                    risk_level VARCHAR,
-                    generation_params TEXT,
-                    commodity_tags TEXT,
-                    alternative_versions TEXT
-                );
-            """)
-            logger.info("✅ 重新創建 post_records 表成功")
-            
-        new_conn.close()
+        conn = get_db_connection()
+        try:
+            # 刪除並以目前的結構重建（與 /admin/drop-and-recreate-post-records-table 相同）
+            summary = recreate_post_records(conn)
+        finally:
+            return_db_connection(conn)
+        reset_post_records_columns_cache()
+        logger.info(f"✅ 重新創建 post_records 表成功，重新套用遷移: {summary['applied']}")
         
         return {
             "success": True,
@@ -6466,17 +6457,20 @@ async def get_kol_stats(serial: str):
 
         conn = get_db_connection()
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            # 1. 核心指標
+            # 1-3. 核心指標 / 發文趨勢 / 互動趨勢（post_stats_kol_daily 彙總表，由觸發器維護）
             cursor.execute("""
                 SELECT
-                    COUNT(*) as total_posts,
-                    COUNT(CASE WHEN status = 'published' THEN 1 END) as published_posts,
-                    COUNT(CASE WHEN status = 'draft' THEN 1 END) as draft_posts,
-                    COALESCE(AVG(CASE WHEN status = 'published' THEN likes END), 0) as avg_likes,
-                    COALESCE(AVG(CASE WHEN status = 'published' THEN comments END), 0) as avg_comments,
-                    COALESCE(AVG(CASE WHEN status = 'published' THEN shares END), 0) as avg_shares,
-                    COALESCE(SUM(CASE WHEN status = 'published' THEN likes + comments + shares END), 0) as total_interactions
-                FROM post_records
+                    COALESCE(SUM(post_count), 0) as total_posts,
+                    COALESCE(SUM(post_count) FILTER (WHERE status = 'published'), 0) as published_posts,
+                    COALESCE(SUM(post_count) FILTER (WHERE status = 'draft'), 0) as draft_posts,
+                    COALESCE(SUM(likes) FILTER (WHERE status = 'published')::float
+                             / NULLIF(SUM(post_count) FILTER (WHERE status = 'published'), 0), 0) as avg_likes,
+                    COALESCE(SUM(comments) FILTER (WHERE status = 'published')::float
+                             / NULLIF(SUM(post_count) FILTER (WHERE status = 'published'), 0), 0) as avg_comments,
+                    COALESCE(SUM(shares) FILTER (WHERE status = 'published')::float
+                             / NULLIF(SUM(post_count) FILTER (WHERE status = 'published'), 0), 0) as avg_shares,
+                    COALESCE(SUM(likes + comments + shares) FILTER (WHERE status = 'published'), 0) as total_interactions
+                FROM post_stats_kol_daily
                 WHERE kol_serial = %s
             """, (int(serial),))
             core_metrics = cursor.fetchone()
@@ -6484,33 +6478,34 @@ async def get_kol_stats(serial: str):
             # 2. 發文趨勢（最近3個月，按日分組）
             cursor.execute("""
                 SELECT
-                    DATE(created_at) as date,
-                    COUNT(*) as count
-                FROM post_records
+                    day as date,
+                    SUM(post_count) as count
+                FROM post_stats_kol_daily
                 WHERE kol_serial = %s
-                  AND created_at >= CURRENT_DATE - INTERVAL '3 months'
-                GROUP BY DATE(created_at)
-                ORDER BY DATE(created_at) ASC
+                  AND day >= CURRENT_DATE - INTERVAL '3 months'
+                GROUP BY day
+                HAVING SUM(post_count) > 0
+                ORDER BY day ASC
             """, (int(serial),))
             posting_trend = cursor.fetchall()
 
             # 3. 互動趨勢（最近3個月，按日分組）
             cursor.execute("""
                 SELECT
-                    DATE(created_at) as date,
-                    COUNT(*) as post_count,
-                    COALESCE(SUM(likes), 0) as total_likes,
-                    COALESCE(SUM(comments), 0) as total_comments,
-                    COALESCE(SUM(shares), 0) as total_shares,
-                    COALESCE(AVG(likes), 0) as avg_likes,
-                    COALESCE(AVG(comments), 0) as avg_comments,
-                    COALESCE(AVG(shares), 0) as avg_shares
-                FROM post_records
+                    day as date,
+                    post_count,
+                    likes as total_likes,
+                    comments as total_comments,
+                    shares as total_shares,
+                    likes::float / post_count as avg_likes,
+                    comments::float / post_count as avg_comments,
+                    shares::float / post_count as avg_shares
+                FROM post_stats_kol_daily
                 WHERE kol_serial = %s
                   AND status = 'published'
-                  AND created_at >= CURRENT_DATE - INTERVAL '3 months'
-                GROUP BY DATE(created_at)
-                ORDER BY DATE(created_at) ASC
+                  AND post_count > 0
+                  AND day >= CURRENT_DATE - INTERVAL '3 months'
+                ORDER BY day ASC
             """, (int(serial),))
             interaction_trend = cursor.fetchall()
 
@@ -6604,14 +6599,15 @@ async def get_kol_stats(serial: str):
             # 9. 成長趨勢（月度統計，最近6個月）
             cursor.execute("""
                 SELECT
-                    TO_CHAR(created_at, 'YYYY-MM') as month,
-                    COUNT(*) as count,
+                    TO_CHAR(day, 'YYYY-MM') as month,
+                    SUM(post_count) as count,
                     COALESCE(SUM(likes + comments + shares), 0) as total_interactions
-                FROM post_records
+                FROM post_stats_kol_daily
                 WHERE kol_serial = %s
                   AND status = 'published'
-                  AND created_at >= CURRENT_DATE - INTERVAL '6 months'
-                GROUP BY TO_CHAR(created_at, 'YYYY-MM')
+                  AND post_count > 0
+                  AND day >= CURRENT_DATE - INTERVAL '6 months'
+                GROUP BY TO_CHAR(day, 'YYYY-MM')
                 ORDER BY month ASC
             """, (int(serial),))
             growth_trend = cursor.fetchall()
@@ -6674,18 +6670,9 @@ async def test_kol_login(request: Request):
                 "timestamp": get_current_time().isoformat()
             }
 
-        # 將 src 路徑加入 Python path
-        src_path = '/app/src'
-        if src_path not in sys.path:
-            sys.path.insert(0, src_path)
-
-        from src.clients.cmoney.cmoney_client import CMoneyClient, LoginCredentials
-        cmoney_client = CMoneyClient()
-
-        # 嘗試登入
-        credentials = LoginCredentials(email=email, password=password)
+        # 嘗試登入（強制重新登入，確認帳密仍有效）
         try:
-            access_token = await cmoney_client.login(credentials)
+            access_token = await get_cmoney_token_manager().get(email, password, force_refresh=True)
             logger.info(f"✅ 測試登入成功: {email}")
 
             return {
@@ -6752,7 +6739,7 @@ async def test_kol_nickname(request: Request):
         # 先登入獲取 token
         credentials = LoginCredentials(email=email, password=password)
         try:
-            access_token = await cmoney_client.login(credentials)
+            access_token = await get_cmoney_token_manager().login(credentials)
             logger.info(f"✅ 測試登入成功: {email}")
         except Exception as login_error:
             logger.error(f"❌ 測試登入失敗: {login_error}")
@@ -6869,7 +6856,7 @@ async def create_kol(request: Request):
         # 登入 CMoney
         credentials = LoginCredentials(email=email, password=password)
         try:
-            access_token = await cmoney_client.login(credentials)
+            access_token = await get_cmoney_token_manager().login(credentials)
             logger.info(f"✅ CMoney 登入成功: {email}")
         except Exception as login_error:
             logger.error(f"❌ CMoney 登入失敗: {login_error}")
@@ -6914,6 +6901,8 @@ async def create_kol(request: Request):
 
         # Phase 2: AI 生成個性化資料（如果提供了 ai_description）
         ai_generated_profile = {}
+        if ai_description and not gpt_generator:
+            await subsystems.ensure('content_generation', timeout=60)
         if ai_description and gpt_generator:
             logger.info(f"🤖 Phase 2: 使用 AI 生成個性化資料...")
             try:
@@ -7635,49 +7624,45 @@ async def get_daily_stats():
             today_start = get_current_time().replace(hour=0, minute=0, second=0, microsecond=0)
             today_end = get_current_time().replace(hour=23, minute=59, second=59, microsecond=999999)
 
-            # Count total posts generated today from schedule_tasks
+            # Schedule counters in one pass over schedule_tasks
             cursor.execute("""
-                SELECT COALESCE(SUM(total_posts_generated), 0) as today_posts
+                SELECT
+                    COALESCE(SUM(total_posts_generated) FILTER (WHERE last_run >= %(start)s AND last_run <= %(end)s), 0) as today_posts,
+                    COUNT(*) FILTER (WHERE status = 'active' AND next_run > NOW()) as scheduled_posts,
+                    COALESCE(SUM(success_count) FILTER (WHERE last_run >= %(start)s AND last_run <= %(end)s), 0) as completed_posts,
+                    COALESCE(SUM(failure_count) FILTER (WHERE last_run >= %(start)s AND last_run <= %(end)s), 0) as failed_posts,
+                    COUNT(*) FILTER (WHERE status = 'active') as active_schedules,
+                    COUNT(*) as total_schedules
                 FROM schedule_tasks
-                WHERE last_run >= %s AND last_run <= %s
-            """, (today_start, today_end))
-            today_posts = cursor.fetchone()['today_posts']
-
-            # Count scheduled posts (active schedules with next_run in future)
+            """, {'start': today_start, 'end': today_end})
+            schedule_counts = cursor.fetchone()
+            today_posts = schedule_counts['today_posts']
+            scheduled_posts = schedule_counts['scheduled_posts']
+            completed_posts = schedule_counts['completed_posts']
+            failed_posts = schedule_counts['failed_posts']
+            active_schedules = schedule_counts['active_schedules']
+            total_schedules = schedule_counts['total_schedules']
+
+            # Today's post_records by status and top stocks (rollup tables; days follow stored UTC created_at)
             cursor.execute("""
-                SELECT COUNT(*) as scheduled_posts
-                FROM schedule_tasks
-                WHERE status = 'active' AND next_run > NOW()
+                SELECT status, SUM(post_count) as count
+                FROM post_stats_kol_daily
+                WHERE day = CURRENT_DATE
+                GROUP BY status
+                HAVING SUM(post_count) > 0
             """)
-            scheduled_posts = cursor.fetchone()['scheduled_posts']
-
-            # Count completed posts today (schedules that completed today)
-            cursor.execute("""
-                SELECT COALESCE(SUM(success_count), 0) as completed_posts
-                FROM schedule_tasks
-                WHERE last_run >= %s AND last_run <= %s
-            """, (today_start, today_end))
-            completed_posts = cursor.fetchone()['completed_posts']
+            posts_today_by_status = {row['status']: int(row['count']) for row in cursor.fetchall()}
 
-            # Count failed posts today
             cursor.execute("""
-                SELECT COALESCE(SUM(failure_count), 0) as failed_posts
-                FROM schedule_tasks
-                WHERE last_run >= %s AND last_run <= %s
-            """, (today_start, today_end))
-            failed_posts = cursor.fetchone()['failed_posts']
-
-            # Count active schedules
-            cursor.execute("""
-                SELECT COUNT(*) as active_schedules
-                FROM schedule_tasks
-                WHERE status = 'active'
+                SELECT stock_code, SUM(post_count) as count
+                FROM post_stats_stock_daily
+                WHERE day = CURRENT_DATE
+                GROUP BY stock_code
+                HAVING SUM(post_count) > 0
+                ORDER BY count DESC
+                LIMIT 10
             """)
-            active_schedules = cursor.fetchone()['active_schedules']
-
-            # Count total schedules
-            cursor.execute("SELECT COUNT(*) as total_schedules FROM schedule_tasks")
-            total_schedules = cursor.fetchone()['total_schedules']
+            top_stocks_today = [{'stock_code': row['stock_code'], 'count': int(row['count'])} for row in cursor.fetchall()]
 
             conn.commit()
 
@@ -7689,7 +7674,9 @@ async def get_daily_stats():
                     "completed_posts": int(completed_posts),
                     "failed_posts": int(failed_posts),
                     "active_schedules": int(active_schedules),
-                    "total_schedules": int(total_schedules)
+                    "total_schedules": int(total_schedules),
+                    "posts_today_by_status": posts_today_by_status,
+                    "top_stocks_today": top_stocks_today
                 },
                 "timestamp": get_current_time().isoformat()
             }
@@ -7711,6 +7698,141 @@ async def get_daily_stats():
         if conn:
             return_db_connection(conn)
 
+# ==================== 交易日曆 (Trading Calendar) ====================
+
+def reschedule_after_calendar_change(day: date) -> int:
+    """
+    休市/補班公告變更後，重算 next_run 落在該日或之後的每日排程（NOTIFY 觸發分派器重新排序）
+
+    Returns:
+        更新的排程數
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT * FROM schedule_tasks
+                WHERE status = 'active' AND schedule_type IN ('daily', 'weekday_daily')
+                  AND next_run::date >= %s
+                FOR UPDATE SKIP LOCKED
+            """, (day,))
+            schedules = cursor.fetchall()
+            for schedule in schedules:
+                cursor.execute(
+                    "UPDATE schedule_tasks SET next_run = %s, updated_at = NOW() WHERE schedule_id = %s",
+                    (calculate_next_run(schedule['schedule_id'], schedule, is_post_execution=False), schedule['schedule_id'])
+                )
+        conn.commit()
+        return len(schedules)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        return_db_connection(conn)
+
+@app.get("/api/trading-calendar")
+async def get_trading_calendar_days(
+    start_date: Optional[str] = Query(None, description="開始日期 YYYY-MM-DD（預設今天）"),
+    days: int = Query(14, ge=1, le=366, description="查詢天數")
+):
+    """查詢交易日曆：每日是否開市與休市原因"""
+    try:
+        calendar = get_trading_calendar()
+        start = date.fromisoformat(start_date) if start_date else get_current_time().date()
+        result = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            reason = calendar.closure_reason(day)
+            result.append({"date": day.isoformat(), "is_trading_day": reason is None, "closure_reason": reason})
+        return {
+            "success": True,
+            "data": result,
+            "stats": calendar.get_stats(),
+            "timestamp": get_current_time().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"❌ 查詢交易日曆失敗: {e}")
+        return {"success": False, "error": str(e)}
+
+@app.get("/api/trading-calendar/overrides")
+async def list_trading_calendar_overrides():
+    """列出休市/補班公告覆寫"""
+    if not db_pool:
+        return {"success": False, "error": "數據庫連接不可用"}
+    conn = None
+    try:
+        conn = get_db_connection()
+        overrides = load_trading_calendar_overrides(conn)
+        return {
+            "success": True,
+            "data": [
+                {"date": day.isoformat(), "is_open": is_open, "reason": reason}
+                for day, (is_open, reason) in sorted(overrides.items())
+            ]
+        }
+    except Exception as e:
+        logger.error(f"❌ 查詢交易日曆覆寫失敗: {e}")
+        return {"success": False, "error": str(e)}
+    finally:
+        if conn:
+            return_db_connection(conn)
+
+@app.post("/api/trading-calendar/overrides")
+async def upsert_trading_calendar_override(request: Request):
+    """
+    新增/更新休市或補班公告
+
+    Body: {"date": "2025-07-29", "is_open": false, "reason": "颱風停市"}
+    """
+    if not db_pool:
+        return {"success": False, "error": "數據庫連接不可用"}
+    conn = None
+    try:
+        body = await request.json()
+        day = date.fromisoformat(body['date'])
+        is_open = bool(body.get('is_open', False))
+        reason = body.get('reason', '')
+
+        conn = get_db_connection()
+        save_trading_calendar_override(conn, day, is_open, reason)
+        rescheduled = await asyncio.to_thread(reschedule_after_calendar_change, day)
+        logger.info(f"📅 交易日曆覆寫: {day} {'開市' if is_open else '休市'}（{reason}），重排 {rescheduled} 個排程")
+        return {
+            "success": True,
+            "data": {"date": day.isoformat(), "is_open": is_open, "reason": reason},
+            "rescheduled": rescheduled
+        }
+    except (KeyError, ValueError) as e:
+        return {"success": False, "error": f"無效的日期: {e}"}
+    except Exception as e:
+        logger.error(f"❌ 儲存交易日曆覆寫失敗: {e}")
+        return {"success": False, "error": str(e)}
+    finally:
+        if conn:
+            return_db_connection(conn)
+
+@app.delete("/api/trading-calendar/overrides/{day}")
+async def remove_trading_calendar_override(day: str):
+    """刪除休市/補班公告（恢復由 FinLab 交易日與週一至週五判斷）"""
+    if not db_pool:
+        return {"success": False, "error": "數據庫連接不可用"}
+    conn = None
+    try:
+        override_day = date.fromisoformat(day)
+        conn = get_db_connection()
+        if not delete_trading_calendar_override(conn, override_day):
+            return {"success": False, "error": f"找不到覆寫: {day}"}
+        rescheduled = await asyncio.to_thread(reschedule_after_calendar_change, override_day)
+        return {"success": True, "date": override_day.isoformat(), "rescheduled": rescheduled}
+    except ValueError as e:
+        return {"success": False, "error": f"無效的日期: {e}"}
+    except Exception as e:
+        logger.error(f"❌ 刪除交易日曆覆寫失敗: {e}")
+        return {"success": False, "error": str(e)}
+    finally:
+        if conn:
+            return_db_connection(conn)
+
 @app.get("/api/schedule/scheduler/status")
 async def get_scheduler_status():
     """獲取排程器狀態"""
@@ -7802,7 +7924,10 @@ async def get_scheduler_status():
                     "pending_tasks": int(pending_tasks),
                     "next_run": next_run,
                     "last_run": last_run,
-                    "uptime": uptime
+                    "uptime": uptime,
+                    "dispatcher": schedule_dispatcher.get_stats() if schedule_dispatcher else None,
+                    "dispatcher_service": dispatcher_service(),
+                    "trading_calendar": get_trading_calendar().get_stats()
                 },
                 "timestamp": get_current_time().isoformat()
             }
@@ -8074,10 +8199,9 @@ async def create_schedule(request: Request):
                     if next_run <= now:
                         next_run = next_run + timedelta(days=1)
 
-                    # 如果是工作日模式，跳過週末
+                    # 如果是工作日模式，跳過非交易日（週末、國定假日、颱風停市）
                     if weekdays_only:
-                        while next_run.weekday() >= 5:  # 5=Saturday, 6=Sunday
-                            next_run = next_run + timedelta(days=1)
+                        next_run = get_trading_calendar().roll_forward(next_run)
 
             # 插入排程任務到資料庫
             insert_sql = """
@@ -8200,10 +8324,12 @@ async def toggle_auto_posting(task_id: str, request: Request):
 
 
 @app.post("/api/schedule/execute/{task_id}")
-async def execute_schedule_now(task_id: str, request: Request):
+async def execute_schedule_now(task_id: str, request: Request, force: bool = False):
     """
     立即執行排程 (手動觸發)
     Execute a schedule immediately without waiting for scheduled time
+
+    weekday_daily / weekdays_only 排程在非交易日（週末、假日、颱風停市）不執行，force=true 可強制執行
     """
     logger.info(f"收到立即執行排程請求 - Task ID: {task_id}")
 
@@ -8234,6 +8360,16 @@ async def execute_schedule_now(task_id: str, request: Request):
 
         logger.info(f"📋 排程資訊: {schedule['schedule_name']}")
 
+        closure_reason = schedule_closure_reason(schedule)
+        if closure_reason and not force:
+            logger.info(f"⏭️ 今日休市（{closure_reason}），不執行排程: {schedule['schedule_name']}")
+            return {
+                "success": False,
+                "error": f"今日非交易日（{closure_reason}），盤後資料未更新；如需執行請加上 force=true",
+                "non_trading_day": True,
+                "closure_reason": closure_reason
+            }
+
         # Extract configuration
         trigger_config = schedule.get('trigger_config', {})
         schedule_config = schedule.get('schedule_config', {})
@@ -8478,17 +8614,11 @@ async def execute_schedule_now(task_id: str, request: Request):
         else:
             # random mode: fetch all active KOLs from database
             try:
-                database_url = os.getenv("DATABASE_URL")
-                kol_conn = await asyncpg.connect(database_url)
-                kol_rows = await kol_conn.fetch("""
-                    SELECT serial
-                    FROM kol_profiles
-                    WHERE status = 'active'
-                    ORDER BY serial
-                """)
-                kol_serials = [row['serial'] for row in kol_rows]
-                await kol_conn.close()
-                logger.info(f"✅ Fetched {len(kol_serials)} active KOLs from database (random mode): {kol_serials}")
+                kol_profile_cache = get_kol_profile_cache()
+                if not kol_profile_cache.loaded:
+                    await asyncio.to_thread(kol_profile_cache.load)
+                kol_serials = kol_profile_cache.serials(status='active')
+                logger.info(f"✅ Fetched {len(kol_serials)} active KOLs from KOL profile cache (random mode): {kol_serials}")
             except Exception as e:
                 logger.error(f"❌ Failed to fetch KOLs from database: {e}")
                 # Fallback: use schedule's selected KOLs if available
@@ -9291,7 +9421,7 @@ try:
             # Login
             cmoney_client = CMoneyClient()
             credentials = LoginCredentials(email=poster_email, password=poster_password)
-            access_token = await cmoney_client.login(credentials)
+            access_token = await get_cmoney_token_manager().login(credentials)
 
             if not access_token or not access_token.token:
                 raise HTTPException(status_code=401, detail="Login failed")
@@ -9471,6 +9601,7 @@ except Exception as e:
     import traceback
     logger.error(traceback.format_exc())
 
+startup_profile.mark_import('routes')
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,30 @@
+-- Secondary indexes for post_records, derived from the hot queries:
+--   /api/posts                      ORDER BY created_at DESC, post_id DESC (keyset), optional status / session_id filter
+--   status summaries                SELECT status, COUNT(*) ... GROUP BY status
+--   KOL stats / KOL detail          WHERE kol_serial = ? [ORDER BY created_at DESC | GROUP BY DATE(created_at)]
+--   refresh-interactions            WHERE status = 'published' AND cmoney_post_id IS NOT NULL ORDER BY created_at DESC
+--   posting-service history-stats   WHERE session_id = ? / kol_serial = ?
+
+-- Unfiltered /api/posts pages
+CREATE INDEX IF NOT EXISTS idx_post_records_created_post
+    ON post_records (created_at DESC, post_id DESC);
+
+-- /api/posts?status=... pages, status counts
+CREATE INDEX IF NOT EXISTS idx_post_records_status_created_post
+    ON post_records (status, created_at DESC, post_id DESC);
+
+-- /api/posts?session_id=... pages, per-session history
+CREATE INDEX IF NOT EXISTS idx_post_records_session_created_post
+    ON post_records (session_id, created_at DESC, post_id DESC);
+
+-- Per-KOL statistics and post lists
+CREATE INDEX IF NOT EXISTS idx_post_records_kol_created
+    ON post_records (kol_serial, created_at DESC);
+
+-- Published posts that have a CMoney article id (interaction refresh)
+CREATE INDEX IF NOT EXISTS idx_post_records_published_cmoney
+    ON post_records (created_at DESC)
+    INCLUDE (kol_serial, cmoney_post_id)
+    WHERE status = 'published' AND cmoney_post_id IS NOT NULL;
+
+ANALYZE post_records;
@@ -0,0 +1,13 @@
+-- Helper for the post_records TEXT -> JSONB payload conversion (services/jsonb_backfill.py)
+-- Unparseable legacy text is kept as a JSON string instead of being dropped
+CREATE OR REPLACE FUNCTION post_records_try_jsonb(value TEXT) RETURNS JSONB
+LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    IF value IS NULL OR btrim(value) = '' THEN
+        RETURN NULL;
+    END IF;
+    RETURN value::jsonb;
+EXCEPTION WHEN others THEN
+    RETURN to_jsonb(value);
+END;
+$$;
@@ -0,0 +1,149 @@
+-- Rollup tables for post statistics, maintained by triggers on post_records
+--   post_stats_kol_daily    per KOL / day / status: post count + interaction sums  (KOL stats, daily stats)
+--   post_stats_stock_daily  per stock / day / status: post count + interaction sums (daily stats)
+--   post_stats_session      per session / KOL / stock / status: post count          (posting-service history-stats)
+-- The *_scan views compute the same rows from a full scan; they seed the tables here and are
+-- what `python -m services.post_stats reconcile` diffs against.
+-- Days are DATE(created_at) as stored (UTC), status defaults to 'draft', a missing session is -1.
+
+CREATE TABLE IF NOT EXISTS post_stats_kol_daily (
+    kol_serial INTEGER NOT NULL,
+    day DATE NOT NULL,
+    status VARCHAR NOT NULL,
+    post_count BIGINT NOT NULL DEFAULT 0,
+    likes BIGINT NOT NULL DEFAULT 0,
+    comments BIGINT NOT NULL DEFAULT 0,
+    shares BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (kol_serial, day, status)
+);
+
+CREATE TABLE IF NOT EXISTS post_stats_stock_daily (
+    stock_code VARCHAR NOT NULL,
+    day DATE NOT NULL,
+    status VARCHAR NOT NULL,
+    post_count BIGINT NOT NULL DEFAULT 0,
+    likes BIGINT NOT NULL DEFAULT 0,
+    comments BIGINT NOT NULL DEFAULT 0,
+    shares BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (stock_code, day, status)
+);
+CREATE INDEX IF NOT EXISTS idx_post_stats_stock_daily_day ON post_stats_stock_daily (day);
+
+CREATE TABLE IF NOT EXISTS post_stats_session (
+    session_id BIGINT NOT NULL,
+    kol_serial INTEGER NOT NULL,
+    stock_code VARCHAR NOT NULL,
+    status VARCHAR NOT NULL,
+    post_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, kol_serial, stock_code, status)
+);
+
+CREATE OR REPLACE VIEW post_stats_kol_daily_scan AS
+SELECT kol_serial,
+       COALESCE(created_at, 'epoch')::date AS day,
+       COALESCE(status, 'draft') AS status,
+       COUNT(*) AS post_count,
+       COALESCE(SUM(likes), 0) AS likes,
+       COALESCE(SUM(comments), 0) AS comments,
+       COALESCE(SUM(shares), 0) AS shares
+FROM post_records
+GROUP BY 1, 2, 3;
+
+CREATE OR REPLACE VIEW post_stats_stock_daily_scan AS
+SELECT stock_code,
+       COALESCE(created_at, 'epoch')::date AS day,
+       COALESCE(status, 'draft') AS status,
+       COUNT(*) AS post_count,
+       COALESCE(SUM(likes), 0) AS likes,
+       COALESCE(SUM(comments), 0) AS comments,
+       COALESCE(SUM(shares), 0) AS shares
+FROM post_records
+GROUP BY 1, 2, 3;
+
+CREATE OR REPLACE VIEW post_stats_session_scan AS
+SELECT COALESCE(session_id, -1) AS session_id,
+       kol_serial,
+       stock_code,
+       COALESCE(status, 'draft') AS status,
+       COUNT(*) AS post_count
+FROM post_records
+GROUP BY 1, 2, 3, 4;
+
+CREATE OR REPLACE FUNCTION post_stats_apply(
+    p_kol_serial INTEGER, p_stock_code VARCHAR, p_session_id BIGINT, p_status VARCHAR,
+    p_created_at TIMESTAMP, p_likes BIGINT, p_comments BIGINT, p_shares BIGINT, p_sign INTEGER
+) RETURNS VOID
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_day DATE := COALESCE(p_created_at, 'epoch')::date;
+    v_status VARCHAR := COALESCE(p_status, 'draft');
+    v_likes BIGINT := p_sign * COALESCE(p_likes, 0);
+    v_comments BIGINT := p_sign * COALESCE(p_comments, 0);
+    v_shares BIGINT := p_sign * COALESCE(p_shares, 0);
+BEGIN
+    INSERT INTO post_stats_kol_daily AS t (kol_serial, day, status, post_count, likes, comments, shares)
+    VALUES (p_kol_serial, v_day, v_status, p_sign, v_likes, v_comments, v_shares)
+    ON CONFLICT (kol_serial, day, status) DO UPDATE SET
+        post_count = t.post_count + EXCLUDED.post_count,
+        likes = t.likes + EXCLUDED.likes,
+        comments = t.comments + EXCLUDED.comments,
+        shares = t.shares + EXCLUDED.shares;
+
+    INSERT INTO post_stats_stock_daily AS t (stock_code, day, status, post_count, likes, comments, shares)
+    VALUES (p_stock_code, v_day, v_status, p_sign, v_likes, v_comments, v_shares)
+    ON CONFLICT (stock_code, day, status) DO UPDATE SET
+        post_count = t.post_count + EXCLUDED.post_count,
+        likes = t.likes + EXCLUDED.likes,
+        comments = t.comments + EXCLUDED.comments,
+        shares = t.shares + EXCLUDED.shares;
+
+    INSERT INTO post_stats_session AS t (session_id, kol_serial, stock_code, status, post_count)
+    VALUES (COALESCE(p_session_id, -1), p_kol_serial, p_stock_code, v_status, p_sign)
+    ON CONFLICT (session_id, kol_serial, stock_code, status) DO UPDATE SET
+        post_count = t.post_count + EXCLUDED.post_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION post_stats_maintain() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM post_stats_apply(OLD.kol_serial, OLD.stock_code, OLD.session_id, OLD.status,
+                                 OLD.created_at, OLD.likes, OLD.comments, OLD.shares, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM post_stats_apply(NEW.kol_serial, NEW.stock_code, NEW.session_id, NEW.status,
+                                 NEW.created_at, NEW.likes, NEW.comments, NEW.shares, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Block writes while seeding so no row is counted twice or missed
+LOCK TABLE post_records IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS post_stats_insert_delete ON post_records;
+CREATE TRIGGER post_stats_insert_delete
+    AFTER INSERT OR DELETE ON post_records
+    FOR EACH ROW EXECUTE PROCEDURE post_stats_maintain();
+
+DROP TRIGGER IF EXISTS post_stats_update ON post_records;
+CREATE TRIGGER post_stats_update
+    AFTER UPDATE OF kol_serial, stock_code, session_id, status, created_at, likes, comments, shares ON post_records
+    FOR EACH ROW
+    WHEN (OLD.kol_serial IS DISTINCT FROM NEW.kol_serial
+          OR OLD.stock_code IS DISTINCT FROM NEW.stock_code
+          OR OLD.session_id IS DISTINCT FROM NEW.session_id
+          OR OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.created_at IS DISTINCT FROM NEW.created_at
+          OR OLD.likes IS DISTINCT FROM NEW.likes
+          OR OLD.comments IS DISTINCT FROM NEW.comments
+          OR OLD.shares IS DISTINCT FROM NEW.shares)
+    EXECUTE PROCEDURE post_stats_maintain();
+
+DELETE FROM post_stats_kol_daily;
+DELETE FROM post_stats_stock_daily;
+DELETE FROM post_stats_session;
+INSERT INTO post_stats_kol_daily SELECT * FROM post_stats_kol_daily_scan;
+INSERT INTO post_stats_stock_daily SELECT * FROM post_stats_stock_daily_scan;
+INSERT INTO post_stats_session SELECT * FROM post_stats_session_scan;
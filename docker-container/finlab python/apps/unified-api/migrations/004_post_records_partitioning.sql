@@ -0,0 +1,147 @@
+-- Monthly range partitions for post_records on created_at
+--   post_records_yYYYYmMM   one partition per calendar month (created_at as stored, UTC)
+--   post_records_default    catch-all for months without a partition yet (normally empty)
+-- post_records_ensure_partition(month) creates a month's partition; the app calls it for the
+-- current and next month at startup and daily (services/post_partitions.py), which also
+-- archives partitions past the retention horizon to Parquet files.
+--
+-- Postgres requires the partition key in every unique constraint, so the primary key becomes
+-- (post_id, created_at) and created_at becomes NOT NULL (missing values take updated_at).
+-- Indexes, triggers and views that pointed at the old table are recreated on the new one;
+-- the old table is kept as post_records_unpartitioned until it is dropped by hand.
+
+CREATE OR REPLACE FUNCTION post_records_partition_name(p_month DATE) RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT 'post_records_' || to_char(date_trunc('month', p_month), '"y"YYYY"m"MM')
+$$;
+
+CREATE OR REPLACE FUNCTION post_records_ensure_partition(p_month DATE) RETURNS TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_month)::date;
+    v_end DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    v_name TEXT := post_records_partition_name(p_month);
+    v_moved BIGINT;
+BEGIN
+    IF to_regclass(v_name) IS NOT NULL THEN
+        RETURN v_name;
+    END IF;
+
+    -- Rows of this month that landed in the default partition must leave it before the
+    -- partition can be attached; they are re-inserted through the parent so the row
+    -- triggers (post_stats rollups) see a delete and an insert that cancel out.
+    DROP TABLE IF EXISTS pg_temp.post_records_moving;
+    CREATE TEMP TABLE post_records_moving (LIKE post_records);
+    IF to_regclass('post_records_default') IS NOT NULL THEN
+        WITH moved AS (
+            DELETE FROM post_records_default
+            WHERE created_at >= v_start AND created_at < v_end
+            RETURNING *
+        )
+        INSERT INTO post_records_moving SELECT * FROM moved;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I PARTITION OF post_records FOR VALUES FROM (%L) TO (%L)',
+                   v_name, v_start, v_end);
+
+    INSERT INTO post_records SELECT * FROM post_records_moving;
+    GET DIAGNOSTICS v_moved = ROW_COUNT;
+    DROP TABLE pg_temp.post_records_moving;
+
+    IF v_moved > 0 THEN
+        RAISE NOTICE 'moved % rows from post_records_default into %', v_moved, v_name;
+    END IF;
+    RETURN v_name;
+END;
+$$;
+
+DO $$
+DECLARE
+    v_definition RECORD;
+    v_month DATE;
+    v_last_month DATE := (date_trunc('month', CURRENT_TIMESTAMP) + INTERVAL '1 month')::date;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'post_records'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    LOCK TABLE post_records IN ACCESS EXCLUSIVE MODE;
+
+    -- Still on the old table, so the rollup triggers move these rows' day buckets too
+    UPDATE post_records
+    SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP::timestamp)
+    WHERE created_at IS NULL;
+
+    CREATE TEMP TABLE post_records_old_indexes ON COMMIT DROP AS
+    SELECT i.indexrelid::regclass::text AS name, pg_get_indexdef(i.indexrelid) AS definition
+    FROM pg_index i
+    WHERE i.indrelid = 'post_records'::regclass AND NOT i.indisprimary AND NOT i.indisunique;
+
+    CREATE TEMP TABLE post_records_old_triggers ON COMMIT DROP AS
+    SELECT t.tgname AS name, pg_get_triggerdef(t.oid) AS definition
+    FROM pg_trigger t
+    WHERE t.tgrelid = 'post_records'::regclass AND NOT t.tgisinternal;
+
+    ALTER TABLE post_records RENAME TO post_records_unpartitioned;
+    FOR v_definition IN SELECT name FROM post_records_old_indexes LOOP
+        EXECUTE format('ALTER INDEX %s RENAME TO %I',
+                       v_definition.name, left(v_definition.name, 48) || '_unpartitioned');
+    END LOOP;
+    IF to_regclass('post_records_pkey') IS NOT NULL THEN
+        ALTER INDEX post_records_pkey RENAME TO post_records_unpartitioned_pkey;
+    END IF;
+
+    CREATE TABLE post_records (
+        LIKE post_records_unpartitioned INCLUDING DEFAULTS INCLUDING STORAGE INCLUDING COMMENTS,
+        PRIMARY KEY (post_id, created_at)
+    ) PARTITION BY RANGE (created_at);
+    CREATE TABLE post_records_default PARTITION OF post_records DEFAULT;
+
+    v_month := COALESCE(
+        (SELECT date_trunc('month', MIN(created_at))::date FROM post_records_unpartitioned),
+        date_trunc('month', CURRENT_TIMESTAMP)::date
+    );
+    WHILE v_month <= v_last_month LOOP
+        PERFORM post_records_ensure_partition(v_month);
+        v_month := (v_month + INTERVAL '1 month')::date;
+    END LOOP;
+
+    -- Copied before the triggers exist: the rollups already count these rows
+    INSERT INTO post_records SELECT * FROM post_records_unpartitioned;
+
+    FOR v_definition IN SELECT definition FROM post_records_old_indexes LOOP
+        EXECUTE v_definition.definition;
+    END LOOP;
+
+    FOR v_definition IN SELECT name, definition FROM post_records_old_triggers LOOP
+        EXECUTE format('DROP TRIGGER %I ON post_records_unpartitioned', v_definition.name);
+        EXECUTE v_definition.definition;
+    END LOOP;
+
+    -- Views resolve their table at creation time; re-point them at the partitioned table
+    FOR v_definition IN
+        SELECT DISTINCT v.oid::regclass::text AS name, pg_get_viewdef(v.oid) AS definition
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.refobjid = 'post_records_unpartitioned'::regclass AND v.oid <> d.refobjid
+    LOOP
+        EXECUTE format('CREATE OR REPLACE VIEW %s AS %s', v_definition.name,
+                       replace(v_definition.definition, 'post_records_unpartitioned', 'post_records'));
+    END LOOP;
+END;
+$$;
+
+ANALYZE post_records;
+
+-- Months moved to Parquet by services/post_partitions.py; rows there are no longer in post_records
+CREATE TABLE IF NOT EXISTS post_records_archive (
+    partition_name VARCHAR PRIMARY KEY,
+    range_start DATE NOT NULL,
+    range_end DATE NOT NULL,
+    row_count BIGINT NOT NULL,
+    session_ids BIGINT[] NOT NULL DEFAULT '{}',
+    file_path VARCHAR NOT NULL,
+    file_bytes BIGINT,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
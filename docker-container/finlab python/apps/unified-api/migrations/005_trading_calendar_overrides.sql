@@ -0,0 +1,10 @@
+-- Announced exchange closures (typhoon days, ad-hoc holidays) and extra sessions
+-- (make-up trading days) that the FinLab price index cannot know about in advance.
+-- Read by services/trading_calendar.py; an override wins over the derived calendar.
+CREATE TABLE IF NOT EXISTS trading_calendar_overrides (
+    day DATE PRIMARY KEY,
+    is_open BOOLEAN NOT NULL,
+    reason VARCHAR NOT NULL DEFAULT '',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
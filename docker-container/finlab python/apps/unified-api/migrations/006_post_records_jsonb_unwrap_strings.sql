@@ -0,0 +1,52 @@
+-- post_records payload values written as json.dumps(...) strings through a JSONB-typed ORM column
+-- were stored double-encoded: a JSON string scalar holding the real object, so
+-- generation_params->>'trigger_type' was NULL. Only strings that hold an object or array are
+-- unwrapped; plain legacy text stays a JSON string.
+CREATE OR REPLACE FUNCTION post_records_unwrap_jsonb(value JSONB) RETURNS JSONB
+LANGUAGE plpgsql IMMUTABLE AS $$
+DECLARE
+    inner_value JSONB;
+BEGIN
+    IF value IS NULL OR jsonb_typeof(value) <> 'string' THEN
+        RETURN value;
+    END IF;
+    inner_value := (value #>> '{}')::jsonb;
+    IF jsonb_typeof(inner_value) IN ('object', 'array') THEN
+        RETURN inner_value;
+    END IF;
+    RETURN value;
+EXCEPTION WHEN others THEN
+    RETURN value;
+END;
+$$;
+
+-- The TEXT -> JSONB backfill (services/jsonb_backfill.py) goes through this helper, so it unwraps too
+CREATE OR REPLACE FUNCTION post_records_try_jsonb(value TEXT) RETURNS JSONB
+LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    IF value IS NULL OR btrim(value) = '' THEN
+        RETURN NULL;
+    END IF;
+    RETURN post_records_unwrap_jsonb(value::jsonb);
+EXCEPTION WHEN others THEN
+    RETURN to_jsonb(value);
+END;
+$$;
+
+-- Repair rows already converted; columns still TEXT are handled by the backfill
+DO $$
+DECLARE
+    v_column TEXT;
+BEGIN
+    FOR v_column IN
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'post_records' AND data_type = 'jsonb'
+          AND column_name IN ('alternative_versions', 'serper_data', 'generation_params', 'commodity_tags')
+    LOOP
+        EXECUTE format(
+            'UPDATE post_records SET %1$I = post_records_unwrap_jsonb(%1$I) WHERE jsonb_typeof(%1$I) = ''string'' AND post_records_unwrap_jsonb(%1$I) <> %1$I',
+            v_column
+        );
+    END LOOP;
+END;
+$$;
@@ -6,11 +6,19 @@ import random
 import json
 import logging
 import os
+import sys
 import openai
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 from kol_database_service import KOLProfile, KOLDatabaseService
 from random_content_generator import RandomContentGenerator
 
+# 文字後處理規則集位於 unified-api/services（預先編譯的語調與標籤清理規則）
+unified_api_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if unified_api_root not in sys.path:
+    sys.path.append(unified_api_root)
+
+from services.text_postprocess import tone_rules, clean_tags_and_signatures
+
 logger = logging.getLogger(__name__)
 
 # LLM配置
@@ -596,6 +604,8 @@ class EnhancedPersonalizationProcessor:
     
     def __init__(self):
         self.kol_service = KOLDatabaseService()
+        # 由服務注入的 KOL 設定查詢（serial -> profile，例如 unified-api 的 KOL Profile 快取）；未設定時查詢數據庫
+        self.kol_profile_lookup: Optional[Callable[[str], Any]] = None
         self.parameter_mapper = EnhancedParameterMapper()
         self.style_randomizer = PostingStyleRandomizer()
         self.llm_processor = cLLMPersonalizationProcessor()  # 新增：LLM處理器
@@ -603,6 +613,15 @@ class EnhancedPersonalizationProcessor:
         self.prompt_template = ENHANCED_PERSONALIZATION_PROMPT_TEMPLATE
         self.logger = logging.getLogger(__name__)
     
+    def _get_kol_profile(self, kol_serial: str):
+        """KOL 設定：優先使用注入的快取查詢，失敗時退回 KOLDatabaseService"""
+        if self.kol_profile_lookup is not None:
+            try:
+                return self.kol_profile_lookup(kol_serial)
+            except Exception as e:
+                self.logger.warning(f"⚠️ KOL 快取查詢失敗，改查數據庫: {e}")
+        return self.kol_service.get_kol_by_serial(kol_serial)
+    
     def _format_realtime_data_for_llm(self, price_data: Dict, trigger_type: str) -> str:
         """將盤中觸發器的 JSON 數據格式化為 LLM 可讀的格式 - 包含完整的 column names
         
@@ -780,7 +799,7 @@ class EnhancedPersonalizationProcessor:
                 self.logger.info(f"⚠️ 沒有即時股價數據，使用原始內容")
             
             # 1. 獲取KOL設定
-            kol_profile = self.kol_service.get_kol_by_serial(str(kol_serial))
+            kol_profile = self._get_kol_profile(str(kol_serial))
             if not kol_profile:
                 self.logger.warning(f"⚠️ 找不到KOL {kol_serial}，返回原始內容")
                 return standard_title, standard_content, {}
@@ -1626,35 +1645,9 @@ class EnhancedPersonalizationProcessor:
         tone_emotion = kol_profile.tone_emotion or 5
         tone_confidence = style_params.get('tone_confidence', kol_profile.tone_confidence or 7)
         
-        # 2. 動態調整正式程度
-        if tone_formal >= 8:
-            # 高正式度：使用正式用詞
-            content = content.replace("很", "相當").replace("非常", "極其").replace("超", "極度")
-        elif tone_formal <= 4:
-            # 低正式度：使用輕鬆用詞
-            content = content.replace("相當", "很").replace("極其", "非常").replace("極度", "超")
-        
-        # 3. 動態調整情感強度 - 避免過度興奮
-        if tone_emotion >= 7:
-            # 高情感度：使用中性情感詞彙
-            content = content.replace("強勢", "穩健").replace("上漲", "上揚")
-        elif tone_emotion <= 3:
-            # 低情感度：使用中性詞彙
-            content = content.replace("強勢突破", "穩健上漲").replace("強勢上漲", "溫和上漲")
-        
-        # 4. 動態調整自信程度
-        if tone_confidence >= 8:
-            # 高自信度：使用謹慎肯定詞彙
-            content = content.replace("可能", "預期").replace("或許", "有望")
-        elif tone_confidence <= 4:
-            # 低自信度：使用謹慎詞彙
-            content = content.replace("將", "可能").replace("必定", "或許")
-        
-        # 5. 過濾聳動性用詞
-        sensational_words = ["強勢突破", "爆量上攻", "衝高", "強勢上漲", "突破性上漲", "量價齊揚", "強勢表現"]
-        for word in sensational_words:
-            if word in content:
-                content = content.replace(word, "穩健表現")
+        # 2-5. 正式程度、情感強度、自信程度的用詞替換與聳動性用詞過濾
+        # （每個語調區間的規則只編譯一次，單次掃描完成所有替換）
+        content = tone_rules(tone_formal, tone_emotion, tone_confidence).sub(content)
         
         return content
     
@@ -1707,8 +1700,6 @@ class EnhancedPersonalizationProcessor:
         """根據KOL設定動態應用標籤與簽名 - 完全基於KOL欄位"""
         
         # 🔥 修復1: 移除所有可能的簽名檔，避免重複
-        import re
-        
         # 檢查各種可能的簽名格式並移除
         possible_signatures = [
             kol_profile.signature.strip() if kol_profile.signature else "",
@@ -1726,33 +1717,9 @@ class EnhancedPersonalizationProcessor:
                 content = content.replace(sig, '')
                 self.logger.info(f"⚠️ 移除重複簽名檔: {sig}")
         
-        # 移除重複的簽名模式
-        signature_patterns = [
-            r'😂\s*板橋大who\s*-\s*鄉民觀點.*?鄉民觀點僅供娛樂，投資請理性思考。',
-            r'📊\s*[^-\n]+\s*-\s*技術分析.*?技術分析僅供參考，投資有風險，請謹慎決策。',
-            r'📰\s*[^-\n]+\s*-\s*新聞快報.*?消息僅供參考，投資決策請自行判斷。',
-        ]
-        
-        for pattern in signature_patterns:
-            content = re.sub(pattern, '', content, flags=re.DOTALL)
-        
+        # 移除重複的簽名模式、所有 hashtag，並清理多餘的空格和換行
         # 🔥 修復2: 移除所有 hashtag，確保內容看起來更自然
-        # 移除所有hashtag模式
-        import re
-        # 更強力的hashtag移除模式
-        hashtag_patterns = [
-            r'#[\w\u4e00-\u9fff]+(?:\s+#[\w\u4e00-\u9fff]+)*',  # 標準hashtag
-            r'#[\w\u4e00-\u9fff]+',  # 單個hashtag
-            r'#鄉民觀點\s*#PTT\s*#股市討論\s*#幽默分析',  # 特定的hashtag組合
-            r'#[\w\u4e00-\u9fff]+\s*#[\w\u4e00-\u9fff]+',  # 多個hashtag
-        ]
-        
-        for pattern in hashtag_patterns:
-            content = re.sub(pattern, '', content)
-        
-        # 清理多餘的空格和換行
-        content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)  # 移除多餘的換行
-        content = re.sub(r' +', ' ', content)  # 移除多餘的空格
+        content = clean_tags_and_signatures(content)
         
         # 🔥 修復3: 只添加一次簽名檔，且不添加任何簽名
         # 完全移除簽名添加邏輯，避免重複
@@ -12,7 +12,6 @@ import random
 import time
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
-import numpy as np
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
@@ -66,6 +65,9 @@ class PoissonDistributor:
         if self.total_articles == 0:
             return {}
 
+        # numpy is imported here so registering the reaction bot routes stays off the startup import path
+        import numpy as np
+
         # Generate Poisson distribution
         reactions_per_article = np.random.poisson(self.lambda_param, self.total_articles)
 
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+文字後處理效能比較：原本逐條 re.sub / str.replace 的串接 vs services/text_postprocess 的單次掃描規則集
+
+    python scripts/benchmark_text_postprocess.py                  # 約 2000 字的貼文 × 200 篇
+    python scripts/benchmark_text_postprocess.py --posts 1000
+    python scripts/benchmark_text_postprocess.py --write-golden   # 以原本的串接重新產生 golden 輸出
+
+golden 語料（testdata/text_postprocess_golden.json）的 expected 由這裡的 legacy_* 函式產生，
+test_text_postprocess.py 確認新的規則集輸出與其完全一致。
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+UNIFIED_API_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if UNIFIED_API_ROOT not in sys.path:
+    sys.path.insert(0, UNIFIED_API_ROOT)
+
+from services.text_postprocess import (  # noqa: E402
+    clean_tags_and_signatures,
+    sanitize_content_numbers,
+    tone_rules,
+)
+
+logger = logging.getLogger(__name__)
+
+GOLDEN_PATH = os.path.join(UNIFIED_API_ROOT, 'testdata', 'text_postprocess_golden.json')
+
+
+# ==================== 原本的串接（基準） ====================
+
+def legacy_sanitize_content_numbers(content: str) -> str:
+    """
+    main.py 原本的 sanitize_content_numbers（逐條 re.sub，每條重新掃描全文）
+
+    Fixes:
+    - Trailing zeros: 2.50萬 → 2.5萬, 3.00億 → 3億
+    - Awkward raw numbers: 112340千元 → 1.12億元, 15000張 → 1.5萬張
+    - Over-precise decimals: 1.234567億 → 1.23億
+    - Inconsistent units: 混合使用千/萬/億
+
+    Args:
+        content: The GPT-generated content to sanitize
+
+    Returns:
+        Sanitized content with natural number formatting
+    """
+    import re
+
+    if not content:
+        return content
+
+    result = content
+
+    # 1. Fix trailing zeros in decimals (2.50 → 2.5, 3.00 → 3)
+    # Pattern: number with trailing zeros before unit
+    result = re.sub(r'(\d+)\.0+([萬億千張元%股])', r'\1\2', result)  # 3.00萬 → 3萬
+    result = re.sub(r'(\d+\.\d*[1-9])0+([萬億千張元%股])', r'\1\2', result)  # 2.50萬 → 2.5萬
+
+    # 2. Convert awkward 千元 to proper units (112340千元 → 1.12億元)
+    def convert_qian_to_proper_unit(match):
+        num_str = match.group(1)
+        unit_suffix = match.group(2) if match.group(2) else '元'
+        try:
+            num = float(num_str)
+            actual_value = num * 1000  # 千 = 1000
+
+            if actual_value >= 100000000:  # >= 1億
+                formatted = actual_value / 100000000
+                if formatted == int(formatted):
+                    return f"{int(formatted)}億{unit_suffix}"
+                else:
+                    return f"{formatted:.2f}億{unit_suffix}".rstrip('0').rstrip('.')  + unit_suffix if unit_suffix != '元' else f"{formatted:.2f}".rstrip('0').rstrip('.') + "億元"
+            elif actual_value >= 10000:  # >= 1萬
+                formatted = actual_value / 10000
+                if formatted == int(formatted):
+                    return f"{int(formatted)}萬{unit_suffix}"
+                else:
+                    return f"{formatted:.2f}萬{unit_suffix}".rstrip('0').rstrip('.')
+            else:
+                return match.group(0)  # Keep original if small
+        except:
+            return match.group(0)
+
+    result = re.sub(r'(\d+(?:\.\d+)?)\s*千\s*(元)?', convert_qian_to_proper_unit, result)
+
+    # 3. Convert large raw numbers to 萬/億 units
+    def convert_large_number(match):
+        prefix = match.group(1) or ''
+        num_str = match.group(2)
+        unit = match.group(3)
+        try:
+            num = float(num_str.replace(',', ''))
+
+            # Skip if already has Chinese unit modifier
+            if num < 10000:
+                return match.group(0)
+
+            if num >= 100000000:  # >= 1億
+                formatted = num / 100000000
+                if formatted == int(formatted):
+                    return f"{prefix}{int(formatted)}億{unit}"
+                else:
+                    return f"{prefix}{formatted:.2f}億{unit}".replace('.00', '')
+            elif num >= 10000:  # >= 1萬
+                formatted = num / 10000
+                if formatted == int(formatted):
+                    return f"{prefix}{int(formatted)}萬{unit}"
+                else:
+                    # Remove trailing zeros
+                    formatted_str = f"{formatted:.2f}".rstrip('0').rstrip('.')
+                    return f"{prefix}{formatted_str}萬{unit}"
+            else:
+                return match.group(0)
+        except:
+            return match.group(0)
+
+    # Match patterns like: 15000張, 成交量15000張, etc.
+    result = re.sub(r'(成交量|買超|賣超|持股)?[\s]*(\d{5,}(?:,\d{3})*(?:\.\d+)?)\s*(張|股|元|手)', convert_large_number, result)
+
+    # 4. Fix over-precise decimals (1.234567億 → 1.23億)
+    def fix_decimal_precision(match):
+        num = match.group(1)
+        unit = match.group(2)
+        try:
+            # Parse and reformat with max 2 decimal places
+            num_float = float(num)
+            if num_float == int(num_float):
+                return f"{int(num_float)}{unit}"
+            else:
+                formatted = f"{num_float:.2f}".rstrip('0').rstrip('.')
+                return f"{formatted}{unit}"
+        except:
+            return match.group(0)
+
+    result = re.sub(r'(\d+\.\d{3,})(萬|億|%)', fix_decimal_precision, result)
+
+    # 5. Clean up redundant patterns
+    result = re.sub(r'(\d+)\.0([萬億])', r'\1\2', result)  # 5.0萬 → 5萬
+
+    # 6. Fix patterns like "X.XX萬元元" (double unit)
+    result = re.sub(r'(萬|億)(元)(元)', r'\1\2', result)
+
+    logger.debug(f"📝 Content sanitized: {len(content)} → {len(result)} chars")
+
+    return result
+
+
+def legacy_tone_control(content: str, tone_formal: float, tone_emotion: float, tone_confidence: float) -> str:
+    """personalization_module._apply_dynamic_tone_control 原本的 str.replace 串接"""
+    if tone_formal >= 8:
+        content = content.replace("很", "相當").replace("非常", "極其").replace("超", "極度")
+    elif tone_formal <= 4:
+        content = content.replace("相當", "很").replace("極其", "非常").replace("極度", "超")
+
+    if tone_emotion >= 7:
+        content = content.replace("強勢", "穩健").replace("上漲", "上揚")
+    elif tone_emotion <= 3:
+        content = content.replace("強勢突破", "穩健上漲").replace("強勢上漲", "溫和上漲")
+
+    if tone_confidence >= 8:
+        content = content.replace("可能", "預期").replace("或許", "有望")
+    elif tone_confidence <= 4:
+        content = content.replace("將", "可能").replace("必定", "或許")
+
+    sensational_words = ["強勢突破", "爆量上攻", "衝高", "強勢上漲", "突破性上漲", "量價齊揚", "強勢表現"]
+    for word in sensational_words:
+        if word in content:
+            content = content.replace(word, "穩健表現")
+
+    return content
+
+
+def legacy_clean_tags_and_signatures(content: str) -> str:
+    """personalization_module._apply_dynamic_tags_and_signature 原本的 regex 串接"""
+    signature_patterns = [
+        r'😂\s*板橋大who\s*-\s*鄉民觀點.*?鄉民觀點僅供娛樂，投資請理性思考。',
+        r'📊\s*[^-\n]+\s*-\s*技術分析.*?技術分析僅供參考，投資有風險，請謹慎決策。',
+        r'📰\s*[^-\n]+\s*-\s*新聞快報.*?消息僅供參考，投資決策請自行判斷。',
+    ]
+    for pattern in signature_patterns:
+        content = re.sub(pattern, '', content, flags=re.DOTALL)
+
+    hashtag_patterns = [
+        r'#[\w\u4e00-\u9fff]+(?:\s+#[\w\u4e00-\u9fff]+)*',
+        r'#[\w\u4e00-\u9fff]+',
+        r'#鄉民觀點\s*#PTT\s*#股市討論\s*#幽默分析',
+        r'#[\w\u4e00-\u9fff]+\s*#[\w\u4e00-\u9fff]+',
+    ]
+    for pattern in hashtag_patterns:
+        content = re.sub(pattern, '', content)
+
+    content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
+    content = re.sub(r' +', ' ', content)
+    return content
+
+
+def new_tone_control(content: str, tone_formal: float, tone_emotion: float, tone_confidence: float) -> str:
+    return tone_rules(tone_formal, tone_emotion, tone_confidence).sub(content)
+
+
+# ==================== golden 語料 ====================
+
+def write_golden(path: str = GOLDEN_PATH):
+    """保留語料的 input 與語調設定，expected 以原本的串接重新計算"""
+    with open(path, encoding='utf-8') as f:
+        golden = json.load(f)
+    for case in golden['sanitize_content_numbers']:
+        case['expected'] = legacy_sanitize_content_numbers(case['input'])
+    for case in golden['tone_control']:
+        case['expected'] = legacy_tone_control(
+            case['input'], case['tone_formal'], case['tone_emotion'], case['tone_confidence']
+        )
+    for case in golden['clean_tags_and_signatures']:
+        case['expected'] = legacy_clean_tags_and_signatures(case['input'])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    print(f"已寫入 {path}")
+
+
+# ==================== 合成貼文 ====================
+
+SENTENCES = [
+    "台積電今日成交量{vol}張，外資買超{buy}張，股價收在{price}元，漲幅{pct}%。",
+    "公司第三季營收{rev}千元，年增{yoy}%，毛利率{margin}%，本益比約{pe}倍。",
+    "市值{cap}元，三大法人合計賣超 {sell}股，融資餘額{margin_bal}萬元元。",
+    "技術面來看，股價很可能強勢突破前高，均線呈現多頭排列，成交量非常穩定。",
+    "短線或許會有震盪，但中長期基本面將持續強勢上漲，外資持股{hold}張。",
+    "投資人可以留意{price}元附近的支撐，若量價齊揚，後續有機會衝高到{target}元。",
+    "法說會上經營層表示，明年資本支出約{capex}億，營收目標成長{yoy}%。",
+    # 沒有數字的敘述（生成的貼文大多是這類句子）
+    "從產業面來看，AI 伺服器需求持續升溫，先進製程與先進封裝的產能依舊供不應求。",
+    "不過市場也擔心美國升息循環尚未結束，資金面可能轉趨保守，短線追高要特別小心。",
+    "整體而言，基本面仍有支撐，建議投資人分批布局，並設好停損，不要一次重壓。",
+    "鄉民們對這波走勢看法分歧，有人說是主力在洗盤，也有人認為只是跟著大盤修正。",
+    "如果接下來幾天量能無法放大，股價恐怕會在區間內整理一段時間，耐心等待方向。",
+]
+
+
+def synthetic_post(rng: random.Random, length: int) -> str:
+    parts = []
+    while sum(len(part) for part in parts) < length:
+        sentence = rng.choice(SENTENCES).format(
+            vol=rng.randint(1000, 90000), buy=rng.randint(100, 30000), sell=f"{rng.randint(10000, 9000000):,}",
+            price=f"{rng.uniform(10, 1000):.2f}", target=f"{rng.uniform(10, 1000):.1f}",
+            pct=f"{rng.uniform(-10, 10):.3f}", rev=rng.randint(10000, 900000000),
+            yoy=f"{rng.uniform(-30, 80):.4f}", margin=f"{rng.uniform(10, 60):.2f}",
+            pe=f"{rng.uniform(5, 40):.1f}", cap=rng.randint(10 ** 8, 10 ** 13),
+            margin_bal=f"{rng.uniform(1, 500):.2f}", hold=rng.randint(10000, 5000000),
+            capex=f"{rng.uniform(1, 300):.5f}",
+        )
+        parts.append(sentence)
+        if rng.random() < 0.2:
+            parts.append("\n\n  \n")
+    parts.append("\n\n📊 川川哥 - 技術分析\n\n技術分析僅供參考，投資有風險，請謹慎決策。")
+    parts.append("\n#台積電 #半導體  #技術分析")
+    return ''.join(parts)
+
+
+def measure(function, posts, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for post in posts:
+            function(post)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--length', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--write-golden', action='store_true')
+    args = parser.parse_args()
+
+    if args.write_golden:
+        write_golden()
+        return
+
+    rng = random.Random(0)
+    posts = [synthetic_post(rng, args.length) for _ in range(args.posts)]
+    tone = (9, 8, 3)
+    cases = {
+        'sanitize_content_numbers': (legacy_sanitize_content_numbers, sanitize_content_numbers),
+        'tone_control': (lambda text: legacy_tone_control(text, *tone), lambda text: new_tone_control(text, *tone)),
+        'clean_tags_and_signatures': (legacy_clean_tags_and_signatures, clean_tags_and_signatures),
+    }
+
+    print(f"{args.posts} 篇 × 約 {args.length} 字，每項取 {args.repeat} 次中位數\n")
+    print(f"{'步驟':<28}{'原本串接':>12}{'單次掃描':>12}{'每篇':>10}{'加速':>8}")
+    for name, (legacy, new) in cases.items():
+        mismatched = sum(legacy(post) != new(post) for post in posts)
+        if mismatched:
+            print(f"⚠️ {name}: {mismatched} 篇輸出與原本不同")
+        legacy_time = measure(legacy, posts, args.repeat)
+        new_time = measure(new, posts, args.repeat)
+        print(f"{name:<28}{legacy_time * 1000:>10.1f}ms{new_time * 1000:>10.1f}ms"
+              f"{new_time / args.posts * 1e6:>8.0f}µs{legacy_time / new_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,14 @@ Fetches 1-minute candlestick data for real-time stock prices
 Adapted from ai_chatbot project for forum_autoposter integration
 """
 
-import httpx
 import os
 import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from urllib.parse import quote
-import jwt
 from zoneinfo import ZoneInfo
+from .http_clients import get_http_client
+from .cmoney_tokens import get_token_manager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,65 +34,26 @@ class CMoneyRealtimeService:
         self.base_url = "https://api.cmoney.tw/AdditionInformationRevisit"
 
     async def login(self) -> bool:
-        """Login and get Bearer token"""
+        """Login and get Bearer token (shared token manager: cached, single-flight)"""
 
         if not self.email or not self.password:
             logger.error("❌ CMoney credentials not set (FORUM_200_EMAIL, FORUM_200_PASSWORD)")
             return False
 
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-
-        # Form data (NOT JSON!)
-        data = {
-            "grant_type": "password",
-            "login_method": "email",
-            "client_id": "cmstockcommunity",
-            "account": self.email,
-            "password": self.password
-        }
-
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.login_url,
-                    headers=headers,
-                    data=data,
-                    timeout=10.0
-                )
-
-                if response.status_code != 200:
-                    logger.error(f"❌ CMoney login failed: {response.status_code}")
-                    return False
-
-                result = response.json()
-                self.bearer_token = result.get("access_token")
-                expires_in = result.get("expires_in", 3600)
-
-                if not self.bearer_token:
-                    logger.error(f"❌ No access_token in CMoney response")
-                    return False
-
-                # Decode JWT to get user GUID
-                try:
-                    decoded = jwt.decode(self.bearer_token, options={"verify_signature": False})
-                    self.user_guid = decoded.get("user_guid")
-                except Exception as e:
-                    logger.warning(f"⚠️  Could not decode CMoney JWT: {e}")
-
-                # Use Taiwan timezone for token expiration
-                taiwan_tz = ZoneInfo("Asia/Taipei")
-                self.token_expires_at = datetime.now(taiwan_tz) + timedelta(seconds=expires_in - 300)
-
-                logger.info(f"✅ CMoney login successful (user: {self.user_guid})")
-                return True
-
+            token = await get_token_manager().get(self.email, self.password)
         except Exception as e:
             logger.error(f"❌ CMoney login error: {e}")
             return False
 
+        self.bearer_token = token.token
+        self.user_guid = token.user_guid
+        # Use Taiwan timezone for token expiration (margin already applied by the manager)
+        self.token_expires_at = datetime.fromtimestamp(token.expires_at_ts, ZoneInfo("Asia/Taipei"))
+
+        logger.info(f"✅ CMoney login successful (user: {self.user_guid})")
+        return True
+
     async def ensure_authenticated(self) -> bool:
         """Ensure we have a valid token, login if needed"""
 
@@ -168,49 +129,49 @@ class CMoneyRealtimeService:
         }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, headers=headers, json=payload, timeout=30.0)
-
-                if response.status_code == 200:
-                    data = response.json()
-
-                    # If data is valid and not empty, return it
-                    if data and len(data) > 0:
-                        date_str = str(date)
-                        formatted_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
-                        logger.info(f"✅ CMoney: Got {len(data)} candlestick data points for {stock_code} (date: {formatted_date})")
-                        return data
-
-                    # If empty and auto_fallback enabled, try previous days
-                    if auto_fallback:
-                        logger.warning(f"⚠️  CMoney: No data for {stock_code} on {date}, trying previous days...")
-
-                        # Try up to 5 previous days (handles weekends and holidays)
-                        current_date = datetime.strptime(str(date), "%Y%m%d")
-                        for days_back in range(1, 6):
-                            prev_date = current_date - timedelta(days=days_back)
-                            prev_date_int = int(prev_date.strftime("%Y%m%d"))
-
-                            # Recursive call with auto_fallback=False to avoid infinite loop
-                            prev_data = await self.get_historical_candlestick(
-                                stock_code,
-                                date=prev_date_int,
-                                auto_fallback=False
-                            )
-
-                            if prev_data and len(prev_data) > 0:
-                                formatted_prev_date = prev_date.strftime("%Y-%m-%d")
-                                logger.info(f"✅ CMoney: Fallback success! Using data from {formatted_prev_date}")
-                                return prev_data
-
-                        logger.error(f"❌ CMoney: No data found for {stock_code} in last 5 days")
-                        return None
-
-                    return None
-                else:
-                    logger.error(f"❌ CMoney API error: {response.status_code}")
+            client = get_http_client('cmoney_api')
+            response = await client.post(url, headers=headers, json=payload, timeout=30.0)
+
+            if response.status_code == 200:
+                data = response.json()
+
+                # If data is valid and not empty, return it
+                if data and len(data) > 0:
+                    date_str = str(date)
+                    formatted_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
+                    logger.info(f"✅ CMoney: Got {len(data)} candlestick data points for {stock_code} (date: {formatted_date})")
+                    return data
+
+                # If empty and auto_fallback enabled, try previous days
+                if auto_fallback:
+                    logger.warning(f"⚠️  CMoney: No data for {stock_code} on {date}, trying previous days...")
+
+                    # Try up to 5 previous days (handles weekends and holidays)
+                    current_date = datetime.strptime(str(date), "%Y%m%d")
+                    for days_back in range(1, 6):
+                        prev_date = current_date - timedelta(days=days_back)
+                        prev_date_int = int(prev_date.strftime("%Y%m%d"))
+
+                        # Recursive call with auto_fallback=False to avoid infinite loop
+                        prev_data = await self.get_historical_candlestick(
+                            stock_code,
+                            date=prev_date_int,
+                            auto_fallback=False
+                        )
+
+                        if prev_data and len(prev_data) > 0:
+                            formatted_prev_date = prev_date.strftime("%Y-%m-%d")
+                            logger.info(f"✅ CMoney: Fallback success! Using data from {formatted_prev_date}")
+                            return prev_data
+
+                    logger.error(f"❌ CMoney: No data found for {stock_code} in last 5 days")
                     return None
 
+                return None
+            else:
+                logger.error(f"❌ CMoney API error: {response.status_code}")
+                return None
+
         except Exception as e:
             logger.error(f"❌ CMoney request failed: {e}")
             return None
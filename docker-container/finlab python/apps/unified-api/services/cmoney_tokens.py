@@ -0,0 +1,260 @@
+"""
+CMoney Token Manager - One token cache for every CMoney account login
+Single-flight refresh (concurrent callers share one login), proactive refresh before expiry,
+optional persistence across restarts and counters for logins avoided vs performed
+
+The persisted cache is keyed by email only; the password fingerprint used to detect a
+changed password is an HMAC under a per-process random key and never leaves memory.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+import logging
+
+from .http_clients import get_http_client
+
+logger = logging.getLogger(__name__)
+
+LOGIN_URL = "https://social.cmoney.tw/identity/token"
+
+# Tokens are treated as expired this many seconds before the server-side expiry
+EXPIRY_MARGIN_SECONDS = 300
+# Within this window before (margin-adjusted) expiry, a background refresh is started
+PROACTIVE_REFRESH_SECONDS = 600
+
+LOGIN_MAX_RETRIES = 3
+LOGIN_RETRY_DELAY = 2  # seconds
+
+
+# Password fingerprints only need to be comparable within this process
+_DIGEST_KEY = secrets.token_bytes(32)
+
+
+def _password_digest(email: str, password: str) -> str:
+    return hmac.new(_DIGEST_KEY, f"{email}:{password}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+class CMoneyToken:
+    """Access token for one account (duck-type compatible with cmoney_client.AccessToken)"""
+
+    def __init__(self, token: str, expires_at_ts: float, user_guid: Optional[str] = None):
+        self.token = token
+        self.expires_at_ts = expires_at_ts
+        self.user_guid = user_guid
+
+    @property
+    def expires_at(self) -> datetime:
+        """Expiry as a naive local datetime (same convention as AccessToken)"""
+        return datetime.fromtimestamp(self.expires_at_ts)
+
+    @property
+    def seconds_left(self) -> float:
+        return self.expires_at_ts - time.time()
+
+    @property
+    def is_expired(self) -> bool:
+        return self.seconds_left <= 0
+
+
+class CMoneyTokenManager:
+    """Per-account CMoney token cache with single-flight login"""
+
+    def __init__(self, persist_path: Optional[str] = None):
+        self.persist_path = persist_path
+        self._tokens: Dict[str, CMoneyToken] = {}
+        self._password_digests: Dict[str, str] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            'logins_performed': 0,
+            'logins_avoided': 0,
+            'logins_coalesced': 0,
+            'login_failures': 0,
+            'proactive_refreshes': 0,
+            'invalidations': 0
+        }
+        if persist_path:
+            self._load()
+
+    # ==================== Public API ====================
+
+    async def get(self, email: str, password: str, force_refresh: bool = False) -> CMoneyToken:
+        """
+        Get a valid token for an account, logging in only when needed
+
+        Args:
+            email: CMoney account email
+            password: CMoney account password
+            force_refresh: Ignore the cached token and log in again
+
+        Returns:
+            CMoneyToken
+
+        Raises:
+            Exception: login failed
+        """
+        digest = _password_digest(email, password)
+        cached = self._tokens.get(email)
+        if cached and email not in self._password_digests:
+            # Restored from disk: bind the token to the first password it is requested with
+            self._password_digests[email] = digest
+        if cached and self._password_digests.get(email) != digest:
+            # Different password than the cached login - never hand out the old token
+            cached = None
+
+        if cached and not force_refresh and not cached.is_expired:
+            self.stats['logins_avoided'] += 1
+            if cached.seconds_left < PROACTIVE_REFRESH_SECONDS and email not in self._inflight:
+                self.stats['proactive_refreshes'] += 1
+                self._start_login(email, password, digest)
+            return cached
+
+        if email in self._inflight:
+            self.stats['logins_coalesced'] += 1
+            task = self._inflight[email]
+        else:
+            task = self._start_login(email, password, digest)
+        return await asyncio.shield(task)
+
+    async def get_token(self, email: str, password: str, force_refresh: bool = False) -> str:
+        """Shortcut returning just the bearer token string"""
+        return (await self.get(email, password, force_refresh)).token
+
+    async def login(self, credentials) -> CMoneyToken:
+        """Drop-in for CMoneyClient.login(credentials)"""
+        return await self.get(credentials.email, credentials.password)
+
+    def invalidate(self, email: str):
+        """Forget an account's token (e.g. after a 401)"""
+        if self._tokens.pop(email, None) is not None:
+            self.stats['invalidations'] += 1
+            self._save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'cached_accounts': len(self._tokens), 'inflight_logins': len(self._inflight)}
+
+    # ==================== Login ====================
+
+    def _start_login(self, email: str, password: str, digest: str) -> asyncio.Task:
+        task = asyncio.create_task(self._login(email, password, digest), name=f"cmoney_login_{email}")
+        self._inflight[email] = task
+        task.add_done_callback(lambda t: self._inflight.pop(email, None) if self._inflight.get(email) is t else None)
+        # Retrieve the exception so a failed proactive refresh is not reported as "never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _login(self, email: str, password: str, digest: str) -> CMoneyToken:
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+        data = {
+            "grant_type": "password",
+            "login_method": "email",
+            "client_id": "cmstockcommunity",
+            "account": email,
+            "password": password
+        }
+
+        self.stats['logins_performed'] += 1
+        last_error: Optional[Exception] = None
+        for attempt in range(LOGIN_MAX_RETRIES):
+            try:
+                response = await get_http_client('cmoney_identity').post(
+                    LOGIN_URL, headers=headers, data=data, timeout=30.0
+                )
+                if response.status_code != 200:
+                    raise Exception(f"登入失敗: HTTP {response.status_code}")
+
+                result = response.json()
+                access_token = result.get("access_token")
+                if not access_token:
+                    raise Exception("登入失敗: 沒有收到 access_token")
+
+                expires_in = result.get("expires_in", 3600)
+                token = CMoneyToken(
+                    token=access_token,
+                    expires_at_ts=time.time() + expires_in - EXPIRY_MARGIN_SECONDS,
+                    user_guid=self._decode_user_guid(access_token)
+                )
+                self._tokens[email] = token
+                self._password_digests[email] = digest
+                self._save()
+                logger.info(f"CMoney login successful: {email}")
+                return token
+
+            except Exception as e:
+                last_error = e
+                logger.warning(f"CMoney login attempt {attempt + 1}/{LOGIN_MAX_RETRIES} failed for {email}: {e}")
+                if attempt < LOGIN_MAX_RETRIES - 1:
+                    await asyncio.sleep(LOGIN_RETRY_DELAY)
+
+        self.stats['login_failures'] += 1
+        raise Exception(f"CMoney 登入失敗 ({email}): {last_error}")
+
+    @staticmethod
+    def _decode_user_guid(access_token: str) -> Optional[str]:
+        try:
+            import jwt
+            decoded = jwt.decode(access_token, options={"verify_signature": False})
+            return decoded.get("user_guid")
+        except Exception:
+            return None
+
+    # ==================== Persistence ====================
+
+    def _load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            now = time.time()
+            for email, entry in payload.items():
+                if entry.get('expires_at_ts', 0) > now:
+                    self._tokens[email] = CMoneyToken(entry['token'], entry['expires_at_ts'], entry.get('user_guid'))
+            logger.info(f"CMoney tokens restored: {len(self._tokens)} accounts")
+        except Exception as e:
+            logger.warning(f"Failed to load CMoney token cache ({self.persist_path}): {e}")
+
+    def _save(self):
+        if not self.persist_path:
+            return
+        payload = {
+            email: {
+                'token': token.token,
+                'expires_at_ts': token.expires_at_ts,
+                'user_guid': token.user_guid
+            }
+            for email, token in self._tokens.items()
+        }
+        try:
+            directory = os.path.dirname(self.persist_path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            os.chmod(tmp_path, 0o600)  # tokens are credentials
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            logger.warning(f"Failed to save CMoney token cache ({self.persist_path}): {e}")
+
+
+# Singleton instance
+_token_manager: Optional[CMoneyTokenManager] = None
+
+
+def get_token_manager() -> CMoneyTokenManager:
+    """Get or create singleton token manager (persists to CMONEY_TOKEN_CACHE_PATH when set)"""
+    global _token_manager
+    if _token_manager is None:
+        _token_manager = CMoneyTokenManager(persist_path=os.getenv("CMONEY_TOKEN_CACHE_PATH"))
+    return _token_manager
@@ -3,10 +3,10 @@ DTNO Service - Fetch stock data from CMoney DTNO tables
 Based on the 3-level hierarchy: Category > SubCategory > Columns
 """
 
-import httpx
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from .cmoney_realtime import get_cmoney_service
+from .http_clients import get_http_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -156,21 +156,21 @@ class DTNOService:
         }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.dtno_url,
-                    headers=headers,
-                    data=payload,
-                    timeout=30.0
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    logger.info(f"DTNO fetch success: table={dtno_id}, stock={stock_code}")
-                    return data
-                else:
-                    logger.error(f"DTNO API error ({dtno_id}): {response.status_code}")
-                    return None
+            client = get_http_client('dtno')
+            response = await client.post(
+                self.dtno_url,
+                headers=headers,
+                data=payload,
+                timeout=30.0
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                logger.info(f"DTNO fetch success: table={dtno_id}, stock={stock_code}")
+                return data
+            else:
+                logger.error(f"DTNO API error ({dtno_id}): {response.status_code}")
+                return None
 
         except Exception as e:
             logger.error(f"DTNO request failed ({dtno_id}): {e}")
@@ -382,59 +382,59 @@ class DTNOService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.dtno_url,
-                    headers=headers,
-                    data=payload
-                )
-
-                if response.status_code != 200:
-                    logger.error(f"DTNO News API error: {response.status_code}")
-                    return None
-
-                data = response.json()
-
-                if 'Title' not in data or 'Data' not in data:
-                    logger.warning(f"DTNO News: Invalid response structure for {stock_code}")
-                    return None
-
-                rows = data['Data']
-                logger.info(f"DTNO News: Got {len(rows)} total news for {stock_code}")
-
-                # Filter news from last N days
-                cutoff_date = datetime.now() - timedelta(days=days)
-                recent_news = []
-
-                for row in rows:
-                    if len(row) < 4:  # Need at least date, datetime, title, content
-                        continue
-
-                    # Parse date (format: YYYYMMDD)
-                    date_str = str(row[0])
-                    try:
-                        if len(date_str) == 8 and date_str.isdigit():
-                            news_date = datetime.strptime(date_str, '%Y%m%d')
-                        else:
-                            continue  # Skip invalid dates
-
-                        # Only include news from last N days
-                        if news_date >= cutoff_date:
-                            recent_news.append({
-                                'date': news_date.strftime('%Y-%m-%d'),
-                                'datetime': str(row[1]),  # 發布日期時間
-                                'title': str(row[2]),  # 新聞標題
-                                'snippet': str(row[3])[:200],  # 新聞內容 (truncated for prompt)
-                                'content': str(row[3]),  # Full content
-                                'link': '',  # DTNO news don't have links
-                                'source': 'CMoney'
-                            })
-                    except Exception as e:
-                        # Skip unparseable dates
-                        continue
-
-                logger.info(f"DTNO News: Filtered {len(recent_news)} news from last {days} days for {stock_code}")
-                return recent_news if len(recent_news) > 0 else None
+            client = get_http_client('dtno')
+            response = await client.post(
+                self.dtno_url,
+                headers=headers,
+                data=payload
+            )
+
+            if response.status_code != 200:
+                logger.error(f"DTNO News API error: {response.status_code}")
+                return None
+
+            data = response.json()
+
+            if 'Title' not in data or 'Data' not in data:
+                logger.warning(f"DTNO News: Invalid response structure for {stock_code}")
+                return None
+
+            rows = data['Data']
+            logger.info(f"DTNO News: Got {len(rows)} total news for {stock_code}")
+
+            # Filter news from last N days
+            cutoff_date = datetime.now() - timedelta(days=days)
+            recent_news = []
+
+            for row in rows:
+                if len(row) < 4:  # Need at least date, datetime, title, content
+                    continue
+
+                # Parse date (format: YYYYMMDD)
+                date_str = str(row[0])
+                try:
+                    if len(date_str) == 8 and date_str.isdigit():
+                        news_date = datetime.strptime(date_str, '%Y%m%d')
+                    else:
+                        continue  # Skip invalid dates
+
+                    # Only include news from last N days
+                    if news_date >= cutoff_date:
+                        recent_news.append({
+                            'date': news_date.strftime('%Y-%m-%d'),
+                            'datetime': str(row[1]),  # 發布日期時間
+                            'title': str(row[2]),  # 新聞標題
+                            'snippet': str(row[3])[:200],  # 新聞內容 (truncated for prompt)
+                            'content': str(row[3]),  # Full content
+                            'link': '',  # DTNO news don't have links
+                            'source': 'CMoney'
+                        })
+                except Exception as e:
+                    # Skip unparseable dates
+                    continue
+
+            logger.info(f"DTNO News: Filtered {len(recent_news)} news from last {days} days for {stock_code}")
+            return recent_news if len(recent_news) > 0 else None
 
         except Exception as e:
             logger.error(f"Error fetching DTNO news for {stock_code}: {e}")
@@ -0,0 +1,238 @@
+"""
+HTTP Client Registry - Shared keep-alive clients per upstream (CMoney, DTNO, Serper, OpenAI, internal)
+Replaces per-call `async with httpx.AsyncClient()` so requests reuse TCP/TLS connections,
+and records per-upstream latency / error / connection-reuse metrics
+"""
+
+import time
+import threading
+from typing import Optional, Dict, Any
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# Upstream configuration
+# ============================================
+
+UPSTREAMS: Dict[str, Dict[str, Any]] = {
+    # social.cmoney.tw identity/token, www.cmoney.tw member login
+    'cmoney_identity': {'timeout': 10.0, 'max_connections': 20, 'max_keepalive': 10},
+    # api.cmoney.tw / asterisk-chipsapi / forumservice (articles, interactions, intraday triggers)
+    'cmoney_api': {'timeout': 30.0, 'max_connections': 50, 'max_keepalive': 20},
+    # outpost.cmoney.tw DTNO tables
+    'dtno': {'timeout': 30.0, 'max_connections': 30, 'max_keepalive': 15},
+    # google.serper.dev
+    'serper': {'timeout': 15.0, 'max_connections': 10, 'max_keepalive': 5},
+    # api.openai.com (sync client, installed as openai.http_client)
+    'openai': {'timeout': 120.0, 'max_connections': 20, 'max_keepalive': 10},
+    # self-calls to this API (schedule execution / publish queue)
+    'internal': {'timeout': 300.0, 'max_connections': 20, 'max_keepalive': 10, 'http2': False},
+}
+
+DEFAULT_UPSTREAM_CONFIG = {'timeout': 30.0, 'max_connections': 20, 'max_keepalive': 10}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class UpstreamMetrics:
+    """Counters for one upstream (latency is time to response headers)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float, error: bool):
+        with self._lock:
+            self.requests += 1
+            self.total_ms += elapsed_ms
+            if elapsed_ms > self.max_ms:
+                self.max_ms = elapsed_ms
+            if error:
+                self.errors += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        requests = self.requests
+        reused = max(requests - self.new_connections, 0)
+        return {
+            'requests': requests,
+            'errors': self.errors,
+            'error_rate': round(self.errors / requests, 4) if requests else 0.0,
+            'avg_ms': round(self.total_ms / requests, 1) if requests else 0.0,
+            'max_ms': round(self.max_ms, 1),
+            'new_connections': self.new_connections,
+            'reused_connections': reused,
+            'reuse_rate': round(reused / requests, 4) if requests else 0.0
+        }
+
+
+def _is_error(response: Optional[httpx.Response]) -> bool:
+    return response is None or response.status_code >= 500
+
+
+class _AsyncInstrumentedTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, metrics: UpstreamMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self._metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        metrics = self._metrics
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == 'connection.connect_tcp.complete':
+                metrics.record_connection()
+
+        request.extensions = {**request.extensions, 'trace': trace}
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await super().handle_async_request(request)
+            return response
+        finally:
+            metrics.record((time.perf_counter() - start) * 1000, _is_error(response))
+
+
+class _SyncInstrumentedTransport(httpx.HTTPTransport):
+    def __init__(self, metrics: UpstreamMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self._metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        metrics = self._metrics
+
+        def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == 'connection.connect_tcp.complete':
+                metrics.record_connection()
+
+        request.extensions = {**request.extensions, 'trace': trace}
+        start = time.perf_counter()
+        response = None
+        try:
+            response = super().handle_request(request)
+            return response
+        finally:
+            metrics.record((time.perf_counter() - start) * 1000, _is_error(response))
+
+
+class HTTPClientRegistry:
+    """Lazily created, long-lived httpx clients keyed by upstream name"""
+
+    def __init__(self, upstreams: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.upstreams = upstreams if upstreams is not None else UPSTREAMS
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._sync_clients: Dict[str, httpx.Client] = {}
+        self._metrics: Dict[str, UpstreamMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _config(self, upstream: str) -> Dict[str, Any]:
+        return {**DEFAULT_UPSTREAM_CONFIG, **self.upstreams.get(upstream, {})}
+
+    def _transport_kwargs(self, upstream: str) -> Dict[str, Any]:
+        config = self._config(upstream)
+        return {
+            'limits': httpx.Limits(
+                max_connections=config['max_connections'],
+                max_keepalive_connections=config['max_keepalive'],
+                keepalive_expiry=config.get('keepalive_expiry', 60.0)
+            ),
+            'http2': config.get('http2', True) and _http2_available(),
+            'retries': config.get('retries', 1)
+        }
+
+    def _metrics_for(self, upstream: str) -> UpstreamMetrics:
+        metrics = self._metrics.get(upstream)
+        if metrics is None:
+            metrics = self._metrics.setdefault(upstream, UpstreamMetrics())
+        return metrics
+
+    def get(self, upstream: str) -> httpx.AsyncClient:
+        """Shared AsyncClient for an upstream (do not close it; the registry owns it)"""
+        client = self._async_clients.get(upstream)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._async_clients.get(upstream)
+                if client is None or client.is_closed:
+                    transport = _AsyncInstrumentedTransport(
+                        self._metrics_for(upstream), **self._transport_kwargs(upstream)
+                    )
+                    client = httpx.AsyncClient(
+                        transport=transport,
+                        timeout=self._config(upstream)['timeout']
+                    )
+                    self._async_clients[upstream] = client
+                    logger.info(f"HTTP client created for upstream '{upstream}'")
+        return client
+
+    def get_sync(self, upstream: str) -> httpx.Client:
+        """Shared sync Client for an upstream (for SDKs that take an httpx.Client, e.g. OpenAI)"""
+        client = self._sync_clients.get(upstream)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._sync_clients.get(upstream)
+                if client is None or client.is_closed:
+                    transport = _SyncInstrumentedTransport(
+                        self._metrics_for(upstream), **self._transport_kwargs(upstream)
+                    )
+                    client = httpx.Client(
+                        transport=transport,
+                        timeout=self._config(upstream)['timeout']
+                    )
+                    self._sync_clients[upstream] = client
+                    logger.info(f"HTTP sync client created for upstream '{upstream}'")
+        return client
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {upstream: metrics.to_dict() for upstream, metrics in sorted(self._metrics.items())}
+
+    async def aclose(self):
+        """Close every client (call on application shutdown)"""
+        with self._lock:
+            async_clients = list(self._async_clients.values())
+            sync_clients = list(self._sync_clients.values())
+            self._async_clients.clear()
+            self._sync_clients.clear()
+
+        for client in async_clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client: {e}")
+        for client in sync_clients:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP sync client: {e}")
+
+
+# Singleton instance
+_http_clients: Optional[HTTPClientRegistry] = None
+
+
+def get_http_clients() -> HTTPClientRegistry:
+    """Get or create singleton HTTP client registry"""
+    global _http_clients
+    if _http_clients is None:
+        _http_clients = HTTPClientRegistry()
+    return _http_clients
+
+
+def get_http_client(upstream: str) -> httpx.AsyncClient:
+    """Shortcut for get_http_clients().get(upstream)"""
+    return get_http_clients().get(upstream)
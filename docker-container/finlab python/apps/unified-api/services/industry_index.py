@@ -0,0 +1,162 @@
+"""
+Industry Index Service - Precomputed industry lookups for screener endpoints
+Built once from stock_mapping (FinLab company_basic_info) and aligned to price matrix columns
+"""
+
+import threading
+from typing import Optional, Dict, Any, List, Iterable
+
+import logging
+
+from .startup import LazyModule
+
+# Imported on first use, so importing this module stays off the startup path
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_INDUSTRY = '未知產業'
+
+
+class IndustryIndex:
+    """Immutable industry index: industry names, per-stock categorical codes, per-industry members"""
+
+    def __init__(self, stock_mapping: Dict[str, Dict[str, Any]]):
+        stock_industry: Dict[str, str] = {}
+        for stock_id, info in stock_mapping.items():
+            industry = (info or {}).get('industry') or UNKNOWN_INDUSTRY
+            stock_industry[str(stock_id)] = industry
+
+        # Industry name -> categorical code (sorted so codes are stable across rebuilds)
+        self.industries: List[str] = sorted(set(stock_industry.values()))
+        self._industry_code: Dict[str, int] = {name: i for i, name in enumerate(self.industries)}
+        self._stock_code: Dict[str, int] = {
+            stock_id: self._industry_code[industry] for stock_id, industry in stock_industry.items()
+        }
+
+        self._stocks_by_industry: Dict[str, List[str]] = {name: [] for name in self.industries}
+        for stock_id in sorted(stock_industry):
+            self._stocks_by_industry[stock_industry[stock_id]].append(stock_id)
+
+        # Alignment cache for the last price matrix columns seen: (columns, codes, positions)
+        self._aligned = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._stock_code)
+
+    def industry_of(self, stock_id: str) -> str:
+        """Industry name of a stock, UNKNOWN_INDUSTRY if not in the index"""
+        code = self._stock_code.get(str(stock_id))
+        return self.industries[code] if code is not None else UNKNOWN_INDUSTRY
+
+    def stocks_in(self, industry: str) -> List[str]:
+        """Sorted stock ids belonging to an industry"""
+        return self._stocks_by_industry.get(industry, [])
+
+    def _align(self, columns: 'pd.Index'):
+        """Return (codes, positions) for the given columns, reusing the cached alignment when possible"""
+        aligned = self._aligned
+        if aligned is not None and (aligned[0] is columns or aligned[0].equals(columns)):
+            return aligned[1], aligned[2]
+
+        with self._lock:
+            aligned = self._aligned
+            if aligned is not None and (aligned[0] is columns or aligned[0].equals(columns)):
+                return aligned[1], aligned[2]
+
+            # Stock -> industry categorical code array (-1 for stocks missing from the mapping)
+            codes = np.fromiter(
+                (self._stock_code.get(str(c), -1) for c in columns),
+                dtype=np.int32,
+                count=len(columns)
+            )
+
+            # Industry -> sorted column positions (stable argsort keeps positions ascending)
+            order = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.industries))
+            start = int(np.searchsorted(codes[order], 0))
+            positions: Dict[str, np.ndarray] = {}
+            for code, name in enumerate(self.industries):
+                end = start + int(counts[code])
+                positions[name] = order[start:end]
+                start = end
+
+            self._aligned = (columns, codes, positions)
+            return codes, positions
+
+    def codes_for(self, columns: 'pd.Index') -> 'np.ndarray':
+        """Industry code per column (-1 for unknown stocks)"""
+        return self._align(columns)[0]
+
+    def positions_for(self, columns: 'pd.Index', industry: str) -> 'np.ndarray':
+        """Sorted column positions of an industry's stocks within the given columns"""
+        return self._align(columns)[1].get(industry, np.empty(0, dtype=np.intp))
+
+    def mask(self, columns: 'pd.Index', industries: Iterable[str]) -> 'np.ndarray':
+        """Boolean mask over columns selecting stocks in any of the given industries"""
+        wanted = [self._industry_code[name] for name in industries if name in self._industry_code]
+        codes = self.codes_for(columns)
+        if not wanted:
+            return np.zeros(len(codes), dtype=bool)
+        return np.isin(codes, wanted)
+
+    def sector_stats(self, change_percent: 'pd.Series') -> List[Dict[str, Any]]:
+        """
+        Industry-level aggregates for one cross-section of price changes
+
+        Args:
+            change_percent: Series of percentage changes indexed by stock id
+
+        Returns:
+            List of dicts with industry, stock_count, up_count, down_count,
+            breadth (up / count) and avg_change_percent, sorted by avg change descending
+        """
+        codes = self.codes_for(change_percent.index)
+        values = change_percent.to_numpy(dtype=float, na_value=np.nan)
+        valid = (codes >= 0) & ~np.isnan(values)
+
+        n = len(self.industries)
+        valid_codes = codes[valid]
+        valid_values = values[valid]
+        counts = np.bincount(valid_codes, minlength=n)
+        sums = np.bincount(valid_codes, weights=valid_values, minlength=n)
+        ups = np.bincount(valid_codes[valid_values > 0], minlength=n)
+        downs = np.bincount(valid_codes[valid_values < 0], minlength=n)
+
+        stats = []
+        for code in np.flatnonzero(counts):
+            count = int(counts[code])
+            stats.append({
+                'industry': self.industries[code],
+                'stock_count': count,
+                'up_count': int(ups[code]),
+                'down_count': int(downs[code]),
+                'breadth': round(float(ups[code]) / count, 4),
+                'avg_change_percent': round(float(sums[code]) / count, 2)
+            })
+
+        stats.sort(key=lambda x: x['avg_change_percent'], reverse=True)
+        return stats
+
+
+# Singleton instance (swapped atomically on rebuild)
+_industry_index: Optional[IndustryIndex] = None
+
+
+def rebuild_industry_index(stock_mapping: Dict[str, Dict[str, Any]]) -> IndustryIndex:
+    """Build a new index from stock_mapping and swap it in"""
+    global _industry_index
+    index = IndustryIndex(stock_mapping)
+    _industry_index = index
+    logger.info(f"Industry index built: {len(index)} stocks, {len(index.industries)} industries")
+    return index
+
+
+def get_industry_index() -> IndustryIndex:
+    """Get the current industry index (empty until rebuild_industry_index is called)"""
+    global _industry_index
+    if _industry_index is None:
+        _industry_index = IndustryIndex({})
+    return _industry_index
@@ -0,0 +1,168 @@
+"""
+JSONB Backfill - Convert post_records payload columns (TEXT / JSON) to JSONB without a long table lock
+Writes go to shadow <column>_jsonb columns (kept in sync by a trigger), existing rows are
+backfilled in small committed batches, then the columns are swapped in one short transaction
+
+    python -m services.jsonb_backfill   # uses DATABASE_URL
+"""
+
+import os
+import time
+from typing import Dict, Any, List
+import logging
+
+from .migrations import MIGRATION_LOCK_KEY
+
+logger = logging.getLogger(__name__)
+
+# Separate advisory lock so a replica converting the table never blocks plain migrations
+BACKFILL_LOCK_KEY = MIGRATION_LOCK_KEY + 1
+
+PAYLOAD_COLUMNS = ('alternative_versions', 'serper_data', 'generation_params', 'commodity_tags')
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAUSE_SECONDS = 0.05
+SWAP_LOCK_TIMEOUT = '5s'
+
+
+def pending_columns(cursor) -> List[str]:
+    """Payload columns of post_records that are not JSONB yet"""
+    cursor.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'post_records'
+    """)
+    types = {row[0]: row[1] for row in cursor.fetchall()}
+    return [c for c in PAYLOAD_COLUMNS if c in types and types[c] != 'jsonb']
+
+
+def _install_shadow_columns(cursor, columns: List[str]):
+    for column in columns:
+        cursor.execute(f"ALTER TABLE post_records ADD COLUMN IF NOT EXISTS {column}_jsonb JSONB")
+
+    assignments = "\n".join(
+        f"    NEW.{column}_jsonb := post_records_try_jsonb(NEW.{column}::text);" for column in columns
+    )
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION post_records_sync_jsonb() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+        {assignments}
+            RETURN NEW;
+        END;
+        $$
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS post_records_sync_jsonb ON post_records")
+    cursor.execute(f"""
+        CREATE TRIGGER post_records_sync_jsonb
+        BEFORE INSERT OR UPDATE OF {", ".join(columns)} ON post_records
+        FOR EACH ROW EXECUTE PROCEDURE post_records_sync_jsonb()
+    """)
+
+
+def _backfill_batches(conn, columns: List[str], batch_size: int, pause_seconds: float) -> int:
+    assignments = ", ".join(f"{c}_jsonb = post_records_try_jsonb(p.{c}::text)" for c in columns)
+    last_post_id = ''
+    total = 0
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                WITH batch AS (
+                    SELECT post_id FROM post_records
+                    WHERE post_id > %s
+                    ORDER BY post_id
+                    LIMIT %s
+                )
+                UPDATE post_records p SET {assignments}
+                FROM batch
+                WHERE p.post_id = batch.post_id
+                RETURNING p.post_id
+            """, (last_post_id, batch_size))
+            post_ids = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+
+        if not post_ids:
+            return total
+        total += len(post_ids)
+        last_post_id = max(post_ids)
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+
+def _swap_columns(conn, columns: List[str]):
+    with conn.cursor() as cursor:
+        cursor.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+        cursor.execute("LOCK TABLE post_records IN ACCESS EXCLUSIVE MODE")
+        # Rows written before the trigger existed but after their batch ran (none expected)
+        catch_up = " OR ".join(f"({c} IS NOT NULL AND {c}_jsonb IS NULL)" for c in columns)
+        assignments = ", ".join(f"{c}_jsonb = post_records_try_jsonb({c}::text)" for c in columns)
+        cursor.execute(f"UPDATE post_records SET {assignments} WHERE {catch_up}")
+        cursor.execute("DROP TRIGGER post_records_sync_jsonb ON post_records")
+        cursor.execute("DROP FUNCTION post_records_sync_jsonb()")
+        for column in columns:
+            cursor.execute(f"ALTER TABLE post_records DROP COLUMN {column}")
+            cursor.execute(f"ALTER TABLE post_records RENAME COLUMN {column}_jsonb TO {column}")
+    conn.commit()
+
+
+def migrate_post_records_jsonb(conn, batch_size: int = DEFAULT_BATCH_SIZE,
+                               pause_seconds: float = DEFAULT_PAUSE_SECONDS) -> Dict[str, Any]:
+    """
+    Convert the post_records payload columns to JSONB (no-op once converted)
+
+    Args:
+        conn: psycopg2 connection
+        batch_size: Rows updated per committed batch
+        pause_seconds: Sleep between batches so normal traffic keeps the table
+
+    Returns:
+        Dict with converted columns and backfilled row count
+
+    Raises:
+        Exception: conversion failed; the shadow columns and trigger are left in
+        place and the next run resumes from the start of the backfill
+    """
+    conn.rollback()
+    with conn.cursor() as cursor:
+        columns = pending_columns(cursor)
+        locked = bool(columns)
+        if locked:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (BACKFILL_LOCK_KEY,))
+            locked = cursor.fetchone()[0]
+    conn.commit()
+    if not columns:
+        return {'converted': [], 'rows': 0}
+    if not locked:
+        logger.info("post_records JSONB conversion already running on another connection")
+        return {'converted': [], 'rows': 0, 'skipped': True}
+
+    logger.info(f"Converting post_records columns to JSONB: {columns}")
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cursor:
+            _install_shadow_columns(cursor, columns)
+        conn.commit()
+
+        rows = _backfill_batches(conn, columns, batch_size, pause_seconds)
+        _swap_columns(conn, columns)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (BACKFILL_LOCK_KEY,))
+        conn.commit()
+
+    duration_ms = int((time.perf_counter() - start) * 1000)
+    logger.info(f"post_records JSONB conversion done: {columns}, {rows} rows in {duration_ms} ms")
+    return {'converted': columns, 'rows': rows, 'duration_ms': duration_ms}
+
+
+if __name__ == "__main__":
+    import psycopg2
+
+    logging.basicConfig(level=logging.INFO)
+    connection = psycopg2.connect(os.environ["DATABASE_URL"])
+    try:
+        print(migrate_post_records_jsonb(connection))
+    finally:
+        connection.close()
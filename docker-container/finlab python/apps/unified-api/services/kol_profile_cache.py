@@ -0,0 +1,325 @@
+"""
+KOL Profile Cache - Process-wide kol_profiles snapshot indexed by serial
+All rows are loaded with one query; afterwards lookups are dict reads. A trigger on
+kol_profiles (installed by the cache on connect) NOTIFYs kol_profiles_changed with the
+serial of every inserted, updated or deleted row, so every replica reloads just those
+serials once the change commits, whichever service or script wrote it. Reconnecting
+the LISTEN connection reloads everything (changes may have been missed while it was down).
+
+    cache = configure_kol_profile_cache(lambda: psycopg2.connect(**DB_CONNECT_KWARGS))
+    asyncio.create_task(cache.run())
+    profile = get_kol_profile_cache().get('208')   # profile.nickname / profile['nickname']
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable, Iterable, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'kol_profiles_changed'
+
+RECONNECT_DELAY_SECONDS = 30
+
+# Serializes trigger installation between replicas (unified-api's migration lock + 11)
+TRIGGER_LOCK_KEY = 7_324_012
+
+NOTIFY_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION kol_profiles_notify() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- Identical notifications within one transaction are delivered once
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('{NOTIFY_CHANNEL}', OLD.serial::text);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM pg_notify('{NOTIFY_CHANNEL}', NEW.serial::text);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+"""
+
+CREATE_TRIGGER_SQL = """
+CREATE TRIGGER kol_profiles_notify
+    AFTER INSERT OR UPDATE OR DELETE ON kol_profiles
+    FOR EACH ROW EXECUTE PROCEDURE kol_profiles_notify()
+"""
+
+
+class KOLProfileRecord(dict):
+    """One kol_profiles row; columns are readable as keys or attributes (like the ORM KOLProfile)"""
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def install_notify_trigger(conn) -> bool:
+    """Create the NOTIFY trigger on kol_profiles (idempotent); False when the table does not exist yet"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (TRIGGER_LOCK_KEY,))
+            cursor.execute("SELECT to_regclass('kol_profiles') IS NOT NULL")
+            if not cursor.fetchone()[0]:
+                conn.rollback()
+                return False
+            cursor.execute(NOTIFY_TRIGGER_SQL)
+            cursor.execute("""
+                SELECT 1 FROM pg_trigger
+                WHERE tgrelid = to_regclass('kol_profiles') AND tgname = 'kol_profiles_notify'
+            """)
+            if cursor.fetchone() is None:
+                cursor.execute(CREATE_TRIGGER_SQL)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return True
+
+
+class KOLProfileCache:
+    """
+    kol_profiles by serial, kept current through LISTEN/NOTIFY
+
+    Args:
+        connect: Returns a new psycopg2 connection (the cache keeps two: LISTEN and loads)
+    """
+
+    def __init__(self, connect: Optional[Callable[[], Any]] = None):
+        self._connect = connect
+        self._profiles: Dict[str, KOLProfileRecord] = {}
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._listen_conn = None
+        self._work_conn = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = False
+        self._loaded_at: Optional[float] = None
+        self._stats = {'loads': 0, 'reloads': 0, 'notifications': 0, 'hits': 0, 'misses': 0}
+
+    # ---------- lookups ----------
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self, serial, load: bool = True) -> Optional[KOLProfileRecord]:
+        """
+        Profile for `serial` (str or int); loads the table on first use
+
+        With load=False a lookup before the first load raises RuntimeError instead of
+        blocking on the full load (for callers on the event loop that have a fallback).
+        """
+        if not self._loaded:
+            if not load:
+                raise RuntimeError("KOL profile cache is not loaded yet")
+            self.load()
+        profile = self._profiles.get(str(serial))
+        self._stats['hits' if profile is not None else 'misses'] += 1
+        return profile
+
+    async def get_async(self, serial) -> Optional[KOLProfileRecord]:
+        """get() for coroutines: the first load runs in a worker thread"""
+        if not self._loaded:
+            await asyncio.to_thread(self.load)
+        return self.get(serial)
+
+    def serials(self, status: Optional[str] = 'active') -> List[str]:
+        """Serials (sorted like ORDER BY serial), optionally only those with `status`"""
+        if not self._loaded:
+            self.load()
+        return sorted(serial for serial, profile in self._profiles.items()
+                      if status is None or profile.get('status') == status)
+
+    # ---------- database (worker thread) ----------
+
+    def _work_connection(self):
+        if self._connect is None:
+            raise RuntimeError("KOL profile cache has no database connection configured")
+        if self._work_conn is None or self._work_conn.closed:
+            self._work_conn = self._connect()
+        return self._work_conn
+
+    def _fetch(self, serials: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        from psycopg2.extras import RealDictCursor
+
+        conn = self._work_connection()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                if serials is None:
+                    cursor.execute("SELECT * FROM kol_profiles")
+                else:
+                    cursor.execute("SELECT * FROM kol_profiles WHERE serial = ANY(%s)", (serials,))
+                rows = cursor.fetchall()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return rows
+
+    def load(self) -> int:
+        """Replace the snapshot with the whole table (one query); returns the number of profiles"""
+        with self._load_lock:
+            rows = self._fetch()
+            self._profiles = {str(row['serial']): KOLProfileRecord(row) for row in rows}
+            self._loaded = True
+            self._loaded_at = time.time()
+            self._stats['loads'] += 1
+        logger.info(f"KOL profile cache loaded {len(rows)} profiles")
+        return len(rows)
+
+    def reload(self, serials: Iterable[str]) -> None:
+        """Re-read the given serials; serials no longer in the table are dropped"""
+        serials = sorted({str(serial) for serial in serials})
+        if not serials:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                return
+            rows = {str(row['serial']): KOLProfileRecord(row) for row in self._fetch(serials)}
+            profiles = dict(self._profiles)
+            for serial in serials:
+                if serial in rows:
+                    profiles[serial] = rows[serial]
+                else:
+                    profiles.pop(serial, None)
+            # Readers keep whichever snapshot they already hold
+            self._profiles = profiles
+            self._stats['reloads'] += 1
+        logger.info(f"KOL profile cache reloaded {', '.join(serials)}")
+
+    # ---------- LISTEN ----------
+
+    def _listen(self):
+        if not install_notify_trigger(self._work_connection()):
+            logger.warning("KOL profile cache: kol_profiles does not exist, NOTIFY trigger not installed")
+        conn = self._connect()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        return conn
+
+    def _on_notify_readable(self):
+        conn = self._listen_conn
+        try:
+            conn.poll()
+        except Exception as e:
+            logger.warning(f"KOL profile cache LISTEN connection lost: {e}")
+            self._drop_listen_connection()
+            self._wake.set()
+            return
+
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            self._stats['notifications'] += 1
+            if notify.payload:
+                self._pending.add(notify.payload)
+        self._wake.set()
+
+    def _drop_listen_connection(self):
+        if self._listen_conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._listen_conn.fileno())
+        except Exception:
+            pass
+        try:
+            self._listen_conn.close()
+        except Exception:
+            pass
+        self._listen_conn = None
+
+    async def _connect_and_load(self):
+        # LISTEN before loading so no change between the two is missed
+        self._listen_conn = await asyncio.to_thread(self._listen)
+        self._loop.add_reader(self._listen_conn.fileno(), self._on_notify_readable)
+        self._pending.clear()
+        await asyncio.to_thread(self.load)
+
+    # ---------- main loop ----------
+
+    async def run(self):
+        """Keep the snapshot current until stop() is called"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._running = True
+        try:
+            while self._running:
+                self._wake.clear()
+
+                if self._listen_conn is None:
+                    try:
+                        await self._connect_and_load()
+                    except Exception as e:
+                        logger.error(f"KOL profile cache could not connect: {e}")
+                        self._drop_listen_connection()
+                        await self._sleep(RECONNECT_DELAY_SECONDS)
+                        continue
+
+                if self._pending:
+                    pending, self._pending = self._pending, set()
+                    try:
+                        await asyncio.to_thread(self.reload, pending)
+                    except Exception as e:
+                        logger.error(f"KOL profile cache reload failed: {e}")
+                        # Reconnect and reload everything on the next iteration
+                        self._drop_listen_connection()
+                        continue
+
+                await self._wake.wait()
+        finally:
+            self._running = False
+            self._drop_listen_connection()
+            if self._work_conn is not None and not self._work_conn.closed:
+                self._work_conn.close()
+            self._work_conn = None
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def stop(self):
+        self._running = False
+        if self._wake is not None:
+            self._wake.set()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'running': self._running,
+            'listening': self._listen_conn is not None,
+            'profiles': len(self._profiles),
+            'loaded_at': self._loaded_at,
+        }
+
+
+_cache: Optional[KOLProfileCache] = None
+
+
+def get_kol_profile_cache() -> KOLProfileCache:
+    global _cache
+    if _cache is None:
+        _cache = KOLProfileCache()
+    return _cache
+
+
+def configure_kol_profile_cache(connect: Callable[[], Any]) -> KOLProfileCache:
+    """Attach the connection factory (call once at startup, before run())"""
+    cache = get_kol_profile_cache()
+    cache._connect = connect
+    return cache
@@ -0,0 +1,140 @@
+"""
+Migration Runner - Apply numbered SQL files from migrations/ once, in order
+Applied versions and file checksums are recorded in schema_migrations; an
+advisory lock keeps concurrent replicas from applying the same file twice
+"""
+
+import hashlib
+import os
+import re
+import time
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+# Only NNN_name.sql files are versioned; legacy unnumbered files keep their own loaders
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{3,})_([\w\-]+)\.sql$')
+
+# pg_advisory_lock key shared by every replica running migrations
+MIGRATION_LOCK_KEY = 7_324_001
+
+
+def discover_migrations(migrations_dir: Optional[str] = None) -> List[Tuple[int, str, str]]:
+    """
+    List versioned migration files
+
+    Returns:
+        Sorted list of (version, filename, path)
+
+    Raises:
+        ValueError: two files share a version number
+    """
+    migrations_dir = migrations_dir or MIGRATIONS_DIR
+    if not os.path.isdir(migrations_dir):
+        return []
+
+    migrations = []
+    seen: Dict[int, str] = {}
+    for filename in os.listdir(migrations_dir):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise ValueError(f"Duplicate migration version {version}: {seen[version]}, {filename}")
+        seen[version] = filename
+        migrations.append((version, filename, os.path.join(migrations_dir, filename)))
+
+    return sorted(migrations)
+
+
+def file_checksum(sql: str) -> str:
+    return hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            filename VARCHAR NOT NULL,
+            checksum VARCHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms INTEGER
+        )
+    """)
+
+
+def run_migrations(conn, migrations_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Apply pending migrations (each file in its own transaction)
+
+    Args:
+        conn: psycopg2 connection (returned in a clean, committed state)
+        migrations_dir: Directory with NNN_name.sql files (default: unified-api/migrations)
+
+    Returns:
+        Dict with applied, already_applied and checksum_mismatches
+
+    Raises:
+        Exception: a migration failed (it is rolled back; later files are not attempted)
+    """
+    migrations = discover_migrations(migrations_dir)
+    summary: Dict[str, Any] = {'applied': [], 'already_applied': 0, 'checksum_mismatches': []}
+
+    conn.rollback()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+    try:
+        with conn.cursor() as cursor:
+            ensure_migrations_table(cursor)
+            conn.commit()
+
+            cursor.execute("SELECT version, checksum FROM schema_migrations")
+            applied = {version: checksum for version, checksum in cursor.fetchall()}
+            conn.commit()
+
+        for version, filename, path in migrations:
+            with open(path, 'r', encoding='utf-8') as f:
+                sql = f.read()
+            checksum = file_checksum(sql)
+
+            if version in applied:
+                summary['already_applied'] += 1
+                if applied[version] != checksum:
+                    # Applied files must not be edited; ship a new version instead
+                    logger.warning(f"Migration {filename} changed after it was applied (checksum mismatch)")
+                    summary['checksum_mismatches'].append(filename)
+                continue
+
+            start = time.perf_counter()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql)
+                    duration_ms = int((time.perf_counter() - start) * 1000)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, filename, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+                        (version, filename, checksum, duration_ms)
+                    )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Migration {filename} failed: {e}")
+                raise
+
+            logger.info(f"Migration applied: {filename} ({duration_ms} ms)")
+            summary['applied'].append(filename)
+    finally:
+        # An error outside the per-file try can leave the transaction aborted; roll it back so
+        # the unlock can run, and never let a failed unlock hide the original error
+        try:
+            conn.rollback()
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to release migration lock: {e}")
+
+    return summary
@@ -0,0 +1,349 @@
+"""
+Post Partitions - Monthly post_records partitions and their cold Parquet archive
+The partitioned table and post_records_ensure_partition() come from
+migrations/004_post_records_partitioning.sql
+
+    python -m services.post_partitions ensure    # create this month's and next month's partition
+    python -m services.post_partitions archive   # move months past the horizon to Parquet
+
+Only `ensure` runs automatically (startup and the daily job). Archiving drops partitions, so it
+is an explicit operation and requires POST_RECORDS_ARCHIVE_DIR (or --archive-dir) to point at
+persistent storage, e.g. a mounted volume; the container filesystem is lost on redeploy.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME_PATTERN = re.compile(r'^post_records_y(\d{4})m(\d{2})$')
+
+DEFAULT_HORIZON_MONTHS = 12
+MONTHS_AHEAD = 1
+PARQUET_COMPRESSION = 'zstd'
+
+
+def archive_dir() -> Optional[str]:
+    """POST_RECORDS_ARCHIVE_DIR, None when archiving is not configured (there is no default)"""
+    return os.getenv("POST_RECORDS_ARCHIVE_DIR") or None
+
+
+def horizon_months() -> int:
+    return int(os.getenv("POST_RECORDS_ARCHIVE_MONTHS", DEFAULT_HORIZON_MONTHS))
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_month(name: str) -> Optional[date]:
+    """post_records_y2025m03 -> date(2025, 3, 1); None for other names (e.g. the default partition)"""
+    match = PARTITION_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def is_partitioned(cursor) -> bool:
+    cursor.execute("""
+        SELECT c.relkind FROM pg_class c
+        WHERE c.oid = to_regclass('post_records')
+    """)
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(cursor) -> List[Tuple[str, date]]:
+    """Monthly partitions of post_records, oldest first"""
+    cursor.execute("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('post_records')
+    """)
+    partitions = [(row[0], partition_month(row[0])) for row in cursor.fetchall()]
+    return sorted((name, month) for name, month in partitions if month)
+
+
+def estimate_post_count(cursor, where_sql: str = "", params: Optional[List[Any]] = None) -> int:
+    """
+    Planner row estimate for post_records (optionally filtered)
+
+    pg_class.reltuples of the partitioned parent is never refreshed by autovacuum, so the
+    estimate comes from EXPLAIN, which sums the partitions and scales each one's statistics
+    by its current size (unanalyzed partitions are estimated from their pages)
+
+    Args:
+        cursor: psycopg2 cursor (tuple or RealDictCursor)
+        where_sql: " WHERE ..." clause with %s placeholders, or ""
+        params: Parameters for where_sql
+    """
+    cursor.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM post_records{where_sql}", params or [])
+    row = cursor.fetchone()
+    plan = row['QUERY PLAN'] if isinstance(row, dict) else row[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def ensure_partitions(conn, today: Optional[date] = None, months_ahead: int = MONTHS_AHEAD) -> List[str]:
+    """
+    Create the current month's partition and the next ones (existing partitions are left alone)
+
+    Returns:
+        Partition names that exist afterwards, [] if post_records is not partitioned yet
+    """
+    month = (today or datetime.utcnow().date()).replace(day=1)
+    try:
+        with conn.cursor() as cursor:
+            if not is_partitioned(cursor):
+                conn.rollback()
+                return []
+            names = []
+            for offset in range(months_ahead + 1):
+                cursor.execute("SELECT post_records_ensure_partition(%s)", (add_months(month, offset),))
+                names.append(cursor.fetchone()[0])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return names
+
+
+def _json_columns(cursor) -> List[str]:
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'post_records'
+          AND data_type IN ('json', 'jsonb')
+    """)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _write_parquet(cursor, partition: str, path: str, json_columns: List[str]) -> int:
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    cursor.execute(f'SELECT * FROM "{partition}" ORDER BY created_at, post_id')
+    columns = [d[0] for d in cursor.description]
+    df = pd.DataFrame(cursor.fetchall(), columns=columns)
+    for column in json_columns:
+        if column in df.columns:
+            df[column] = df[column].map(
+                lambda v: None if v is None else (v if isinstance(v, str) else json.dumps(v, ensure_ascii=False))
+            )
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'post_records_json_columns': json.dumps(json_columns).encode('utf-8'),
+    })
+
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression=PARQUET_COMPRESSION)
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(df)
+
+
+def _verify_archive(cursor, partition: str, path: str) -> int:
+    """Read the written file back and check it holds exactly the partition's rows"""
+    import pyarrow.parquet as pq
+
+    cursor.execute(f'SELECT COUNT(*) FROM "{partition}"')
+    expected = cursor.fetchone()[0]
+    written = pq.read_table(path, columns=['post_id']).num_rows
+    if written != expected:
+        raise RuntimeError(f"{partition}: {path} holds {written} rows, partition has {expected}; not dropping it")
+    return written
+
+
+def archive_old_partitions(conn, horizon: Optional[int] = None, directory: Optional[str] = None,
+                           today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Move monthly partitions older than the horizon to Parquet files, then detach and drop them
+
+    A partition is archived once its whole month lies before (current month - horizon).
+    The file is written, read back and its row count compared with the partition before the
+    partition is dropped; if anything fails the partition stays and the file is rewritten on
+    the next run. The post_stats rollups keep counting archived rows (dropping a partition
+    fires no row triggers).
+
+    Raises:
+        ValueError: No directory given and POST_RECORDS_ARCHIVE_DIR is not set
+
+    Returns:
+        One entry per archived partition: name, rows, file path and size
+    """
+    horizon = horizon_months() if horizon is None else horizon
+    directory = directory or archive_dir()
+    if not directory:
+        raise ValueError("POST_RECORDS_ARCHIVE_DIR is not set; refusing to archive (partitions are dropped afterwards)")
+    cutoff = add_months((today or datetime.utcnow().date()).replace(day=1), -horizon)
+
+    conn.rollback()
+    with conn.cursor() as cursor:
+        if not is_partitioned(cursor):
+            conn.rollback()
+            return []
+        candidates = [(name, month) for name, month in list_partitions(cursor) if add_months(month, 1) <= cutoff]
+        json_columns = _json_columns(cursor)
+    conn.rollback()
+    if not candidates:
+        return []
+
+    os.makedirs(directory, exist_ok=True)
+    archived = []
+    for name, month in candidates:
+        path = os.path.join(directory, f"{name}.parquet")
+        try:
+            with conn.cursor() as cursor:
+                # Block writes to this month while it is copied out and dropped
+                cursor.execute(f'LOCK TABLE "{name}" IN SHARE MODE')
+                _write_parquet(cursor, name, path, json_columns)
+                rows = _verify_archive(cursor, name, path)
+                cursor.execute(f'SELECT COALESCE(array_agg(DISTINCT COALESCE(session_id, -1)), \'{{}}\') FROM "{name}"')
+                session_ids = cursor.fetchone()[0]
+                cursor.execute("""
+                    INSERT INTO post_records_archive
+                        (partition_name, range_start, range_end, row_count, session_ids, file_path, file_bytes)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (partition_name) DO UPDATE SET
+                        row_count = EXCLUDED.row_count, session_ids = EXCLUDED.session_ids,
+                        file_path = EXCLUDED.file_path, file_bytes = EXCLUDED.file_bytes,
+                        archived_at = CURRENT_TIMESTAMP
+                """, (name, month, add_months(month, 1), rows, session_ids, path, os.path.getsize(path)))
+                cursor.execute(f'ALTER TABLE post_records DETACH PARTITION "{name}"')
+                cursor.execute(f'DROP TABLE "{name}"')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        entry = {'partition': name, 'rows': rows, 'file': path, 'bytes': os.path.getsize(path)}
+        logger.info(f"Archived post_records partition: {entry}")
+        archived.append(entry)
+    return archived
+
+
+def _archive_files(directory: str) -> List[Tuple[date, str]]:
+    if not os.path.isdir(directory):
+        return []
+    files = []
+    for filename in os.listdir(directory):
+        if filename.endswith('.parquet'):
+            month = partition_month(filename[:-len('.parquet')])
+            if month:
+                files.append((month, os.path.join(directory, filename)))
+    return sorted(files, reverse=True)
+
+
+def _to_python(value, is_json: bool):
+    if value is None:
+        return None
+    if isinstance(value, float) and value != value:  # NaN from an integer column with NULLs
+        return None
+    if hasattr(value, 'to_pydatetime'):
+        return value.to_pydatetime()
+    if hasattr(value, 'item'):  # numpy scalar
+        return value.item()
+    if is_json and isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def read_archived_posts(limit: int, before: Optional[Tuple[datetime, str]] = None,
+                        status: Optional[str] = None, session_id: Optional[int] = None,
+                        columns: Optional[List[str]] = None,
+                        directory: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read archived posts newest first, continuing the /api/posts keyset order
+
+    Args:
+        limit: Maximum rows
+        before: (created_at, post_id) of the last row already returned; only older rows follow
+        status / session_id: Same filters as the live query
+        columns: Projection (None = every column)
+        directory: Archive directory (default: POST_RECORDS_ARCHIVE_DIR; [] when neither is set)
+
+    Returns:
+        Rows as dicts, JSON payload columns decoded
+    """
+    directory = directory or archive_dir()
+    if not directory:
+        return []
+
+    import pyarrow.parquet as pq
+
+    results: List[Dict[str, Any]] = []
+    for month, path in _archive_files(directory):
+        if limit - len(results) <= 0:
+            break
+        if before and month > before[0].date():
+            continue
+
+        schema = pq.read_schema(path)
+        json_columns = set(json.loads((schema.metadata or {}).get(b'post_records_json_columns', b'[]')))
+        wanted = [c for c in (columns or schema.names) if c in schema.names]
+        read_columns = list(dict.fromkeys(wanted + ['created_at', 'post_id']))
+
+        filters = []
+        if status:
+            filters.append(('status', '=', status))
+        if session_id is not None and 'session_id' in schema.names:
+            filters.append(('session_id', '=', session_id))
+        if before:
+            filters.append(('created_at', '<=', before[0]))
+
+        df = pq.read_table(path, columns=read_columns, filters=filters or None).to_pandas()
+        if before and not df.empty:
+            created = df['created_at']
+            df = df[(created < before[0]) | ((created == before[0]) & (df['post_id'] < before[1]))]
+        df = df.sort_values(['created_at', 'post_id'], ascending=False).head(limit - len(results))
+
+        for record in df[wanted].to_dict('records'):
+            results.append({k: _to_python(v, k in json_columns) for k, v in record.items()})
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain post_records monthly partitions")
+    parser.add_argument('command', choices=['ensure', 'archive'])
+    parser.add_argument('--horizon-months', type=int, default=None)
+    parser.add_argument('--archive-dir', default=None)
+    parser.add_argument('--database-url', default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("DATABASE_URL is not set")
+    if args.command == 'archive' and not (args.archive_dir or archive_dir()):
+        parser.error("archive needs --archive-dir or POST_RECORDS_ARCHIVE_DIR on persistent storage")
+
+    import psycopg2
+
+    conn = psycopg2.connect(args.database_url)
+    try:
+        if args.command == 'ensure':
+            print(ensure_partitions(conn))
+        else:
+            ensure_partitions(conn)
+            for entry in archive_old_partitions(conn, args.horizon_months, args.archive_dir):
+                print(entry)
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
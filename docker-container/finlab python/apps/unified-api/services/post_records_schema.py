@@ -0,0 +1,85 @@
+"""
+Post Records Schema - The base post_records table definition
+Startup (create_post_records_table) and the migration tests create the table from here;
+migrations/ then add the indexes, stats rollups and monthly partitions on top of it.
+recreate_post_records() rebuilds the whole stack for the admin reset endpoints.
+"""
+
+from typing import Dict, Any
+
+from .migrations import run_migrations
+
+# Migrations that build on post_records (indexes, stats rollups, partitions); all can be re-run
+POST_RECORDS_MIGRATIONS = (1, 3, 4)
+
+POST_RECORDS_TABLE_DDL = """
+    CREATE TABLE post_records (
+        post_id VARCHAR PRIMARY KEY,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        session_id BIGINT,
+        kol_serial INTEGER NOT NULL,
+        kol_nickname VARCHAR NOT NULL,
+        kol_persona VARCHAR,
+        stock_code VARCHAR NOT NULL,
+        stock_name VARCHAR NOT NULL,
+        title VARCHAR NOT NULL,
+        content TEXT NOT NULL,
+        content_md TEXT,
+        status VARCHAR DEFAULT 'draft',
+        reviewer_notes TEXT,
+        approved_by VARCHAR,
+        approved_at TIMESTAMP,
+        scheduled_at TIMESTAMP,
+        published_at TIMESTAMP,
+        cmoney_post_id VARCHAR,
+        cmoney_post_url VARCHAR,
+        publish_error TEXT,
+        views BIGINT DEFAULT 0,
+        likes BIGINT DEFAULT 0,
+        comments BIGINT DEFAULT 0,
+        shares BIGINT DEFAULT 0,
+        donations BIGINT DEFAULT 0,
+        topic_id VARCHAR,
+        topic_title VARCHAR,
+        technical_analysis TEXT,
+        serper_data JSONB,
+        quality_score FLOAT,
+        ai_detection_score FLOAT,
+        risk_level VARCHAR,
+        generation_params JSONB,
+        commodity_tags JSONB,
+        alternative_versions JSONB
+    )
+"""
+
+
+def create_post_records(cursor) -> None:
+    """Create post_records (unpartitioned; migration 004 converts it to monthly partitions)"""
+    cursor.execute(POST_RECORDS_TABLE_DDL)
+
+
+def recreate_post_records(conn) -> Dict[str, Any]:
+    """
+    Drop post_records (every row is lost) and rebuild it with the current schema
+
+    The base table is created with JSONB payload columns, then the post_records migrations
+    are applied again so the indexes, rollup triggers and monthly partitions come back
+    (the rollups are reseeded from the now empty table).
+
+    Args:
+        conn: psycopg2 connection (returned in a clean, committed state)
+
+    Returns:
+        run_migrations() summary
+    """
+    conn.rollback()
+    with conn.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS post_records CASCADE")
+        cursor.execute("DROP TABLE IF EXISTS post_records_unpartitioned CASCADE")
+        create_post_records(cursor)
+        cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        if cursor.fetchone()[0]:
+            cursor.execute("DELETE FROM schema_migrations WHERE version = ANY(%s)", (list(POST_RECORDS_MIGRATIONS),))
+    conn.commit()
+    return run_migrations(conn)
@@ -0,0 +1,139 @@
+"""
+Post Stats Rollups - Reconcile the trigger-maintained post_stats_* tables against a full scan
+The tables and their *_scan views are created by migrations/003_post_stats_rollups.sql
+
+    python -m services.post_stats reconcile            # report differences (exit 1 if any)
+    python -m services.post_stats reconcile --rebuild  # rebuild from a full scan, then re-check
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, Any, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rollup table -> key columns
+ROLLUPS: Dict[str, Tuple[str, ...]] = {
+    'post_stats_kol_daily': ('kol_serial', 'day', 'status'),
+    'post_stats_stock_daily': ('stock_code', 'day', 'status'),
+    'post_stats_session': ('session_id', 'kol_serial', 'stock_code', 'status'),
+}
+
+
+def live_scope(cursor, table: str) -> str:
+    """
+    SQL condition limiting a rollup table to rows post_records can still reproduce
+
+    Partitions archived to Parquet (services/post_partitions.py) are dropped without firing
+    row triggers, so the rollups keep their counts while the scan views no longer see them.
+    """
+    cursor.execute("SELECT to_regclass('post_records_archive') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return "TRUE"
+    if table == 'post_stats_session':
+        return "session_id NOT IN (SELECT unnest(session_ids) FROM post_records_archive)"
+    return "day >= COALESCE((SELECT MAX(range_end) FROM post_records_archive), 'epoch')"
+
+
+def diff_rollups(conn, sample_size: int = 10) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare each rollup table with its full-scan view
+
+    Rows whose counts dropped to zero (every post of the group was deleted or moved)
+    are ignored on the table side; archived months and sessions are skipped.
+
+    Returns:
+        {table: {'missing_or_wrong': n, 'stale': n, 'samples': [...]}}
+    """
+    report = {}
+    with conn.cursor() as cursor:
+        for table, keys in ROLLUPS.items():
+            scan = f"{table}_scan"
+            scope = live_scope(cursor, table)
+            cursor.execute(f"""
+                SELECT 'expected' AS side, * FROM (
+                    SELECT * FROM {scan} WHERE {scope}
+                    EXCEPT
+                    SELECT * FROM {table} WHERE post_count <> 0 AND {scope}
+                ) AS expected
+                UNION ALL
+                SELECT 'stale' AS side, * FROM (
+                    SELECT * FROM {table} WHERE post_count <> 0 AND {scope}
+                    EXCEPT
+                    SELECT * FROM {scan} WHERE {scope}
+                ) AS stale
+                ORDER BY {", ".join(str(i + 2) for i in range(len(keys)))}
+            """)
+            columns = [d[0] for d in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            report[table] = {
+                'missing_or_wrong': sum(1 for r in rows if r['side'] == 'expected'),
+                'stale': sum(1 for r in rows if r['side'] == 'stale'),
+                'samples': rows[:sample_size]
+            }
+    conn.rollback()
+    return report
+
+
+def rebuild_rollups(conn) -> Dict[str, int]:
+    """Replace every rollup table with its full-scan view (writes to post_records wait meanwhile; archived rows are kept)"""
+    counts = {}
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("LOCK TABLE post_records IN SHARE ROW EXCLUSIVE MODE")
+            for table in ROLLUPS:
+                scope = live_scope(cursor, table)
+                cursor.execute(f"DELETE FROM {table} WHERE {scope}")
+                cursor.execute(f"INSERT INTO {table} SELECT * FROM {table}_scan WHERE {scope}")
+                counts[table] = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    logger.info(f"Post stats rollups rebuilt: {counts}")
+    return counts
+
+
+def _has_differences(report: Dict[str, Dict[str, Any]]) -> bool:
+    return any(r['missing_or_wrong'] or r['stale'] for r in report.values())
+
+
+def _print_report(report: Dict[str, Dict[str, Any]]):
+    for table, result in report.items():
+        print(f"{table}: missing_or_wrong={result['missing_or_wrong']} stale={result['stale']}")
+        for sample in result['samples']:
+            print(f"    {sample}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reconcile post_stats rollup tables against post_records")
+    parser.add_argument('command', choices=['reconcile'])
+    parser.add_argument('--rebuild', action='store_true', help="rebuild the rollups from a full scan")
+    parser.add_argument('--database-url', default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("DATABASE_URL is not set")
+
+    import psycopg2
+
+    conn = psycopg2.connect(args.database_url)
+    try:
+        report = diff_rollups(conn)
+        _print_report(report)
+        if not args.rebuild:
+            return 1 if _has_differences(report) else 0
+
+        print(f"rebuilt: {rebuild_rollups(conn)}")
+        report = diff_rollups(conn)
+        _print_report(report)
+        return 1 if _has_differences(report) else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Startup Service - Fast-start support for the unified API
+Records import-time / per-step startup timings and initializes heavy subsystems lazily or in the background
+"""
+
+import asyncio
+import importlib
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Subsystem states
+PENDING = 'pending'
+INITIALIZING = 'initializing'
+READY = 'ready'
+DISABLED = 'disabled'
+FAILED = 'failed'
+
+
+def _elapsed_ms(start: float, end: Optional[float] = None) -> float:
+    return round(((end or time.perf_counter()) - start) * 1000, 1)
+
+
+class StartupProfile:
+    """Import-time and per-step startup timings (milliseconds since process import)"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._last_import_mark = self.started_at
+        self.imports: Dict[str, float] = {}
+        # Imports moved off the startup path (LazyModule), paid by the first request that needs them
+        self.lazy_imports: Dict[str, float] = {}
+        self.steps: Dict[str, float] = {}
+        self.startup_complete_ms: Optional[float] = None
+        self.first_healthy_ms: Optional[float] = None
+
+    def mark_import(self, name: str):
+        """Record time spent importing since the previous mark"""
+        now = time.perf_counter()
+        self.imports[name] = _elapsed_ms(self._last_import_mark, now)
+        self._last_import_mark = now
+
+    @contextmanager
+    def step(self, name: str):
+        """Time a startup step"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = _elapsed_ms(start)
+
+    def mark_startup_complete(self):
+        self.startup_complete_ms = _elapsed_ms(self.started_at)
+        logger.info(f"Startup complete in {self.startup_complete_ms} ms (imports: {self.imports}, steps: {self.steps})")
+
+    def mark_healthy(self):
+        """Record the first successful healthcheck (time-to-healthy)"""
+        if self.first_healthy_ms is None:
+            self.first_healthy_ms = _elapsed_ms(self.started_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        imports_total = round(sum(self.imports.values()), 1)
+        lazy_total = round(sum(self.lazy_imports.values()), 1)
+        return {
+            'imports_ms': dict(self.imports),
+            'imports_total_ms': imports_total,
+            'lazy_imports_ms': dict(self.lazy_imports),
+            'lazy_imports_total_ms': lazy_total,
+            # What the startup path would pay with every lazy import done eagerly (before vs imports_total_ms after)
+            'eager_imports_total_ms': round(imports_total + lazy_total, 1),
+            'steps_ms': dict(self.steps),
+            'startup_complete_ms': self.startup_complete_ms,
+            'time_to_healthy_ms': self.first_healthy_ms,
+            'uptime_ms': _elapsed_ms(self.started_at)
+        }
+
+
+class Subsystem:
+    """A named subsystem with a one-shot initializer"""
+
+    def __init__(self, name: str, init_fn: Callable, depends_on: Iterable[str] = ()):
+        self.name = name
+        self.init_fn = init_fn
+        self.depends_on = tuple(depends_on)
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class SubsystemRegistry:
+    """
+    Lazily initialized subsystems
+
+    Each init function runs at most once: either in the background after startup
+    (start) or on first use (ensure). Sync init functions run in a worker thread
+    so they never block the event loop. An init function returning False marks
+    the subsystem as disabled (e.g. missing configuration).
+    """
+
+    def __init__(self, profile: StartupProfile):
+        self.profile = profile
+        self._subsystems: Dict[str, Subsystem] = {}
+
+    def register(self, name: str, init_fn: Callable, depends_on: Iterable[str] = ()):
+        self._subsystems[name] = Subsystem(name, init_fn, depends_on)
+
+    def start(self, name: str) -> asyncio.Task:
+        """Start initialization in the background (no-op if already started)"""
+        subsystem = self._subsystems[name]
+        if subsystem.task is None:
+            subsystem.task = asyncio.create_task(self._run(subsystem), name=f"init_{name}")
+        return subsystem.task
+
+    def start_all(self):
+        for name in self._subsystems:
+            self.start(name)
+
+    async def ensure(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Initialize on first use and wait until ready; returns False if failed, disabled or timed out"""
+        task = self.start(name)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Subsystem '{name}' not ready after {timeout}s")
+            return False
+
+    async def wait_all(self):
+        tasks = [self.start(name) for name in self._subsystems]
+        await asyncio.gather(*tasks)
+
+    def is_ready(self, name: str) -> bool:
+        subsystem = self._subsystems.get(name)
+        return subsystem is not None and subsystem.state == READY
+
+    async def _run(self, subsystem: Subsystem) -> bool:
+        for dependency in subsystem.depends_on:
+            if not await self.ensure(dependency):
+                subsystem.state = DISABLED
+                subsystem.error = f"dependency '{dependency}' not ready"
+                logger.warning(f"Subsystem '{subsystem.name}' disabled: {subsystem.error}")
+                return False
+
+        subsystem.state = INITIALIZING
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(subsystem.init_fn):
+                result = await subsystem.init_fn()
+            else:
+                result = await asyncio.to_thread(subsystem.init_fn)
+            subsystem.state = DISABLED if result is False else READY
+        except Exception as e:
+            subsystem.state = FAILED
+            subsystem.error = f"{type(e).__name__}: {e}"
+            logger.error(f"Subsystem '{subsystem.name}' failed to initialize: {subsystem.error}")
+        finally:
+            subsystem.duration_ms = _elapsed_ms(start)
+            self.profile.steps[f"subsystem:{subsystem.name}"] = subsystem.duration_ms
+
+        logger.info(f"Subsystem '{subsystem.name}' {subsystem.state} in {subsystem.duration_ms} ms")
+        return subsystem.state == READY
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                'state': subsystem.state,
+                'duration_ms': subsystem.duration_ms,
+                'error': subsystem.error
+            }
+            for name, subsystem in self._subsystems.items()
+        }
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, module_name: str):
+        self._module_name = module_name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        module = self._module
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._module_name)
+            self._module = module
+            startup_profile.lazy_imports[self._module_name] = _elapsed_ms(start)
+        return getattr(module, attr)
+
+
+# Process-wide instances
+startup_profile = StartupProfile()
+subsystems = SubsystemRegistry(startup_profile)
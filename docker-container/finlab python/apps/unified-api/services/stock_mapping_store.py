@@ -0,0 +1,139 @@
+"""
+Stock Mapping Store - Build stock_mapping from FinLab company_basic_info and persist it as a snapshot
+Cold starts load the snapshot file; the FinLab refresh runs in the background
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+import logging
+
+from .startup import LazyModule
+
+# Imported on first use (the snapshot path at startup never needs pandas)
+pd = LazyModule('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot payload shape changes; old snapshots are then ignored
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_FILENAME = f"stock_mapping_snapshot.v{SNAPSHOT_VERSION}.json"
+
+_warned_paths = set()
+
+
+def get_snapshot_path() -> str:
+    """
+    Snapshot file location
+
+    STOCK_MAPPING_SNAPSHOT_PATH wins; otherwise the Railway volume (RAILWAY_VOLUME_MOUNT_PATH)
+    when one is attached. The temp directory is the last resort: it is wiped on every
+    redeploy, so each new container rebuilds the mapping from FinLab (a warning is logged).
+    """
+    path = os.getenv("STOCK_MAPPING_SNAPSHOT_PATH")
+    if not path and os.getenv("RAILWAY_VOLUME_MOUNT_PATH"):
+        path = os.path.join(os.environ["RAILWAY_VOLUME_MOUNT_PATH"], SNAPSHOT_FILENAME)
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), SNAPSHOT_FILENAME)
+
+    if is_ephemeral_path(path) and path not in _warned_paths:
+        _warned_paths.add(path)
+        logger.warning(
+            f"Stock mapping snapshot is in a temporary directory ({path}) and will not survive a redeploy; "
+            "set STOCK_MAPPING_SNAPSHOT_PATH to a file on a mounted volume"
+        )
+    return path
+
+
+def is_ephemeral_path(path: str) -> bool:
+    """True for paths under /tmp or the process temp directory"""
+    real = os.path.realpath(path)
+    return any(
+        real == root or real.startswith(root + os.sep)
+        for root in {os.path.realpath('/tmp'), os.path.realpath(tempfile.gettempdir())}
+    )
+
+
+def build_stock_mapping(company_info: 'pd.DataFrame') -> Dict[str, Dict[str, str]]:
+    """
+    Convert company_basic_info into {stock_id: {'company_name', 'industry'}} in one pass
+
+    Args:
+        company_info: FinLab company_basic_info DataFrame (must contain 'stock_id')
+
+    Returns:
+        Dict keyed by stock id; the first row wins for duplicated stock ids
+    """
+    if company_info is None or company_info.empty or 'stock_id' not in company_info.columns:
+        return {}
+
+    df = company_info.drop_duplicates(subset='stock_id', keep='first').set_index('stock_id')
+    stock_ids = df.index.astype(str)
+
+    fallback_names = pd.Series([f'股票{sid}' for sid in stock_ids], index=df.index)
+    names = fallback_names
+    if '公司名稱' in df.columns:
+        names = df['公司名稱'].fillna(names)
+    if '公司簡稱' in df.columns:
+        names = df['公司簡稱'].fillna(names)
+
+    if '產業類別' in df.columns:
+        industries = df['產業類別'].fillna('未知產業')
+    else:
+        industries = pd.Series('未知產業', index=df.index)
+
+    return {
+        sid: {'company_name': str(name), 'industry': str(industry)}
+        for sid, name, industry in zip(stock_ids, names.to_numpy(), industries.to_numpy())
+    }
+
+
+def load_snapshot(path: Optional[str] = None) -> Optional[Dict[str, Dict[str, str]]]:
+    """Load the mapping snapshot; returns None if missing, unreadable or from another version"""
+    path = path or get_snapshot_path()
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+    except Exception as e:
+        logger.warning(f"Stock mapping snapshot unreadable ({path}): {e}")
+        return None
+
+    if payload.get('version') != SNAPSHOT_VERSION:
+        logger.info(f"Stock mapping snapshot version mismatch: {payload.get('version')} != {SNAPSHOT_VERSION}")
+        return None
+
+    mapping = payload.get('data') or {}
+    logger.info(f"Stock mapping snapshot loaded: {len(mapping)} stocks (created {payload.get('created_at')})")
+    return mapping
+
+
+def save_snapshot(mapping: Dict[str, Dict[str, Any]], path: Optional[str] = None) -> bool:
+    """Write the mapping snapshot atomically (temp file + rename)"""
+    path = path or get_snapshot_path()
+    payload = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'source': 'finlab:company_basic_info',
+        'count': len(mapping),
+        'data': mapping
+    }
+
+    try:
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logger.info(f"Stock mapping snapshot saved: {len(mapping)} stocks -> {path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save stock mapping snapshot ({path}): {e}")
+        return False
@@ -0,0 +1,279 @@
+"""
+Text Post-processing - Precompiled rules for generated posts
+All patterns are compiled once at import. Word replacements (LiteralRules) are merged
+into one alternation and applied in a single scan with a dict as the dispatch table.
+Rules that feed each other stay ordered: sanitize_content_numbers finds the numbers
+in one scan and runs its steps on each number only, and clean_tags_and_signatures
+keeps its stages as separate scans that are skipped when their first character
+does not occur.
+
+    sanitize_content_numbers("成交量15000張，營收112340千元")  # '成交量1.5萬張，營收1.12億元'
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LiteralRules:
+    """
+    A chain of str.replace calls as one scan: each source word (longest first) is
+    replaced by what the whole chain turns that word into
+
+    The alternation has no groups, so the regex engine can skip ahead to the words'
+    first characters; the replacement is a dict lookup on the matched word.
+    """
+
+    def __init__(self, replacements: Sequence[Tuple[str, str]]):
+        self.replacements = list(replacements)
+        words = sorted({old for old, _ in self.replacements}, key=len, reverse=True)
+        self.table = {word: self._chain(word) for word in words}
+        self.pattern = re.compile('|'.join(re.escape(word) for word in words))
+
+    def _chain(self, text: str) -> str:
+        for old, new in self.replacements:
+            text = text.replace(old, new)
+        return text
+
+    def sub(self, text: str) -> str:
+        table = self.table
+        return self.pattern.sub(lambda match: table[match.group()], text)
+
+    def sub_sequential(self, text: str) -> str:
+        """The str.replace chain itself"""
+        return self._chain(text)
+
+
+# ==================== Number formatting ====================
+
+def _convert_qian_to_proper_unit(match: re.Match) -> str:
+    """112340千元 → 1.12億元"""
+    num_str = match.group(1)
+    unit_suffix = match.group(2) if match.group(2) else '元'
+    try:
+        num = float(num_str)
+        actual_value = num * 1000  # 千 = 1000
+
+        if actual_value >= 100000000:  # >= 1億
+            formatted = actual_value / 100000000
+            if formatted == int(formatted):
+                return f"{int(formatted)}億{unit_suffix}"
+            else:
+                return f"{formatted:.2f}億{unit_suffix}".rstrip('0').rstrip('.')  + unit_suffix if unit_suffix != '元' else f"{formatted:.2f}".rstrip('0').rstrip('.') + "億元"
+        elif actual_value >= 10000:  # >= 1萬
+            formatted = actual_value / 10000
+            if formatted == int(formatted):
+                return f"{int(formatted)}萬{unit_suffix}"
+            else:
+                return f"{formatted:.2f}萬{unit_suffix}".rstrip('0').rstrip('.')
+        else:
+            return match.group(0)  # Keep original if small
+    except Exception:
+        return match.group(0)
+
+
+def _convert_large_number(match: re.Match) -> str:
+    """15000張 → 1.5萬張"""
+    prefix = match.group(1) or ''
+    num_str = match.group(2)
+    unit = match.group(3)
+    try:
+        num = float(num_str.replace(',', ''))
+
+        # Skip if already has Chinese unit modifier
+        if num < 10000:
+            return match.group(0)
+
+        if num >= 100000000:  # >= 1億
+            formatted = num / 100000000
+            if formatted == int(formatted):
+                return f"{prefix}{int(formatted)}億{unit}"
+            else:
+                return f"{prefix}{formatted:.2f}億{unit}".replace('.00', '')
+        elif num >= 10000:  # >= 1萬
+            formatted = num / 10000
+            if formatted == int(formatted):
+                return f"{prefix}{int(formatted)}萬{unit}"
+            else:
+                # Remove trailing zeros
+                formatted_str = f"{formatted:.2f}".rstrip('0').rstrip('.')
+                return f"{prefix}{formatted_str}萬{unit}"
+        else:
+            return match.group(0)
+    except Exception:
+        return match.group(0)
+
+
+def _fix_decimal_precision(match: re.Match) -> str:
+    """1.234567億 → 1.23億"""
+    num = match.group(1)
+    unit = match.group(2)
+    try:
+        num_float = float(num)
+        if num_float == int(num_float):
+            return f"{int(num_float)}{unit}"
+        else:
+            formatted = f"{num_float:.2f}".rstrip('0').rstrip('.')
+            return f"{formatted}{unit}"
+    except Exception:
+        return match.group(0)
+
+
+_FIVE_DIGITS = re.compile(r'\d{5}')
+
+# Ordered steps; each one sees the previous step's output (15000.50張 → 15000.5張 → 1.5萬張)
+# (pattern, replacement, guard): the step only runs on tokens the guard accepts, and
+# every guard is a condition the pattern cannot match without
+_NUMBER_STEPS = [
+    # 1. Trailing zeros: 3.00萬 → 3萬, 2.50萬 → 2.5萬
+    (re.compile(r'(\d+)\.0+([萬億千張元%股])'), r'\1\2', lambda token: '.0' in token),
+    (re.compile(r'(\d+\.\d*[1-9])0+([萬億千張元%股])'), r'\1\2', lambda token: '.' in token and '0' in token),
+    # 2. 千元 to 萬/億
+    (re.compile(r'(\d+(?:\.\d+)?)\s*千\s*(元)?'), _convert_qian_to_proper_unit, lambda token: '千' in token),
+    # 3. Large raw numbers: 15000張, 成交量15000張
+    (re.compile(r'(成交量|買超|賣超|持股)?[\s]*(\d{5,}(?:,\d{3})*(?:\.\d+)?)\s*(張|股|元|手)'), _convert_large_number,
+     lambda token: len(token) > 5 and _FIVE_DIGITS.search(token) is not None),
+    # 4. Over-precise decimals: 1.234567億 → 1.23億
+    (re.compile(r'(\d+\.\d{3,})(萬|億|%)'), _fix_decimal_precision,
+     lambda token: '.' in token and ('萬' in token or '億' in token or '%' in token)),
+    # 5. Redundant .0: 5.0萬 → 5萬
+    (re.compile(r'(\d+)\.0([萬億])'), r'\1\2', lambda token: '.0' in token),
+]
+
+# 6. Double unit: 萬元元 → 萬元 (last, over the whole text)
+DOUBLE_UNIT_PATTERN = re.compile(r'(萬|億)(元)(元)')
+
+# Digits, separators, whitespace and units up to the next other character. Steps only
+# match inside such a run, plus (step 3) whitespace and a prefix right before it.
+NUMBER_PATTERN = re.compile(r'\d[\d.,\s千萬億張元%股手]*')
+NUMBER_PREFIXES = ('成交量', '買超', '賣超', '持股')
+
+
+def _normalize_number(token: str) -> str:
+    for regex, replacement, guard in _NUMBER_STEPS:
+        if guard(token):
+            token = regex.sub(replacement, token)
+    return token
+
+
+def sanitize_content_numbers(content: str) -> str:
+    """
+    🔥 Sanitize machine-like number formatting to sound more natural/human-like.
+
+    Fixes:
+    - Trailing zeros: 2.50萬 → 2.5萬, 3.00億 → 3億
+    - Awkward raw numbers: 112340千元 → 1.12億元, 15000張 → 1.5萬張
+    - Over-precise decimals: 1.234567億 → 1.23億
+    - Inconsistent units: 混合使用千/萬/億
+
+    Args:
+        content: The GPT-generated content to sanitize
+
+    Returns:
+        Sanitized content with natural number formatting
+    """
+    if not content:
+        return content
+
+    # One scan for numbers; the ordered steps then run on each number only
+    pieces = []
+    end = 0
+    for match in NUMBER_PATTERN.finditer(content):
+        start = match.start()
+        while start > end and content[start - 1].isspace():
+            start -= 1
+        for prefix in NUMBER_PREFIXES:
+            if start - len(prefix) >= end and content.startswith(prefix, start - len(prefix), start):
+                start -= len(prefix)
+                break
+        pieces.append(content[end:start])
+        pieces.append(_normalize_number(content[start:match.end()]))
+        end = match.end()
+    pieces.append(content[end:])
+    result = ''.join(pieces)
+
+    if '元元' in result:
+        result = DOUBLE_UNIT_PATTERN.sub(r'\1\2', result)
+
+    logger.debug(f"📝 Content sanitized: {len(content)} → {len(result)} chars")
+
+    return result
+
+
+# ==================== Personalization style ====================
+
+# 聳動性用詞（語調控制最後一律換成「穩健表現」）
+SENSATIONAL_WORDS = ["強勢突破", "爆量上攻", "衝高", "強勢上漲", "突破性上漲", "量價齊揚", "強勢表現"]
+
+
+def _tone_level(value: float, high: float, low: float) -> int:
+    return 1 if value >= high else -1 if value <= low else 0
+
+
+@lru_cache(maxsize=None)
+def _tone_rules(formal: int, emotion: int, confidence: int) -> LiteralRules:
+    replacements: List[Tuple[str, str]] = []
+    # 正式程度
+    if formal > 0:
+        replacements += [("很", "相當"), ("非常", "極其"), ("超", "極度")]
+    elif formal < 0:
+        replacements += [("相當", "很"), ("極其", "非常"), ("極度", "超")]
+    # 情感強度 - 避免過度興奮
+    if emotion > 0:
+        replacements += [("強勢", "穩健"), ("上漲", "上揚")]
+    elif emotion < 0:
+        replacements += [("強勢突破", "穩健上漲"), ("強勢上漲", "溫和上漲")]
+    # 自信程度
+    if confidence > 0:
+        replacements += [("可能", "預期"), ("或許", "有望")]
+    elif confidence < 0:
+        replacements += [("將", "可能"), ("必定", "或許")]
+    # 過濾聳動性用詞
+    replacements += [(word, "穩健表現") for word in SENSATIONAL_WORDS]
+    return LiteralRules(replacements)
+
+
+def tone_rules(tone_formal: float, tone_emotion: float, tone_confidence: float) -> LiteralRules:
+    """Tone-control word replacements for a KOL's settings (compiled once per tone band)"""
+    return _tone_rules(
+        _tone_level(tone_formal, 8, 4),
+        _tone_level(tone_emotion, 7, 3),
+        _tone_level(tone_confidence, 8, 4),
+    )
+
+
+# Boilerplate signature blocks, each starting with its emoji; kept as ordered scans
+# (a block's lazy .*? can span another block) that are skipped unless the emoji occurs
+SIGNATURE_PATTERNS = [
+    ('😂', re.compile(r'😂\s*板橋大who\s*-\s*鄉民觀點.*?鄉民觀點僅供娛樂，投資請理性思考。', re.DOTALL)),
+    ('📊', re.compile(r'📊\s*[^-\n]+\s*-\s*技術分析.*?技術分析僅供參考，投資有風險，請謹慎決策。', re.DOTALL)),
+    ('📰', re.compile(r'📰\s*[^-\n]+\s*-\s*新聞快報.*?消息僅供參考，投資決策請自行判斷。', re.DOTALL)),
+]
+
+# A hashtag and any hashtags following it after whitespace (this also covers single
+# hashtags and fixed combinations such as #鄉民觀點 #PTT #股市討論 #幽默分析)
+HASHTAG_PATTERN = re.compile(r'#[\w\u4e00-\u9fff]+(?:\s+#[\w\u4e00-\u9fff]+)*')
+
+BLANK_LINES_PATTERN = re.compile(r'\n\s*\n\s*\n')  # 移除多餘的換行
+SPACES_PATTERN = re.compile(r' {2,}')  # 移除多餘的空格 (a single space is left as is)
+
+
+def clean_tags_and_signatures(content: str) -> str:
+    """
+    Remove boilerplate signature blocks and hashtags, then collapse blank lines and spaces
+
+    Removing a block can join the text around it into a new hashtag or whitespace
+    run, so the stages stay ordered scans; each one is skipped when its first
+    character does not occur.
+    """
+    for marker, pattern in SIGNATURE_PATTERNS:
+        if marker in content:
+            content = pattern.sub('', content)
+    if '#' in content:
+        content = HASHTAG_PATTERN.sub('', content)
+    if '\n' in content:
+        content = BLANK_LINES_PATTERN.sub('\n\n', content)
+    return SPACES_PATTERN.sub(' ', content)
@@ -0,0 +1,44 @@
+"""
+測試產業索引（services/industry_index）
+
+    python -m pytest test_industry_index.py -q
+
+以小型 stock_mapping 確認篩選遮罩與產業統計；沒有產業資料的股票歸入未知產業。
+"""
+
+import numpy as np
+import pandas as pd
+
+from services.industry_index import UNKNOWN_INDUSTRY, IndustryIndex
+
+MAPPING = {
+    '2330': {'industry': '半導體業'},
+    '2303': {'industry': '半導體業'},
+    '2881': {'industry': '金融保險業'},
+    '9999': {'industry': ''},
+}
+
+
+def test_mask_selects_industries_over_matrix_columns():
+    index = IndustryIndex(MAPPING)
+    columns = pd.Index(['2881', '2330', '1234', '2303', '9999'])
+
+    assert index.mask(columns, ['半導體業']).tolist() == [False, True, False, True, False]
+    assert index.mask(columns, ['金融保險業', '半導體業']).tolist() == [True, True, False, True, False]
+    # 不在 mapping 的股票（1234）不屬於任何產業，包括未知產業
+    assert index.mask(columns, [UNKNOWN_INDUSTRY]).tolist() == [False, False, False, False, True]
+    assert not index.mask(columns, ['不存在的產業']).any()
+
+
+def test_sector_stats_aggregates_one_cross_section():
+    index = IndustryIndex(MAPPING)
+    change = pd.Series({'2330': 2.0, '2303': -1.0, '2881': 1.5, '1234': 9.9, '9999': np.nan})
+
+    stats = {row['industry']: row for row in index.sector_stats(change)}
+
+    assert list(stats) == ['金融保險業', '半導體業']  # 依平均漲跌幅排序；NaN 與不在 mapping 的股票不計
+    assert stats['半導體業'] == {
+        'industry': '半導體業', 'stock_count': 2, 'up_count': 1, 'down_count': 1,
+        'breadth': 0.5, 'avg_change_percent': 0.5,
+    }
+    assert stats['金融保險業']['up_count'] == 1
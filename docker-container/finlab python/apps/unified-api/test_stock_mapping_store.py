@@ -0,0 +1,49 @@
+"""
+測試股票映射快照（services/stock_mapping_store）
+
+    python -m pytest test_stock_mapping_store.py -q
+"""
+
+import os
+
+import pandas as pd
+
+from services import stock_mapping_store
+from services.stock_mapping_store import build_stock_mapping, get_snapshot_path, load_snapshot, save_snapshot
+
+
+def test_snapshot_path_prefers_configured_volume(tmp_path, monkeypatch):
+    monkeypatch.delenv("STOCK_MAPPING_SNAPSHOT_PATH", raising=False)
+    monkeypatch.setenv("RAILWAY_VOLUME_MOUNT_PATH", str(tmp_path / "volume"))
+    assert get_snapshot_path() == os.path.join(str(tmp_path / "volume"), stock_mapping_store.SNAPSHOT_FILENAME)
+
+    monkeypatch.setenv("STOCK_MAPPING_SNAPSHOT_PATH", "/data/mapping.json")
+    assert get_snapshot_path() == "/data/mapping.json"
+
+
+def test_temporary_snapshot_path_is_flagged(monkeypatch, caplog):
+    monkeypatch.delenv("STOCK_MAPPING_SNAPSHOT_PATH", raising=False)
+    monkeypatch.delenv("RAILWAY_VOLUME_MOUNT_PATH", raising=False)
+    monkeypatch.setattr(stock_mapping_store, "_warned_paths", set())
+
+    path = get_snapshot_path()
+    assert stock_mapping_store.is_ephemeral_path(path)
+    assert "will not survive a redeploy" in caplog.text
+    assert not stock_mapping_store.is_ephemeral_path("/data/mapping.json")
+
+
+def test_snapshot_round_trip(tmp_path):
+    company_info = pd.DataFrame({
+        'stock_id': ['2330', '2881'],
+        '公司簡稱': ['台積電', None],
+        '公司名稱': ['台灣積體電路製造', '富邦金融控股'],
+        '產業類別': ['半導體業', None],
+    })
+    mapping = build_stock_mapping(company_info)
+    path = str(tmp_path / "snapshot.json")
+
+    assert save_snapshot(mapping, path)
+    assert load_snapshot(path) == {
+        '2330': {'company_name': '台積電', 'industry': '半導體業'},
+        '2881': {'company_name': '富邦金融控股', 'industry': '未知產業'},
+    }
@@ -0,0 +1,54 @@
+"""
+測試文字後處理規則集（services/text_postprocess）
+
+    python -m pytest test_text_postprocess.py -q
+
+testdata/text_postprocess_golden.json 的 expected 由原本逐條 re.sub / str.replace 的串接產生
+（python scripts/benchmark_text_postprocess.py --write-golden），單次掃描的輸出必須完全相同。
+"""
+
+import json
+import os
+
+import pytest
+
+from services.text_postprocess import (
+    LiteralRules,
+    clean_tags_and_signatures,
+    sanitize_content_numbers,
+    tone_rules,
+)
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'testdata', 'text_postprocess_golden.json')
+
+with open(GOLDEN_PATH, encoding='utf-8') as f:
+    GOLDEN = json.load(f)
+
+
+@pytest.mark.parametrize('case', GOLDEN['sanitize_content_numbers'], ids=lambda case: case['input'][:20])
+def test_sanitize_content_numbers_matches_golden(case):
+    assert sanitize_content_numbers(case['input']) == case['expected']
+
+
+@pytest.mark.parametrize('case', GOLDEN['tone_control'], ids=lambda case: case['input'][:20])
+def test_tone_rules_match_golden(case):
+    rules = tone_rules(case['tone_formal'], case['tone_emotion'], case['tone_confidence'])
+    assert rules.sub(case['input']) == case['expected']
+
+
+@pytest.mark.parametrize('case', GOLDEN['clean_tags_and_signatures'], ids=lambda case: case['input'][:20])
+def test_clean_tags_and_signatures_matches_golden(case):
+    assert clean_tags_and_signatures(case['input']) == case['expected']
+
+
+def test_literal_rules_match_the_replace_chain():
+    # 後面的替換會作用在前面替換的結果上（很 → 相當 → 頗為）
+    rules = LiteralRules([("很", "相當"), ("相當", "頗為"), ("強勢突破", "穩健表現"), ("強勢", "穩健")])
+    text = "很強勢，相當看好，強勢突破前高"
+
+    assert rules.sub(text) == rules.sub_sequential(text) == "頗為穩健，頗為看好，穩健表現前高"
+
+
+def test_tone_rules_are_compiled_once_per_band():
+    assert tone_rules(9, 8, 9) is tone_rules(8, 10, 8)
+    assert tone_rules(9, 8, 9) is not tone_rules(3, 8, 9)
@@ -0,0 +1,116 @@
+"""
+Fake Sheets Client - In-memory Google Sheets stand-in for tests
+Same read/write interface and response shapes as GoogleSheetsClient; every API call is recorded.
+"""
+import re
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+_CELL = re.compile(r'^([A-Z]+)?(\d+)?$')
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - ord('A') + 1)
+    return index - 1
+
+
+def _column_letters(index: int) -> str:
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _parse_range(range_name: Optional[str]) -> Tuple[int, Optional[int], int, Optional[int]]:
+    """'A2:R10' / 'A:R' / 'B5' -> (first_row, last_row, first_col, last_col), 0-based, None for unbounded"""
+    if not range_name:
+        return 0, None, 0, None
+    start, _, end = range_name.partition(':')
+    start_match, end_match = _CELL.match(start), _CELL.match(end or start)
+    first_col = _column_index(start_match.group(1)) if start_match.group(1) else 0
+    first_row = int(start_match.group(2)) - 1 if start_match.group(2) else 0
+    last_col = _column_index(end_match.group(1)) if end_match.group(1) else None
+    last_row = int(end_match.group(2)) - 1 if end_match.group(2) else None
+    return first_row, last_row, first_col, last_col
+
+
+class FakeSheetsClient:
+    """
+    Worksheets held in memory (each one a list of string rows)
+
+    Args:
+        sheets: Initial data {sheet name: [[...], ...]}
+    """
+
+    def __init__(self, sheets: Optional[Dict[str, List[List[Any]]]] = None):
+        self.sheets: Dict[str, List[List[str]]] = {
+            name: [[str(value) for value in row] for row in rows] for name, rows in (sheets or {}).items()
+        }
+        self.calls: List[Tuple[str, str, int]] = []  # (method, sheet, rows)
+        self._lock = threading.Lock()
+
+    def _sheet(self, sheet_name: str) -> List[List[str]]:
+        return self.sheets.setdefault(sheet_name, [])
+
+    def read_sheet(self, sheet_name: str, range_name: str = None) -> List[List[str]]:
+        with self._lock:
+            rows = self._sheet(sheet_name)
+            first_row, last_row, first_col, last_col = _parse_range(range_name)
+            selected = rows[first_row:None if last_row is None else last_row + 1]
+            values = [row[first_col:None if last_col is None else last_col + 1] for row in selected]
+            # Like the API: trailing empty rows are dropped
+            while values and not any(values[-1]):
+                values.pop()
+            self.calls.append(('read', sheet_name, len(values)))
+            return [list(row) for row in values]
+
+    def write_sheet(self, sheet_name: str, values: List[List[Any]], range_name: str = None) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._sheet(sheet_name)
+            first_row, _, first_col, _ = _parse_range(range_name)
+            for offset, row in enumerate(values):
+                target_row = first_row + offset
+                while len(rows) <= target_row:
+                    rows.append([])
+                target = rows[target_row]
+                while len(target) < first_col + len(row):
+                    target.append('')
+                for column, value in enumerate(row):
+                    target[first_col + column] = '' if value is None else str(value)
+            self.calls.append(('write', sheet_name, len(values)))
+            return {'updatedRows': len(values), 'updatedCells': sum(len(row) for row in values)}
+
+    def update_cell(self, sheet_name: str, cell_range: str, value: str) -> Dict[str, Any]:
+        return self.write_sheet(sheet_name, [[value]], cell_range)
+
+    def append_sheet(self, sheet_name: str, values: List[List[Any]]) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._sheet(sheet_name)
+            while rows and not any(rows[-1]):
+                rows.pop()
+            start_row = len(rows) + 1
+            for row in values:
+                rows.append(['' if value is None else str(value) for value in row])
+            width = max((len(row) for row in values), default=1)
+            self.calls.append(('append', sheet_name, len(values)))
+            updated_range = f"'{sheet_name}'!A{start_row}:{_column_letters(width - 1)}{start_row + len(values) - 1}"
+            result = {
+                'updates': {
+                    'updatedRange': updated_range,
+                    'updatedRows': len(values),
+                    'updatedCells': sum(len(row) for row in values),
+                }
+            }
+            if start_row > 1:
+                result['tableRange'] = f"'{sheet_name}'!A1:{_column_letters(width - 1)}{start_row - 1}"
+            return result
+
+    def get_sheet_info(self) -> Dict[str, Any]:
+        return {'sheets': [{'properties': {'title': name}} for name in self.sheets]}
+
+    def api_calls(self, method: Optional[str] = None) -> int:
+        return sum(1 for call in self.calls if method is None or call[0] == method)
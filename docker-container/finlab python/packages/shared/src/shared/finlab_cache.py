@@ -0,0 +1,559 @@
+"""
+FinLab Dataset Cache - One copy of each FinLab dataset shared by every service
+Datasets are keyed by name and last trading date, so a key never goes stale: the
+next trading day simply asks for a new key.
+
+Backends (FINLAB_CACHE_BACKEND):
+    lru    in-process LRU only (default; no extra dependencies)
+    arrow  uncompressed Arrow IPC files on a shared volume (FINLAB_CACHE_DIR), memory-mapped
+           by every service, so the pages are shared by all processes on the host
+    redis  Arrow IPC bytes in a Redis-protocol server (FINLAB_CACHE_REDIS_URL / REDIS_URL)
+
+Every backend sits behind a small in-process LRU (FINLAB_CACHE_LRU_MB) so a request never
+re-reads a dataset the process already holds.
+
+The key rolls over at FINLAB_CACHE_ROLLOVER_HOUR, but FinLab may publish late. During the
+settle window after the rollover (FINLAB_CACHE_SETTLE_MINUTES) a dataset whose index does
+not reach the new trading date is kept in-process only and fetched again after
+FINLAB_CACHE_RECHECK_SECONDS, so an early fetch never pins yesterday's data for the day.
+
+Returned frames are shared by every caller (and, with the arrow backend, memory-mapped
+read-only): treat them as read-only or ask for a private copy with writable=True.
+
+    from finlab import data as finlab_data
+    data = CachedFinlabData(finlab_data)
+    close = data.get('price:收盤價')
+    adjusted = data.get('price:收盤價', writable=True)
+"""
+
+import importlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Callable, Tuple
+from urllib.parse import quote
+import logging
+
+logger = logging.getLogger(__name__)
+
+TAIPEI = timezone(timedelta(hours=8))
+
+DEFAULT_BACKEND = 'lru'
+DEFAULT_LRU_MB = 2048
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'finlab_cache')
+DEFAULT_REDIS_TTL_SECONDS = 36 * 3600
+
+# FinLab publishes the day's prices in the early evening (Taipei); before that the
+# latest trading date is still the previous session
+DEFAULT_ROLLOVER_HOUR = 18
+
+# After the rollover, datasets that do not reach the new trading date yet are re-fetched
+# this often until the settle window ends
+DEFAULT_SETTLE_MINUTES = 90
+DEFAULT_RECHECK_SECONDS = 600
+
+# Dated files kept per dataset in the Arrow directory (older ones may still be mapped)
+ARROW_FILES_KEPT = 2
+
+INDEX_COLUMN = '__index__'
+META_FRAME_CLASS = b'finlab_cache.frame_class'
+META_COLUMNS_NAME = b'finlab_cache.columns_name'
+META_INDEX_NAME = b'finlab_cache.index_name'
+
+
+def default_rollover_hour() -> int:
+    return int(os.getenv("FINLAB_CACHE_ROLLOVER_HOUR", DEFAULT_ROLLOVER_HOUR))
+
+
+def reaches(df, trading_day: date) -> bool:
+    """Whether a dataset's date index includes trading_day (False for non-date indexes)"""
+    try:
+        latest = df.index.max()
+    except Exception:
+        return False
+    return hasattr(latest, 'date') and latest.date() >= trading_day
+
+
+def last_trading_date(now: Optional[datetime] = None,
+                      is_trading_day: Optional[Callable[[date], bool]] = None,
+                      rollover_hour: Optional[int] = None) -> date:
+    """
+    Latest trading date whose data FinLab has published
+
+    Args:
+        now: Current time (default: now, Asia/Taipei)
+        is_trading_day: Trading-day predicate (default: Monday-Friday)
+        rollover_hour: Hour (Taipei) after which today's session counts (FINLAB_CACHE_ROLLOVER_HOUR)
+    """
+    now = (now or datetime.now(TAIPEI)).astimezone(TAIPEI)
+    is_trading_day = is_trading_day or (lambda d: d.weekday() < 5)
+    if rollover_hour is None:
+        rollover_hour = default_rollover_hour()
+
+    day = now.date()
+    if now.hour < rollover_hour:
+        day -= timedelta(days=1)
+    for _ in range(60):
+        if is_trading_day(day):
+            return day
+        day -= timedelta(days=1)
+    return now.date()
+
+
+def frame_nbytes(df) -> int:
+    try:
+        return int(df.memory_usage(index=True, deep=False).sum())
+    except Exception:
+        return 0
+
+
+# ---------- Arrow conversion ----------
+
+def dataframe_to_table(df):
+    """
+    DataFrame -> Arrow table that converts back without copying numeric columns
+
+    NaN stays a float value (not an Arrow null) so float columns map straight onto
+    the Arrow buffers; the index is stored as a regular column.
+    """
+    import pyarrow as pa
+
+    arrays = [pa.array(df.index.to_numpy())]
+    names = [INDEX_COLUMN]
+    for position, column in enumerate(df.columns):
+        values = df.iloc[:, position].to_numpy()
+        arrays.append(pa.array(values, from_pandas=values.dtype == object))
+        names.append(str(column))
+
+    frame_class = type(df)
+    metadata = {
+        META_FRAME_CLASS: f"{frame_class.__module__}:{frame_class.__qualname__}".encode('utf-8'),
+        META_COLUMNS_NAME: str(df.columns.name or '').encode('utf-8'),
+        META_INDEX_NAME: str(df.index.name or '').encode('utf-8'),
+    }
+    return pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(metadata)
+
+
+def _frame_class(path: str):
+    import pandas as pd
+
+    module_name, _, qualname = path.partition(':')
+    try:
+        cls = importlib.import_module(module_name)
+        for part in qualname.split('.'):
+            cls = getattr(cls, part)
+        if isinstance(cls, type) and issubclass(cls, pd.DataFrame):
+            return cls
+    except Exception:
+        pass
+    return pd.DataFrame
+
+
+def table_to_dataframe(table):
+    """Arrow table written by dataframe_to_table -> DataFrame (numeric columns stay on the Arrow buffers)"""
+    metadata = table.schema.metadata or {}
+    df = table.to_pandas(split_blocks=True, self_destruct=False)
+    df = df.set_index(INDEX_COLUMN)
+    df.index.name = metadata.get(META_INDEX_NAME, b'').decode('utf-8') or None
+    df.columns.name = metadata.get(META_COLUMNS_NAME, b'').decode('utf-8') or None
+
+    frame_class = _frame_class(metadata.get(META_FRAME_CLASS, b'').decode('utf-8'))
+    if frame_class is not type(df):
+        df = frame_class(df)
+    return df
+
+
+# ---------- Backends ----------
+
+class LRUBackend:
+    """In-process LRU bounded by DataFrame memory"""
+
+    name = 'lru'
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("FINLAB_CACHE_LRU_MB", DEFAULT_LRU_MB)) * 1024 * 1024
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, df):
+        size = frame_nbytes(df)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._bytes -= previous[1]
+            self._entries[key] = (df, size)
+            self._bytes += size
+            # Keep at least the newest entry even if it alone exceeds the budget
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def discard(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry[1]
+
+    def discard_dataset(self, name: str, keep_key: str):
+        """Drop older trading dates of a dataset once a newer one is cached"""
+        prefix = f"{name}@"
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix) and k != keep_key]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+
+class ArrowFileBackend:
+    """
+    Arrow IPC files on a shared volume, read back memory-mapped
+
+    Layout: <directory>/<quoted dataset name>/<trading date>.arrow. Files are written to a
+    temporary name and renamed, and a per-dataset flock makes one process download a
+    dataset while the others wait for its file.
+    """
+
+    name = 'arrow'
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv("FINLAB_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+    def _dataset_dir(self, name: str) -> str:
+        return os.path.join(self.directory, quote(name, safe=''))
+
+    def _path(self, key: str) -> str:
+        name, _, trading_date = key.rpartition('@')
+        return os.path.join(self._dataset_dir(name), f"{trading_date}.arrow")
+
+    def get(self, key: str):
+        import pyarrow as pa
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        source = pa.memory_map(path, 'r')
+        table = pa.ipc.open_file(source).read_all()
+        return table_to_dataframe(table)
+
+    def put(self, key: str, df):
+        import pyarrow as pa
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = dataframe_to_table(df)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._prune(os.path.dirname(path))
+
+    def _prune(self, dataset_dir: str):
+        dated = sorted(f for f in os.listdir(dataset_dir) if f.endswith('.arrow'))
+        for filename in dated[:-ARROW_FILES_KEPT]:
+            try:
+                # Processes that still map the file keep their pages until they drop it
+                os.remove(os.path.join(dataset_dir, filename))
+            except OSError:
+                pass
+
+    @contextmanager
+    def loading(self, key: str):
+        """Cross-process lock held while one process downloads and writes key"""
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        name = key.rpartition('@')[0]
+        os.makedirs(self._dataset_dir(name), exist_ok=True)
+        with open(os.path.join(self._dataset_dir(name), '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict[str, Any]:
+        files = 0
+        size = 0
+        if os.path.isdir(self.directory):
+            for root, _, filenames in os.walk(self.directory):
+                for filename in filenames:
+                    if filename.endswith('.arrow'):
+                        files += 1
+                        size += os.path.getsize(os.path.join(root, filename))
+        return {'directory': self.directory, 'files': files, 'bytes': size}
+
+
+class RedisBackend:
+    """Arrow IPC stream bytes in a Redis-protocol server (requires the redis package)"""
+
+    name = 'redis'
+
+    def __init__(self, url: Optional[str] = None, ttl_seconds: int = DEFAULT_REDIS_TTL_SECONDS,
+                 key_prefix: str = 'finlab:'):
+        import redis
+
+        self.url = url or os.getenv("FINLAB_CACHE_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._client = redis.Redis.from_url(self.url)
+
+    def get(self, key: str):
+        import pyarrow as pa
+
+        payload = self._client.get(self.key_prefix + key)
+        if payload is None:
+            return None
+        table = pa.ipc.open_stream(pa.py_buffer(payload)).read_all()
+        return table_to_dataframe(table)
+
+    def put(self, key: str, df):
+        import pyarrow as pa
+
+        table = dataframe_to_table(df)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression='zstd')) as writer:
+            writer.write_table(table)
+        self._client.set(self.key_prefix + key, sink.getvalue().to_pybytes(), ex=self.ttl_seconds)
+
+    @contextmanager
+    def loading(self, key: str):
+        """Cross-process lock (SET NX with expiry) held while one process downloads key"""
+        lock_key = f"{self.key_prefix}{key}:loading"
+        deadline = time.monotonic() + 300
+        while not self._client.set(lock_key, b'1', nx=True, ex=300):
+            if time.monotonic() > deadline or self._client.exists(self.key_prefix + key):
+                break
+            time.sleep(0.2)
+        try:
+            yield
+        finally:
+            self._client.delete(lock_key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'url': self.url.split('@')[-1], 'ttl_seconds': self.ttl_seconds}
+
+
+def create_backend(name: Optional[str] = None):
+    name = (name or os.getenv("FINLAB_CACHE_BACKEND", DEFAULT_BACKEND)).lower()
+    if name == 'arrow':
+        return ArrowFileBackend()
+    if name == 'redis':
+        return RedisBackend()
+    if name == 'lru':
+        return None
+    raise ValueError(f"Unknown FINLAB_CACHE_BACKEND: {name}")
+
+
+# ---------- Cache ----------
+
+class DatasetCache:
+    """
+    FinLab datasets keyed by (name, last trading date)
+
+    Args:
+        loader: Fetches a dataset by name on a miss (e.g. finlab.data.get)
+        backend: Shared backend (ArrowFileBackend / RedisBackend); None = in-process only
+        trading_date: Returns the current last trading date (default: last_trading_date())
+        local: In-process LRU in front of the backend
+        now: Current time (default: now, Asia/Taipei); decides the settle window
+        settle_minutes: Window after the rollover in which stale fetches are re-checked (0 = off)
+        recheck_seconds: How long such a provisional fetch is served before fetching again
+    """
+
+    def __init__(self, loader: Callable[[str], Any], backend=None,
+                 trading_date: Optional[Callable[[], date]] = None,
+                 local: Optional[LRUBackend] = None,
+                 now: Optional[Callable[[], datetime]] = None,
+                 settle_minutes: Optional[int] = None,
+                 recheck_seconds: Optional[float] = None):
+        self.loader = loader
+        self.backend = backend
+        self.trading_date = trading_date or last_trading_date
+        self.local = local or LRUBackend()
+        self.now = now or (lambda: datetime.now(TAIPEI))
+        self.settle_minutes = settle_minutes if settle_minutes is not None else int(
+            os.getenv("FINLAB_CACHE_SETTLE_MINUTES", DEFAULT_SETTLE_MINUTES))
+        self.recheck_seconds = recheck_seconds if recheck_seconds is not None else float(
+            os.getenv("FINLAB_CACHE_RECHECK_SECONDS", DEFAULT_RECHECK_SECONDS))
+        self._recheck_at: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._stats = {'local_hits': 0, 'backend_hits': 0, 'loads': 0, 'load_seconds': 0.0, 'backend_errors': 0,
+                       'provisional': 0}
+
+    def key(self, name: str) -> str:
+        return f"{name}@{self.trading_date().isoformat()}"
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, name: str, writable: bool = False):
+        """
+        Dataset for the current trading date
+
+        The frame is shared with every other caller and, with the arrow backend, backed by
+        a read-only memory map (in-place writes raise ValueError). Pass writable=True for a
+        private copy that can be modified.
+        """
+        df = self._get(name)
+        return df.copy() if writable else df
+
+    def _get(self, name: str):
+        key = self.key(name)
+        df = self._local_get(key)
+        if df is not None:
+            self._stats['local_hits'] += 1
+            return df
+
+        # One load per key per process; other threads wait for it
+        with self._lock_for(key):
+            df = self._local_get(key)
+            if df is not None:
+                self._stats['local_hits'] += 1
+                return df
+
+            df = self._from_backend(key)
+            if df is None:
+                df = self._load(name, key)
+            self.local.put(key, df)
+            self.local.discard_dataset(name, key)
+        return df
+
+    def _local_get(self, key: str):
+        recheck_at = self._recheck_at.get(key)
+        if recheck_at is not None:
+            if time.monotonic() < recheck_at:
+                return self.local.get(key)
+            self._recheck_at.pop(key, None)
+            self.local.discard(key)
+            return None
+        return self.local.get(key)
+
+    def _provisional(self, key: str, df) -> bool:
+        """
+        A fetch made shortly after the rollover whose data does not reach the new trading
+        date yet (FinLab has not published today's session)
+        """
+        if self.settle_minutes <= 0:
+            return False
+        trading_day = date.fromisoformat(key.rpartition('@')[2])
+        now = self.now().astimezone(TAIPEI)
+        if now.date() != trading_day:
+            return False
+        settled_at = datetime.combine(trading_day, datetime.min.time(), TAIPEI) + timedelta(
+            hours=default_rollover_hour(), minutes=self.settle_minutes)
+        return now < settled_at and not reaches(df, trading_day)
+
+    def _from_backend(self, key: str, count_hit: bool = True):
+        if self.backend is None:
+            return None
+        try:
+            df = self.backend.get(key)
+        except Exception as e:
+            self._stats['backend_errors'] += 1
+            logger.warning(f"FinLab cache backend read failed ({self.backend.name}, {key}): {e}")
+            return None
+        if df is not None and count_hit:
+            self._stats['backend_hits'] += 1
+        return df
+
+    def _load(self, name: str, key: str):
+        if self.backend is None:
+            return self._fetch(name, key)
+
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(self.backend.loading(key))
+            except Exception as e:
+                logger.warning(f"FinLab cache lock unavailable ({self.backend.name}, {key}): {e}")
+
+            # Another process may have written it while we waited for the lock
+            df = self._from_backend(key)
+            if df is not None:
+                return df
+            df = self._fetch(name, key)
+            if key in self._recheck_at:
+                # Provisional: keep it out of the shared backend so other services fetch again too
+                return df
+            try:
+                self.backend.put(key, df)
+            except Exception as e:
+                self._stats['backend_errors'] += 1
+                logger.warning(f"FinLab cache backend write failed ({self.backend.name}, {key}): {e}")
+                return df
+        # Serve the shared copy so this process maps the same pages as the others
+        shared = self._from_backend(key, count_hit=False)
+        return shared if shared is not None else df
+
+    def _fetch(self, name: str, key: str):
+        start = time.perf_counter()
+        df = self.loader(name)
+        elapsed = time.perf_counter() - start
+        self._stats['loads'] += 1
+        self._stats['load_seconds'] = round(self._stats['load_seconds'] + elapsed, 3)
+        logger.info(f"FinLab dataset loaded: {key} in {elapsed:.1f}s ({frame_nbytes(df) / 1e6:.0f} MB)")
+        if self._provisional(key, df):
+            self._stats['provisional'] += 1
+            self._recheck_at[key] = time.monotonic() + self.recheck_seconds
+            logger.info(f"FinLab dataset {key} does not reach its trading date yet; fetching again in {self.recheck_seconds:.0f}s")
+        return df
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'backend': self.backend.name if self.backend else 'lru',
+            'backend_stats': self.backend.stats() if self.backend else None,
+            'local': self.local.stats(),
+            'trading_date': self.trading_date().isoformat(),
+        }
+
+
+class CachedFinlabData:
+    """
+    Drop-in for `from finlab import data`: data.get(name) goes through a DatasetCache,
+    everything else (and get() with extra arguments) is passed to the real module
+    """
+
+    def __init__(self, module, backend=None, trading_date: Optional[Callable[[], date]] = None):
+        self._module = module
+        self.cache = DatasetCache(
+            loader=lambda name: module.get(name),
+            backend=backend if backend is not None else create_backend(),
+            trading_date=trading_date,
+        )
+
+    def get(self, name: str, *args, writable: bool = False, **kwargs):
+        """
+        Cached dataset; the frame is shared and may be read-only (arrow backend), so pass
+        writable=True before modifying it in place
+        """
+        if args or kwargs:
+            return self._module.get(name, *args, **kwargs)
+        return self.cache.get(name, writable=writable)
+
+    def __getattr__(self, attr: str):
+        return getattr(self._module, attr)
@@ -0,0 +1,163 @@
+"""
+Frame Response - Content negotiation for bulk DataFrame responses (OHLC bars and the like)
+
+Formats, chosen by the `format` query parameter or the Accept header:
+    records  application/json                      [{"date": ..., "open": ...}, ...] (default)
+    columns  application/vnd.finlab.columns+json   {"dates": [...], "open": [...], ...} via orjson
+    arrow    application/vnd.apache.arrow.stream   Arrow IPC stream (pyarrow)
+
+The columnar shapes encode each column as one array instead of one dict per row, so a
+year of daily bars for many stocks is serialized without building Python objects per value.
+
+    fmt = negotiate_format(request.headers.get('accept'), format)
+    return frame_response(ohlcv_df, fmt)
+"""
+
+import json
+from typing import Optional, Dict, Any, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+FORMAT_RECORDS = 'records'
+FORMAT_COLUMNS = 'columns'
+FORMAT_ARROW = 'arrow'
+
+MEDIA_TYPES = {
+    FORMAT_RECORDS: 'application/json',
+    FORMAT_COLUMNS: 'application/vnd.finlab.columns+json',
+    FORMAT_ARROW: 'application/vnd.apache.arrow.stream',
+}
+_FORMATS_BY_MEDIA_TYPE = {media_type: fmt for fmt, media_type in MEDIA_TYPES.items()}
+
+DATES_KEY = 'dates'
+
+
+def negotiate_format(accept: Optional[str] = None, requested: Optional[str] = None) -> str:
+    """
+    Pick the response format: an explicit `format` parameter wins, then the Accept header
+    (highest q first), then records
+
+    Raises:
+        ValueError: unknown `format` value
+    """
+    if requested:
+        fmt = requested.strip().lower()
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported format: {requested} (expected one of {', '.join(MEDIA_TYPES)})")
+        return fmt
+
+    candidates = []
+    for position, part in enumerate((accept or '').split(',')):
+        media_type, *params = [piece.strip() for piece in part.split(';')]
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if media_type in _FORMATS_BY_MEDIA_TYPE and quality > 0:
+            candidates.append((-quality, position, _FORMATS_BY_MEDIA_TYPE[media_type]))
+    return min(candidates)[2] if candidates else FORMAT_RECORDS
+
+
+def frame_to_records(df) -> List[Dict[str, Any]]:
+    """Row dicts, dates as ISO strings (the existing /get_ohlc shape)"""
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def frame_to_columns(df, date_column: str = 'date') -> Dict[str, Any]:
+    """{"dates": ["YYYY-MM-DD", ...], column: ndarray, ...}; NaN is encoded as null"""
+    import numpy as np
+
+    columns: Dict[str, Any] = {}
+    if date_column in df.columns:
+        dates = df[date_column]
+        if np.issubdtype(dates.dtype, np.datetime64):
+            columns[DATES_KEY] = np.datetime_as_string(dates.to_numpy(dtype='datetime64[ns]'), unit='D').tolist()
+        else:
+            columns[DATES_KEY] = dates.astype(str).tolist()
+    for column in df.columns:
+        if column == date_column:
+            continue
+        values = df[column].to_numpy()
+        columns[str(column)] = np.ascontiguousarray(values) if values.dtype.kind in 'iufb' else values.tolist()
+    return columns
+
+
+def encode_columns(columns: Dict[str, Any]) -> bytes:
+    """Serialize frame_to_columns output (orjson with numpy support; json fallback)"""
+    try:
+        import orjson
+    except ImportError:
+        return _encode_columns_json(columns)
+    return orjson.dumps(columns, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _encode_columns_json(columns: Dict[str, Any]) -> bytes:
+    import numpy as np
+
+    converted = {}
+    for key, value in columns.items():
+        if hasattr(value, 'dtype') and value.dtype.kind == 'f':
+            converted[key] = np.where(np.isnan(value), None, value).tolist()
+        else:
+            converted[key] = value.tolist() if hasattr(value, 'tolist') else value
+    return json.dumps(converted, ensure_ascii=False).encode('utf-8')
+
+
+def frame_to_arrow(df) -> bytes:
+    """Arrow IPC stream of the frame's columns (index dropped)"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def arrow_to_frame(payload: bytes):
+    """Arrow IPC stream (frame_to_arrow, or any client's) -> DataFrame"""
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(pa.py_buffer(payload)).read_all().to_pandas()
+
+
+def columns_to_frame(columns: Dict[str, Any], date_column: str = 'date'):
+    """{"dates": [...], column: [...]} -> DataFrame with a datetime `date_column`"""
+    import pandas as pd
+
+    columns = dict(columns)
+    dates = columns.pop(DATES_KEY, None)
+    df = pd.DataFrame(columns)
+    if dates is not None:
+        df.insert(0, date_column, pd.to_datetime(dates))
+    return df
+
+
+def encode_frame(df, fmt: str, date_column: str = 'date') -> bytes:
+    """DataFrame -> response body bytes in the negotiated format"""
+    if fmt == FORMAT_ARROW:
+        return frame_to_arrow(df)
+    if fmt == FORMAT_COLUMNS:
+        return encode_columns(frame_to_columns(df, date_column))
+    return json.dumps(frame_to_records(df), ensure_ascii=False).encode('utf-8')
+
+
+def frame_response(df, fmt: str, date_column: str = 'date'):
+    """
+    Starlette/FastAPI response for the negotiated format; records are returned as the
+    plain list so the endpoint keeps its current behaviour
+    """
+    if fmt == FORMAT_RECORDS:
+        return frame_to_records(df)
+
+    from starlette.responses import Response
+
+    return Response(
+        content=encode_frame(df, fmt, date_column),
+        media_type=MEDIA_TYPES[fmt],
+        headers={'Vary': 'Accept'},
+    )
@@ -0,0 +1,257 @@
+"""
+Revenue / Fundamentals Dataset - Monthly revenue and financial-statement datasets loaded
+once per publication and served as aligned arrays
+
+Listed companies file monthly revenue by the 10th of the following month and quarterly
+reports by fixed deadlines (3/31, 5/15, 8/14, 11/14). Inside a filing window FinLab
+publishes new rows every day, so the data version is the day; outside it nothing new
+arrives, so the version stays at the window's close until the next window opens. A
+process therefore loads the eight monthly_revenue datasets (and the fundamentals)
+about a dozen times a month instead of on every request.
+
+Each version is kept as a snapshot: every dataset reindexed onto one shared date index
+and stock columns and held as a float matrix, so a request for many stocks and periods
+is a column slice plus a few array operations.
+
+    revenue = get_fundamentals_dataset().revenue()
+    rows = revenue.tail(['2330', '2317'], periods=3)
+"""
+
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, Callable, Iterable, List, Tuple
+import logging
+
+from .finlab_cache import TAIPEI, DEFAULT_ROLLOVER_HOUR, DatasetCache, create_backend
+
+logger = logging.getLogger(__name__)
+
+# Field name -> FinLab dataset; the first field anchors the periods of a snapshot
+REVENUE_DATASETS = {
+    'current_revenue': 'monthly_revenue:當月營收',
+    'previous_revenue': 'monthly_revenue:上月營收',
+    'last_year_revenue': 'monthly_revenue:去年當月營收',
+    'mom_change': 'monthly_revenue:上月比較增減(%)',
+    'yoy_change': 'monthly_revenue:去年同月增減(%)',
+    'cumulative_revenue': 'monthly_revenue:當月累計營收',
+    'last_year_cumulative': 'monthly_revenue:去年累計營收',
+    'period_change': 'monthly_revenue:前期比較增減(%)',
+}
+
+FUNDAMENTAL_DATASETS = {
+    'operating_profit': 'fundamental_features:營業利益',
+    'operating_margin': 'fundamental_features:營業利益率',
+    'roe': 'fundamental_features:ROE稅後',
+}
+
+# Last day of the month by which monthly revenue must be filed
+DEFAULT_REVENUE_PUBLICATION_DAY = 10
+
+# (month, day) filing deadlines of annual / Q1 / Q2 / Q3 reports; each window opens on the 1st
+QUARTERLY_REPORT_DEADLINES = ((3, 31), (5, 15), (8, 14), (11, 14))
+
+
+def _data_day(now: Optional[datetime], rollover_hour: Optional[int]) -> date:
+    """Latest day whose evening publication has happened"""
+    now = (now or datetime.now(TAIPEI)).astimezone(TAIPEI)
+    if rollover_hour is None:
+        rollover_hour = int(os.getenv("FINLAB_CACHE_ROLLOVER_HOUR", DEFAULT_ROLLOVER_HOUR))
+    day = now.date()
+    if now.hour < rollover_hour:
+        day -= timedelta(days=1)
+    return day
+
+
+def revenue_data_version(now: Optional[datetime] = None, publication_day: Optional[int] = None,
+                         rollover_hour: Optional[int] = None) -> date:
+    """
+    Version of the monthly revenue data: the day itself while filings come in (1st to the
+    publication day, MONTHLY_REVENUE_PUBLICATION_DAY), otherwise the publication day of the month
+    """
+    if publication_day is None:
+        publication_day = int(os.getenv("MONTHLY_REVENUE_PUBLICATION_DAY", DEFAULT_REVENUE_PUBLICATION_DAY))
+    day = _data_day(now, rollover_hour)
+    if day.day <= publication_day:
+        return day
+    return day.replace(day=publication_day)
+
+
+def fundamental_data_version(now: Optional[datetime] = None, rollover_hour: Optional[int] = None) -> date:
+    """Version of the financial-statement data: the day inside a filing window, else the last deadline"""
+    day = _data_day(now, rollover_hour)
+    for year in (day.year, day.year - 1):
+        for month, deadline_day in reversed(QUARTERLY_REPORT_DEADLINES):
+            deadline = date(year, month, deadline_day)
+            if deadline.replace(day=1) <= day <= deadline:
+                return day
+            if deadline < day:
+                return deadline
+    return day
+
+
+class DatasetSnapshot:
+    """
+    One version of a group of datasets aligned on the anchor dataset's dates and stocks
+
+    Args:
+        frames: Field -> DataFrame (dates x stock ids); the first field is the anchor
+        version: Data version the frames were loaded for
+    """
+
+    def __init__(self, frames: Dict[str, Any], version: date):
+        import numpy as np
+
+        anchor = next(iter(frames.values()))
+        self.version = version
+        self.fields = list(frames)
+        self.index = anchor.index
+        self.columns = [str(column) for column in anchor.columns]
+        self._positions = {column: position for position, column in enumerate(self.columns)}
+        self.arrays = {
+            field: frame.reindex(index=anchor.index, columns=anchor.columns).to_numpy(dtype=np.float64, na_value=np.nan)
+            for field, frame in frames.items()
+        }
+        self.loaded_at = time.time()
+
+    def __contains__(self, stock_id: str) -> bool:
+        return str(stock_id) in self._positions
+
+    def positions(self, stock_ids: Iterable[str]) -> Tuple[List[str], List[int], List[str]]:
+        """(found stock ids, their column positions, unknown stock ids)"""
+        found, positions, missing = [], [], []
+        for stock_id in stock_ids:
+            position = self._positions.get(str(stock_id))
+            if position is None:
+                missing.append(str(stock_id))
+            else:
+                found.append(str(stock_id))
+                positions.append(position)
+        return found, positions, missing
+
+    def tail(self, stock_ids: Iterable[str], periods: int,
+             fields: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Latest `periods` periods per stock (newest first), counting the periods in which the
+        anchor field has a value: {stock_id: [{'period': ..., field: value, ...}, ...]}
+        """
+        import numpy as np
+
+        fields = fields or self.fields
+        stocks, positions, _ = self.positions(stock_ids)
+        result: Dict[str, List[Dict[str, Any]]] = {stock_id: [] for stock_id in stocks}
+        if not stocks or periods <= 0:
+            return result
+
+        valid = ~np.isnan(self.arrays[self.fields[0]][:, positions])
+        # Valid periods at or after each row, counted from the end
+        remaining = np.cumsum(valid[::-1], axis=0)[::-1]
+        rows, columns = np.nonzero(valid & (remaining <= periods))
+        order = np.lexsort((-rows, columns))
+        rows, columns = rows[order], columns[order]
+        values = {field: self.arrays[field][:, positions][rows, columns] for field in fields}
+
+        for i, (row, column) in enumerate(zip(rows.tolist(), columns.tolist())):
+            record = {'period': self.index[row]}
+            for field in fields:
+                value = values[field][i]
+                record[field] = None if np.isnan(value) else float(value)
+            result[stocks[column]].append(record)
+        return result
+
+    def latest(self, stock_ids: Iterable[str], fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Last available value of each field per stock (each field on its own latest period)"""
+        import numpy as np
+
+        fields = fields or self.fields
+        stocks, positions, _ = self.positions(stock_ids)
+        result: Dict[str, Dict[str, Any]] = {stock_id: {} for stock_id in stocks}
+        if not stocks:
+            return result
+
+        for field in fields:
+            block = self.arrays[field][:, positions]
+            valid = ~np.isnan(block)
+            has_value = valid.any(axis=0)
+            last_row = block.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+            last_values = block[last_row, np.arange(len(positions))]
+            for column, stock_id in enumerate(stocks):
+                result[stock_id][field] = float(last_values[column]) if has_value[column] else None
+        return result
+
+
+class FundamentalsDataset:
+    """
+    Process-level holder of the revenue and fundamentals snapshots
+
+    Args:
+        loader: Fetches a dataset by name (e.g. finlab.data.get)
+        backend: Shared finlab_cache backend (default: FINLAB_CACHE_BACKEND)
+        revenue_version / fundamental_version: Data version callables (default: the filing schedules)
+    """
+
+    def __init__(self, loader: Callable[[str], Any], backend=None,
+                 revenue_version: Optional[Callable[[], date]] = None,
+                 fundamental_version: Optional[Callable[[], date]] = None):
+        self._groups = {
+            'revenue': (REVENUE_DATASETS, revenue_version or revenue_data_version),
+            'fundamental': (FUNDAMENTAL_DATASETS, fundamental_version or fundamental_data_version),
+        }
+        self._caches = {
+            # Versions are publication days, not trading dates: no post-rollover freshness check
+            group: DatasetCache(loader, backend=backend, trading_date=version, settle_minutes=0)
+            for group, (_, version) in self._groups.items()
+        }
+        self._snapshots: Dict[str, DatasetSnapshot] = {}
+        self._lock = threading.Lock()
+        self._stats = {'builds': 0, 'hits': 0}
+
+    def revenue(self) -> DatasetSnapshot:
+        return self._snapshot('revenue')
+
+    def fundamentals(self) -> DatasetSnapshot:
+        return self._snapshot('fundamental')
+
+    def _snapshot(self, group: str) -> DatasetSnapshot:
+        datasets, version_of = self._groups[group]
+        version = version_of()
+        snapshot = self._snapshots.get(group)
+        if snapshot is not None and snapshot.version == version:
+            self._stats['hits'] += 1
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshots.get(group)
+            if snapshot is not None and snapshot.version == version:
+                self._stats['hits'] += 1
+                return snapshot
+            cache = self._caches[group]
+            frames = {field: cache.get(name) for field, name in datasets.items()}
+            snapshot = DatasetSnapshot(frames, version)
+            self._snapshots[group] = snapshot
+            self._stats['builds'] += 1
+        logger.info(f"{group} snapshot ready: version {version}, "
+                    f"{len(snapshot.index)} periods x {len(snapshot.columns)} stocks")
+        return snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'versions': {group: snapshot.version.isoformat() for group, snapshot in self._snapshots.items()},
+            'cache': {group: cache.get_stats() for group, cache in self._caches.items()},
+        }
+
+
+_dataset: Optional[FundamentalsDataset] = None
+_dataset_lock = threading.Lock()
+
+
+def get_fundamentals_dataset() -> FundamentalsDataset:
+    """Process-wide holder backed by finlab.data"""
+    global _dataset
+    with _dataset_lock:
+        if _dataset is None:
+            from finlab import data as finlab_data
+            _dataset = FundamentalsDataset(lambda name: finlab_data.get(name), backend=create_backend())
+        return _dataset
@@ -0,0 +1,436 @@
+"""
+Schedule Dispatcher - Run schedule_tasks at their next_run without polling the table
+Active schedules are loaded once into a min-heap keyed by next_run; a trigger on
+schedule_tasks sends NOTIFY on every insert / delete / status or next_run change,
+which updates the heap. The dispatcher sleeps until the earliest next_run (or a
+notification) and claims the due row with SELECT ... FOR UPDATE SKIP LOCKED,
+advancing next_run in the same transaction, so only one replica runs each slot.
+
+next_run is stored as naive Asia/Taipei wall time (timestamp without time zone).
+unified-api and posting-service share schedule_tasks but execute schedules differently,
+so exactly one of them runs the dispatcher: the one named by SCHEDULE_DISPATCHER_SERVICE
+(default unified-api). The other service only edits schedules.
+
+    dispatcher = ScheduleDispatcher(connect, next_run_for=..., execute=...)
+    asyncio.create_task(dispatcher.run())
+"""
+
+import asyncio
+import heapq
+import json
+import os
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable, Set
+import logging
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'schedule_tasks_changed'
+
+# Serializes trigger installation between replicas and services (unified-api's migration lock + 10)
+TRIGGER_LOCK_KEY = 7_324_011
+
+# Service that owns schedule execution; every other service leaves the dispatcher off
+DISPATCHER_SERVICE_ENV = 'SCHEDULE_DISPATCHER_SERVICE'
+DEFAULT_DISPATCHER_SERVICE = 'unified-api'
+
+DEFAULT_STALE_AFTER_SECONDS = 60
+DEFAULT_MAX_SLEEP_SECONDS = 3600
+RECONNECT_DELAY_SECONDS = 30
+
+def dispatcher_service() -> str:
+    """Name of the service that runs the dispatcher (SCHEDULE_DISPATCHER_SERVICE, default unified-api)"""
+    return (os.getenv(DISPATCHER_SERVICE_ENV) or DEFAULT_DISPATCHER_SERVICE).strip()
+
+
+def dispatcher_enabled(service_name: str) -> bool:
+    """Whether service_name should run the dispatcher; True for exactly one service"""
+    return dispatcher_service() == service_name
+
+
+NOTIFY_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION schedule_tasks_notify() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        r := OLD;
+    ELSE
+        r := NEW;
+    END IF;
+    PERFORM pg_notify('{NOTIFY_CHANNEL}', json_build_object(
+        'schedule_id', r.schedule_id,
+        'status', CASE WHEN TG_OP = 'DELETE' THEN 'deleted' ELSE r.status END,
+        'next_run', r.next_run
+    )::text);
+    RETURN NULL;
+END;
+$$;
+"""
+
+CREATE_TRIGGER_SQL = """
+CREATE TRIGGER schedule_tasks_notify
+    AFTER INSERT OR DELETE OR UPDATE OF status, next_run ON schedule_tasks
+    FOR EACH ROW EXECUTE PROCEDURE schedule_tasks_notify()
+"""
+
+
+def install_notify_trigger(conn):
+    """Create the NOTIFY trigger on schedule_tasks (idempotent)"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (TRIGGER_LOCK_KEY,))
+            cursor.execute(NOTIFY_TRIGGER_SQL)
+            cursor.execute("""
+                SELECT 1 FROM pg_trigger
+                WHERE tgrelid = to_regclass('schedule_tasks') AND tgname = 'schedule_tasks_notify'
+            """)
+            if cursor.fetchone() is None:
+                cursor.execute(CREATE_TRIGGER_SQL)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+class ScheduleDispatcher:
+    """
+    Event-driven runner for schedule_tasks
+
+    Args:
+        connect: Returns a new psycopg2 connection (the dispatcher keeps two: LISTEN and claims)
+        next_run_for: (schedule row, now) -> next run after this one (None stops the schedule)
+        execute: Coroutine run for every claimed schedule (in its own task)
+        timezone: Zone of the stored naive next_run values
+        stale_after_seconds: A slot older than this when claimed is skipped (next_run
+            is advanced without executing), e.g. slots missed while no replica was up
+        initialize_missing: Give active schedules without next_run one via next_run_for
+    """
+
+    def __init__(self,
+                 connect: Callable[[], Any],
+                 next_run_for: Callable[[Dict[str, Any], datetime], Optional[datetime]],
+                 execute: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 timezone: str = 'Asia/Taipei',
+                 stale_after_seconds: float = DEFAULT_STALE_AFTER_SECONDS,
+                 max_sleep_seconds: float = DEFAULT_MAX_SLEEP_SECONDS,
+                 initialize_missing: bool = False):
+        self._connect = connect
+        self._next_run_for = next_run_for
+        self._execute = execute
+        self.tz = pytz.timezone(timezone)
+        self.stale_after_seconds = stale_after_seconds
+        self.max_sleep_seconds = max_sleep_seconds
+        self.initialize_missing = initialize_missing
+
+        self._heap: List[Tuple[datetime, str]] = []
+        self._next_runs: Dict[str, datetime] = {}
+        self._needs_next_run: Set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._listen_conn = None
+        self._work_conn = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = False
+        self._executions: Set[asyncio.Task] = set()
+        self._stats = {'loads': 0, 'notifications': 0, 'claimed': 0, 'skipped_stale': 0,
+                       'lost_to_other_replica': 0, 'executed': 0, 'failed': 0}
+
+    # ---------- time ----------
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz).replace(tzinfo=None)
+
+    def _naive(self, value: Optional[datetime]) -> Optional[datetime]:
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(self.tz).replace(tzinfo=None)
+
+    # ---------- heap ----------
+
+    def _set_next_run(self, schedule_id: str, next_run: Optional[datetime]):
+        if next_run is None:
+            self._next_runs.pop(schedule_id, None)
+            return
+        if self._next_runs.get(schedule_id) == next_run:
+            return
+        self._next_runs[schedule_id] = next_run
+        heapq.heappush(self._heap, (next_run, schedule_id))
+
+    def _peek(self) -> Optional[Tuple[datetime, str]]:
+        # Entries superseded by a newer next_run (or a removed schedule) are dropped lazily
+        while self._heap:
+            next_run, schedule_id = self._heap[0]
+            if self._next_runs.get(schedule_id) == next_run:
+                return next_run, schedule_id
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now: datetime) -> List[str]:
+        due = []
+        while True:
+            head = self._peek()
+            if head is None or head[0] > now:
+                return due
+            heapq.heappop(self._heap)
+            del self._next_runs[head[1]]
+            due.append(head[1])
+
+    # ---------- database (worker thread) ----------
+
+    def _work_connection(self):
+        if self._work_conn is None or self._work_conn.closed:
+            self._work_conn = self._connect()
+        return self._work_conn
+
+    def _load(self) -> Tuple[Dict[str, datetime], List[str]]:
+        conn = self._work_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT schedule_id, next_run FROM schedule_tasks WHERE status = 'active'")
+                rows = cursor.fetchall()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        scheduled = {row[0]: row[1] for row in rows if row[1] is not None}
+        missing = [row[0] for row in rows if row[1] is None]
+        return scheduled, missing
+
+    def _assign_missing(self, schedule_ids: List[str]):
+        from psycopg2.extras import RealDictCursor
+
+        conn = self._work_connection()
+        now = self.now()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                for schedule_id in schedule_ids:
+                    cursor.execute("""
+                        SELECT * FROM schedule_tasks
+                        WHERE schedule_id = %s AND status = 'active' AND next_run IS NULL
+                        FOR UPDATE SKIP LOCKED
+                    """, (schedule_id,))
+                    row = cursor.fetchone()
+                    if row is None:
+                        continue
+                    next_run = self._naive(self._next_run_for(dict(row), now))
+                    if next_run is not None:
+                        cursor.execute(
+                            "UPDATE schedule_tasks SET next_run = %s, updated_at = NOW() WHERE schedule_id = %s",
+                            (next_run, schedule_id)
+                        )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _claim(self, schedule_id: str, now: datetime) -> Tuple[Optional[Dict[str, Any]], bool, Optional[datetime]]:
+        """Lock the due row, advance next_run and return (row, stale, new next_run); row is None if not ours"""
+        from psycopg2.extras import RealDictCursor
+
+        conn = self._work_connection()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("""
+                    SELECT * FROM schedule_tasks
+                    WHERE schedule_id = %s AND status = 'active'
+                      AND next_run IS NOT NULL AND next_run <= %s
+                    FOR UPDATE SKIP LOCKED
+                """, (schedule_id, now))
+                row = cursor.fetchone()
+                if row is None:
+                    conn.rollback()
+                    return None, False, None
+
+                row = dict(row)
+                stale = (now - row['next_run']).total_seconds() > self.stale_after_seconds
+                next_run = self._naive(self._next_run_for(row, now))
+                cursor.execute(
+                    "UPDATE schedule_tasks SET next_run = %s, updated_at = NOW() WHERE schedule_id = %s",
+                    (next_run, schedule_id)
+                )
+            conn.commit()
+            return row, stale, next_run
+        except Exception:
+            conn.rollback()
+            raise
+
+    # ---------- LISTEN ----------
+
+    def _listen(self):
+        conn = self._connect()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        return conn
+
+    def _on_notify_readable(self):
+        conn = self._listen_conn
+        try:
+            conn.poll()
+        except Exception as e:
+            logger.warning(f"Schedule dispatcher LISTEN connection lost: {e}")
+            self._drop_listen_connection()
+            self._wake.set()
+            return
+
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            self._stats['notifications'] += 1
+            try:
+                payload = json.loads(notify.payload)
+            except ValueError:
+                continue
+            schedule_id = payload.get('schedule_id')
+            next_run = payload.get('next_run')
+            if payload.get('status') != 'active':
+                self._set_next_run(schedule_id, None)
+            elif next_run:
+                self._set_next_run(schedule_id, datetime.fromisoformat(next_run))
+            else:
+                self._set_next_run(schedule_id, None)
+                if self.initialize_missing:
+                    self._needs_next_run.add(schedule_id)
+        self._wake.set()
+
+    def _drop_listen_connection(self):
+        if self._listen_conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._listen_conn.fileno())
+        except Exception:
+            pass
+        try:
+            self._listen_conn.close()
+        except Exception:
+            pass
+        self._listen_conn = None
+
+    async def _connect_and_load(self):
+        """(Re)open the LISTEN connection, then rebuild the heap from the table"""
+        await asyncio.to_thread(install_notify_trigger, self._work_connection())
+        # LISTEN before loading so no change between the two is missed
+        self._listen_conn = await asyncio.to_thread(self._listen)
+        self._loop.add_reader(self._listen_conn.fileno(), self._on_notify_readable)
+
+        scheduled, missing = await asyncio.to_thread(self._load)
+        self._heap = []
+        self._next_runs = {}
+        for schedule_id, next_run in scheduled.items():
+            self._set_next_run(schedule_id, next_run)
+        if self.initialize_missing:
+            self._needs_next_run.update(missing)
+        self._stats['loads'] += 1
+        logger.info(f"Schedule dispatcher loaded {len(scheduled)} active schedules"
+                    + (f", {len(missing)} without next_run" if missing else ""))
+
+    # ---------- main loop ----------
+
+    async def run(self):
+        """Dispatch until stop() is called"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._running = True
+        try:
+            while self._running:
+                self._wake.clear()
+
+                if self._listen_conn is None:
+                    try:
+                        await self._connect_and_load()
+                    except Exception as e:
+                        logger.error(f"Schedule dispatcher could not connect: {e}")
+                        self._drop_listen_connection()
+                        await self._sleep(RECONNECT_DELAY_SECONDS)
+                        continue
+
+                if self._needs_next_run:
+                    pending, self._needs_next_run = list(self._needs_next_run), set()
+                    try:
+                        await asyncio.to_thread(self._assign_missing, pending)
+                    except Exception as e:
+                        logger.error(f"Schedule dispatcher could not assign next_run: {e}")
+
+                now = self.now()
+                for schedule_id in self._pop_due(now):
+                    await self._dispatch(schedule_id, now)
+
+                head = self._peek()
+                delay = self.max_sleep_seconds
+                if head is not None:
+                    delay = min(delay, max((head[0] - self.now()).total_seconds(), 0))
+                if delay > 0:
+                    await self._sleep(delay)
+        finally:
+            self._running = False
+            self._drop_listen_connection()
+            if self._work_conn is not None and not self._work_conn.closed:
+                self._work_conn.close()
+            self._work_conn = None
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch(self, schedule_id: str, now: datetime):
+        try:
+            row, stale, next_run = await asyncio.to_thread(self._claim, schedule_id, now)
+        except Exception as e:
+            logger.error(f"Schedule dispatcher failed to claim {schedule_id}: {e}")
+            # Connection problems: reconnect and reload everything on the next iteration
+            self._drop_listen_connection()
+            if self._work_conn is not None:
+                self._work_conn.close()
+            return
+
+        if row is None:
+            self._stats['lost_to_other_replica'] += 1
+            return
+        self._set_next_run(schedule_id, next_run)
+        if stale:
+            self._stats['skipped_stale'] += 1
+            logger.info(f"Schedule {schedule_id} missed its slot {row['next_run']}, next run {next_run}")
+            return
+
+        self._stats['claimed'] += 1
+        lag_ms = int((self.now() - row['next_run']).total_seconds() * 1000)
+        logger.info(f"Schedule {schedule_id} due {row['next_run']} claimed ({lag_ms} ms late), next run {next_run}")
+        task = asyncio.create_task(self._run_execution(row), name=f"schedule_{schedule_id}")
+        self._executions.add(task)
+        task.add_done_callback(self._executions.discard)
+
+    async def _run_execution(self, row: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            await self._execute(row)
+            self._stats['executed'] += 1
+        except Exception as e:
+            self._stats['failed'] += 1
+            logger.error(f"Schedule {row['schedule_id']} execution failed: {e}")
+        finally:
+            logger.info(f"Schedule {row['schedule_id']} finished in {time.perf_counter() - start:.1f}s")
+
+    def stop(self):
+        self._running = False
+        if self._wake is not None:
+            self._wake.set()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def get_stats(self) -> Dict[str, Any]:
+        head = self._peek()
+        return {
+            **self._stats,
+            'running': self._running,
+            'scheduled': len(self._next_runs),
+            'executing': len(self._executions),
+            'next_due': head[0].isoformat() if head else None,
+            'next_schedule_id': head[1] if head else None,
+        }
@@ -0,0 +1,251 @@
+"""
+Serper Client - Async Google search (serper.dev) shared by every service
+Pooled httpx connections, a SQLite query cache and request coalescing.
+
+Responses are cached per normalized query and time bucket: the bucket is the Taipei
+market date plus a slot of SERPER_CACHE_BUCKET_MINUTES (one hour by default), so the
+same "stock + 漲停" search is sent to Serper at most once per slot no matter how many
+flows, services or processes ask for it. Concurrent callers asking for a query that is
+already in flight await the same request instead of sending their own.
+
+    client = get_serper_client()
+    data = await client.search("台積電 2330 漲停 原因", num=5, tbs="qdr:d")
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Callable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+TAIPEI = timezone(timedelta(hours=8))
+
+SERPER_SEARCH_URL = "https://google.serper.dev/search"
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'serper_cache.sqlite3')
+DEFAULT_BUCKET_MINUTES = 60
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_TIMEOUT_SECONDS = 10
+DEFAULT_MAX_CONNECTIONS = 10
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """NFKC (full-width → half-width), lower case, single spaces"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', query or '')).strip().lower()
+
+
+def cache_bucket(now: Optional[datetime] = None, bucket_minutes: int = DEFAULT_BUCKET_MINUTES) -> str:
+    """Market date (Taipei) and time slot, e.g. '2025-07-04#13' for 13:00-13:59 with 60-minute slots"""
+    now = (now or datetime.now(TAIPEI)).astimezone(TAIPEI)
+    slot = (now.hour * 60 + now.minute) // max(bucket_minutes, 1)
+    return f"{now.date().isoformat()}#{slot}"
+
+
+class SerperCache:
+    """
+    SQLite response cache (safe to share between processes)
+
+    Args:
+        path: Database file (SERPER_CACHE_PATH; ':memory:' for a private cache)
+        retention_days: Rows older than this are removed when the cache is opened
+    """
+
+    def __init__(self, path: Optional[str] = None, retention_days: Optional[int] = None):
+        self.path = path or os.getenv('SERPER_CACHE_PATH', DEFAULT_CACHE_PATH)
+        if retention_days is None:
+            retention_days = int(os.getenv('SERPER_CACHE_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        if self.path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS serper_cache (
+                key TEXT PRIMARY KEY,
+                bucket TEXT NOT NULL,
+                query TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("DELETE FROM serper_cache WHERE created_at < ?",
+                           (time.time() - retention_days * 86400,))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM serper_cache WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, bucket: str, query: str, response: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO serper_cache (key, bucket, query, response, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, bucket, query, json.dumps(response, ensure_ascii=False), time.time())
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM serper_cache").fetchone()[0]
+        return {'path': self.path, 'entries': entries}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SerperClient:
+    """
+    Async Serper search client
+
+    Args:
+        api_key: Serper key (default: SERPER_API_KEY)
+        cache: Response cache (default: SerperCache at SERPER_CACHE_PATH; None disables caching)
+        bucket_minutes: Cache slot length (SERPER_CACHE_BUCKET_MINUTES)
+        url: Search endpoint
+        http_client: Returns the httpx.AsyncClient to send with (e.g. a service's pooled client);
+            by default the client keeps one AsyncClient per event loop
+        now: Clock used for the cache bucket (default: now, Asia/Taipei)
+    """
+
+    _DEFAULT_CACHE = object()
+
+    def __init__(self, api_key: Optional[str] = None, cache=_DEFAULT_CACHE,
+                 bucket_minutes: Optional[int] = None, url: str = SERPER_SEARCH_URL,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 http_client: Optional[Callable[[], Any]] = None, now: Optional[Callable[[], datetime]] = None):
+        self.api_key = api_key or os.getenv('SERPER_API_KEY')
+        self.cache = SerperCache() if cache is self._DEFAULT_CACHE else cache
+        if bucket_minutes is None:
+            bucket_minutes = int(os.getenv('SERPER_CACHE_BUCKET_MINUTES', DEFAULT_BUCKET_MINUTES))
+        self.bucket_minutes = bucket_minutes
+        self.url = url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.http_client = http_client
+        self._now = now
+        self._clients: Dict[int, Tuple[asyncio.AbstractEventLoop, Any]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'errors': 0}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def cache_key(self, query: str, bucket: Optional[str] = None, **params) -> str:
+        bucket = bucket or cache_bucket(self._now() if self._now else None, self.bucket_minutes)
+        payload = json.dumps({'q': normalize_query(query), **params}, sort_keys=True, ensure_ascii=False)
+        return f"{bucket}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+    def _client(self):
+        """httpx.AsyncClient for the running event loop (pooled connections cannot cross loops)"""
+        if self.http_client is not None:
+            return self.http_client()
+
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        owner, client = self._clients.get(id(loop), (None, None))
+        if owner is not loop or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections),
+                timeout=self.timeout
+            )
+            self._clients[id(loop)] = (loop, client)
+        return client
+
+    async def search(self, query: str, num: int = 10, gl: str = "tw", hl: str = "zh-tw",
+                     tbs: Optional[str] = None, use_cache: bool = True, **extra) -> Dict[str, Any]:
+        """
+        Run a Serper search; cached and coalesced per (normalized query, parameters, bucket)
+
+        Raises:
+            RuntimeError: SERPER_API_KEY is not set
+            httpx.HTTPError: the request failed (failures are not cached)
+        """
+        if not self.api_key:
+            raise RuntimeError("SERPER_API_KEY is not set")
+
+        params = {'num': num, 'gl': gl, 'hl': hl, **extra}
+        if tbs:
+            params['tbs'] = tbs
+        bucket = cache_bucket(self._now() if self._now else None, self.bucket_minutes)
+        key = self.cache_key(query, bucket=bucket, **params)
+
+        if use_cache and self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                self._stats['cache_hits'] += 1
+                return cached
+
+        loop = asyncio.get_running_loop()
+        future = self._inflight.get(key)
+        if future is not None and future.get_loop() is loop:
+            self._stats['coalesced'] += 1
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            data = await self._post({'q': query, **params})
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.put, key, bucket, normalize_query(query), data)
+            future.set_result(data)
+            return data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self._stats['errors'] += 1
+            future.set_exception(e)
+            # Only waiters see the exception; keep asyncio from reporting it as never retrieved
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self._stats['requests'] += 1
+        response = await self._client().post(
+            self.url, json=payload, headers={"X-API-KEY": self.api_key, "Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'inflight': len(self._inflight),
+            'bucket_minutes': self.bucket_minutes,
+            'cache': self.cache.stats() if self.cache is not None else None,
+        }
+
+    async def close(self):
+        """Close the client this instance created for the running event loop"""
+        loop = asyncio.get_running_loop()
+        owner, client = self._clients.get(id(loop), (None, None))
+        if owner is loop:
+            del self._clients[id(loop)]
+            await client.aclose()
+
+
+_client: Optional[SerperClient] = None
+
+
+def get_serper_client() -> SerperClient:
+    global _client
+    if _client is None:
+        _client = SerperClient()
+    return _client
@@ -0,0 +1,230 @@
+"""
+Sheets Append Writer - Batched values.append for Google Sheets shared by every service
+Rows appended by many callers within a short window are merged into one values.append
+call; the written position comes back in the API response and is kept in memory, so
+nobody reads the whole sheet back just to find the last row.
+
+    writer = get_append_writer(sheets_client, '貼文記錄表')
+    result = writer.append_rows([[post_id, kol_serial, content]])   # AppendResult(start_row, end_row)
+"""
+
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How long the first pending row waits for others before the batch is sent (seconds)
+DEFAULT_FLUSH_WINDOW = 0.5
+# Most rows written by a single API call
+DEFAULT_MAX_BATCH_ROWS = 500
+
+_UPDATED_RANGE = re.compile(r'!\$?[A-Z]+\$?(\d+)(?::\$?[A-Z]+\$?(\d+))?$')
+
+
+@dataclass
+class AppendResult:
+    """Rows written by one append (1-based, inclusive)"""
+    start_row: int
+    end_row: int
+
+
+def parse_updated_range(updated_range: str) -> Optional[Tuple[int, int]]:
+    """Parse updates.updatedRange of a values.append response, e.g. "'貼文記錄表'!A120:R125" -> (120, 125)"""
+    match = _UPDATED_RANGE.search(updated_range or '')
+    if not match:
+        return None
+    start = int(match.group(1))
+    return start, int(match.group(2) or start)
+
+
+class SheetsAppendWriter:
+    """
+    Batched appender for one worksheet (thread-safe; usable from sync and async callers)
+
+    Args:
+        sheets_client: GoogleSheetsClient, or anything with the same append_sheet() (FakeSheetsClient)
+        sheet_name: Worksheet name
+        flush_window: Seconds the first pending row waits before the batch is sent; None holds
+            rows until flush() is called or max_batch_rows are pending
+        max_batch_rows: Most rows written by a single API call
+    """
+
+    def __init__(self, sheets_client, sheet_name: str,
+                 flush_window: Optional[float] = DEFAULT_FLUSH_WINDOW,
+                 max_batch_rows: int = DEFAULT_MAX_BATCH_ROWS):
+        self.sheets_client = sheets_client
+        self.sheet_name = sheet_name
+        self.flush_window = flush_window
+        self.max_batch_rows = max_batch_rows
+
+        self._pending: List[Tuple[List[List[Any]], Future]] = []
+        self._pending_rows = 0
+        self._first_pending_at = 0.0
+        self._flush_requested = False
+        self._in_flight = 0
+        self._next_row: Optional[int] = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'appends': 0, 'rows': 0, 'api_calls': 0, 'errors': 0}
+
+    @property
+    def next_row(self) -> Optional[int]:
+        """Row the next append will be written to (None until something was written)"""
+        return self._next_row
+
+    def append(self, rows: List[List[Any]]) -> Future:
+        """
+        Queue rows for writing
+
+        Returns:
+            concurrent.futures.Future resolving to an AppendResult (or the write error)
+        """
+        future: Future = Future()
+        if not rows:
+            future.set_result(AppendResult(0, -1))
+            return future
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"SheetsAppendWriter({self.sheet_name}) is closed")
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append((rows, future))
+            self._pending_rows += len(rows)
+            self._stats['appends'] += 1
+            self._ensure_thread()
+            self._condition.notify_all()
+        return future
+
+    def append_rows(self, rows: List[List[Any]], timeout: Optional[float] = 60) -> AppendResult:
+        """Append and wait for the write"""
+        return self.append(rows).result(timeout)
+
+    async def append_rows_async(self, rows: List[List[Any]]) -> AppendResult:
+        """Append and wait for the write without blocking the event loop"""
+        return await asyncio.wrap_future(self.append(rows))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send the pending rows now and wait until they are written"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self._flush_requested = False
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """Write the remaining rows, then stop the background thread"""
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {**self._stats, 'pending_rows': self._pending_rows, 'next_row': self._next_row}
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name=f"sheets-append-{self.sheet_name}", daemon=True
+            )
+            self._thread.start()
+
+    def _take_batch(self) -> Optional[List[Tuple[List[List[Any]], Future]]]:
+        """Wait for the window to end (or max_batch_rows), then take one batch; called with the lock held"""
+        while not self._pending:
+            if self._closed:
+                return None
+            self._condition.wait()
+
+        while not self._closed and not self._flush_requested and self._pending_rows < self.max_batch_rows:
+            if self.flush_window is None:
+                self._condition.wait()
+                continue
+            remaining = self._first_pending_at + self.flush_window - time.monotonic()
+            if remaining <= 0:
+                break
+            self._condition.wait(remaining)
+
+        batch, rows = [], 0
+        while self._pending and (not batch or rows + len(self._pending[0][0]) <= self.max_batch_rows):
+            item = self._pending.pop(0)
+            batch.append(item)
+            rows += len(item[0])
+        self._pending_rows -= rows
+        self._first_pending_at = time.monotonic() if self._pending else 0.0
+        self._in_flight += 1
+        return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                self._write(batch)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+
+    def _write(self, batch: List[Tuple[List[List[Any]], Future]]):
+        values = [row for rows, _ in batch for row in rows]
+        try:
+            result = self.sheets_client.append_sheet(self.sheet_name, values)
+        except Exception as e:
+            with self._condition:
+                self._stats['errors'] += 1
+            logger.error(f"Batched append to {self.sheet_name} failed ({len(values)} rows): {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        written = parse_updated_range(((result or {}).get('updates') or {}).get('updatedRange', ''))
+        with self._condition:
+            self._stats['api_calls'] += 1
+            self._stats['rows'] += len(values)
+            if written:
+                start_row = written[0]
+            elif self._next_row is not None:
+                start_row = self._next_row
+            else:
+                start_row = 0  # Position unknown (no updatedRange in the response)
+            if start_row:
+                self._next_row = start_row + len(values)
+
+        logger.info(f"Appended {len(values)} rows to {self.sheet_name} ({len(batch)} callers, 1 API call)")
+        row = start_row
+        for rows, future in batch:
+            future.set_result(AppendResult(row, row + len(rows) - 1) if row else AppendResult(0, -1))
+            if row:
+                row += len(rows)
+
+
+_writers: Dict[Tuple[int, str], SheetsAppendWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_append_writer(sheets_client, sheet_name: str) -> SheetsAppendWriter:
+    """One writer per sheets_client and worksheet, so rows from different callers are merged"""
+    key = (id(sheets_client), sheet_name)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer.sheets_client is not sheets_client or writer._closed:
+            writer = SheetsAppendWriter(sheets_client, sheet_name)
+            _writers[key] = writer
+        return writer
@@ -0,0 +1,267 @@
+"""
+Trading Calendar - TWSE trading sessions derived from the FinLab price index
+Past sessions are the dates present in price:收盤價 (cached to a local file so cold
+starts do not need FinLab); days after the last known session fall back to
+Monday-Friday. Announced closures (typhoon days, holidays) and extra sessions come
+from the trading_calendar_overrides table (unified-api migrations/005_trading_calendar_overrides.sql)
+and win over both.
+
+unified-api refreshes the sessions from FinLab; posting-service has no FinLab access and
+relies on the cache file, weekdays and the overrides. Both dispatchers roll next_run
+forward with roll_forward() and skip runs with schedule_closure_reason().
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, List, Callable, Iterable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), f"trading_calendar.v{CACHE_VERSION}.json")
+
+# Overrides are re-read at most this often (they change when a closure is announced)
+OVERRIDES_TTL_SECONDS = 60
+
+# Guard against configurations that never reach a trading day
+MAX_LOOKAHEAD_DAYS = 60
+
+
+def get_cache_path() -> str:
+    """Session cache location (override with TRADING_CALENDAR_CACHE_PATH)"""
+    return os.getenv("TRADING_CALENDAR_CACHE_PATH", DEFAULT_CACHE_PATH)
+
+
+class TradingCalendar:
+    """
+    Which days the Taiwan stock exchange is open
+
+    Args:
+        overrides_loader: Returns {day: (is_open, reason)}; called at most every OVERRIDES_TTL_SECONDS
+        cache_path: Session cache file (default: TRADING_CALENDAR_CACHE_PATH / tempdir)
+    """
+
+    def __init__(self, overrides_loader: Optional[Callable[[], Dict[date, Tuple[bool, str]]]] = None,
+                 cache_path: Optional[str] = None):
+        self._overrides_loader = overrides_loader
+        self._cache_path = cache_path or get_cache_path()
+        self._sessions: frozenset = frozenset()
+        self._first_session: Optional[date] = None
+        self._last_session: Optional[date] = None
+        self._overrides: Dict[date, Tuple[bool, str]] = {}
+        self._overrides_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    # ---------- sessions ----------
+
+    def set_sessions(self, days: Iterable[date]):
+        sessions = frozenset(days)
+        with self._lock:
+            self._sessions = sessions
+            self._first_session = min(sessions) if sessions else None
+            self._last_session = max(sessions) if sessions else None
+
+    def refresh_from_index(self, index) -> int:
+        """
+        Rebuild sessions from a FinLab DatetimeIndex (e.g. data.get('price:收盤價').index)
+        and write the cache file
+
+        Returns:
+            Number of sessions
+        """
+        days = {ts.date() for ts in index}
+        self.set_sessions(days)
+        self.save_cache()
+        logger.info(f"Trading calendar refreshed: {len(days)} sessions, last {self._last_session}")
+        return len(days)
+
+    def load_cache(self) -> bool:
+        if not os.path.exists(self._cache_path):
+            return False
+        try:
+            with open(self._cache_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except Exception as e:
+            logger.warning(f"Trading calendar cache unreadable ({self._cache_path}): {e}")
+            return False
+        if payload.get('version') != CACHE_VERSION:
+            return False
+        self.set_sessions(date.fromisoformat(d) for d in payload.get('sessions', []))
+        logger.info(f"Trading calendar cache loaded: {len(self._sessions)} sessions, last {self._last_session}")
+        return True
+
+    def save_cache(self):
+        payload = {
+            'version': CACHE_VERSION,
+            'saved_at': datetime.utcnow().isoformat(),
+            'sessions': sorted(d.isoformat() for d in self._sessions),
+        }
+        directory = os.path.dirname(self._cache_path) or '.'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self._cache_path)
+        except Exception as e:
+            logger.warning(f"Trading calendar cache not written ({self._cache_path}): {e}")
+
+    # ---------- overrides ----------
+
+    def _current_overrides(self) -> Dict[date, Tuple[bool, str]]:
+        if self._overrides_loader and time.monotonic() - self._overrides_loaded_at > OVERRIDES_TTL_SECONDS:
+            try:
+                overrides = self._overrides_loader()
+                with self._lock:
+                    self._overrides = overrides
+                    self._overrides_loaded_at = time.monotonic()
+            except Exception as e:
+                # Keep the previous overrides; retry on the next call after the TTL
+                self._overrides_loaded_at = time.monotonic()
+                logger.warning(f"Trading calendar overrides not loaded: {e}")
+        return self._overrides
+
+    def invalidate_overrides(self):
+        self._overrides_loaded_at = 0.0
+
+    # ---------- queries ----------
+
+    def is_trading_day(self, day: date) -> bool:
+        if isinstance(day, datetime):
+            day = day.date()
+        override = self._current_overrides().get(day)
+        if override is not None:
+            return override[0]
+        if self._last_session is not None and self._first_session <= day <= self._last_session:
+            return day in self._sessions
+        return day.weekday() < 5
+
+    def closure_reason(self, day: date) -> Optional[str]:
+        """Why the market is closed on day (None when it is a trading day)"""
+        if self.is_trading_day(day):
+            return None
+        override = self._current_overrides().get(day)
+        if override is not None:
+            return override[1] or 'override'
+        return 'weekend' if day.weekday() >= 5 else 'holiday'
+
+    def next_trading_day(self, day: date, inclusive: bool = True) -> date:
+        """First trading day on or after day (after day when inclusive=False)"""
+        candidate = day if inclusive else day + timedelta(days=1)
+        for _ in range(MAX_LOOKAHEAD_DAYS):
+            if self.is_trading_day(candidate):
+                return candidate
+            candidate += timedelta(days=1)
+        raise ValueError(f"No trading day within {MAX_LOOKAHEAD_DAYS} days after {day}")
+
+    def previous_trading_day(self, day: date, inclusive: bool = False) -> date:
+        candidate = day if inclusive else day - timedelta(days=1)
+        for _ in range(MAX_LOOKAHEAD_DAYS):
+            if self.is_trading_day(candidate):
+                return candidate
+            candidate -= timedelta(days=1)
+        raise ValueError(f"No trading day within {MAX_LOOKAHEAD_DAYS} days before {day}")
+
+    def roll_forward(self, moment: datetime) -> datetime:
+        """Move moment by whole days to the first trading day on or after its date (time of day kept)"""
+        day = self.next_trading_day(moment.date())
+        return moment + timedelta(days=(day - moment.date()).days)
+
+    def trading_days(self, start: date, end: date) -> List[date]:
+        days = []
+        day = start
+        while day <= end:
+            if self.is_trading_day(day):
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'sessions': len(self._sessions),
+            'first_session': self._first_session.isoformat() if self._first_session else None,
+            'last_session': self._last_session.isoformat() if self._last_session else None,
+            'overrides': len(self._overrides),
+            'cache_path': self._cache_path,
+        }
+
+
+def load_overrides(conn) -> Dict[date, Tuple[bool, str]]:
+    """{day: (is_open, reason)} from trading_calendar_overrides ({} before the migration ran)"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('trading_calendar_overrides') IS NOT NULL")
+            if not cursor.fetchone()[0]:
+                return {}
+            cursor.execute("SELECT day, is_open, reason FROM trading_calendar_overrides")
+            rows = cursor.fetchall()
+    finally:
+        conn.rollback()
+    return {row[0]: (row[1], row[2] or '') for row in rows}
+
+
+def save_override(conn, day: date, is_open: bool, reason: str = '') -> None:
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO trading_calendar_overrides (day, is_open, reason)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (day) DO UPDATE SET
+                    is_open = EXCLUDED.is_open, reason = EXCLUDED.reason, updated_at = CURRENT_TIMESTAMP
+            """, (day, is_open, reason))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    get_trading_calendar().invalidate_overrides()
+
+
+def delete_override(conn, day: date) -> bool:
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM trading_calendar_overrides WHERE day = %s", (day,))
+            deleted = cursor.rowcount > 0
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    get_trading_calendar().invalidate_overrides()
+    return deleted
+
+
+_calendar: Optional[TradingCalendar] = None
+
+
+def get_trading_calendar() -> TradingCalendar:
+    global _calendar
+    if _calendar is None:
+        _calendar = TradingCalendar()
+    return _calendar
+
+
+def configure_trading_calendar(overrides_loader: Callable[[], Dict[date, Tuple[bool, str]]]) -> TradingCalendar:
+    """Attach the overrides source and load the session cache (call once at startup)"""
+    calendar = get_trading_calendar()
+    calendar._overrides_loader = overrides_loader
+    calendar.invalidate_overrides()
+    calendar.load_cache()
+    return calendar
+
+
+def schedule_closure_reason(schedule: Dict[str, Any], now: Optional[datetime] = None) -> Optional[str]:
+    """
+    Why a schedule must not run today: the market is closed and the schedule is
+    weekday_daily or weekdays_only (None for other schedules and on trading days).
+    Catches closures announced after next_run was computed (e.g. typhoon days).
+    """
+    if schedule.get('schedule_type') != 'weekday_daily' and not schedule.get('weekdays_only', True):
+        return None
+    if now is None:
+        import pytz
+        now = datetime.now(pytz.timezone(schedule.get('timezone') or 'Asia/Taipei'))
+    return get_trading_calendar().closure_reason(now.date())
@@ -0,0 +1,231 @@
+"""
+shared.finlab_cache: one load per (dataset, trading date) across backends
+
+    cd packages/shared && python -m pytest tests/test_finlab_cache.py -q
+"""
+
+import os
+import socket
+import socketserver
+import sys
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from shared.finlab_cache import (  # noqa: E402
+    ArrowFileBackend,
+    DatasetCache,
+    LRUBackend,
+    RedisBackend,
+    last_trading_date,
+)
+
+TAIPEI = timezone(timedelta(hours=8))
+
+
+def make_frame() -> pd.DataFrame:
+    index = pd.date_range('2025-07-01', periods=5, freq='B', name='date')
+    df = pd.DataFrame(np.arange(15, dtype=float).reshape(5, 3), index=index, columns=['2330', '2317', '2454'])
+    df.iloc[1, 2] = np.nan
+    df.columns.name = 'symbol'
+    return df
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, name):
+        self.calls.append(name)
+        return make_frame()
+
+
+def test_last_trading_date_rolls_back_before_publish_and_over_weekends():
+    monday_morning = datetime(2025, 7, 7, 10, 0, tzinfo=TAIPEI)
+    monday_evening = datetime(2025, 7, 7, 19, 0, tzinfo=TAIPEI)
+    assert last_trading_date(monday_morning, rollover_hour=18) == date(2025, 7, 4)
+    assert last_trading_date(monday_evening, rollover_hour=18) == date(2025, 7, 7)
+
+    typhoon = {date(2025, 7, 7)}
+    assert last_trading_date(monday_evening, is_trading_day=lambda d: d.weekday() < 5 and d not in typhoon,
+                             rollover_hour=18) == date(2025, 7, 4)
+
+
+def test_lru_loads_once_per_trading_date():
+    loader = CountingLoader()
+    trading_day = [date(2025, 7, 4)]
+    cache = DatasetCache(loader, trading_date=lambda: trading_day[0])
+
+    first = cache.get('price:收盤價')
+    assert cache.get('price:收盤價') is first
+    assert loader.calls == ['price:收盤價']
+
+    trading_day[0] = date(2025, 7, 7)
+    cache.get('price:收盤價')
+    assert loader.calls == ['price:收盤價', 'price:收盤價']
+    assert cache.local.stats()['entries'] == 1
+
+
+def test_lru_evicts_by_bytes():
+    lru = LRUBackend(max_bytes=make_frame().memory_usage(index=True).sum() * 2)
+    for i in range(4):
+        lru.put(f"d{i}@2025-07-04", make_frame())
+    assert lru.get('d0@2025-07-04') is None
+    assert lru.get('d3@2025-07-04') is not None
+    assert lru.stats()['entries'] == 2
+
+
+def test_arrow_backend_shares_one_copy_between_processes(tmp_path):
+    pytest.importorskip('pyarrow')
+    loader = CountingLoader()
+    service_a = DatasetCache(loader, backend=ArrowFileBackend(str(tmp_path)), trading_date=lambda: date(2025, 7, 4))
+    service_b = DatasetCache(loader, backend=ArrowFileBackend(str(tmp_path)), trading_date=lambda: date(2025, 7, 4))
+
+    pd.testing.assert_frame_equal(service_a.get('price:收盤價'), make_frame(), check_freq=False)
+    pd.testing.assert_frame_equal(service_b.get('price:收盤價'), make_frame(), check_freq=False)
+    assert loader.calls == ['price:收盤價']
+    assert service_b.get_stats()['backend_hits'] == 1
+
+
+def test_arrow_backend_keeps_only_recent_dates(tmp_path):
+    pytest.importorskip('pyarrow')
+    backend = ArrowFileBackend(str(tmp_path))
+    for day in ('2025-07-02', '2025-07-03', '2025-07-04'):
+        backend.put(f"price:收盤價@{day}", make_frame())
+    assert backend.get('price:收盤價@2025-07-02') is None
+    assert backend.get('price:收盤價@2025-07-04') is not None
+    assert backend.stats()['files'] == 2
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for RedisBackend (HELLO / GET / SET [EX] [NX] / DEL / EXISTS)"""
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:])
+        parts = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            name = command[0].upper()
+            if name == b'GET':
+                value = store.get(command[1])
+                self.wfile.write(b'_\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value))
+            elif name == b'SET':
+                if b'NX' in [c.upper() for c in command[3:]] and command[1] in store:
+                    self.wfile.write(b'_\r\n')
+                else:
+                    store[command[1]] = command[2]
+                    self.wfile.write(b'+OK\r\n')
+            elif name in (b'DEL', b'EXISTS'):
+                found = sum(1 for key in command[1:] if key in store)
+                if name == b'DEL':
+                    for key in command[1:]:
+                        store.pop(key, None)
+                self.wfile.write(b':%d\r\n' % found)
+            elif name == b'HELLO':
+                # RESP3 handshake (redis-py 8 default); nil replies therefore use the RESP3 '_' form
+                self.wfile.write(b'%1\r\n+proto\r\n:3\r\n')
+            else:
+                self.wfile.write(b'+OK\r\n')
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), RespHandler)
+    server.daemon_threads = True
+    server.store = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_redis_backend_round_trip(resp_server):
+    pytest.importorskip('pyarrow')
+    pytest.importorskip('redis')
+    url = f"redis://127.0.0.1:{resp_server.server_address[1]}/0"
+    loader = CountingLoader()
+    service_a = DatasetCache(loader, backend=RedisBackend(url), trading_date=lambda: date(2025, 7, 4))
+    service_b = DatasetCache(loader, backend=RedisBackend(url), trading_date=lambda: date(2025, 7, 4))
+
+    service_a.get('price:收盤價')
+    pd.testing.assert_frame_equal(service_b.get('price:收盤價'), make_frame(), check_freq=False)
+    assert loader.calls == ['price:收盤價']
+    assert list(resp_server.store) == ['finlab:price:收盤價@2025-07-04'.encode('utf-8')]
+
+
+def test_backend_failure_falls_back_to_loader():
+    class BrokenBackend:
+        name = 'broken'
+
+        def get(self, key):
+            raise socket.error('unreachable')
+
+        def put(self, key, df):
+            raise socket.error('unreachable')
+
+        def loading(self, key):
+            raise socket.error('unreachable')
+
+        def stats(self):
+            return {}
+
+    loader = CountingLoader()
+    cache = DatasetCache(loader, backend=BrokenBackend(), trading_date=lambda: date(2025, 7, 4))
+    pd.testing.assert_frame_equal(cache.get('price:收盤價'), make_frame())
+    assert cache.get_stats()['backend_errors'] >= 2
+
+
+def test_arrow_frames_are_read_only_unless_writable(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = DatasetCache(CountingLoader(), backend=ArrowFileBackend(str(tmp_path)),
+                         trading_date=lambda: date(2025, 7, 4))
+    shared = cache.get('price:收盤價')
+    with pytest.raises(ValueError):
+        shared.iloc[0, 0] = 99.0
+
+    private = cache.get('price:收盤價', writable=True)
+    private.iloc[0, 0] = 99.0
+    assert cache.get('price:收盤價').iloc[0, 0] == 0.0
+
+
+def test_fetch_before_publish_is_rechecked_after_rollover(tmp_path):
+    pytest.importorskip('pyarrow')
+    published = [False]
+    calls = []
+
+    def loader(name):
+        calls.append(name)
+        df = make_frame()  # 2025-07-01 .. 2025-07-07
+        return df if published[0] else df.iloc[:-1]
+
+    backend = ArrowFileBackend(str(tmp_path))
+    cache = DatasetCache(loader, backend=backend, trading_date=lambda: date(2025, 7, 7),
+                         now=lambda: datetime(2025, 7, 7, 18, 5, tzinfo=TAIPEI), recheck_seconds=0)
+
+    assert cache.get('price:收盤價').index.max() == pd.Timestamp('2025-07-04')
+    # Not shared with other services while it still shows the previous session
+    assert backend.get('price:收盤價@2025-07-07') is None
+
+    published[0] = True
+    assert cache.get('price:收盤價').index.max() == pd.Timestamp('2025-07-07')
+    cache.get('price:收盤價')
+    assert len(calls) == 2
+    assert backend.get('price:收盤價@2025-07-07') is not None
+    assert cache.get_stats()['provisional'] == 1
@@ -0,0 +1,70 @@
+"""
+shared.frame_response: negotiated records / columns / arrow encodings of the same frame
+
+    cd packages/shared && python -m pytest tests/test_frame_response.py -q
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from shared.frame_response import (  # noqa: E402
+    _encode_columns_json,
+    arrow_to_frame,
+    columns_to_frame,
+    encode_columns,
+    frame_to_arrow,
+    frame_to_columns,
+    frame_to_records,
+    negotiate_format,
+)
+
+
+def make_ohlcv(days: int = 5) -> pd.DataFrame:
+    return pd.DataFrame({
+        'date': pd.date_range('2025-07-01', periods=days, freq='B'),
+        'open': np.linspace(100, 104, days),
+        'high': np.linspace(101, 105, days),
+        'low': np.linspace(99, 103, days),
+        'close': [100.5, np.nan, 102.5, 103.5, 104.5][:days],
+        'volume': np.arange(days, dtype='int64') * 1000,
+    })
+
+
+def test_negotiation_prefers_parameter_then_accept_quality():
+    assert negotiate_format(None) == 'records'
+    assert negotiate_format('*/*') == 'records'
+    assert negotiate_format('application/vnd.finlab.columns+json') == 'columns'
+    assert negotiate_format('application/json;q=0.9, application/vnd.apache.arrow.stream') == 'arrow'
+    assert negotiate_format('application/vnd.apache.arrow.stream;q=0', 'columns') == 'columns'
+    assert negotiate_format('application/vnd.apache.arrow.stream;q=0') == 'records'
+    with pytest.raises(ValueError):
+        negotiate_format(None, 'csv')
+
+
+def test_columns_match_records():
+    df = make_ohlcv()
+    records = frame_to_records(df)
+    columns = json.loads(encode_columns(frame_to_columns(df)))
+
+    assert columns['dates'] == [record['date'][:10] for record in records]
+    for field in ('open', 'high', 'low', 'close', 'volume'):
+        assert columns[field] == [record[field] for record in records]
+    assert columns['close'][1] is None
+    # Same output without orjson
+    assert json.loads(_encode_columns_json(frame_to_columns(df))) == columns
+
+
+def test_columns_and_arrow_round_trip():
+    df = make_ohlcv()
+    restored = columns_to_frame(json.loads(encode_columns(frame_to_columns(df))))
+    pd.testing.assert_frame_equal(restored, df, check_dtype=False)
+
+    pytest.importorskip('pyarrow')
+    pd.testing.assert_frame_equal(arrow_to_frame(frame_to_arrow(df)), df, check_dtype=False)
@@ -0,0 +1,105 @@
+"""
+shared.revenue_dataset: datasets loaded once per publication version, sliced per stock and period
+
+    cd packages/shared && python -m pytest tests/test_revenue_dataset.py -q
+"""
+
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from shared.revenue_dataset import (  # noqa: E402
+    FUNDAMENTAL_DATASETS,
+    REVENUE_DATASETS,
+    FundamentalsDataset,
+    fundamental_data_version,
+    revenue_data_version,
+)
+
+TAIPEI = timezone(timedelta(hours=8))
+
+
+def make_revenue(offset: float) -> pd.DataFrame:
+    index = pd.DatetimeIndex([f'2025-{month:02d}-10' for month in range(1, 7)], name='date')
+    return pd.DataFrame({
+        '2330': np.arange(6, dtype=float),
+        '2317': [np.nan, 1, 2, np.nan, 4, np.nan],
+        '1101': np.nan,  # no revenue reported at all
+    }, index=index) + offset
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, name):
+        self.calls.append(name)
+        fields = {**REVENUE_DATASETS, **FUNDAMENTAL_DATASETS}
+        offset = list(fields.values()).index(name) * 100
+        frame = make_revenue(offset)
+        if name == REVENUE_DATASETS['period_change']:
+            # A dataset with fewer stocks and periods than the anchor
+            frame = frame[['2330']].iloc[:-1]
+        return frame
+
+
+def test_versions_follow_the_filing_schedule():
+    at = lambda *args: datetime(*args, tzinfo=TAIPEI)  # noqa: E731
+    # Monthly revenue: a new version every evening up to the 10th, then held for the month
+    assert revenue_data_version(at(2025, 7, 3, 19), rollover_hour=18) == date(2025, 7, 3)
+    assert revenue_data_version(at(2025, 7, 3, 9), rollover_hour=18) == date(2025, 7, 2)
+    assert revenue_data_version(at(2025, 7, 11, 19), rollover_hour=18) == date(2025, 7, 10)
+    assert revenue_data_version(at(2025, 7, 31, 19), rollover_hour=18) == date(2025, 7, 10)
+    assert revenue_data_version(at(2025, 8, 1, 9), rollover_hour=18) == date(2025, 7, 10)
+    assert revenue_data_version(at(2025, 8, 1, 19), rollover_hour=18) == date(2025, 8, 1)
+    # Quarterly reports: daily inside a filing window, otherwise the last deadline
+    assert fundamental_data_version(at(2025, 5, 14, 19), rollover_hour=18) == date(2025, 5, 14)
+    assert fundamental_data_version(at(2025, 6, 20, 19), rollover_hour=18) == date(2025, 5, 15)
+    assert fundamental_data_version(at(2025, 1, 20, 19), rollover_hour=18) == date(2024, 11, 14)
+
+
+def test_loaded_once_per_version():
+    loader = CountingLoader()
+    version = [date(2025, 7, 10)]
+    dataset = FundamentalsDataset(loader, revenue_version=lambda: version[0],
+                                  fundamental_version=lambda: date(2025, 5, 15))
+
+    first = dataset.revenue()
+    assert dataset.revenue() is first
+    assert len(loader.calls) == len(REVENUE_DATASETS)
+
+    version[0] = date(2025, 8, 1)
+    assert dataset.revenue() is not first
+    assert len(loader.calls) == 2 * len(REVENUE_DATASETS)
+    dataset.fundamentals()
+    assert dataset.get_stats()['builds'] == 3
+
+
+def test_tail_slices_many_stocks_and_periods():
+    dataset = FundamentalsDataset(CountingLoader(), revenue_version=lambda: date(2025, 7, 10))
+    revenue = dataset.revenue()
+
+    rows = revenue.tail(['2330', '2317', '1101', '9999'], periods=3)
+    assert list(rows) == ['2330', '2317', '1101']
+    assert [row['current_revenue'] for row in rows['2330']] == [5.0, 4.0, 3.0]
+    assert [row['period'] for row in rows['2330']] == list(revenue.index[::-1][:3])
+    # Periods without revenue are skipped, the rest of the fields come from the same month
+    assert [row['current_revenue'] for row in rows['2317']] == [4.0, 2.0, 1.0]
+    assert [row['mom_change'] for row in rows['2317']] == [304.0, 302.0, 301.0]
+    assert rows['1101'] == []
+    # Missing values in the other datasets come back as None
+    assert rows['2330'][0]['period_change'] is None
+    assert rows['2330'][1]['period_change'] == 704.0
+
+
+def test_latest_takes_each_fields_last_value():
+    dataset = FundamentalsDataset(CountingLoader(), revenue_version=lambda: date(2025, 7, 10))
+    latest = dataset.revenue().latest(['2330', '2317', '1101'], ['current_revenue', 'period_change'])
+    assert latest['2330'] == {'current_revenue': 5.0, 'period_change': 704.0}
+    assert latest['2317'] == {'current_revenue': 4.0, 'period_change': None}
+    assert latest['1101'] == {'current_revenue': None, 'period_change': None}
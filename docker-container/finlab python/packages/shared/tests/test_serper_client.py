@@ -0,0 +1,139 @@
+"""
+shared.serper_client: one upstream call per (normalized query, time bucket), coalesced in flight
+
+    cd packages/shared && python -m pytest tests/test_serper_client.py -q
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from shared.serper_client import SerperCache, SerperClient, cache_bucket, normalize_query  # noqa: E402
+
+TAIPEI = timezone(timedelta(hours=8))
+
+
+class StubSerper(ThreadingHTTPServer):
+    """Local stand-in for google.serper.dev/search that records every payload"""
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.05, status: int = 200):
+        super().__init__(('127.0.0.1', 0), StubSerperHandler)
+        self.delay = delay
+        self.status = status
+        self.payloads = []
+        self.url = f"http://127.0.0.1:{self.server_address[1]}/search"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class StubSerperHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        assert self.headers['X-API-KEY'] == 'test-key'
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server.payloads.append(payload)
+        time.sleep(server.delay)
+        body = json.dumps({'organic': [{'title': f"result for {payload['q']}"}]}).encode('utf-8')
+        self.send_response(server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_client(url, cache, clock):
+    return SerperClient(api_key='test-key', cache=cache, url=url, now=lambda: clock[0])
+
+
+def test_normalize_and_bucket():
+    assert normalize_query('  台積電　2330   漲停 ') == normalize_query('台積電 ２３３０ 漲停')
+    moment = datetime(2025, 7, 4, 13, 59, tzinfo=TAIPEI)
+    assert cache_bucket(moment, 60) == '2025-07-04#13'
+    assert cache_bucket(moment + timedelta(minutes=1), 60) == '2025-07-04#14'
+    assert cache_bucket(moment.astimezone(timezone.utc), 30) == '2025-07-04#27'
+
+
+def test_concurrent_identical_queries_share_one_request():
+    clock = [datetime(2025, 7, 4, 10, 0, tzinfo=TAIPEI)]
+
+    async def scenario(url):
+        client = make_client(url, None, clock)
+        try:
+            return client, await asyncio.gather(*(client.search('台積電 2330 漲停', num=5) for _ in range(10)))
+        finally:
+            await client.close()
+
+    with StubSerper() as stub:
+        client, results = asyncio.run(scenario(stub.url))
+    assert len(stub.payloads) == 1
+    assert all(result == results[0] for result in results)
+    assert client.get_stats()['coalesced'] == 9
+
+
+def test_cache_hit_within_bucket_and_refresh_after(tmp_path):
+    clock = [datetime(2025, 7, 4, 10, 5, tzinfo=TAIPEI)]
+    cache_path = str(tmp_path / 'serper.sqlite3')
+
+    async def scenario(url):
+        client = make_client(url, SerperCache(cache_path), clock)
+        await client.search('台積電 2330 漲停', num=5)
+        await client.search('台積電  2330 漲停 ', num=5)
+        # Another process (new client, same file) sees the cached response
+        other = make_client(url, SerperCache(cache_path), clock)
+        await other.search('台積電 2330 漲停', num=5)
+        # Different parameters are a different query
+        await client.search('台積電 2330 漲停', num=3)
+        # Next slot queries Serper again
+        clock[0] += timedelta(hours=1)
+        await client.search('台積電 2330 漲停', num=5)
+        await client.close()
+        await other.close()
+        return client
+
+    with StubSerper(delay=0) as stub:
+        client = asyncio.run(scenario(stub.url))
+    assert [payload['num'] for payload in stub.payloads] == [5, 3, 5]
+    assert client.get_stats()['cache_hits'] == 1
+    assert client.cache.stats()['entries'] == 3
+
+
+def test_failures_are_not_cached():
+    clock = [datetime(2025, 7, 4, 10, 0, tzinfo=TAIPEI)]
+
+    async def scenario(url):
+        client = make_client(url, SerperCache(':memory:'), clock)
+        try:
+            for _ in range(2):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await client.search('2330 漲停')
+        finally:
+            await client.close()
+        return client
+
+    with StubSerper(delay=0, status=500) as stub:
+        client = asyncio.run(scenario(stub.url))
+    assert len(stub.payloads) == 2
+    assert client.cache.stats()['entries'] == 0
+    assert client.get_stats()['errors'] == 2
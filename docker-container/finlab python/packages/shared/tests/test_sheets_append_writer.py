@@ -0,0 +1,114 @@
+"""
+shared.sheets_append_writer: batched appends against the in-memory FakeSheetsClient
+
+    cd packages/shared && python -m pytest tests/test_sheets_append_writer.py -q
+
+Batching tests use flush_window=None and an explicit flush(), so what ends up in one
+API call does not depend on thread scheduling.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from shared.fake_sheets_client import FakeSheetsClient  # noqa: E402
+from shared.sheets_append_writer import (  # noqa: E402
+    AppendResult,
+    SheetsAppendWriter,
+    get_append_writer,
+    parse_updated_range,
+)
+
+HEADER = ['貼文ID', 'KOL Serial', '生成內容']
+
+
+def make_sheet(existing_rows: int = 3) -> FakeSheetsClient:
+    rows = [HEADER] + [[f'old-{i}', '200', '...'] for i in range(existing_rows)]
+    return FakeSheetsClient({'貼文記錄表': rows})
+
+
+def test_parse_updated_range():
+    assert parse_updated_range("'貼文記錄表'!A120:R125") == (120, 125)
+    assert parse_updated_range("Sheet1!A7") == (7, 7)
+    assert parse_updated_range("") is None
+
+
+def test_rows_from_many_callers_share_one_append_call():
+    sheets = make_sheet()
+    writer = SheetsAppendWriter(sheets, '貼文記錄表', flush_window=None)
+
+    futures = {}
+
+    def caller(i):
+        futures[i] = writer.append([[f'post-{i}', '200', f'content {i}']])
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sheets.api_calls('append') == 0
+    assert writer.flush(timeout=5)
+    results = {i: future.result() for i, future in futures.items()}
+
+    assert sheets.api_calls('append') == 1
+    assert sheets.api_calls('read') == 0
+    # 每個呼叫端拿到自己那一列的列號，與工作表內容一致
+    for i, result in results.items():
+        assert sheets.sheets['貼文記錄表'][result.start_row - 1][0] == f'post-{i}'
+    assert sorted(result.start_row for result in results.values()) == list(range(5, 25))
+    assert writer.next_row == 25
+
+
+def test_row_cursor_tracks_consecutive_batches():
+    sheets = make_sheet(existing_rows=0)
+    writer = SheetsAppendWriter(sheets, '貼文記錄表', flush_window=0)
+
+    assert writer.append_rows([['a'], ['b']]) == AppendResult(2, 3)
+    assert writer.append_rows([['c']]) == AppendResult(4, 4)
+    assert writer.next_row == 5
+    assert [row[0] for row in sheets.read_sheet('貼文記錄表', 'A:A')] == ['貼文ID', 'a', 'b', 'c']
+
+
+def test_large_bursts_split_at_max_batch_rows():
+    sheets = make_sheet()
+    writer = SheetsAppendWriter(sheets, '貼文記錄表', flush_window=None, max_batch_rows=10)
+    futures = [writer.append([[f'p{i}-{j}'] for j in range(4)]) for i in range(6)]
+    assert writer.flush(timeout=5)
+    assert all(future.done() for future in futures)
+    # 6 × 4 列，每批最多 10 列且不拆開單一呼叫端 → 3 次呼叫
+    assert sheets.api_calls('append') == 3
+    assert len(sheets.read_sheet('貼文記錄表')) == 4 + 24
+
+
+def test_async_callers_and_failures():
+    class FailingSheets(FakeSheetsClient):
+        def append_sheet(self, sheet_name, values):
+            raise RuntimeError('quota exceeded')
+
+    async def scenario():
+        ok = SheetsAppendWriter(make_sheet(), '貼文記錄表', flush_window=None)
+        callers = [asyncio.ensure_future(ok.append_rows_async([[f'async-{i}']])) for i in range(5)]
+        await asyncio.sleep(0)  # every caller has queued its row
+        assert await asyncio.to_thread(ok.flush, 5)
+        results = await asyncio.gather(*callers)
+        failing = SheetsAppendWriter(FailingSheets(), '貼文記錄表', flush_window=0)
+        with pytest.raises(RuntimeError):
+            await failing.append_rows_async([['x']])
+        return ok, results, failing
+
+    ok, results, failing = asyncio.run(scenario())
+    assert [result.start_row for result in results] == [5, 6, 7, 8, 9]
+    assert ok.sheets_client.api_calls('append') == 1
+    assert failing.get_stats()['errors'] == 1
+
+
+def test_get_append_writer_is_shared_per_client_and_sheet():
+    sheets = make_sheet()
+    assert get_append_writer(sheets, '貼文記錄表') is get_append_writer(sheets, '貼文記錄表')
+    assert get_append_writer(sheets, '貼文記錄表') is not get_append_writer(sheets, '互動數據')
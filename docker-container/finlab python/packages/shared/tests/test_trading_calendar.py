@@ -0,0 +1,44 @@
+"""
+shared.trading_calendar: sessions, announced closures and the schedule gate both dispatchers use
+
+    cd packages/shared && python -m pytest tests/test_trading_calendar.py -q
+"""
+
+import os
+import sys
+from datetime import date, datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from shared import trading_calendar  # noqa: E402
+from shared.trading_calendar import TradingCalendar, schedule_closure_reason  # noqa: E402
+
+TYPHOON_DAY = date(2025, 3, 4)  # Tuesday
+
+
+@pytest.fixture
+def calendar(tmp_path, monkeypatch):
+    calendar = TradingCalendar(overrides_loader=lambda: {TYPHOON_DAY: (False, 'typhoon')},
+                               cache_path=str(tmp_path / 'calendar.json'))
+    # 2025-02-28 (Friday) was a holiday: it is missing from the known sessions
+    calendar.set_sessions([date(2025, 2, 26), date(2025, 2, 27), date(2025, 3, 3)])
+    monkeypatch.setattr(trading_calendar, '_calendar', calendar)
+    return calendar
+
+
+def test_roll_forward_skips_holidays_weekends_and_closures(calendar):
+    assert calendar.roll_forward(datetime(2025, 2, 28, 9, 30)) == datetime(2025, 3, 3, 9, 30)
+    # Past the last known session: weekdays, minus the announced closure
+    assert calendar.roll_forward(datetime(2025, 3, 4, 9, 30)) == datetime(2025, 3, 5, 9, 30)
+    assert calendar.closure_reason(date(2025, 2, 28)) == 'holiday'
+    assert calendar.closure_reason(date(2025, 3, 8)) == 'weekend'
+
+
+def test_schedule_closure_reason_only_gates_trading_day_schedules(calendar):
+    on_typhoon_day = datetime(2025, 3, 4, 14, 0)
+    assert schedule_closure_reason({'schedule_type': 'weekday_daily'}, on_typhoon_day) == 'typhoon'
+    assert schedule_closure_reason({'schedule_type': 'daily', 'weekdays_only': True}, on_typhoon_day) == 'typhoon'
+    assert schedule_closure_reason({'schedule_type': 'daily', 'weekdays_only': False}, on_typhoon_day) is None
+    assert schedule_closure_reason({'schedule_type': 'weekday_daily'}, datetime(2025, 3, 3, 14, 0)) is None
@@ -4,6 +4,8 @@
 """
 
 import logging
+import os
+import sys
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass
@@ -12,6 +14,15 @@ from services.assign.assignment_service import AssignmentService, TopicData, Tas
 from services.content.content_generator import create_content_generator, ContentRequest
 from clients.google.sheets_client import GoogleSheetsClient
 
+# 共用的批次追加寫入器（docker-container/finlab python/packages/shared；映像內已安裝）
+SHARED_PACKAGE_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    'docker-container', 'finlab python', 'packages', 'shared', 'src'
+)
+if os.path.isdir(SHARED_PACKAGE_SRC) and SHARED_PACKAGE_SRC not in sys.path:
+    sys.path.append(SHARED_PACKAGE_SRC)
+from shared.sheets_append_writer import get_append_writer  # noqa: E402
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -242,15 +253,9 @@ class TopicProcessor:
                 
                 records_to_write.append(record)
             
-            # 寫入 Google Sheets
+            # 寫入 Google Sheets（追加到最後一行之後，與其他寫入合併為一次 API 呼叫）
             if records_to_write:
-                # 找到最後一行
-                existing_data = self.sheets_client.read_sheet('貼文記錄表', 'A:R')  # 更新為 A:R 包含新欄位
-                start_row = len(existing_data) + 1
-                
-                # 寫入新記錄
-                range_name = f'A{start_row}:R{start_row + len(records_to_write) - 1}'  # 更新為 A:R
-                self.sheets_client.write_sheet('貼文記錄表', records_to_write, range_name)
+                get_append_writer(self.sheets_client, '貼文記錄表').append_rows(records_to_write)
                 
                 logger.info(f"成功更新 {len(records_to_write)} 筆記錄到貼文記錄表")
             
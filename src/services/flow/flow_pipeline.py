@@ -0,0 +1,53 @@
+"""
+流程管線工具
+多檔股票並行處理（有上限）與單次流程共用的 HTTP session
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# 同時處理的股票數
+FLOW_MAX_CONCURRENCY = int(os.getenv('FLOW_MAX_CONCURRENCY', '5'))
+# 每個服務（host:port）同時開啟的連線數
+FLOW_HTTP_LIMIT_PER_HOST = int(os.getenv('FLOW_HTTP_LIMIT_PER_HOST', '4'))
+# 單一請求逾時秒數
+FLOW_HTTP_TIMEOUT = float(os.getenv('FLOW_HTTP_TIMEOUT', '10'))
+
+
+def create_flow_session(limit_per_host: Optional[int] = None,
+                        timeout: Optional[float] = None) -> aiohttp.ClientSession:
+    """
+    建立一次流程共用的 aiohttp session（連線重用，並限制每個服務的並行連線數）
+
+    需在事件迴圈內呼叫，並以 async with 或 close() 關閉
+    """
+    connector = aiohttp.TCPConnector(limit_per_host=limit_per_host or FLOW_HTTP_LIMIT_PER_HOST)
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout or FLOW_HTTP_TIMEOUT)
+    )
+
+
+async def run_bounded(items: Iterable[T], worker: Callable[[T], Awaitable[R]],
+                      limit: Optional[int] = None) -> List[Any]:
+    """
+    以最多 limit 個並行執行 worker(item)，結果順序與 items 相同
+
+    單一項目失敗不影響其他項目：該位置回傳例外物件（同 asyncio.gather(return_exceptions=True)）
+    """
+    semaphore = asyncio.Semaphore(limit or FLOW_MAX_CONCURRENCY)
+
+    async def bounded(item: T):
+        async with semaphore:
+            return await worker(item)
+
+    return await asyncio.gather(*(bounded(item) for item in items), return_exceptions=True)
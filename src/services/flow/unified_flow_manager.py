@@ -4,11 +4,17 @@
 """
 
 import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import asyncio
 
+import aiohttp
+
 from src.clients.cmoney.cmoney_client import CMoneyClient, LoginCredentials
 from src.clients.google.sheets_client import GoogleSheetsClient
 from src.services.assign.assignment_service import AssignmentService, TopicData
@@ -18,9 +24,40 @@ from src.services.stock.topic_stock_service import TopicStockService
 from src.services.trending_topic_news_service import TrendingTopicNewsService, TrendingTopicPost, PostGenerationResult
 # PostgreSQL 服務將在需要時動態導入
 from src.utils.limit_up_data_parser import LimitUpDataParser
+from src.services.flow.flow_pipeline import create_flow_session, run_bounded, FLOW_MAX_CONCURRENCY
 
 logger = logging.getLogger(__name__)
 
+# 數據支線服務位置
+REVENUE_API_URL = os.getenv("REVENUE_API_URL", "http://localhost:8008")
+ANALYZE_API_URL = os.getenv("ANALYZE_API_URL", "http://localhost:8002")
+FINANCIAL_API_URL = os.getenv("FINANCIAL_API_URL", "http://localhost:8009")
+FUNDAMENTAL_API_URL = os.getenv("FUNDAMENTAL_API_URL", "http://localhost:8010")
+SERPER_SEARCH_URL = "https://google.serper.dev/search"
+
+# 各 KOL 角色需要的數據支線（綜合派與其他角色共用同一次查詢結果）
+ROLE_DATA_SOURCES = {
+    '籌碼派': ['technical'],
+    '基本面派': ['revenue', 'financial'],
+    '消息派': [],
+    '綜合派': ['technical', 'revenue', 'financial', 'market'],
+}
+
+# 共用 Serper 客戶端（docker-container/finlab python/packages/shared：查詢快取、相同查詢合併為一次請求）
+SHARED_PACKAGE_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    'docker-container', 'finlab python', 'packages', 'shared', 'src'
+)
+if os.path.isdir(SHARED_PACKAGE_SRC) and SHARED_PACKAGE_SRC not in sys.path:
+    sys.path.append(SHARED_PACKAGE_SRC)
+try:
+    from shared.serper_client import get_serper_client
+except ImportError:
+    get_serper_client = None
+
+# 目前流程共用的 HTTP session（以 context 區分，同時執行的流程各自擁有）
+_flow_http_session: ContextVar[Optional[aiohttp.ClientSession]] = ContextVar('flow_http_session', default=None)
+
 @dataclass
 class FlowConfig:
     """流程配置"""
@@ -44,6 +81,18 @@ class FlowResult:
 class UnifiedFlowManager:
     """統一的流程管理器"""
     
+    revenue_api_url = REVENUE_API_URL
+    analyze_api_url = ANALYZE_API_URL
+    financial_api_url = FINANCIAL_API_URL
+    fundamental_api_url = FUNDAMENTAL_API_URL
+    serper_search_url = SERPER_SEARCH_URL
+    
+    # 同時處理的股票數
+    max_concurrency = FLOW_MAX_CONCURRENCY
+    
+    # 共用 Serper 客戶端（None 時以流程 session 直接呼叫 serper_search_url）
+    serper_client = None
+    
     def __init__(self, sheets_client: GoogleSheetsClient):
         """初始化流程管理器"""
         self.sheets_client = sheets_client
@@ -57,6 +106,9 @@ class UnifiedFlowManager:
         # 新增：熱門話題新聞搜尋服務
         self.trending_news_service = TrendingTopicNewsService()
         
+        if get_serper_client is not None:
+            self.serper_client = get_serper_client()
+        
         # PostgreSQL 服務將在需要時動態初始化
         
         # 統一的認證管理
@@ -65,7 +117,7 @@ class UnifiedFlowManager:
         
         logger.info("統一流程管理器初始化完成")
     
-    def _get_mock_trending_topics(self) -> List[Topic]:
+    def _get_mock_trending_topics(self) -> List["Topic"]:
         """獲取模擬熱門話題數據"""
         from src.clients.cmoney.models import Topic
         
@@ -637,34 +689,55 @@ class UnifiedFlowManager:
                 logger.warning(f"無效的股票代號格式: {stock_id}")
         return valid_ids
     
+    @asynccontextmanager
+    async def _flow_session(self):
+        """整個流程共用一個 HTTP session；已在流程中時沿用外層的 session"""
+        session = _flow_http_session.get()
+        if session is not None and not session.closed:
+            yield session
+            return
+        
+        session = create_flow_session()
+        token = _flow_http_session.set(session)
+        try:
+            yield session
+        finally:
+            _flow_http_session.reset(token)
+            await session.close()
+    
     async def _get_intraday_limit_up_stocks_with_serper(self, stock_ids: List[str]) -> List[Dict[str, Any]]:
-        """使用 Serper API 獲取盤中漲停股列表並分析漲停原因"""
-        limit_up_stocks = []
+        """使用 Serper API 獲取盤中漲停股列表並分析漲停原因（最多 max_concurrency 檔並行）"""
+        async with self._flow_session():
+            results = await run_bounded(stock_ids, self._process_limit_up_stock, self.max_concurrency)
         
-        for stock_id in stock_ids:
-            try:
-                logger.info(f"處理股票: {stock_id}")
-                
-                # 1. 統一使用 Serper API 分析漲停原因
-                serper_analysis = await self._analyze_limit_up_reason(stock_id)
-                
-                # 2. 解析漲停資訊（從你提供的資料中提取）
-                stock_info = self._parse_limit_up_info(stock_id, serper_analysis)
-                
-                if stock_info:
-                    # 3. 根據 KOL 角色特性派發數據源
-                    enhanced_stock_info = await self._distribute_data_by_kol_role(stock_info, serper_analysis)
-                    limit_up_stocks.append(enhanced_stock_info)
-                    logger.info(f"確認漲停: {stock_id} 漲幅 {enhanced_stock_info.get('change_percent', 0):.2f}%")
-                else:
-                    logger.warning(f"無法解析漲停資訊: {stock_id}")
-                    
-            except Exception as e:
-                logger.error(f"處理股票 {stock_id} 時發生錯誤: {e}")
-                continue
+        limit_up_stocks = []
+        for stock_id, result in zip(stock_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"處理股票 {stock_id} 時發生錯誤: {result}")
+            elif result:
+                limit_up_stocks.append(result)
         
         return limit_up_stocks
     
+    async def _process_limit_up_stock(self, stock_id: str) -> Optional[Dict[str, Any]]:
+        """單檔股票：分析漲停原因 → 解析漲停資訊 → 依 KOL 角色派發數據源"""
+        logger.info(f"處理股票: {stock_id}")
+        
+        # 1. 統一使用 Serper API 分析漲停原因
+        serper_analysis = await self._analyze_limit_up_reason(stock_id)
+        
+        # 2. 解析漲停資訊（從你提供的資料中提取）
+        stock_info = self._parse_limit_up_info(stock_id, serper_analysis)
+        
+        if not stock_info:
+            logger.warning(f"無法解析漲停資訊: {stock_id}")
+            return None
+        
+        # 3. 根據 KOL 角色特性派發數據源
+        enhanced_stock_info = await self._distribute_data_by_kol_role(stock_info, serper_analysis)
+        logger.info(f"確認漲停: {stock_id} 漲幅 {enhanced_stock_info.get('change_percent', 0):.2f}%")
+        return enhanced_stock_info
+    
     async def _analyze_limit_up_reason(self, stock_id: str) -> Dict[str, Any]:
         """使用 Serper API 分析漲停原因"""
         try:
@@ -748,11 +821,14 @@ class UnifiedFlowManager:
             # 獲取所有 KOL 角色
             kol_roles = self._get_kol_roles()
             
+            # 所有角色需要的數據支線並行查詢一次
+            source_data = await self._fetch_role_sources(stock_id, kol_roles)
+            
             # 為每個角色準備對應的數據源
             role_based_data = {}
             
             for role in kol_roles:
-                role_data = await self._prepare_data_for_role(role, stock_id, serper_analysis)
+                role_data = await self._prepare_data_for_role(role, stock_id, serper_analysis, source_data)
                 role_based_data[role] = role_data
             
             # 整合到股票資訊中
@@ -780,8 +856,31 @@ class UnifiedFlowManager:
             '綜合派'       # 全方位分析
         ]
     
-    async def _prepare_data_for_role(self, role: str, stock_id: str, serper_analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """為特定角色準備數據"""
+    async def _fetch_role_sources(self, stock_id: str, roles: List[str]) -> Dict[str, Dict[str, Any]]:
+        """並行查詢指定角色需要的數據支線，每個支線只查一次"""
+        fetchers = {
+            'technical': self._fetch_technical_data,
+            'revenue': self._fetch_revenue_data,
+            'financial': self._fetch_financial_data,
+            'market': self._fetch_market_data,
+        }
+        source_types = list(dict.fromkeys(
+            source_type for role in roles for source_type in ROLE_DATA_SOURCES.get(role, [])
+        ))
+        results = await asyncio.gather(*(fetchers[source_type](stock_id) for source_type in source_types),
+                                       return_exceptions=True)
+        
+        source_data = {}
+        for source_type, result in zip(source_types, results):
+            if isinstance(result, Exception):
+                logger.error(f"數據支線 {source_type} 調用失敗: {stock_id} - {result}")
+                result = {'success': False, 'error': str(result)}
+            source_data[source_type] = result
+        return source_data
+    
+    async def _prepare_data_for_role(self, role: str, stock_id: str, serper_analysis: Dict[str, Any],
+                                     source_data: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """為特定角色準備數據（source_data 為已查詢的數據支線，未提供時自行查詢）"""
         role_data = {
             'role': role,
             'data_sources': [],
@@ -790,9 +889,12 @@ class UnifiedFlowManager:
         }
         
         try:
+            if source_data is None:
+                source_data = await self._fetch_role_sources(stock_id, [role])
+            
             if role == '籌碼派':
                 # 技術面數據
-                technical_data = await self._fetch_technical_data(stock_id)
+                technical_data = source_data['technical']
                 role_data['data_sources'].append({
                     'type': 'technical',
                     'data': technical_data,
@@ -803,8 +905,8 @@ class UnifiedFlowManager:
                 
             elif role == '基本面派':
                 # 財報和營收數據
-                revenue_data = await self._fetch_revenue_data(stock_id)
-                financial_data = await self._fetch_financial_data(stock_id)
+                revenue_data = source_data['revenue']
+                financial_data = source_data['financial']
                 
                 role_data['data_sources'].append({
                     'type': 'revenue',
@@ -844,10 +946,10 @@ class UnifiedFlowManager:
                 
             elif role == '綜合派':
                 # 全方位數據
-                technical_data = await self._fetch_technical_data(stock_id)
-                revenue_data = await self._fetch_revenue_data(stock_id)
-                financial_data = await self._fetch_financial_data(stock_id)
-                market_data = await self._fetch_market_data(stock_id)
+                technical_data = source_data['technical']
+                revenue_data = source_data['revenue']
+                financial_data = source_data['financial']
+                market_data = source_data['market']
                 
                 role_data['data_sources'].extend([
                     {
@@ -943,8 +1045,7 @@ class UnifiedFlowManager:
             logger.info(f"獲取月營收數據: {stock_id}")
             
             # 調用營收 API
-            revenue_url = "http://localhost:8008"
-            response = await self._make_api_request(f"{revenue_url}/revenue/{stock_id}/summary")
+            response = await self._make_api_request(f"{self.revenue_api_url}/revenue/{stock_id}/summary")
             
             if response and response.get('success', False):
                 return {
@@ -966,8 +1067,7 @@ class UnifiedFlowManager:
             logger.info(f"獲取技術面數據: {stock_id}")
             
             # 調用技術分析 API
-            technical_url = "http://localhost:8002"
-            response = await self._make_api_request(f"{technical_url}/analyze/{stock_id}")
+            response = await self._make_api_request(f"{self.analyze_api_url}/analyze/{stock_id}")
             
             if response and response.get('success', False):
                 return {
@@ -989,8 +1089,7 @@ class UnifiedFlowManager:
             logger.info(f"獲取財報數據: {stock_id}")
             
             # 調用財報 API
-            financial_url = "http://localhost:8009"
-            response = await self._make_api_request(f"{financial_url}/financial/{stock_id}/summary")
+            response = await self._make_api_request(f"{self.financial_api_url}/financial/{stock_id}/summary")
             
             if response and response.get('success', False):
                 return {
@@ -1012,8 +1111,7 @@ class UnifiedFlowManager:
             logger.info(f"獲取市場數據: {stock_id}")
             
             # 調用基本面分析器
-            fundamental_url = "http://localhost:8010"
-            response = await self._make_api_request(f"{fundamental_url}/analyze/fundamental?stock_id={stock_id}")
+            response = await self._make_api_request(f"{self.fundamental_api_url}/analyze/fundamental?stock_id={stock_id}")
             
             if response and response.get('success', False):
                 return {
@@ -1029,17 +1127,15 @@ class UnifiedFlowManager:
             logger.error(f"獲取市場數據失敗: {stock_id} - {e}")
             return {'success': False, 'error': str(e)}
     
-    async def _make_api_request(self, url: str) -> Optional[Dict[str, Any]]:
-        """發送 API 請求"""
+    async def _make_api_request(self, url: str, method: str = "GET", **kwargs) -> Optional[Dict[str, Any]]:
+        """發送 API 請求（使用流程共用的 session）"""
         try:
-            import aiohttp
-            
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                async with session.get(url) as response:
+            async with self._flow_session() as session:
+                async with session.request(method, url, **kwargs) as response:
                     if response.status == 200:
                         return await response.json()
                     else:
-                        logger.warning(f"API 請求失敗: {url} - {response.status}")
+                        logger.warning(f"API 請求失敗: {url} - {response.status} {await response.text()}")
                         return None
                         
         except Exception as e:
@@ -1049,8 +1145,6 @@ class UnifiedFlowManager:
     async def _fetch_serper_data(self, stock_id: str) -> Dict[str, Any]:
         """使用 Serper API 抓取股票相關資料"""
         try:
-            import requests
-            
             # Serper API 配置
             serper_api_key = os.getenv("SERPER_API_KEY")
             if not serper_api_key:
@@ -1060,6 +1154,12 @@ class UnifiedFlowManager:
             # 搜尋查詢
             search_query = f"{stock_id} 股票 漲停 今日 新聞 分析"
             
+            if self.serper_client is not None:
+                # 同一時段內相同查詢直接取快取，並行流程的相同查詢共用一次請求
+                data = await self.serper_client.search(search_query, num=10, gl="tw", hl="zh-tw")
+                logger.info(f"Serper API 查詢成功: {stock_id}")
+                return data
+            
             headers = {
                 "X-API-KEY": serper_api_key,
                 "Content-Type": "application/json"
@@ -1072,19 +1172,19 @@ class UnifiedFlowManager:
                 "hl": "zh-tw"  # 繁體中文
             }
             
-            response = requests.post(
-                "https://google.serper.dev/search",
+            data = await self._make_api_request(
+                self.serper_search_url,
+                method="POST",
                 headers=headers,
                 json=payload,
-                timeout=30
+                timeout=aiohttp.ClientTimeout(total=30)
             )
             
-            if response.status_code == 200:
-                data = response.json()
+            if data is not None:
                 logger.info(f"Serper API 查詢成功: {stock_id}")
                 return data
             else:
-                logger.error(f"Serper API 查詢失敗: {response.status_code} - {response.text}")
+                logger.error(f"Serper API 查詢失敗: {stock_id}")
                 return {}
                 
         except Exception as e:
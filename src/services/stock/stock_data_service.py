@@ -8,7 +8,9 @@ import asyncio
 import pandas as pd
 import finlab
 import os
-from typing import Dict, Any, Optional, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 from .data_source_scheduler import DataSourceScheduler, DataSourceType, get_data_source_scheduler
@@ -19,6 +21,46 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# FinLab data.get 為阻塞呼叫，統一在有上限的執行緒池執行
+FINLAB_EXECUTOR_WORKERS = int(os.getenv('FINLAB_EXECUTOR_WORKERS', '4'))
+# 已載入資料集的有效時間（FinLab 每日盤後更新）
+DATASET_TTL_SECONDS = int(os.getenv('FINLAB_DATASET_TTL_SECONDS', '1800'))
+# 批次綜合數據時同時呼叫 OHLC / 分析 API 的股票數
+MAX_CONCURRENT_STOCKS = int(os.getenv('STOCK_DATA_MAX_CONCURRENCY', '8'))
+
+# StockRevenueData 欄位 -> FinLab 資料集
+REVENUE_DATASETS = {
+    'current_month_revenue': 'monthly_revenue:當月營收',
+    'last_month_revenue': 'monthly_revenue:上月營收',
+    'last_year_same_month_revenue': 'monthly_revenue:去年當月營收',
+    'month_over_month_growth': 'monthly_revenue:上月比較增減(%)',
+    'year_over_year_growth': 'monthly_revenue:去年同月增減(%)',
+    'cumulative_revenue': 'monthly_revenue:當月累計營收',
+    'last_year_cumulative_revenue': 'monthly_revenue:去年累計營收',
+    'cumulative_growth': 'monthly_revenue:前期比較增減(%)',
+}
+
+# StockFinancialData 欄位 -> FinLab 資料集
+FINANCIAL_DATASETS = {
+    'revenue': 'financial_statement:營業收入淨額',
+    'eps': 'financial_statement:每股盈餘',
+    'total_assets': 'financial_statement:資產總額',
+    'total_liabilities': 'financial_statement:負債總額',
+    'shareholders_equity': 'financial_statement:股東權益總額',
+    'operating_income': 'financial_statement:營業利益',
+    'net_income': 'financial_statement:歸屬母公司淨利_損',
+    'cash_flow': 'financial_statement:營業活動之淨現金流入_流出',
+}
+
+_finlab_executor: Optional[ThreadPoolExecutor] = None
+
+def get_finlab_executor() -> ThreadPoolExecutor:
+    """FinLab 資料載入共用的執行緒池（FINLAB_EXECUTOR_WORKERS 個執行緒）"""
+    global _finlab_executor
+    if _finlab_executor is None:
+        _finlab_executor = ThreadPoolExecutor(max_workers=FINLAB_EXECUTOR_WORKERS, thread_name_prefix="finlab")
+    return _finlab_executor
+
 @dataclass
 class StockOHLCData:
     """股票 OHLC 數據"""
@@ -95,6 +137,10 @@ class StockDataService:
         self.finlab_api_key = finlab_api_key
         self.data_scheduler = get_data_source_scheduler()
         
+        # 已載入的 FinLab 資料集 {名稱: (載入時間, DataFrame)} 與載入中的資料集
+        self._datasets: Dict[str, Tuple[float, pd.DataFrame]] = {}
+        self._dataset_loads: Dict[str, asyncio.Future] = {}
+        
         # 初始化 FinLab
         self._finlab_logged_in = False
         if finlab_api_key:
@@ -161,19 +207,22 @@ class StockDataService:
             logger.error(f"獲取 {stock_id} OHLC 數據異常: {e}")
             return None
     
-    async def get_stock_analysis_data(self, stock_id: str) -> Optional[StockAnalysisData]:
+    async def get_stock_analysis_data(self, stock_id: str,
+                                      ohlc_data: Optional[List[StockOHLCData]] = None) -> Optional[StockAnalysisData]:
         """
         獲取股票分析數據 (技術指標和交易信號)
         
         Args:
             stock_id: 股票代號
+            ohlc_data: 已取得的 OHLC 數據（未提供時自行呼叫 OHLC API）
             
         Returns:
             分析數據
         """
         try:
             # 先獲取 OHLC 數據
-            ohlc_data = await self.get_stock_ohlc_data(stock_id)
+            if ohlc_data is None:
+                ohlc_data = await self.get_stock_ohlc_data(stock_id)
             if not ohlc_data:
                 logger.error(f"無法獲取 {stock_id} 的 OHLC 數據，跳過分析")
                 return None
@@ -227,117 +276,141 @@ class StockDataService:
             logger.error(f"獲取 {stock_id} 分析數據異常: {e}")
             return None
     
-    async def get_stock_revenue_data(self, stock_id: str) -> Optional[StockRevenueData]:
+    async def _get_dataset(self, dataset: str) -> pd.DataFrame:
         """
-        獲取股票月營收數據
+        取得 FinLab 資料集：每個資料集只載入一次（TTL 內共用），同時請求同一資料集時共用同一次載入，
+        阻塞的 data.get 在有上限的執行緒池中執行，不佔用事件迴圈
+        """
+        cached = self._datasets.get(dataset)
+        if cached and time.monotonic() - cached[0] < DATASET_TTL_SECONDS:
+            return cached[1]
+        
+        future = self._dataset_loads.get(dataset)
+        if future is None:
+            from finlab import data
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(get_finlab_executor(), data.get, dataset)
+            self._dataset_loads[dataset] = future
+            try:
+                frame = await future
+                self._datasets[dataset] = (time.monotonic(), frame)
+                return frame
+            finally:
+                self._dataset_loads.pop(dataset, None)
+        return await asyncio.shield(future)
+    
+    async def _load_matrices(self, datasets: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+        """並行載入一組資料集 {欄位: 資料集名稱}，載入失敗的資料集略過"""
+        frames = await asyncio.gather(*(self._get_dataset(name) for name in datasets.values()), return_exceptions=True)
+        matrices = {}
+        for (field, name), frame in zip(datasets.items(), frames):
+            if isinstance(frame, Exception):
+                logger.warning(f"載入 {name} 失敗: {frame}")
+                continue
+            matrices[field] = frame
+        return matrices
+    
+    @staticmethod
+    def _latest_values(matrices: Dict[str, pd.DataFrame], stock_ids: List[str]) -> Dict[str, Dict[str, float]]:
+        """從已載入的矩陣切出指定股票各欄位的最新有效值 {stock_id: {欄位: 值}}"""
+        values: Dict[str, Dict[str, float]] = {stock_id: {} for stock_id in stock_ids}
+        for field, frame in matrices.items():
+            columns = [stock_id for stock_id in stock_ids if stock_id in frame.columns]
+            if not columns:
+                continue
+            latest = frame[columns].ffill().iloc[-1]
+            for stock_id, value in latest.items():
+                if pd.notna(value):
+                    values[stock_id][field] = float(value)
+        return values
+    
+    def _finlab_ready(self, purpose: str) -> bool:
+        if not self.finlab_api_key:
+            logger.warning(f"FinLab API 金鑰未設定，無法獲取{purpose}")
+            return False
+        
+        # 確保 FinLab 已登入
+        self._ensure_finlab_login()
+        if not self._finlab_logged_in:
+            logger.warning(f"FinLab API 未登入，無法獲取{purpose}")
+            return False
+        return True
+    
+    async def get_stock_revenue_data_many(self, stock_ids: List[str]) -> Dict[str, StockRevenueData]:
+        """
+        批次獲取股票月營收數據（每個營收資料集只載入一次）
         
         Args:
-            stock_id: 股票代號
+            stock_ids: 股票代號列表
             
         Returns:
-            營收數據
+            {stock_id: 營收數據}；FinLab 不可用時為空
         """
         try:
-            if not self.finlab_api_key:
-                logger.warning("FinLab API 金鑰未設定，無法獲取營收數據")
-                return None
-            
-            # 確保 FinLab 已登入
-            self._ensure_finlab_login()
-            if not self._finlab_logged_in:
-                logger.warning("FinLab API 未登入，無法獲取營收數據")
-                return None
-            
-            from finlab import data
-            
-            # 獲取營收相關數據
-            revenue_data = {}
-            
-            # 當月營收
-            try:
-                current_revenue_df = data.get('monthly_revenue:當月營收')
-                if stock_id in current_revenue_df.columns:
-                    latest_revenue = current_revenue_df[stock_id].dropna().iloc[-1]
-                    revenue_data['current_month_revenue'] = float(latest_revenue)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 當月營收失敗: {e}")
-            
-            # 上月營收
-            try:
-                last_month_revenue_df = data.get('monthly_revenue:上月營收')
-                if stock_id in last_month_revenue_df.columns:
-                    latest_last_month = last_month_revenue_df[stock_id].dropna().iloc[-1]
-                    revenue_data['last_month_revenue'] = float(latest_last_month)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 上月營收失敗: {e}")
+            if not self._finlab_ready("營收數據"):
+                return {}
             
-            # 去年當月營收
-            try:
-                last_year_revenue_df = data.get('monthly_revenue:去年當月營收')
-                if stock_id in last_year_revenue_df.columns:
-                    latest_last_year = last_year_revenue_df[stock_id].dropna().iloc[-1]
-                    revenue_data['last_year_same_month_revenue'] = float(latest_last_year)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 去年當月營收失敗: {e}")
+            matrices = await self._load_matrices(REVENUE_DATASETS)
+            timestamp = datetime.now().isoformat()
+            result = {
+                stock_id: StockRevenueData(
+                    stock_id=stock_id,
+                    **values,
+                    raw_data={"source": "finlab", "timestamp": timestamp}
+                )
+                for stock_id, values in self._latest_values(matrices, stock_ids).items()
+            }
             
-            # 月增率
-            try:
-                mom_growth_df = data.get('monthly_revenue:上月比較增減(%)')
-                if stock_id in mom_growth_df.columns:
-                    latest_mom_growth = mom_growth_df[stock_id].dropna().iloc[-1]
-                    revenue_data['month_over_month_growth'] = float(latest_mom_growth)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 月增率失敗: {e}")
+            logger.info(f"成功獲取 {len(result)} 檔股票的營收數據")
+            return result
             
-            # 年增率
-            try:
-                yoy_growth_df = data.get('monthly_revenue:去年同月增減(%)')
-                if stock_id in yoy_growth_df.columns:
-                    latest_yoy_growth = yoy_growth_df[stock_id].dropna().iloc[-1]
-                    revenue_data['year_over_year_growth'] = float(latest_yoy_growth)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 年增率失敗: {e}")
-            
-            # 累計營收
-            try:
-                cumulative_revenue_df = data.get('monthly_revenue:當月累計營收')
-                if stock_id in cumulative_revenue_df.columns:
-                    latest_cumulative = cumulative_revenue_df[stock_id].dropna().iloc[-1]
-                    revenue_data['cumulative_revenue'] = float(latest_cumulative)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 累計營收失敗: {e}")
+        except Exception as e:
+            logger.error(f"獲取營收數據異常: {e}")
+            return {}
+    
+    async def get_stock_revenue_data(self, stock_id: str) -> Optional[StockRevenueData]:
+        """
+        獲取股票月營收數據
+        
+        Args:
+            stock_id: 股票代號
             
-            # 去年累計營收
-            try:
-                last_year_cumulative_df = data.get('monthly_revenue:去年累計營收')
-                if stock_id in last_year_cumulative_df.columns:
-                    latest_last_year_cumulative = last_year_cumulative_df[stock_id].dropna().iloc[-1]
-                    revenue_data['last_year_cumulative_revenue'] = float(latest_last_year_cumulative)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 去年累計營收失敗: {e}")
+        Returns:
+            營收數據
+        """
+        return (await self.get_stock_revenue_data_many([stock_id])).get(stock_id)
+    
+    async def get_stock_financial_data_many(self, stock_ids: List[str]) -> Dict[str, StockFinancialData]:
+        """
+        批次獲取股票財務數據（每個財報資料集只載入一次）
+        
+        Args:
+            stock_ids: 股票代號列表
             
-            # 累計年增率
-            try:
-                cumulative_growth_df = data.get('monthly_revenue:前期比較增減(%)')
-                if stock_id in cumulative_growth_df.columns:
-                    latest_cumulative_growth = cumulative_growth_df[stock_id].dropna().iloc[-1]
-                    revenue_data['cumulative_growth'] = float(latest_cumulative_growth)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 累計年增率失敗: {e}")
+        Returns:
+            {stock_id: 財務數據}；FinLab 不可用時為空
+        """
+        try:
+            if not self._finlab_ready("財報數據"):
+                return {}
             
-            # 創建營收數據物件
-            revenue_data_obj = StockRevenueData(
-                stock_id=stock_id,
-                **revenue_data,
-                raw_data={"source": "finlab", "timestamp": datetime.now().isoformat()}
-            )
+            matrices = await self._load_matrices(FINANCIAL_DATASETS)
+            timestamp = datetime.now().isoformat()
+            result = {
+                stock_id: StockFinancialData(
+                    stock_id=stock_id,
+                    **values,
+                    raw_data={"source": "finlab", "timestamp": timestamp}
+                )
+                for stock_id, values in self._latest_values(matrices, stock_ids).items()
+            }
             
-            logger.info(f"成功獲取 {stock_id} 的營收數據")
-            return revenue_data_obj
+            logger.info(f"成功獲取 {len(result)} 檔股票的財務數據")
+            return result
             
         except Exception as e:
-            logger.error(f"獲取 {stock_id} 營收數據異常: {e}")
-            return None
+            logger.error(f"獲取財務數據異常: {e}")
+            return {}
     
     async def get_stock_financial_data(self, stock_id: str) -> Optional[StockFinancialData]:
         """
@@ -349,107 +422,76 @@ class StockDataService:
         Returns:
             財務數據
         """
-        try:
-            if not self.finlab_api_key:
-                logger.warning("FinLab API 金鑰未設定，無法獲取財報數據")
-                return None
-            
-            # 確保 FinLab 已登入
-            self._ensure_finlab_login()
-            if not self._finlab_logged_in:
-                logger.warning("FinLab API 未登入，無法獲取財報數據")
-                return None
-            
-            from finlab import data
-            
-            # 獲取財報相關數據
-            financial_data = {}
-            
-            # 營業收入淨額
-            try:
-                revenue_df = data.get('financial_statement:營業收入淨額')
-                if stock_id in revenue_df.columns:
-                    latest_revenue = revenue_df[stock_id].dropna().iloc[-1]
-                    financial_data['revenue'] = float(latest_revenue)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 營業收入失敗: {e}")
-            
-            # 每股盈餘
-            try:
-                eps_df = data.get('financial_statement:每股盈餘')
-                if stock_id in eps_df.columns:
-                    latest_eps = eps_df[stock_id].dropna().iloc[-1]
-                    financial_data['eps'] = float(latest_eps)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 每股盈餘失敗: {e}")
-            
-            # 資產總額
-            try:
-                total_assets_df = data.get('financial_statement:資產總額')
-                if stock_id in total_assets_df.columns:
-                    latest_assets = total_assets_df[stock_id].dropna().iloc[-1]
-                    financial_data['total_assets'] = float(latest_assets)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 資產總額失敗: {e}")
-            
-            # 負債總額
-            try:
-                total_liabilities_df = data.get('financial_statement:負債總額')
-                if stock_id in total_liabilities_df.columns:
-                    latest_liabilities = total_liabilities_df[stock_id].dropna().iloc[-1]
-                    financial_data['total_liabilities'] = float(latest_liabilities)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 負債總額失敗: {e}")
-            
-            # 股東權益總額
-            try:
-                shareholders_equity_df = data.get('financial_statement:股東權益總額')
-                if stock_id in shareholders_equity_df.columns:
-                    latest_equity = shareholders_equity_df[stock_id].dropna().iloc[-1]
-                    financial_data['shareholders_equity'] = float(latest_equity)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 股東權益失敗: {e}")
-            
-            # 營業利益
-            try:
-                operating_income_df = data.get('financial_statement:營業利益')
-                if stock_id in operating_income_df.columns:
-                    latest_operating_income = operating_income_df[stock_id].dropna().iloc[-1]
-                    financial_data['operating_income'] = float(latest_operating_income)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 營業利益失敗: {e}")
-            
-            # 歸屬母公司淨利
-            try:
-                net_income_df = data.get('financial_statement:歸屬母公司淨利_損')
-                if stock_id in net_income_df.columns:
-                    latest_net_income = net_income_df[stock_id].dropna().iloc[-1]
-                    financial_data['net_income'] = float(latest_net_income)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 歸屬母公司淨利失敗: {e}")
-            
-            # 營業活動之淨現金流入
-            try:
-                cash_flow_df = data.get('financial_statement:營業活動之淨現金流入_流出')
-                if stock_id in cash_flow_df.columns:
-                    latest_cash_flow = cash_flow_df[stock_id].dropna().iloc[-1]
-                    financial_data['cash_flow'] = float(latest_cash_flow)
-            except Exception as e:
-                logger.warning(f"獲取 {stock_id} 現金流量失敗: {e}")
+        return (await self.get_stock_financial_data_many([stock_id])).get(stock_id)
+    
+    async def _get_market_data(self, stock_id: str):
+        """OHLC 與分析數據（分析直接使用同一份 OHLC，不重複呼叫 OHLC API）"""
+        ohlc_data = await self.get_stock_ohlc_data(stock_id)
+        analysis_data = await self.get_stock_analysis_data(stock_id, ohlc_data=ohlc_data) if ohlc_data else None
+        return ohlc_data, analysis_data
+    
+    @staticmethod
+    def _comprehensive_result(stock_id: str, ohlc_data, analysis_data, financial_data, revenue_data) -> Dict[str, Any]:
+        return {
+            "stock_id": stock_id,
+            "ohlc_data": ohlc_data,
+            "analysis_data": analysis_data,
+            "financial_data": financial_data,
+            "revenue_data": revenue_data,
+            "has_ohlc": ohlc_data is not None,
+            "has_analysis": analysis_data is not None,
+            "has_financial": financial_data is not None,
+            "has_revenue": revenue_data is not None,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def get_comprehensive_stock_data_many(self, stock_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批次獲取多檔股票綜合數據：營收與財報矩陣各載入一次後切出所有股票，
+        OHLC / 分析 API 以最多 MAX_CONCURRENT_STOCKS 檔並行呼叫
+        
+        Args:
+            stock_ids: 股票代號列表
             
-            # 創建財務數據物件
-            financial_data_obj = StockFinancialData(
-                stock_id=stock_id,
-                **financial_data,
-                raw_data={"source": "finlab", "timestamp": datetime.now().isoformat()}
+        Returns:
+            {stock_id: 綜合股票數據}（格式同 get_comprehensive_stock_data）
+        """
+        stock_ids = list(dict.fromkeys(stock_ids))
+        logger.info(f"開始批次獲取 {len(stock_ids)} 檔股票的綜合數據")
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_STOCKS)
+        
+        async def market_data(stock_id: str):
+            async with semaphore:
+                return await self._get_market_data(stock_id)
+        
+        # 並行：財報矩陣、營收矩陣（執行緒池）與各股 OHLC / 分析（HTTP）
+        financial_task = self.get_stock_financial_data_many(stock_ids)
+        revenue_task = self.get_stock_revenue_data_many(stock_ids)
+        results = await asyncio.gather(
+            financial_task, revenue_task, *(market_data(stock_id) for stock_id in stock_ids),
+            return_exceptions=True
+        )
+        financial_many, revenue_many, market_results = results[0], results[1], results[2:]
+        
+        if isinstance(financial_many, Exception):
+            logger.error(f"批次獲取財務數據失敗: {financial_many}")
+            financial_many = {}
+        if isinstance(revenue_many, Exception):
+            logger.error(f"批次獲取營收數據失敗: {revenue_many}")
+            revenue_many = {}
+        
+        comprehensive = {}
+        for stock_id, market in zip(stock_ids, market_results):
+            if isinstance(market, Exception):
+                logger.error(f"獲取 {stock_id} OHLC / 分析數據失敗: {market}")
+                market = (None, None)
+            ohlc_data, analysis_data = market
+            comprehensive[stock_id] = self._comprehensive_result(
+                stock_id, ohlc_data, analysis_data, financial_many.get(stock_id), revenue_many.get(stock_id)
             )
-            
-            logger.info(f"成功獲取 {stock_id} 的財務數據")
-            return financial_data_obj
-            
-        except Exception as e:
-            logger.error(f"獲取 {stock_id} 財務數據異常: {e}")
-            return None
+        
+        logger.info(f"成功批次獲取 {len(comprehensive)} 檔股票的綜合數據")
+        return comprehensive
     
     async def get_comprehensive_stock_data(self, stock_id: str) -> Dict[str, Any]:
         """
@@ -462,52 +504,7 @@ class StockDataService:
             綜合股票數據
         """
         try:
-            logger.info(f"開始獲取 {stock_id} 的綜合數據")
-            
-            # 並行獲取各種數據
-            ohlc_task = self.get_stock_ohlc_data(stock_id)
-            analysis_task = self.get_stock_analysis_data(stock_id)
-            financial_task = self.get_stock_financial_data(stock_id)
-            revenue_task = self.get_stock_revenue_data(stock_id)
-            
-            # 等待所有任務完成
-            ohlc_data, analysis_data, financial_data, revenue_data = await asyncio.gather(
-                ohlc_task, analysis_task, financial_task, revenue_task, return_exceptions=True
-            )
-            
-            # 處理異常
-            if isinstance(ohlc_data, Exception):
-                logger.error(f"獲取 {stock_id} OHLC 數據失敗: {ohlc_data}")
-                ohlc_data = None
-            
-            if isinstance(analysis_data, Exception):
-                logger.error(f"獲取 {stock_id} 分析數據失敗: {analysis_data}")
-                analysis_data = None
-            
-            if isinstance(financial_data, Exception):
-                logger.error(f"獲取 {stock_id} 財務數據失敗: {financial_data}")
-                financial_data = None
-            
-            if isinstance(revenue_data, Exception):
-                logger.error(f"獲取 {stock_id} 營收數據失敗: {revenue_data}")
-                revenue_data = None
-            
-            # 組裝綜合數據
-            comprehensive_data = {
-                "stock_id": stock_id,
-                "ohlc_data": ohlc_data,
-                "analysis_data": analysis_data,
-                "financial_data": financial_data,
-                "revenue_data": revenue_data,
-                "has_ohlc": ohlc_data is not None,
-                "has_analysis": analysis_data is not None,
-                "has_financial": financial_data is not None,
-                "has_revenue": revenue_data is not None,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            logger.info(f"成功獲取 {stock_id} 的綜合數據")
-            return comprehensive_data
+            return (await self.get_comprehensive_stock_data_many([stock_id]))[stock_id]
             
         except Exception as e:
             logger.error(f"獲取 {stock_id} 綜合數據異常: {e}")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+測試盤中漲停流程的並行管線：總耗時取決於並行上限，而非股票檔數
+
+    python -m pytest test_flow_pipeline.py -q
+"""
+
+import asyncio
+import importlib
+import os
+import sys
+import time
+import types
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.services.flow.flow_pipeline import create_flow_session, run_bounded  # noqa: E402
+
+# 每個 stub 請求的延遲（秒）
+DELAY = 0.1
+
+
+class StubService:
+    """本機 stub 服務：每個請求延遲 DELAY 秒回應，並記錄最大並行數"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.runner = None
+        self.url = None
+
+    async def handle(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(DELAY)
+        finally:
+            self.in_flight -= 1
+        if self.name == 'serper':
+            return web.json_response({'organic': [{'title': '分析 漲停', 'snippet': '利多 突破', 'link': 'x'}]})
+        return web.json_response({'success': True, 'data': {'service': self.name}})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+async def timed_pipeline(stock_count: int, limit: int):
+    service = await StubService('analyze').start()
+    try:
+        async with create_flow_session(limit_per_host=limit) as session:
+            async def fetch(stock_id):
+                async with session.get(f"{service.url}/analyze/{stock_id}") as response:
+                    return await response.json()
+
+            start = time.perf_counter()
+            results = await run_bounded([str(2000 + i) for i in range(stock_count)], fetch, limit)
+            elapsed = time.perf_counter() - start
+    finally:
+        await service.stop()
+    return elapsed, results, service
+
+
+def test_wall_time_follows_concurrency_limit():
+    elapsed_4, results, service = asyncio.run(timed_pipeline(16, 4))
+    assert all(result['success'] for result in results)
+    assert service.max_in_flight == 4
+    # 16 檔、上限 4 → 約 4 輪；逐檔執行需 16 輪
+    assert elapsed_4 < DELAY * 8
+
+    elapsed_8, _, _ = asyncio.run(timed_pipeline(16, 8))
+    assert elapsed_8 < elapsed_4
+
+    elapsed_more_stocks, _, _ = asyncio.run(timed_pipeline(32, 8))
+    assert elapsed_more_stocks < DELAY * 8
+
+
+def test_run_bounded_keeps_order_and_isolates_failures():
+    async def worker(item):
+        await asyncio.sleep(0.01 * (5 - item))
+        if item == 2:
+            raise ValueError("boom")
+        return item * 10
+
+    results = asyncio.run(run_bounded(range(5), worker, 2))
+    assert results[:2] == [0, 10] and results[3:] == [30, 40]
+    assert isinstance(results[2], ValueError)
+
+
+FLOW_MODULE = 'src.services.flow.unified_flow_manager'
+
+# unified_flow_manager 在 import 時載入 CMoney / Google Sheets / 內容生成等完整服務（需要憑證與其他套件），
+# 這裡只測數據管線，以空模組代替這些依賴
+HEAVY_IMPORTS = {
+    'src.clients.cmoney.cmoney_client': ['CMoneyClient', 'LoginCredentials'],
+    'src.clients.google.sheets_client': ['GoogleSheetsClient'],
+    'src.services.assign.assignment_service': ['AssignmentService', 'TopicData'],
+    'src.services.content.content_generator': ['ContentGenerator', 'ContentRequest'],
+    'src.services.stock.stock_data_service': ['StockDataService'],
+    'src.services.stock.topic_stock_service': ['TopicStockService'],
+    'src.services.trending_topic_news_service': ['TrendingTopicNewsService', 'TrendingTopicPost', 'PostGenerationResult'],
+    'src.utils.limit_up_data_parser': ['LimitUpDataParser'],
+}
+
+
+def load_flow_module(monkeypatch):
+    """以 stub 依賴 import unified_flow_manager（測試結束後 sys.modules 還原）"""
+    for module_name, names in HEAVY_IMPORTS.items():
+        stub = types.ModuleType(module_name)
+        for name in names:
+            setattr(stub, name, type(name, (), {}))
+        monkeypatch.setitem(sys.modules, module_name, stub)
+    # 記錄原狀態以便還原，再移除讓模組以 stub 依賴重新載入
+    monkeypatch.setitem(sys.modules, FLOW_MODULE, None)
+    del sys.modules[FLOW_MODULE]
+    return importlib.import_module(FLOW_MODULE)
+
+
+class StubLimitUpParser:
+    def get_stock_data(self, stock_id):
+        return {'stock_name': f'股票{stock_id}', 'change_percent': 9.9}
+
+
+async def run_limit_up_flow(flow, stock_count: int, concurrency: int):
+    names = ['serper', 'revenue', 'analyze', 'financial', 'fundamental']
+    services = {name: await StubService(name).start() for name in names}
+    try:
+        manager = flow.UnifiedFlowManager.__new__(flow.UnifiedFlowManager)
+        manager.limit_up_parser = StubLimitUpParser()
+        manager.max_concurrency = concurrency
+        manager.serper_search_url = f"{services['serper'].url}/search"
+        manager.revenue_api_url = services['revenue'].url
+        manager.analyze_api_url = services['analyze'].url
+        manager.financial_api_url = services['financial'].url
+        manager.fundamental_api_url = services['fundamental'].url
+
+        start = time.perf_counter()
+        stocks = await manager._get_intraday_limit_up_stocks_with_serper([str(2000 + i) for i in range(stock_count)])
+        return time.perf_counter() - start, stocks, services
+    finally:
+        for service in services.values():
+            await service.stop()
+
+
+def test_limit_up_flow_runs_stocks_concurrently(monkeypatch):
+    monkeypatch.setenv("SERPER_API_KEY", "test")
+    flow = load_flow_module(monkeypatch)
+    elapsed, stocks, services = asyncio.run(run_limit_up_flow(flow, 12, 4))
+
+    assert [stock['stock_id'] for stock in stocks] == [str(2000 + i) for i in range(12)]
+    # 每檔：Serper 一次，接著四個數據支線並行且各只查一次
+    assert services['serper'].requests == 12
+    assert all(services[name].requests == 12 for name in ('revenue', 'analyze', 'financial', 'fundamental'))
+    assert all(service.max_in_flight <= 4 for service in services.values())
+    # 每檔兩段延遲、3 輪 → 約 6 * DELAY；逐檔執行需 24 * DELAY
+    assert elapsed < DELAY * 12